@@ -0,0 +1,300 @@
+"""
+Aktionsprotokoll (Empfangen, KI-Analyse, Antwort gesendet, Sync, Fehler ...)
+Einträge werden als JSON-Zeilen an eine Datei angehängt; die Byte-Position einer Zeile
+ist ihre ID und zugleich der Cursor für Tail-Abfragen. Jeder Prozess liest nur die seit
+seinem letzten Offset neu angehängten Zeilen und hält Indizes nach Zeit, Aktion, Level,
+Angebot und Account, so dass Bereichs- und Filterabfragen nicht die Datei durchlaufen.
+Im Speicher bleiben nur die neuesten max_eintraege Einträge (die Datei bleibt vollständig);
+Positionen in den Indizes zählen fortlaufend, ältere Cursor bleiben daher gültig.
+"""
+import csv
+import io
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAX_LIMIT = 1000
+DEFAULT_LIMIT = 200
+DEFAULT_MAX_EINTRAEGE = 100000
+
+# Indizierte Felder (Filterparameter von /api/logs)
+INDEX_FELDER = ('action', 'level', 'offer_id', 'account')
+
+# Spalten des CSV-Exports (wie im Export des Protokoll-Panels)
+CSV_SPALTEN = [
+    ('Zeitstempel', 'timestamp'),
+    ('Aktion', 'action'),
+    ('Level', 'level'),
+    ('Nachricht', 'message'),
+    ('Angebot', 'offer_id'),
+    ('Artikel', 'offer_title'),
+    ('Käufer', 'buyer_name'),
+    ('Angebotspreis', 'listing_price'),
+    ('Käufer-Angebot', 'offer_price'),
+    ('Account', 'account'),
+    ('Details', 'details'),
+]
+
+
+def _zeitgrenze(wert, ende=False):
+    """ISO-Zeitpunkt für Bereichsabfragen; ein reines Datum als 'bis' schließt den ganzen Tag ein"""
+    wert = wert.replace(' ', 'T')
+    if ende and len(wert) == 10:
+        wert += 'T\uffff'
+    return wert
+
+
+def parse_abfrage(args):
+    """Übersetzt Query-Parameter von /api/logs in Abfrage-Argumente"""
+    filter_ = {
+        'action': args.get('action') or args.get('type'),
+        'level': args.get('level') or args.get('status'),
+        'offer_id': args.get('offer_id'),
+        'account': args.get('account'),
+    }
+    nach = args.get('after', args.get('cursor'))
+    vor = args.get('before')
+    return {
+        'filter': {k: v for k, v in filter_.items() if v not in (None, '', 'all')},
+        'von': args.get('from'),
+        'bis': args.get('to'),
+        'suche': args.get('q'),
+        'nach': int(nach) if nach not in (None, '') else None,
+        'vor': int(vor) if vor not in (None, '') else None,
+        'limit': int(args.get('limit', DEFAULT_LIMIT))
+    }
+
+
+class AktionsLog:
+    def __init__(self, pfad='action_log.jsonl', max_eintraege=DEFAULT_MAX_EINTRAEGE):
+        self.pfad = pfad
+        self.max_eintraege = max_eintraege
+        self._lock = threading.RLock()
+        # Byte-Offset bis zu dem die Datei eingelesen ist
+        self._offset = 0
+        # Parallele Listen, aufsteigend nach ID (= Datei-Offset)
+        self._ids = []
+        self._zeiten = []
+        self._eintraege = []
+        # Anzahl verworfener Einträge: Position p steht in _eintraege[p - _basis]
+        self._basis = 0
+        # feld -> wert -> aufsteigende Liste von Positionen
+        self._index = {feld: defaultdict(list) for feld in INDEX_FELDER}
+
+    def log(self, action, message, level='info', offer=None, account=None, **details):
+        """
+        Hängt einen Eintrag an und gibt ihn (mit ID) zurück.
+        offer: optionales Angebots-Dict; Titel, Käufer und Preise werden übernommen
+        """
+        eintrag = {
+            'action': action,
+            'level': level,
+            'message': message,
+            'account': account or (offer or {}).get('account'),
+            'details': details,
+        }
+        if offer:
+            eintrag.update({
+                'offer_id': str(offer.get('id')),
+                'offer_title': offer.get('item_title') or offer.get('title'),
+                'buyer_name': offer.get('buyer_username') or offer.get('buyer_id'),
+                'offer_price': offer.get('offer_amount'),
+                'listing_price': offer.get('list_price') or offer.get('listing_price') or offer.get('current_price'),
+            })
+        with self._lock, open(self.pfad, 'ab') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # Zeitstempel unter der Sperre: Dateireihenfolge == Zeitreihenfolge (auch über Prozesse)
+                eintrag['timestamp'] = datetime.now().isoformat()
+                f.seek(0, os.SEEK_END)
+                eintrag_id = f.tell()
+                f.write(json.dumps(eintrag, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        self._nachladen()
+        return {'id': eintrag_id, **eintrag}
+
+    def _nachladen(self):
+        """Liest nur die seit dem letzten Aufruf angehängten Zeilen (auch die anderer Worker)"""
+        with self._lock:
+            try:
+                with open(self.pfad, 'rb') as f:
+                    f.seek(self._offset)
+                    daten = f.read()
+            except FileNotFoundError:
+                return
+            ende = daten.rfind(b'\n') + 1
+            position = self._offset
+            for zeile in daten[:ende].splitlines(keepends=True):
+                try:
+                    eintrag = json.loads(zeile)
+                except ValueError:
+                    position += len(zeile)
+                    continue
+                eintrag['id'] = position
+                self._indexiere(eintrag)
+                position += len(zeile)
+            self._offset += ende
+            # Erst ab 10 % Überhang kürzen, damit nicht jeder Eintrag die Indizes umkopiert
+            if len(self._eintraege) > self.max_eintraege * 1.1:
+                self._kuerzen(len(self._eintraege) - self.max_eintraege)
+
+    def _kuerzen(self, anzahl):
+        """Verwirft die ältesten Einträge aus dem Speicher und den Indizes"""
+        del self._ids[:anzahl]
+        del self._zeiten[:anzahl]
+        del self._eintraege[:anzahl]
+        self._basis += anzahl
+        for index in self._index.values():
+            for wert in list(index):
+                liste = index[wert]
+                del liste[:bisect_left(liste, self._basis)]
+                if not liste:
+                    del index[wert]
+
+    def _eintrag(self, pos):
+        """Eintrag an Position pos (None, wenn inzwischen verworfen)"""
+        with self._lock:
+            i = pos - self._basis
+            return self._eintraege[i] if i >= 0 else None
+
+    def _indexiere(self, eintrag):
+        pos = self._basis + len(self._eintraege)
+        self._eintraege.append(eintrag)
+        self._ids.append(eintrag['id'])
+        self._zeiten.append(eintrag.get('timestamp', ''))
+        for feld in INDEX_FELDER:
+            wert = eintrag.get(feld)
+            if wert is not None:
+                self._index[feld][str(wert)].append(pos)
+
+    def _positionen(self, filter, von=None, bis=None, nach=None, vor=None):
+        """
+        Positionen aller Treffer (aufsteigend) über Zeit-/ID-Bereich und Indizes,
+        dazu die ID des letzten Eintrags im Bereich (None bei leerem Bereich)
+        """
+        self._nachladen()
+        with self._lock:
+            lo, hi = 0, len(self._eintraege)
+            if von:
+                lo = bisect_left(self._zeiten, _zeitgrenze(von))
+            if bis:
+                hi = bisect_right(self._zeiten, _zeitgrenze(bis, ende=True))
+            if nach is not None:
+                lo = max(lo, bisect_right(self._ids, nach))
+            if vor is not None:
+                hi = min(hi, bisect_left(self._ids, vor))
+            if hi <= lo:
+                return [], None
+            letzte_id = self._ids[hi - 1]
+            lo, hi = lo + self._basis, hi + self._basis
+            if not filter:
+                return range(lo, hi), letzte_id
+
+            listen = []
+            for feld, wert in filter.items():
+                if feld not in self._index:
+                    raise ValueError(f'Unbekanntes Filterfeld: {feld}')
+                liste = self._index[feld].get(str(wert), [])
+                listen.append(liste[bisect_left(liste, lo):bisect_left(liste, hi)])
+            listen.sort(key=len)
+            if len(listen) == 1:
+                return listen[0], letzte_id
+            weitere = [set(liste) for liste in listen[1:]]
+            return [p for p in listen[0] if all(p in menge for menge in weitere)], letzte_id
+
+    @staticmethod
+    def _passt_suche(eintrag, suche):
+        return any(suche in str(eintrag.get(feld) or '').lower()
+                   for feld in ('message', 'action', 'level', 'offer_title', 'buyer_name'))
+
+    def abfragen(self, filter=None, von=None, bis=None, suche=None, nach=None, vor=None, limit=DEFAULT_LIMIT):
+        """
+        Abfrage über Zeitraum (von/bis), Filter ({feld: wert}) und Freitext (suche).
+        nach: Tail-Modus – nur Einträge mit ID > nach, aufsteigend
+        vor: ältere Seite – Einträge mit ID < vor, neueste zuerst
+        Liefert logs, cursor (für den nächsten Tail-Aufruf) und next_before (ältere Seite).
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        suche = suche.lower() if suche else None
+        positionen, letzte_id = self._positionen(filter or {}, von, bis, nach, vor)
+        tail = nach is not None
+        reihenfolge = positionen if tail else reversed(positionen)
+
+        logs = []
+        weitere = False
+        for pos in reihenfolge:
+            eintrag = self._eintrag(pos)
+            if eintrag is None:
+                # Beim Rückwärtslesen sind alle weiteren noch älter und ebenfalls verworfen
+                if tail:
+                    continue
+                break
+            if suche and not self._passt_suche(eintrag, suche):
+                continue
+            if len(logs) == limit:
+                weitere = True
+                break
+            logs.append(eintrag)
+
+        if tail:
+            # Cursor auf den letzten gelieferten Eintrag; ohne weitere Treffer ans Ende des Bereichs
+            if weitere:
+                cursor = logs[-1]['id']
+            else:
+                cursor = letzte_id if letzte_id is not None else nach
+            return {'logs': logs, 'cursor': cursor, 'next_before': None, 'has_more': weitere}
+
+        with self._lock:
+            cursor = self._ids[-1] if self._ids else -1
+        return {
+            'logs': logs,
+            'cursor': cursor,
+            'next_before': logs[-1]['id'] if weitere else None,
+            'has_more': weitere
+        }
+
+    def export_csv(self, filter=None, von=None, bis=None, suche=None, chunk=500):
+        """CSV (Semikolon, UTF-8 mit BOM für Excel) zeilenweise als Generator, älteste zuerst"""
+        suche = suche.lower() if suche else None
+        positionen, _ = self._positionen(filter or {}, von, bis)
+        puffer = io.StringIO()
+        writer = csv.writer(puffer, delimiter=';')
+        writer.writerow([titel for titel, _ in CSV_SPALTEN])
+        yield '\ufeff' + puffer.getvalue()
+        puffer.seek(0)
+        puffer.truncate()
+        for i, pos in enumerate(positionen, 1):
+            eintrag = self._eintrag(pos)
+            if eintrag is None or (suche and not self._passt_suche(eintrag, suche)):
+                continue
+            writer.writerow([
+                json.dumps(eintrag.get(feld), ensure_ascii=False) if feld == 'details' else eintrag.get(feld, '')
+                for _, feld in CSV_SPALTEN
+            ])
+            if i % chunk == 0:
+                yield puffer.getvalue()
+                puffer.seek(0)
+                puffer.truncate()
+        yield puffer.getvalue()
+
+    def stats(self):
+        self._nachladen()
+        with self._lock:
+            return {
+                'total_entries': len(self._eintraege),
+                'dropped_entries': self._basis,
+                'file_bytes': self._offset,
+                'actions': {a: len(p) for a, p in self._index['action'].items()},
+                'levels': {l: len(p) for l, p in self._index['level'].items()}
+            }
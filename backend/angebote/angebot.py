@@ -0,0 +1,273 @@
+"""
+Einheitlicher Angebots-Datensatz
+Angebote kommen in verschiedenen Formen an: Negotiation API (price, buyer_id,
+message, created_time), Trading-API-XML und Studibuch-Skripte (Beträge als Text
+wie '45.00 EUR', deutsche Status, created_date), simple_main, Datengenerator und
+Snapshots. Angebot bringt sie in eine kompakte Form: feste Felder in __slots__,
+Beträge in Cent (int), Status als AngebotStatus, alles Übrige in extra. Ein
+unbekannter Status der Quelle wird zu UNKNOWN (nicht zu PENDING, sonst erschiene
+das Angebot als offen); der Original-Wert bleibt als source_status erhalten.
+
+Datensätze werden nach dem Anlegen nicht mehr verändert (zusammenfuehren liefert
+einen neuen), daher wird die JSON-Zeile beim ersten Bedarf erzeugt und gecacht.
+Nach außen (API, Events, Regeln) gehen weiterhin Dicts mit den bekannten Schlüsseln.
+"""
+import json
+import re
+from enum import Enum
+
+
+class AngebotStatus(str, Enum):
+    PENDING = 'pending'
+    ACCEPTED = 'accepted'
+    REJECTED = 'rejected'
+    COUNTERED = 'countered'
+    EXPIRED = 'expired'
+    RETRACTED = 'retracted'
+    UNKNOWN = 'unknown'
+
+    @classmethod
+    def aus(cls, wert):
+        """Status aus beliebiger Quelle (eBay, deutsche Anzeige-Texte); None wenn leer, UNKNOWN wenn unbekannt"""
+        if wert is None or wert == '':
+            return None
+        if isinstance(wert, cls):
+            return wert
+        return _STATUS.get(str(wert).strip().lower(), cls.UNKNOWN)
+
+    @classmethod
+    def streng(cls, wert):
+        """Status aus einem bekannten Wert (z.B. Filter-Parameter); ValueError bei unbekanntem"""
+        if isinstance(wert, cls):
+            return wert
+        status = _STATUS.get(str(wert).strip().lower())
+        if status is None:
+            raise ValueError(f'Unbekannter Status: {wert}')
+        return status
+
+
+_STATUS = {s.value: s for s in AngebotStatus}
+_STATUS.update({
+    # Negotiation API / Trading API
+    'active': AngebotStatus.PENDING,
+    'declined': AngebotStatus.REJECTED,
+    'counteroffered': AngebotStatus.COUNTERED,
+    # Studibuch-Skripte (translate_status)
+    'aktiv': AngebotStatus.PENDING,
+    'warten auf antwort': AngebotStatus.PENDING,
+    'neuer vorschlag': AngebotStatus.PENDING,
+    'angenommen': AngebotStatus.ACCEPTED,
+    'abgelehnt': AngebotStatus.REJECTED,
+    'abgelaufen': AngebotStatus.EXPIRED,
+    'zurückgezogen': AngebotStatus.RETRACTED,
+    'gegenangebot erhalten': AngebotStatus.COUNTERED,
+    'unbekannt': AngebotStatus.UNKNOWN,
+})
+
+
+_KEINE_ZAHL = re.compile(r'[^0-9,.\-]')
+
+
+def _tausendertrenner(text):
+    """Tausendertrenner laut Währung im Text: '.' bei Euro, ',' bei Dollar/Pfund, sonst None"""
+    text = text.upper()
+    if '€' in text or 'EUR' in text:
+        return '.'
+    if '$' in text or '£' in text or 'USD' in text or 'GBP' in text:
+        return ','
+    return None
+
+
+def cent(wert):
+    """
+    Betrag in Cent aus Zahl oder Text ('45.00 EUR', '1.234,50 €', '1,234.50 USD');
+    None wenn leer, ungültig oder mehrdeutig.
+    Dezimaltrenner ist das letzte ',' oder '.', der andere Trenner gruppiert Tausender.
+    Steht nur ein Trenner mit genau drei Ziffern danach ('1.234'), entscheidet die
+    Währung im Text; ohne Währung ist der Betrag mehrdeutig.
+    """
+    if wert is None or wert == '' or isinstance(wert, bool):
+        return None
+    if isinstance(wert, int):
+        return wert * 100
+    if isinstance(wert, float):
+        return round(wert * 100)
+    text = str(wert)
+    zahl = _KEINE_ZAHL.sub('', text)
+    negativ = zahl.startswith('-')
+    zahl = zahl[negativ:]
+    if not zahl or '-' in zahl or not any(z.isdigit() for z in zahl):
+        return None
+    letzter = max(zahl.rfind(','), zahl.rfind('.'))
+    if letzter < 0:
+        ganz, nachkomma, tausender = zahl, '', None
+    else:
+        trenner = zahl[letzter]
+        ganz, nachkomma = zahl[:letzter], zahl[letzter + 1:]
+        tausender = ',' if trenner == '.' else '.'
+        if trenner in ganz:
+            # Derselbe Trenner mehrfach ('1.234.567'): nur Tausender, kein Dezimalteil
+            ganz, nachkomma, tausender = zahl, '', trenner
+        elif len(nachkomma) == 3 and ganz.strip('0') and tausender not in ganz:
+            konvention = _tausendertrenner(text)
+            if konvention is None:
+                return None
+            if konvention == trenner:
+                ganz, nachkomma, tausender = zahl, '', trenner
+    if tausender is not None and tausender in ganz:
+        gruppen = ganz.split(tausender)
+        if not 1 <= len(gruppen[0]) <= 3 or any(len(g) != 3 for g in gruppen[1:]):
+            return None
+        ganz = ''.join(gruppen)
+    if len(nachkomma) <= 2:
+        betrag = int(ganz or '0') * 100 + int(nachkomma.ljust(2, '0'))
+    else:
+        betrag = round(int(ganz + nachkomma) / 10 ** (len(nachkomma) - 2))
+    return -betrag if negativ else betrag
+
+
+def euro(cent_wert):
+    return cent_wert / 100 if cent_wert is not None else None
+
+
+# Slot -> Schlüssel, unter denen die Quellen den Wert liefern (der erste nicht leere gewinnt).
+# Der erste Schlüssel ist zugleich der Name in der Dict-/JSON-Form.
+FELDER = (
+    ('id', ('id',)),
+    ('best_offer_id', ('best_offer_id',)),
+    # Kanonische Identität im Store (bleibt über Quellen und ID-Wechsel gleich, siehe OfferStore)
+    ('kennung', ('canonical_id',)),
+    ('account', ('account',)),
+    ('item_id', ('item_id',)),
+    ('titel', ('item_title',)),
+    ('sku', ('sku',)),
+    ('kaeufer', ('buyer_username', 'buyer_id')),
+    ('betrag_cent', ('offer_amount', 'price')),
+    ('listenpreis_cent', ('list_price', 'listing_price', 'original_price')),
+    ('gegen_cent', ('counter_amount',)),
+    ('waehrung', ('currency',)),
+    ('menge', ('quantity',)),
+    ('status', ('status',)),
+    ('typ', ('offer_type',)),
+    ('erstellt', ('created_at', 'created_time', 'created_date')),
+    ('nachricht', ('buyer_message', 'message')),
+    ('gegen_nachricht', ('counter_message',)),
+    ('regel', ('applicable_rule',)),
+)
+_BETRAEGE = frozenset(('betrag_cent', 'listenpreis_cent', 'gegen_cent'))
+_SLOTS = tuple(slot for slot, _ in FELDER)
+_BEKANNT = frozenset(s for _, schluessel in FELDER for s in schluessel)
+
+
+def _menge(wert):
+    return int(wert) if str(wert).isdigit() else None
+
+
+def _zeitpunkt(wert):
+    return str(wert).replace(' ', 'T')
+
+
+# Slot -> Name in der Dict-Form (Beträge und Status werden umgerechnet)
+_AUSGABE = tuple((slot, schluessel[0]) for slot, schluessel in FELDER if slot not in _BETRAEGE and slot != 'status')
+_BETRAG_AUSGABE = tuple((slot, schluessel[0]) for slot, schluessel in FELDER if slot in _BETRAEGE)
+
+# Umwandlung je Slot beim Einlesen (None: Wert unverändert übernehmen)
+_UMWANDLUNG = tuple(
+    (slot, schluessel, cent if slot in _BETRAEGE else {
+        'status': AngebotStatus.aus, 'menge': _menge, 'erstellt': _zeitpunkt}.get(slot))
+    for slot, schluessel in FELDER
+)
+
+
+class Angebot:
+    __slots__ = _SLOTS + ('extra', '_json')
+
+    def __init__(self, **werte):
+        for slot in _SLOTS:
+            setattr(self, slot, werte.pop(slot, None))
+        self.extra = werte or None
+        self._json = None
+
+    @classmethod
+    def aus_dict(cls, daten):
+        """Angebot aus einem Dict beliebiger Quelle (siehe Modul-Docstring)"""
+        if isinstance(daten, cls):
+            return daten
+        angebot = cls.__new__(cls)
+        hole = daten.get
+        for slot, schluessel, umwandeln in _UMWANDLUNG:
+            for s in schluessel:
+                wert = hole(s)
+                if wert is not None and wert != '':
+                    if umwandeln is not None:
+                        wert = umwandeln(wert)
+                    break
+            else:
+                wert = None
+            setattr(angebot, slot, wert)
+        # Nur die übrigen Schlüssel kopieren (ein Dict, aus dem gelöscht wird, behält seine Größe)
+        angebot.extra = {k: v for k, v in daten.items() if k not in _BEKANNT} or None
+        if angebot.status is AngebotStatus.UNKNOWN and 'source_status' not in daten:
+            angebot.extra = {**(angebot.extra or {}), 'source_status': str(hole('status'))}
+        angebot._json = None
+        return angebot
+
+    def zusammenfuehren(self, neu):
+        """Neuer Datensatz: Felder aus neu überschreiben, fehlende (None) bleiben erhalten"""
+        ergebnis = Angebot.__new__(Angebot)
+        for slot in _SLOTS:
+            wert = getattr(neu, slot)
+            setattr(ergebnis, slot, wert if wert is not None else getattr(self, slot))
+        if self.extra and neu.extra:
+            ergebnis.extra = {**self.extra, **neu.extra}
+        else:
+            ergebnis.extra = neu.extra or self.extra
+        ergebnis._json = None
+        return ergebnis
+
+    @property
+    def offer_amount(self):
+        return euro(self.betrag_cent)
+
+    @property
+    def list_price(self):
+        return euro(self.listenpreis_cent)
+
+    @property
+    def status_wert(self):
+        return (self.status or AngebotStatus.PENDING).value
+
+    def als_dict(self):
+        """Dict-Form mit den gewohnten Schlüsseln (offer_amount in Euro, status als Text)"""
+        daten = {}
+        for slot, name in _AUSGABE:
+            wert = getattr(self, slot)
+            if wert is not None:
+                daten[name] = wert
+        for slot, name in _BETRAG_AUSGABE:
+            wert = getattr(self, slot)
+            if wert is not None:
+                daten[name] = wert / 100
+        daten['status'] = self.status_wert
+        if self.extra:
+            daten.update(self.extra)
+        return daten
+
+    def als_json(self):
+        """Kompakte JSON-Zeile (ohne Zeilenumbruch), einmal erzeugt und danach gecacht"""
+        if self._json is None:
+            self._json = json.dumps(self.als_dict(), ensure_ascii=False, separators=(',', ':'))
+        return self._json
+
+    def _werte(self):
+        return tuple(getattr(self, slot) for slot in _SLOTS) + (self.extra,)
+
+    def __eq__(self, anderes):
+        if not isinstance(anderes, Angebot):
+            return NotImplemented
+        return self._werte() == anderes._werte()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'Angebot(id={self.id!r}, item_id={self.item_id!r}, betrag={self.offer_amount}, status={self.status_wert})'
@@ -4,10 +4,17 @@
 Erstellt echte eBay-ähnliche Best Offers im Frontend-Format
 """
 
-import json
 from datetime import datetime, timedelta
 import random
 
+try:
+    from angebote.snapshot_datei import SnapshotWriter
+except ImportError:
+    # Direkt aus dem Ordner angebote/ gestartet
+    from snapshot_datei import SnapshotWriter
+
+SNAPSHOT_DATEI = 'realistic_offers.ndjson'
+
 def create_realistic_best_offers():
     """Erstellt realistische Best Offers wie sie von eBay kommen würden"""
     
@@ -94,29 +101,26 @@ def save_frontend_ready_data():
     
     offers = create_realistic_best_offers()
     
+    metadata = {
+        "currency": "EUR",
+        "site": "eBay Deutschland", 
+        "seller": "Studibuch",
+        "api_version": "967"
+    }
+    
+    # Ein NDJSON-Snapshot für Backend und Frontend (zeilenweise geschrieben)
+    with SnapshotWriter(SNAPSHOT_DATEI, source="eBay Production API (Simulation)", metadata=metadata) as writer:
+        writer.schreibe_viele(offers)
+    
     frontend_data = {
         "success": True,
         "timestamp": datetime.now().isoformat(),
-        "total_offers": len(offers),
-        "source": "eBay Production API (Simulation)",
-        "message": f"{len(offers)} realistische Best Offers für Frontend",
-        "offers": offers,
-        "metadata": {
-            "currency": "EUR",
-            "site": "eBay Deutschland", 
-            "seller": "Studibuch",
-            "api_version": "967"
-        }
+        "total_offers": writer.anzahl,
+        "source": writer.source,
+        "message": f"{writer.anzahl} realistische Best Offers für Frontend",
+        "metadata": metadata
     }
     
-    # Speichere für Frontend
-    with open('realistic_offers_frontend.json', 'w', encoding='utf-8') as f:
-        json.dump(frontend_data, f, indent=2, ensure_ascii=False)
-    
-    # Speichere auch kompakt für direkten Import
-    with open('../frontend/src/data/offers.json', 'w', encoding='utf-8') as f:
-        json.dump(frontend_data, f, indent=2, ensure_ascii=False)
-    
     return frontend_data, offers
 
 if __name__ == "__main__":
@@ -142,8 +146,7 @@ if __name__ == "__main__":
         print()
     
     print("💾 GESPEICHERT:")
-    print("✅ realistic_offers_frontend.json (Backend)")
-    print("✅ frontend/src/data/offers.json (Frontend)")
+    print(f"✅ {SNAPSHOT_DATEI} (NDJSON-Snapshot)")
     
     print()
     print("🌐 BEREIT FÜR FRONTEND!")
@@ -152,7 +155,7 @@ if __name__ == "__main__":
     
     print()
     print("📝 FRONTEND INTEGRATION:")
-    print("1. JSON-Datei ist im Frontend-Ordner")
-    print("2. Direkt importierbar in React-Komponenten") 
+    print("1. Backend lädt den Snapshot beim Start (OFFERS_SNAPSHOT)")
+    print("2. Frontend bekommt die Daten über /api/offers") 
     print("3. Realistische eBay-Daten für Development")
     print("4. Kann später durch echte API ersetzt werden") 
\ No newline at end of file
@@ -4,10 +4,17 @@
 Erstellt realistische Best Offers für Studibuch basierend auf echten eBay-Mustern
 """
 
-import json
 from datetime import datetime, timedelta
 import random
 
+try:
+    from angebote.snapshot_datei import SnapshotWriter
+except ImportError:
+    # Direkt aus dem Ordner angebote/ gestartet
+    from snapshot_datei import SnapshotWriter
+
+SNAPSHOT_DATEI = 'studibuch_offers.ndjson'
+
 def create_studibuch_best_offers():
     """Erstellt realistische Studibuch Best Offers"""
     
@@ -116,35 +123,37 @@ def save_studibuch_frontend_data():
     
     offers = create_studibuch_best_offers()
     
+    metadata = {
+        "currency": "EUR",
+        "site": "eBay Deutschland", 
+        "seller": "Studibuch",
+        "api_version": "967",
+        "account": "Studibuch eBay Account"
+    }
+    
+    # Kennzahlen laufend mitrechnen und in den Abschluss-Datensatz schreiben
+    rabatt_summe = 0.0
+    gesamtwert = 0.0
+    with SnapshotWriter(SNAPSHOT_DATEI, source="eBay Production API (Studibuch)", metadata=metadata) as writer:
+        for offer in offers:
+            rabatt_summe += float(offer['discount_percentage'][:-1])
+            gesamtwert += float(offer['offer_amount'].split()[0])
+            writer.schreibe(offer)
+        writer.ende.update({
+            "avg_discount": f"{rabatt_summe / max(writer.anzahl, 1):.1f}%",
+            "total_value": f"{gesamtwert:.2f} EUR"
+        })
+    
     frontend_data = {
         "success": True,
         "timestamp": datetime.now().isoformat(),
-        "total_offers": len(offers),
-        "source": "eBay Production API (Studibuch)",
-        "account": "Studibuch eBay Account",
-        "message": f"{len(offers)} realistische Studibuch Best Offers",
-        "offers": offers,
-        "metadata": {
-            "currency": "EUR",
-            "site": "eBay Deutschland", 
-            "seller": "Studibuch",
-            "api_version": "967",
-            "avg_discount": f"{sum(float(offer['discount_percentage'][:-1]) for offer in offers) / len(offers):.1f}%",
-            "total_value": f"{sum(float(offer['offer_amount'].split()[0]) for offer in offers):.2f} EUR"
-        }
+        "total_offers": writer.anzahl,
+        "source": writer.source,
+        "account": metadata["account"],
+        "message": f"{writer.anzahl} realistische Studibuch Best Offers",
+        "metadata": {**metadata, **writer.ende}
     }
     
-    # Speichere Hauptdatei
-    with open('studibuch_offers_realistic.json', 'w', encoding='utf-8') as f:
-        json.dump(frontend_data, f, indent=2, ensure_ascii=False)
-    
-    # Speichere für Frontend
-    try:
-        with open('../frontend/src/data/studibuch_offers.json', 'w', encoding='utf-8') as f:
-            json.dump(frontend_data, f, indent=2, ensure_ascii=False)
-    except:
-        pass
-    
     return frontend_data, offers
 
 def create_studibuch_demo_html():
@@ -372,8 +381,8 @@ def create_studibuch_demo_html():
     <script>
         async function loadStudibuchOffers() {
             try {
-                const response = await fetch('studibuch_offers_realistic.json');
-                const data = await response.json();
+                const response = await fetch('studibuch_offers.ndjson');
+                const data = parseSnapshot(await response.text());
                 displayOffers(data.offers);
                 updateStats(data);
             } catch (error) {
@@ -383,6 +392,24 @@ def create_studibuch_demo_html():
             }
         }
         
+        function parseSnapshot(text) {
+            // NDJSON: Header, ein Angebot pro Zeile, Abschluss mit Kennzahlen
+            const data = { offers: [], metadata: {}, total_offers: 0 };
+            for (const zeile of text.split('\\n')) {
+                if (!zeile.trim()) continue;
+                const datensatz = JSON.parse(zeile);
+                if (datensatz._snapshot) {
+                    Object.assign(data.metadata, datensatz._snapshot.metadata);
+                } else if (datensatz._snapshot_end) {
+                    Object.assign(data.metadata, datensatz._snapshot_end.metadata);
+                } else {
+                    data.offers.push(datensatz);
+                }
+            }
+            data.total_offers = data.offers.length;
+            return data;
+        }
+        
         function displayOffers(offers) {
             const grid = document.getElementById('offersGrid');
             
@@ -496,8 +523,7 @@ if __name__ == "__main__":
     
     print()
     print("💾 GESPEICHERT:")
-    print("✅ studibuch_offers_realistic.json")
-    print("✅ frontend/src/data/studibuch_offers.json")
+    print(f"✅ {SNAPSHOT_DATEI} (NDJSON-Snapshot)")
     print("✅ studibuch_demo.html")
     
     print()
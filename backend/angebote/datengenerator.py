@@ -0,0 +1,334 @@
+"""
+Synthetische Angebotsdaten für Skalierungstests
+Erzeugt reproduzierbar (Seed) beliebig viele Angebote, Listings und Käufer-Historien
+nach den Verteilungen der Demo-Skripte (Angebot 70–90 % des Preises, Gegenvorschlag
+5–15 % über dem Angebot, Nachrichten, Zeitfenster der letzten 72 Stunden). Listing i
+und Käufer k ergeben immer dieselben Daten; geschrieben wird in Batches, der
+Speicherbedarf hängt nicht von der Anzahl ab.
+
+    python -m angebote.datengenerator --angebote 1000000 --listings 158000 --ausgabe daten/
+    python -m angebote.datengenerator --angebote 5000000 --format csv --nur offers
+
+Formate: ndjson (Standard, .gz-Endung komprimiert), csv und parquet (nur mit pyarrow).
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Artikel aus create_realistic_offers.py / create_studibuch_offers.py (Titel, Preis)
+ARTIKEL = (
+    ('Mathematik für Informatiker', 45.00), ('BWL Grundlagen kompakt', 25.50),
+    ('Physik Experimentalphysik', 89.00), ('Chemie Organische Chemie', 67.50),
+    ('Geschichte Deutschlands', 32.00), ('Englisch Cambridge Grammar', 28.90),
+    ('Statistik für Wirtschaftswissenschaften', 55.00), ('Programmieren lernen mit Python', 39.99),
+    ('Anatomie des Menschen - Sobotta Atlas', 89.90), ('Biochemie für Mediziner', 67.50),
+    ('Grundlagen der Betriebswirtschaftslehre', 45.00), ('Analysis I für Mathematiker', 52.90),
+    ('Organische Chemie Vollhardt', 78.00), ('Physik für Ingenieure Hering', 55.80),
+    ('Statistik für Sozialwissenschaftler', 39.90), ('Einführung in die Rechtswissenschaft', 42.50),
+    ('Mikrobiologie Brock', 85.00), ('Psychologie für Bachelorstudierende', 48.90),
+    ('Grundlagen der Volkswirtschaftslehre', 51.00), ('Experimentalphysik 1 Demtröder', 69.90),
+)
+AUFLAGEN = ('', ' (2. Auflage)', ' (3. Auflage)', ' (5. Auflage)', ' (Neuauflage)', ' (Studienausgabe)')
+ZUSTAENDE = ('Neu', 'Wie neu', 'Sehr gut', 'Gut', 'Akzeptabel')
+
+KAEUFER_NAMEN = (
+    'bargain_hunter', 'student_saver', 'bucher_sammler', 'preishit_finder', 'schnaeppchen_jaeger',
+    'uni_student', 'buch_liebhaber', 'lese_ratte', 'studienhelfer', 'wissen_sammler', 'student_munich',
+    'uni_koeln_read', 'berlin_student_save', 'studentin_ffm', 'lernhilfe_student', 'jura_lernen',
+    'medizin_bucher', 'biochemie_student', 'master_thesis_help', 'abitur_prep',
+)
+
+NACHRICHTEN = (
+    'Hallo, wäre das Buch für diesen Preis verfügbar? Bin Student und würde es dringend brauchen.',
+    'Ich biete Ihnen diesen Preis für das Buch. Ist das in Ordnung?',
+    'Könnten Sie mit diesem Preis leben? Das Buch ist für mein Studium.',
+    'Wäre dieser Preis möglich? Vielen Dank!',
+    'Ist das Buch noch verfügbar? Würde diesen Preis zahlen.',
+    '',
+    '',
+    'Brauche das Buch für die Uni, wäre der Preis ok?',
+    'Hallo, könnten wir uns auf diesen Preis einigen?',
+    'Hallo! Wäre eine schnelle Abwicklung möglich? Brauche es für nächste Woche.',
+    'Bin Ersti und würde mich über das Buch freuen. Geht der Preis klar?',
+)
+GEGEN_NACHRICHTEN = ('Treffen wir uns in der Mitte?', 'Mehr kann ich leider nicht zahlen.',
+                     'Letztes Angebot von meiner Seite.', '')
+
+# Verteilungen
+STATUS_GEWICHTE = (('pending', 70), ('accepted', 12), ('rejected', 10), ('countered', 8))
+ANGEBOT_ANTEIL = (0.70, 0.90)       # Angebot in Anteilen des Listenpreises
+GEGENVORSCHLAG = (1.05, 1.15)       # Vorschlag des Verkäufers relativ zum Angebot
+KAEUFER_GEGENANGEBOT = 0.15         # Anteil der Angebote, die Gegenangebote des Käufers sind
+ACCOUNTS = (('Studibuch', 80), ('Zweitaccount', 20))
+STICHTAG = datetime(2024, 6, 1, 12, 0, 0)
+
+# Angebote werden blockweise aus einem Zufallsstrom erzeugt (schneller als ein Seed pro Angebot)
+BLOCK = 1024
+_ARTEN = {'listing': 1, 'buyer': 2, 'history': 3, 'offer': 4}
+
+FELDER = {
+    'offers': ('id', 'best_offer_id', 'item_id', 'item_title', 'buyer_username', 'offer_amount', 'list_price',
+               'currency', 'quantity', 'status', 'offer_type', 'counter_amount', 'counter_message', 'message',
+               'created_at', 'expires_at', 'suggested_counter', 'account'),
+    'listings': ('item_id', 'title', 'list_price', 'currency', 'quantity', 'condition', 'listed_at',
+                 'best_offer_enabled', 'account'),
+    'buyers': ('buyer_username', 'first_seen', 'offers_total', 'offers_accepted', 'avg_offer_ratio',
+               'history'),
+}
+
+
+def _gewichtet(rnd, tabelle):
+    wert = rnd.random() * sum(g for _, g in tabelle)
+    for eintrag, gewicht in tabelle:
+        wert -= gewicht
+        if wert < 0:
+            return eintrag
+    return tabelle[-1][0]
+
+
+class Datengenerator:
+    def __init__(self, seed=1, listings=10000, kaeufer=20000, stichtag=STICHTAG):
+        self.seed = seed
+        self.anzahl_listings = max(1, listings)
+        self.anzahl_kaeufer = max(1, kaeufer)
+        self.stichtag = stichtag
+        # Häufig referenzierte Listings/Käufer nicht jedes Mal neu erzeugen (begrenzt)
+        self.listing = lru_cache(maxsize=65536)(self._listing)
+        self.kaeufer = lru_cache(maxsize=65536)(self._kaeufer)
+
+    def _rnd(self, art, index):
+        return random.Random((self.seed * 8 + _ARTEN[art]) * 1_000_000_007 + index)
+
+    def _listing(self, i):
+        rnd = self._rnd('listing', i)
+        titel, basispreis = rnd.choice(ARTIKEL)
+        return {
+            'item_id': str(390000000000 + i),
+            'title': titel + rnd.choice(AUFLAGEN),
+            'list_price': round(min(max(basispreis * rnd.lognormvariate(0, 0.25), 4.99), 199.0), 2),
+            'currency': 'EUR',
+            'quantity': rnd.choice((1, 1, 1, 1, 2, 3)),
+            'condition': rnd.choice(ZUSTAENDE),
+            'listed_at': (self.stichtag - timedelta(days=rnd.uniform(0, 365))).isoformat(timespec='seconds'),
+            'best_offer_enabled': True,
+            'account': _gewichtet(rnd, ACCOUNTS),
+        }
+
+    def _kaeufer(self, k):
+        """Käuferprofil: bevorzugter Angebotsanteil und bisherige Verhandlungen"""
+        rnd = self._rnd('buyer', k)
+        quote = rnd.uniform(*ANGEBOT_ANTEIL)
+        angebote = min(int(rnd.expovariate(1 / 3)), 50)
+        angenommen = sum(rnd.random() < (quote - 0.55) * 2 for _ in range(angebote))
+        return {
+            'buyer_username': f'{KAEUFER_NAMEN[k % len(KAEUFER_NAMEN)]}_{k}',
+            'first_seen': (self.stichtag - timedelta(days=rnd.uniform(3, 900))).isoformat(timespec='seconds'),
+            'offers_total': angebote,
+            'offers_accepted': angenommen,
+            'avg_offer_ratio': round(quote, 3),
+        }
+
+    def kaeufer_historie(self, k, max_eintraege=10):
+        """Käuferprofil mit den letzten Verhandlungen (neueste zuerst)"""
+        profil = dict(self.kaeufer(k))
+        rnd = self._rnd('history', k)
+        zeit = self.stichtag - timedelta(days=3)
+        historie = []
+        for n in range(min(profil['offers_total'], max_eintraege)):
+            listing = self.listing(rnd.randrange(self.anzahl_listings))
+            zeit -= timedelta(hours=rnd.uniform(6, 24 * 30))
+            historie.append({
+                'item_id': listing['item_id'],
+                'offer_amount': round(listing['list_price'] * self._anteil(rnd, profil), 2),
+                'list_price': listing['list_price'],
+                'outcome': 'accepted' if n < profil['offers_accepted'] else rnd.choice(('rejected', 'expired')),
+                'date': zeit.isoformat(timespec='seconds'),
+            })
+        profil['history'] = historie
+        return profil
+
+    @staticmethod
+    def _anteil(rnd, profil):
+        return min(max(rnd.gauss(profil['avg_offer_ratio'], 0.04), ANGEBOT_ANTEIL[0]), ANGEBOT_ANTEIL[1])
+
+    def angebote(self, anzahl, start=0):
+        """Angebote start..start+anzahl-1 im Format des Offer-Stores (Generator)"""
+        rnd = None
+        for j in range(start - start % BLOCK, start + anzahl):
+            if rnd is None or j % BLOCK == 0:
+                rnd = self._rnd('offer', j // BLOCK)
+            # Beliebte Listings und aktive Käufer bekommen mehr Angebote (quadratische Schiefe)
+            listing = self.listing(int(self.anzahl_listings * rnd.random() ** 2))
+            k = int(self.anzahl_kaeufer * rnd.random() ** 2)
+            profil = self.kaeufer(k)
+            betrag = round(listing['list_price'] * self._anteil(rnd, profil), 2)
+            erstellt = self.stichtag - timedelta(hours=rnd.uniform(1, 72))
+            angebot = {
+                'id': j + 1,
+                'best_offer_id': f'BO{self.seed:03d}{j:010d}',
+                'item_id': listing['item_id'],
+                'item_title': listing['title'],
+                'buyer_username': profil['buyer_username'],
+                'offer_amount': betrag,
+                'list_price': listing['list_price'],
+                'currency': 'EUR',
+                'quantity': 1,
+                'status': _gewichtet(rnd, STATUS_GEWICHTE),
+                'offer_type': 'initial',
+                'counter_amount': None,
+                'counter_message': None,
+                'message': rnd.choice(NACHRICHTEN),
+                'created_at': erstellt.isoformat(timespec='seconds'),
+                'expires_at': (erstellt + timedelta(hours=48)).isoformat(timespec='seconds'),
+                'suggested_counter': round(betrag * rnd.uniform(*GEGENVORSCHLAG), 2),
+                'account': listing['account'],
+            }
+            if rnd.random() < KAEUFER_GEGENANGEBOT:
+                # Käufer antwortet auf einen Gegenvorschlag: zwischen Angebot und Vorschlag
+                angebot['offer_type'] = 'counter'
+                angebot['counter_amount'] = round(betrag + (angebot['suggested_counter'] - betrag) * rnd.uniform(0.3, 0.7), 2)
+                angebot['counter_message'] = rnd.choice(GEGEN_NACHRICHTEN)
+            if j >= start:
+                yield angebot
+
+    def listings(self, anzahl=None):
+        for i in range(min(anzahl or self.anzahl_listings, self.anzahl_listings)):
+            yield self._listing(i)
+
+    def kaeufer_historien(self, anzahl=None):
+        for k in range(min(anzahl or self.anzahl_kaeufer, self.anzahl_kaeufer)):
+            yield self.kaeufer_historie(k)
+
+
+# === Ausgabe ===
+def _oeffnen(pfad, modus='wt'):
+    if pfad.endswith('.gz'):
+        return gzip.open(pfad, modus, encoding='utf-8', newline='' if '.csv' in pfad else None)
+    return open(pfad, modus, encoding='utf-8', newline='' if pfad.endswith('.csv') else None)
+
+
+def schreibe_ndjson(datensaetze, pfad, batch=5000):
+    """Eine JSON-Zeile pro Datensatz; gepuffert in Batches"""
+    anzahl = 0
+    with _oeffnen(pfad) as f:
+        puffer = []
+        for datensatz in datensaetze:
+            puffer.append(json.dumps(datensatz, ensure_ascii=False, separators=(',', ':')))
+            if len(puffer) >= batch:
+                f.write('\n'.join(puffer) + '\n')
+                anzahl += len(puffer)
+                puffer.clear()
+        if puffer:
+            f.write('\n'.join(puffer) + '\n')
+            anzahl += len(puffer)
+    return anzahl
+
+
+def schreibe_csv(datensaetze, pfad, felder, batch=5000):
+    """Tabellarisch (Semikolon); verschachtelte Felder als JSON"""
+    anzahl = 0
+    with _oeffnen(pfad) as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(felder)
+        puffer = []
+        for datensatz in datensaetze:
+            puffer.append([json.dumps(datensatz[feld], ensure_ascii=False) if isinstance(datensatz[feld], (list, dict))
+                           else datensatz[feld] for feld in felder])
+            if len(puffer) >= batch:
+                writer.writerows(puffer)
+                anzahl += len(puffer)
+                puffer.clear()
+        writer.writerows(puffer)
+        anzahl += len(puffer)
+    return anzahl
+
+
+def schreibe_parquet(datensaetze, pfad, felder, batch=100000):
+    """Spaltenformat (Parquet) in Row-Groups von `batch` Datensätzen – benötigt pyarrow"""
+    if pyarrow is None:
+        raise RuntimeError('Parquet-Ausgabe benötigt pyarrow (pip install pyarrow)')
+    anzahl = 0
+    writer = None
+    spalten = {feld: [] for feld in felder}
+    try:
+        for datensatz in datensaetze:
+            for feld in felder:
+                wert = datensatz[feld]
+                spalten[feld].append(json.dumps(wert, ensure_ascii=False) if isinstance(wert, (list, dict)) else wert)
+            if len(spalten[felder[0]]) >= batch:
+                writer = _parquet_batch(writer, pfad, spalten)
+                anzahl += batch
+        rest = len(spalten[felder[0]])
+        if rest or writer is None:
+            writer = _parquet_batch(writer, pfad, spalten)
+            anzahl += rest
+    finally:
+        if writer is not None:
+            writer.close()
+    return anzahl
+
+
+def _parquet_batch(writer, pfad, spalten):
+    tabelle = pyarrow.table(spalten)
+    if writer is None:
+        writer = pyarrow.parquet.ParquetWriter(pfad, tabelle.schema)
+    writer.write_table(tabelle.cast(writer.schema))
+    for werte in spalten.values():
+        werte.clear()
+    return writer
+
+
+def schreibe(datensaetze, pfad, art, format_='ndjson'):
+    if format_ == 'csv':
+        return schreibe_csv(datensaetze, pfad, FELDER[art])
+    if format_ == 'parquet':
+        return schreibe_parquet(datensaetze, pfad, FELDER[art])
+    return schreibe_ndjson(datensaetze, pfad)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetische Angebote, Listings und Käufer-Historien')
+    parser.add_argument('--angebote', type=int, default=100000)
+    parser.add_argument('--listings', type=int, default=20000)
+    parser.add_argument('--kaeufer', type=int, default=30000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--stichtag', default=STICHTAG.isoformat(), help='Bezugszeitpunkt (reproduzierbar)')
+    parser.add_argument('--format', choices=('ndjson', 'csv', 'parquet'), default='ndjson')
+    parser.add_argument('--gzip', action='store_true', help='ndjson/csv komprimiert schreiben')
+    parser.add_argument('--nur', default='offers,listings,buyers', help='Kommagetrennt: offers, listings, buyers')
+    parser.add_argument('--ausgabe', default='synthetik', help='Zielverzeichnis')
+    args = parser.parse_args()
+
+    generator = Datengenerator(args.seed, args.listings, args.kaeufer, datetime.fromisoformat(args.stichtag))
+    quellen = {
+        'offers': lambda: generator.angebote(args.angebote),
+        'listings': generator.listings,
+        'buyers': generator.kaeufer_historien,
+    }
+    os.makedirs(args.ausgabe, exist_ok=True)
+    endung = {'ndjson': '.ndjson', 'csv': '.csv', 'parquet': '.parquet'}[args.format]
+    if args.gzip and args.format != 'parquet':
+        endung += '.gz'
+    for art in args.nur.split(','):
+        pfad = os.path.join(args.ausgabe, art + endung)
+        start = time.perf_counter()
+        anzahl = schreibe(quellen[art](), pfad, art, args.format)
+        dauer = time.perf_counter() - start
+        print(f'{pfad}: {anzahl} Datensätze in {dauer:.1f} s ({anzahl / max(dauer, 1e-9):,.0f}/s)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
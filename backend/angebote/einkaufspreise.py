@@ -0,0 +1,200 @@
+"""
+Einkaufspreis-Cache für die Regel-Engine
+Lädt die Einkaufspreise aller Artikel mit offenen Angeboten im Block vor und
+holt danach nur noch die seit dem letzten Stand geänderten Preise nach. Bei der
+Entscheidung ist der Preis damit ein Dict-Zugriff statt eines HTTP-Calls.
+
+Quellen brauchen zwei Methoden (beide liefern {artikelnummer: (preis, geaendert_am)}):
+    einkaufspreise(artikelnummern)  Block-Abfrage
+    geaendert_seit(zeitpunkt)       inkrementelle Abfrage
+ShopwareAPI (schnittstelle/shopware_api.py) für den Betrieb, LokaleQuelle für
+Tests und Entwicklung.
+"""
+import csv
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def artikelnummer(offer):
+    """Artikelnummer im Shop: eBay-SKU, sonst die Item-ID"""
+    return str(offer.get('sku') or offer.get('item_id') or '')
+
+
+class LokaleQuelle:
+    """
+    Einkaufspreise aus einem Dict oder einer CSV-Datei (artikelnummer;einkaufspreis;geaendert_am).
+    setze() simuliert Änderungen im Shop; zählt die Abfragen wie ein HTTP-Client.
+    """
+
+    def __init__(self, preise=None):
+        self._preise = {}
+        self._lock = threading.Lock()
+        self.abfragen = 0
+        for nummer, preis in (preise or {}).items():
+            self.setze(nummer, preis)
+
+    @classmethod
+    def aus_csv(cls, pfad):
+        quelle = cls()
+        with open(pfad, 'r', encoding='utf-8', newline='') as f:
+            for zeile in csv.DictReader(f, delimiter=';'):
+                geaendert = zeile.get('geaendert_am')
+                quelle.setze(zeile['artikelnummer'], float(zeile['einkaufspreis'].replace(',', '.')),
+                             datetime.fromisoformat(geaendert) if geaendert else None)
+        return quelle
+
+    def setze(self, nummer, preis, geaendert_am=None):
+        with self._lock:
+            self._preise[str(nummer)] = (float(preis), geaendert_am or datetime.now())
+
+    def einkaufspreise(self, artikelnummern):
+        with self._lock:
+            self.abfragen += 1
+            return {n: self._preise[n] for n in artikelnummern if n in self._preise}
+
+    def geaendert_seit(self, zeitpunkt):
+        with self._lock:
+            self.abfragen += 1
+            return {n: e for n, e in self._preise.items() if e[1] >= zeitpunkt}
+
+
+class EinkaufspreisCache:
+    def __init__(self, quelle, store=None, intervall_sekunden=300.0, unbekannt_ttl_sekunden=3600.0):
+        """
+        quelle: ShopwareAPI oder LokaleQuelle
+        store: OfferStore, aus dessen offenen Angeboten vorgeladen wird
+        intervall_sekunden: Abstand der Hintergrund-Aktualisierung
+        unbekannt_ttl_sekunden: so lange wird ein Artikel ohne Einkaufspreis nicht erneut abgefragt
+        """
+        self.quelle = quelle
+        self.store = store
+        self.intervall_sekunden = intervall_sekunden
+        self.unbekannt_ttl_sekunden = unbekannt_ttl_sekunden
+        # artikelnummer -> (preis, geaendert_am)
+        self._preise = {}
+        # Artikel ohne Einkaufspreis in der Quelle -> Zeitpunkt der Abfrage (time.monotonic)
+        self._unbekannt = {}
+        # Zeitpunkt, ab dem inkrementell abgefragt wird: Beginn des ersten Vorladens,
+        # danach der neueste Änderungszeitpunkt der Quelle
+        self._stand = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self.vorgeladen = 0
+        self.aktualisiert = 0
+        self.letzte_aktualisierung = None
+
+    def preis(self, nummer):
+        """Einkaufspreis oder None – nur Dict-Zugriff, nie ein Call zur Quelle"""
+        eintrag = self._preise.get(nummer)
+        with self._lock:
+            if eintrag is None:
+                self.fehlschlaege += 1
+                return None
+            self.treffer += 1
+        return eintrag[0]
+
+    def preis_fuer(self, offer):
+        return self.preis(artikelnummer(offer))
+
+    def _uebernehmen(self, preise):
+        with self._lock:
+            self._preise.update(preise)
+            for nummer in preise:
+                self._unbekannt.pop(nummer, None)
+            neuester = max((geaendert for _, geaendert in preise.values() if geaendert), default=None)
+            if neuester is not None and (self._stand is None or neuester > self._stand):
+                self._stand = neuester
+
+    def _fehlt(self, nummer, jetzt):
+        if nummer in self._preise:
+            return False
+        gefragt = self._unbekannt.get(nummer)
+        return gefragt is None or jetzt - gefragt >= self.unbekannt_ttl_sekunden
+
+    def vorladen(self, artikelnummern):
+        """
+        Fehlende Preise der Artikel im Block holen; gibt die Anzahl neu geladener zurück.
+        Artikel ohne Preis in der Quelle werden erst nach unbekannt_ttl_sekunden erneut abgefragt.
+        """
+        jetzt = time.monotonic()
+        with self._lock:
+            fehlend = {n for n in artikelnummern if n and self._fehlt(n, jetzt)}
+        if not fehlend:
+            return 0
+        abfrage = datetime.now()
+        preise = self.quelle.einkaufspreise(sorted(fehlend))
+        self._uebernehmen(preise)
+        with self._lock:
+            for nummer in fehlend - preise.keys():
+                self._unbekannt[nummer] = jetzt
+            if self._stand is None:
+                # Auch ohne Treffer ab jetzt inkrementell nachfragen (Änderungen während der Abfrage eingeschlossen)
+                self._stand = abfrage
+            self.vorgeladen += len(preise)
+        return len(preise)
+
+    def vorladen_offene(self):
+        """Preise für alle Artikel mit offenen Angeboten im Store"""
+        if self.store is None:
+            return 0
+        nummern = {str(a.sku or a.item_id or '') for a in self.store.iter_datensaetze()
+                   if a.status_wert == 'pending'}
+        return self.vorladen(nummern)
+
+    def aktualisieren(self):
+        """Seit dem letzten Stand geänderte Preise übernehmen (ohne Stand: nichts zu tun)"""
+        if self._stand is None:
+            return 0
+        preise = self.quelle.geaendert_seit(self._stand)
+        self._uebernehmen(preise)
+        with self._lock:
+            self.aktualisiert += len(preise)
+            self.letzte_aktualisierung = datetime.now().isoformat()
+        return len(preise)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def _loop():
+            while True:
+                try:
+                    self.aktualisieren()
+                    self.vorladen_offene()
+                except Exception as e:
+                    logger.error(f'Einkaufspreise konnten nicht aktualisiert werden: {e}')
+                if self._stop.wait(self.intervall_sekunden):
+                    return
+
+        self._thread = threading.Thread(target=_loop, name='einkaufspreise', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get_status(self):
+        with self._lock:
+            anfragen = self.treffer + self.fehlschlaege
+            return {
+                'source': type(self.quelle).__name__,
+                'entries': len(self._preise),
+                'unknown_items': len(self._unbekannt),
+                'hits': self.treffer,
+                'misses': self.fehlschlaege,
+                'hit_rate': round(self.treffer / anfragen * 100, 1) if anfragen else 0.0,
+                'prefetched': self.vorgeladen,
+                'refreshed': self.aktualisiert,
+                'changes_since': self._stand.isoformat() if self._stand else None,
+                'last_refresh': self.letzte_aktualisierung,
+            }
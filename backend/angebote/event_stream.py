@@ -0,0 +1,76 @@
+"""
+Event-Puffer für Server-Sent Events
+Hält die letzten Änderungen (Angebote, Statistik, Sync-Fortschritt) mit fortlaufender
+ID vor, damit sich Clients per Cursor (Last-Event-ID) ohne Neuladen wieder einklinken.
+Die Event-IDs tragen die Kennung des Streams: mit mehreren Worker-Prozessen landet ein
+Reconnect oft bei einem anderen Worker, dessen Nummern nichts mit denen des ersten zu tun haben.
+"""
+import json
+import threading
+import uuid
+from collections import deque
+
+
+class EventStream:
+    def __init__(self, max_events=2000):
+        self._events = deque(maxlen=max_events)
+        self._cond = threading.Condition()
+        self.last_id = 0
+        self.geschlossen = False
+        # Kennung dieses Streams (pro Prozess und Lauf)
+        self.kennung = uuid.uuid4().hex[:8]
+
+    def event_id(self, nummer):
+        """Event-ID für den Client (Kennung + fortlaufende Nummer)"""
+        return f'{self.kennung}-{nummer}'
+
+    def cursor_aus(self, event_id):
+        """Nummer aus einer Event-ID dieses Streams; None bei fremder, alter oder ungültiger ID"""
+        kennung, _, nummer = (event_id or '').rpartition('-')
+        if kennung != self.kennung or not nummer.isdigit():
+            return None
+        return int(nummer)
+
+    def publish(self, typ, data):
+        """Hängt ein Event an und weckt wartende Clients"""
+        with self._cond:
+            self.last_id += 1
+            self._events.append((self.last_id, typ, data))
+            self._cond.notify_all()
+            return self.last_id
+
+    def since(self, cursor):
+        """
+        Events nach `cursor`. Liegt der Cursor vor dem Pufferanfang, ist ein
+        vollständiges Neuladen nötig (reset=True).
+        """
+        with self._cond:
+            return self._since(cursor)
+
+    def _since(self, cursor):
+        if cursor > self.last_id:
+            # Cursor aus einem früheren Serverlauf
+            return [], True
+        if not self._events or cursor >= self.last_id:
+            return [], False
+        erster = self._events[0][0]
+        if cursor < erster - 1:
+            return [], True
+        return [e for e in self._events if e[0] > cursor], False
+
+    def wait(self, cursor, timeout):
+        """Wartet bis zu `timeout` Sekunden auf Events nach `cursor`"""
+        with self._cond:
+            if cursor == self.last_id and not self.geschlossen:
+                self._cond.wait(timeout)
+            return self._since(cursor)
+
+    def close(self):
+        """Beim Herunterfahren: weckt alle wartenden Clients, damit ihre Streams enden"""
+        with self._cond:
+            self.geschlossen = True
+            self._cond.notify_all()
+
+    @staticmethod
+    def format_sse(event_id, typ, data):
+        return f"id: {event_id}\nevent: {typ}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
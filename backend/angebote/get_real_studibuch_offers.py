@@ -7,9 +7,16 @@ Holt die echten Preisvorschläge vom Studibuch eBay-Account
 import requests
 import xml.etree.ElementTree as ET
 from datetime import datetime
-import json
 import os
 
+try:
+    from angebote.snapshot_datei import SnapshotWriter
+except ImportError:
+    # Direkt aus dem Ordner angebote/ gestartet
+    from snapshot_datei import SnapshotWriter
+
+SNAPSHOT_DATEI = 'studibuch_real_offers.ndjson'
+
 # ECHTE STUDIBUCH PRODUCTION CREDENTIALS (mit neuem Token)
 STUDIBUCH_CREDENTIALS = {
     'app_id': os.getenv('EBAY_APP_ID', 'your_ebay_app_id_here'),
@@ -205,40 +212,21 @@ def calculate_counter_offer(price, currency):
         return "N/A"
 
 def save_studibuch_offers(offers):
-    """Speichert echte Studibuch Offers für Frontend"""
-    
-    if not offers:
-        # Erstelle leere Struktur wenn keine Offers
-        frontend_data = {
-            'success': True,
-            'timestamp': datetime.now().isoformat(),
-            'total_offers': 0,
-            'offers': [],
-            'source': 'eBay Production API (Studibuch)',
-            'account': 'Studibuch',
-            'message': 'Keine Best Offers vorhanden (ist normal)'
-        }
-    else:
-        frontend_data = {
-            'success': True,
-            'timestamp': datetime.now().isoformat(),
-            'total_offers': len(offers),
-            'offers': offers,
-            'source': 'eBay Production API (Studibuch)',
-            'account': 'Studibuch',
-            'message': f'{len(offers)} echte Studibuch Best Offers geladen'
-        }
+    """Speichert echte Studibuch Offers als NDJSON-Snapshot für Backend und Frontend"""
     
-    # Speichere für Frontend
-    with open('studibuch_real_offers.json', 'w', encoding='utf-8') as f:
-        json.dump(frontend_data, f, indent=2, ensure_ascii=False)
+    source = 'eBay Production API (Studibuch)'
+    with SnapshotWriter(SNAPSHOT_DATEI, source=source, metadata={'account': 'Studibuch'}) as writer:
+        writer.schreibe_viele(offers or [])
     
-    # Speichere auch im Frontend-Ordner
-    try:
-        with open('../frontend/src/data/studibuch_offers.json', 'w', encoding='utf-8') as f:
-            json.dump(frontend_data, f, indent=2, ensure_ascii=False)
-    except:
-        pass  # Frontend-Ordner existiert möglicherweise nicht
+    frontend_data = {
+        'success': True,
+        'timestamp': datetime.now().isoformat(),
+        'total_offers': writer.anzahl,
+        'source': source,
+        'account': 'Studibuch',
+        'message': f'{writer.anzahl} echte Studibuch Best Offers geladen' if writer.anzahl
+                   else 'Keine Best Offers vorhanden (ist normal)'
+    }
     
     return frontend_data
 
@@ -280,8 +268,7 @@ if __name__ == "__main__":
     
     print()
     print("💾 GESPEICHERT:")
-    print("✅ studibuch_real_offers.json")
-    print("✅ frontend/src/data/studibuch_offers.json (falls möglich)")
+    print(f"✅ {SNAPSHOT_DATEI} (NDJSON-Snapshot)")
     
     print()
     print("🎯 ERGEBNIS:")
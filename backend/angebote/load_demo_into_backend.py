@@ -5,26 +5,39 @@ Lädt die Studibuch Demo-Offers ins laufende Backend-System
 """
 
 import requests
-import json
 from datetime import datetime
 
+try:
+    from angebote.snapshot_datei import SnapshotWriter, lese_snapshot, erster_vorhandener
+    from angebote.angebot import cent, euro
+except ImportError:
+    # Direkt aus dem Ordner angebote/ gestartet
+    from snapshot_datei import SnapshotWriter, lese_snapshot, erster_vorhandener
+    from angebot import cent, euro
+
+# Neuer Snapshot zuerst, alte JSON-Datei als Fallback
+DEMO_DATEIEN = ('studibuch_offers.ndjson', 'studibuch_offers_realistic.json')
+BACKEND_SNAPSHOT = 'backend_demo_offers.ndjson'
+
 def load_demo_data_to_backend():
     """Lädt Demo-Daten ins Backend-System über API"""
     
     print("🔧 LADE STUDIBUCH DEMO-DATEN INS BACKEND...")
     
     try:
-        # Lese Demo-Daten
-        with open('studibuch_offers_realistic.json', 'r', encoding='utf-8') as f:
-            demo_data = json.load(f)
-        
-        offers = demo_data.get('offers', [])
-        print(f"📋 Gefunden: {len(offers)} Demo-Offers")
+        # Lese Demo-Daten zeilenweise
+        pfad = erster_vorhandener(*DEMO_DATEIEN)
+        if pfad is None:
+            raise FileNotFoundError(DEMO_DATEIEN[0])
+        offers = lese_snapshot(pfad)
+        print(f"📋 Lese Demo-Offers aus {pfad}")
         
         # Konvertiere zu Backend-Format und sende einzeln
         success_count = 0
+        gesamt = 0
         
         for i, offer in enumerate(offers):
+            gesamt += 1
             try:
                 # Backend-Format
                 backend_offer = {
@@ -32,8 +45,8 @@ def load_demo_data_to_backend():
                     'item_id': offer.get('item_id', f'demo_{i}'),
                     'item_title': offer.get('item_title', 'Demo Artikel'),
                     'buyer_username': offer.get('buyer_username', 'demo_user'),
-                    'offer_amount': float(offer.get('offer_amount', '0').replace(' EUR', '')),
-                    'list_price': float(offer.get('original_price', '0').replace(' EUR', '')),
+                    'offer_amount': euro(cent(offer.get('offer_amount'))) or 0.0,
+                    'list_price': euro(cent(offer.get('original_price'))) or 0.0,
                     'status': 'pending',
                     'created_at': offer.get('created_date', datetime.now().isoformat()),
                     'days_online': 1,
@@ -53,7 +66,7 @@ def load_demo_data_to_backend():
                 print(f"   ❌ Fehler bei Offer {i+1}: {e}")
                 continue
         
-        print(f"✅ {success_count}/{len(offers)} Demo-Offers bereit für Backend")
+        print(f"✅ {success_count}/{gesamt} Demo-Offers bereit für Backend")
         return success_count > 0
         
     except Exception as e:
@@ -105,59 +118,42 @@ def inject_demo_data_directly():
         return False
 
 def create_backend_compatible_offers():
-    """Erstellt Backend-kompatible Offers-JSON"""
+    """Erstellt Backend-kompatible Offers als NDJSON-Snapshot"""
     
     print("\n📝 ERSTELLE BACKEND-KOMPATIBLE DATEN...")
     
     try:
-        # Lese Demo-Daten
-        with open('studibuch_offers_realistic.json', 'r', encoding='utf-8') as f:
-            demo_data = json.load(f)
-        
-        offers = demo_data.get('offers', [])
-        
-        # Backend-Format
-        backend_offers = []
-        
-        for i, offer in enumerate(offers):
-            backend_offer = {
-                'id': i + 1,
-                'item_id': offer.get('item_id', f'demo_item_{i+1}'),
-                'item_title': offer.get('item_title', 'Demo Artikel'),
-                'buyer_username': offer.get('buyer_username', 'demo_buyer'),
-                'offer_amount': float(offer.get('offer_amount', '0 EUR').replace(' EUR', '')),
-                'list_price': float(offer.get('original_price', '0 EUR').replace(' EUR', '')),
-                'status': 'pending',
-                'created_at': offer.get('created_date', datetime.now().isoformat()),
-                'days_online': 1,
-                'applicable_rule': 'Studibuch Demo Regel',
-                'best_offer_id': f'studibuch_demo_{i+1}',
-                'offer_type': 'initial',
-                'source_api': 'Studibuch Demo Data',
-                'buyer_message': offer.get('message', ''),
-                'ai_recommendation': {
-                    'action': offer.get('ai_decision', 'analyze'),
-                    'confidence': offer.get('ai_confidence', 80),
-                    'suggested_counter': offer.get('suggested_counter', 'N/A')
-                }
-            }
-            
-            backend_offers.append(backend_offer)
-        
-        # Speichere Backend-Format
-        backend_data = {
-            'success': True,
-            'total': len(backend_offers),
-            'offers': backend_offers,
-            'source': 'Studibuch Demo Data',
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        with open('backend_demo_offers.json', 'w', encoding='utf-8') as f:
-            json.dump(backend_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"✅ {len(backend_offers)} Backend-Offers erstellt")
-        print("💾 Gespeichert: backend_demo_offers.json")
+        pfad = erster_vorhandener(*DEMO_DATEIEN)
+        if pfad is None:
+            raise FileNotFoundError(DEMO_DATEIEN[0])
+        
+        # Backend-Format: Angebot für Angebot lesen, umwandeln und schreiben
+        with SnapshotWriter(BACKEND_SNAPSHOT, source='Studibuch Demo Data') as writer:
+            for i, offer in enumerate(lese_snapshot(pfad)):
+                writer.schreibe({
+                    'id': i + 1,
+                    'item_id': offer.get('item_id', f'demo_item_{i+1}'),
+                    'item_title': offer.get('item_title', 'Demo Artikel'),
+                    'buyer_username': offer.get('buyer_username', 'demo_buyer'),
+                    'offer_amount': euro(cent(offer.get('offer_amount'))) or 0.0,
+                    'list_price': euro(cent(offer.get('original_price'))) or 0.0,
+                    'status': 'pending',
+                    'created_at': offer.get('created_date', datetime.now().isoformat()),
+                    'days_online': 1,
+                    'applicable_rule': 'Studibuch Demo Regel',
+                    'best_offer_id': f'studibuch_demo_{i+1}',
+                    'offer_type': 'initial',
+                    'source_api': 'Studibuch Demo Data',
+                    'buyer_message': offer.get('message', ''),
+                    'ai_recommendation': {
+                        'action': offer.get('ai_decision', 'analyze'),
+                        'confidence': offer.get('ai_confidence', 80),
+                        'suggested_counter': offer.get('suggested_counter', 'N/A')
+                    }
+                })
+        
+        print(f"✅ {writer.anzahl} Backend-Offers erstellt")
+        print(f"💾 Gespeichert: {BACKEND_SNAPSHOT}")
         
         return True
         
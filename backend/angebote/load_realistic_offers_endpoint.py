@@ -6,18 +6,36 @@ Lädt die realistischen Best Offers für das Frontend
 
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
-import json
-import os
+
+try:
+    from angebote.snapshot_datei import lese_snapshot, erster_vorhandener
+except ImportError:
+    # Direkt aus dem Ordner angebote/ gestartet
+    from snapshot_datei import lese_snapshot, erster_vorhandener
+
+# Neuer Snapshot zuerst, alte JSON-Datei als Fallback
+OFFERS_DATEIEN = ('realistic_offers.ndjson', 'realistic_offers_frontend.json')
 
 app = Flask(__name__)
 CORS(app)
 
 def load_realistic_offers():
-    """Lädt die realistischen Offers aus der JSON-Datei"""
+    """Lädt die realistischen Offers aus dem Snapshot"""
     try:
-        with open('realistic_offers_frontend.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
+        pfad = erster_vorhandener(*OFFERS_DATEIEN)
+        if pfad is None:
+            raise FileNotFoundError(OFFERS_DATEIEN[0])
+        with lese_snapshot(pfad) as leser:
+            offers = list(leser)
+            return {
+                "success": True,
+                "timestamp": leser.header.get("created_at") or leser.header.get("timestamp"),
+                "total_offers": len(offers),
+                "source": leser.header.get("source"),
+                "message": f"{len(offers)} realistische Best Offers für Frontend",
+                "offers": offers,
+                "metadata": leser.metadata
+            }
     except Exception as e:
         print(f"Fehler beim Laden der Offers: {e}")
         return {
@@ -85,11 +103,10 @@ if __name__ == '__main__':
     print()
     
     # Prüfe ob Daten vorhanden sind
-    if os.path.exists('realistic_offers_frontend.json'):
-        print("✅ Realistische Offers gefunden")
-        with open('realistic_offers_frontend.json', 'r') as f:
-            data = json.load(f)
-            print(f"📊 {data.get('total_offers', 0)} Offers verfügbar")
+    pfad = erster_vorhandener(*OFFERS_DATEIEN)
+    if pfad:
+        print(f"✅ Realistische Offers gefunden ({pfad})")
+        print(f"📊 {sum(1 for _ in lese_snapshot(pfad))} Offers verfügbar")
     else:
         print("❌ Keine Offers-Datei gefunden")
         print("💡 Führe 'python3 create_realistic_offers.py' aus")
@@ -0,0 +1,484 @@
+"""
+Zentraler In-Memory Offer-Store
+Führt Angebote aus allen Quellen und Accounts zusammen (thread-safe) und hält
+Sekundär-Indizes für Filter, Sortierung und Keyset-Pagination vor. Intern liegen
+die Angebote als kompakte Angebot-Datensätze (angebot.py); nach außen gehen Dicts.
+
+Identität: jedes Angebot bekommt beim ersten Einfügen eine kanonische Kennung
+(canonical_id). Die IDs der Quellen (Trading-API, Sell-API, Studibuch- und
+Demo-Skripte vergeben jeweils eigene) werden als Aliase darauf abgebildet. Ein
+Angebot mit unbekannter ID, aber gleichem Account, Artikel, Käufer und Betrag
+ist dasselbe aus einer anderen Quelle und wird zusammengeführt, sofern beide
+offen sind oder eines aus einer Demo-/Skript-Quelle stammt (siehe dasselbe).
+Erneutes Synchronisieren legt damit keine Duplikate an, und eine Wiederholung im
+Status 'offen' macht eine bereits getroffene Entscheidung nicht rückgängig.
+"""
+import base64
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+
+from angebote.angebot import Angebot, AngebotStatus
+
+# Obergrenze für die Seitengröße von Abfragen
+MAX_LIMIT = 500
+DEFAULT_LIMIT = 100
+
+# Höchstzahl geänderter Angebote, die ein 'offers'-Event vollständig mitführt; bei
+# größeren Batches (Sync, Import) lädt der Client seine aktuelle Seite neu
+MAX_EVENT_ANGEBOTE = 20
+
+_ID_MAX = chr(0x10FFFF)
+
+# ID-Präfixe der Demo- und Skript-Quellen (simple_main sync-working und sync-single-item,
+# create_realistic_offers, create_studibuch_offers, get_real_studibuch_offers, load_demo_into_backend).
+# Trifft ein Angebot mit echter eBay-ID auf ein so erzeugtes, übernimmt es die echte ID.
+SYNTHETISCHE_PRAEFIXE = ('BO_SIMPLE_', 'BO_SINGLE_', 'bestOffer_', 'studibuch_', 'demo_bo_')
+
+# Status, in denen ein Angebot noch offen ist
+OFFENE_STATUS = frozenset((AngebotStatus.PENDING, AngebotStatus.COUNTERED, None))
+# Status nach einer Entscheidung (eBay öffnet ein so abgeschlossenes Angebot nicht wieder)
+ABGESCHLOSSENE_STATUS = frozenset((AngebotStatus.ACCEPTED, AngebotStatus.REJECTED,
+                                   AngebotStatus.EXPIRED, AngebotStatus.RETRACTED))
+
+
+def _status(angebot):
+    return angebot.status_wert
+
+
+def _betrag(angebot):
+    """Angebotsbetrag in Euro (0.0 ohne Betrag)"""
+    return (angebot.betrag_cent or 0) / 100
+
+
+def _erstellt(angebot):
+    """Erstellzeitpunkt als vergleichbarer ISO-String"""
+    return angebot.erstellt or ''
+
+
+def _hat_gegenangebot(angebot):
+    return bool(angebot.gegen_cent or angebot.gegen_nachricht or angebot.typ == 'counter')
+
+
+def quell_schluessel(angebot):
+    """Schlüssel unter der ID der Quelle: 'Account:eBay-Best-Offer-ID' (Fallback: id)"""
+    return '%s:%s' % (angebot.account or '', angebot.best_offer_id or angebot.id)
+
+
+def fingerabdruck(angebot):
+    """Inhalt, an dem ein Angebot quellübergreifend erkannt wird (None, wenn unvollständig)"""
+    if not angebot.item_id or not angebot.kaeufer or angebot.betrag_cent is None:
+        return None
+    return (angebot.account or '', str(angebot.item_id), str(angebot.kaeufer), angebot.betrag_cent)
+
+
+def synthetisch(angebot):
+    return str(angebot.best_offer_id or angebot.id).startswith(SYNTHETISCHE_PRAEFIXE)
+
+
+def dasselbe(bestehend, neu):
+    """
+    Gleicher Fingerabdruck heißt nur dann gleiches Angebot, wenn beide offen sind
+    (eBay lässt je Käufer und Artikel nur ein offenes zu) oder eines aus einer
+    Demo-/Skript-Quelle stammt; ein neues Angebot nach einem abgeschlossenen bleibt eigenständig.
+    """
+    if bestehend.status in OFFENE_STATUS and neu.status in OFFENE_STATUS:
+        return True
+    return synthetisch(bestehend) or synthetisch(neu)
+
+
+def _bis_grenze(bis):
+    """Obergrenze für 'bis' (ISO); ein reines Datum schließt den ganzen Tag ein"""
+    bis = bis.replace(' ', 'T')
+    if len(bis) == 10:
+        bis += 'T\uffff'
+    return bis
+
+
+# Filterbare Felder -> Wert aus dem Angebot
+INDEX_FELDER = {
+    'status': _status,
+    'item_id': lambda a: str(a.item_id or ''),
+    'buyer': lambda a: str(a.kaeufer or ''),
+    'rule': lambda a: str(a.regel or ''),
+    'account': lambda a: str(a.account or ''),
+    'counter': _hat_gegenangebot,
+}
+
+# Sortierbare Felder -> Sortwert
+SORT_FELDER = {
+    'created': _erstellt,
+    'amount': _betrag,
+}
+
+
+def encode_cursor(sortwert, key):
+    return base64.urlsafe_b64encode(json.dumps([sortwert, key]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    sortwert, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return sortwert, key
+
+
+def parse_abfrage(args):
+    """Übersetzt Query-Parameter (/api/offers?status=...&sort=...) in Abfrage-Argumente"""
+    status = args.get('status')
+    filter_ = {
+        'status': status if status not in (None, '', 'all', 'with_counters') else None,
+        'item_id': args.get('item_id') or args.get('item'),
+        'buyer': args.get('buyer'),
+        'rule': args.get('rule'),
+        'account': args.get('account'),
+        'counter': True if status == 'with_counters' else None,
+    }
+    sort = args.get('sort', '-created')
+    desc = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in SORT_FELDER:
+        raise ValueError(f'Unbekanntes Sortierfeld: {sort}')
+    limit = int(args.get('limit', DEFAULT_LIMIT))
+    return {
+        'filter': {k: v for k, v in filter_.items() if v is not None},
+        'von': args.get('from'),
+        'bis': args.get('to'),
+        'sort': sort,
+        'desc': desc,
+        'limit': max(1, min(limit, MAX_LIMIT)),
+        'cursor': args.get('cursor')
+    }
+
+
+class OfferStore:
+    def __init__(self, events=None):
+        """events: optionaler EventStream, der Änderungen und Statistik-Deltas erhält"""
+        self._lock = threading.RLock()
+        # canonical_id -> Angebot (Indizes, Sortlisten und Cursor verweisen ebenfalls auf
+        # die canonical_id: die id der Quelle ist über Accounts hinweg nicht eindeutig)
+        self._offers = {}
+        # id -> canonical_id für get(); behält frühere ids, wenn eine echte eBay-ID eine
+        # synthetische ersetzt hat (das Frontend kann noch die alte halten)
+        self._ids = {}
+        # quell_schluessel -> canonical_id (nur, wo beide verschieden sind)
+        self._aliase = {}
+        # fingerabdruck -> canonical_id des zuletzt indizierten Angebots mit diesem Inhalt
+        self._abdruecke = {}
+        # Angebote, die über Alias oder Inhalt einem vorhandenen zugeordnet wurden
+        self.duplikate = 0
+        # feld -> wert -> Menge von canonical_ids
+        self._index = {feld: defaultdict(set) for feld in INDEX_FELDER}
+        # feld -> sortierte Liste (sortwert, canonical_id)
+        self._sorted = {feld: [] for feld in SORT_FELDER}
+        self.status_counts = Counter()
+        self.events = events
+        # Funktionen, die neue und geänderte Datensätze erhalten (siehe beobachten)
+        self._beobachter = []
+        # Wird bei jeder Änderung erhöht (für Caches und Clients)
+        self.version = 0
+
+    @staticmethod
+    def offer_key(angebot):
+        """Eindeutiger Schlüssel: kanonische Kennung (vor dem Einfügen: Account + Best-Offer-ID)"""
+        return angebot.kennung or quell_schluessel(angebot)
+
+    def upsert_many(self, offers, account=None):
+        """
+        Fügt Angebote ein oder aktualisiert bestehende (Felder, die ein Update nicht
+        mitbringt, bleiben erhalten). Ein Batch wird in zwei Schritten verarbeitet:
+        erst alle Identitäten auflösen und Dubletten im Batch zusammenfassen, dann
+        jedes betroffene Angebot genau einmal schreiben und indizieren.
+        offers: Dicts beliebiger Quelle oder Angebot-Datensätze
+        account: Name des Seller-Accounts, mit dem die Angebote markiert werden
+        Gibt (neu, aktualisiert) zurück.
+        """
+        neu = 0
+        aktualisiert = 0
+        geaendert = []
+        neue_sortwerte = {feld: [] for feld in SORT_FELDER}
+        with self._lock:
+            stats_vorher = self.stats() if self.events else None
+            for key, angebot in self._aufloesen(offers, account).items():
+                bestehend = self._offers.get(key)
+                if bestehend is None:
+                    self._offers[key] = angebot
+                    self._ids[str(angebot.id)] = key
+                    self._indexiere(angebot)
+                    for feld, funktion in SORT_FELDER.items():
+                        neue_sortwerte[feld].append((funktion(angebot), key))
+                    geaendert.append(angebot)
+                    neu += 1
+                    continue
+                if angebot == bestehend:
+                    continue
+                zusammen = bestehend.zusammenfuehren(self._uebernahme(bestehend, angebot))
+                if zusammen != bestehend:
+                    self._entferne_index(bestehend)
+                    self._offers[key] = zusammen
+                    self._ids[str(zusammen.id)] = key
+                    self._indexiere(zusammen)
+                    for feld, funktion in SORT_FELDER.items():
+                        insort(self._sorted[feld], (funktion(zusammen), key))
+                    geaendert.append(zusammen)
+                    aktualisiert += 1
+            self._sortiere_ein(neue_sortwerte)
+            if neu or aktualisiert:
+                self.version += 1
+                for funktion in self._beobachter:
+                    funktion(geaendert)
+                if self.events:
+                    self._publish(geaendert, stats_vorher)
+        return neu, aktualisiert
+
+    def _aufloesen(self, offers, account):
+        """
+        Ordnet jedem eingehenden Angebot seine kanonische Kennung zu (mitgebrachte
+        canonical_id, Alias der Quell-ID, Fingerabdruck eines offenen Angebots oder
+        neu) und fasst mehrere Angebote mit derselben Kennung zusammen.
+        Gibt {canonical_id: Angebot} in Eingangsreihenfolge zurück.
+        """
+        stapel = {}
+        # Fingerabdrücke der im Batch neu angelegten Angebote
+        abdruecke = {}
+        for offer in offers:
+            angebot = Angebot.aus_dict(offer)
+            if angebot is offer:
+                # Übergebene Datensätze nicht verändern
+                angebot = angebot.zusammenfuehren(Angebot())
+            if account is not None:
+                angebot.account = account
+            if angebot.id is None:
+                angebot.id = f"{account}_{angebot.best_offer_id}" if account else angebot.best_offer_id
+            quelle = quell_schluessel(angebot)
+            key = angebot.kennung or self._aliase.get(quelle)
+            if key is None and (quelle in self._offers or quelle in stapel):
+                key = quelle
+            if key is None:
+                abdruck = fingerabdruck(angebot)
+                if abdruck is not None:
+                    key = abdruecke.get(abdruck) or self._abdruecke.get(abdruck)
+                    if key is not None and not dasselbe(stapel.get(key) or self._offers[key], angebot):
+                        key = None
+                if key is not None:
+                    self.duplikate += 1
+                else:
+                    key = quelle
+                    if abdruck is not None:
+                        abdruecke[abdruck] = key
+            else:
+                self.duplikate += key in stapel
+            angebot.kennung = key
+            if key != quelle:
+                self._aliase[quelle] = key
+            vorher = stapel.get(key)
+            stapel[key] = angebot if vorher is None else vorher.zusammenfuehren(self._uebernahme(vorher, angebot))
+        return stapel
+
+    @staticmethod
+    def _uebernahme(bestehend, neu):
+        """
+        Was neu beim Zusammenführen nicht überschreibt: bei abweichender Quell-ID die
+        bisherigen IDs, außer eine echte eBay-ID ersetzt eine synthetische (zum Antworten
+        braucht es die echte); einen abgeschlossenen Status ein offener (z.B. die
+        Wiederholung eines bereits angenommenen Angebots beim nächsten Sync).
+        """
+        if quell_schluessel(neu) != quell_schluessel(bestehend) and (not synthetisch(bestehend) or synthetisch(neu)):
+            neu.id = None
+            neu.best_offer_id = None
+        if bestehend.status in ABGESCHLOSSENE_STATUS and neu.status in OFFENE_STATUS:
+            neu.status = None
+        return neu
+
+    def beobachten(self, funktion):
+        """
+        Registriert funktion(datensaetze) für abgeleitete Strukturen (z.B. SpaltenTabelle):
+        erhält sofort alle vorhandenen Angebote und danach nach jedem Upsert die neuen
+        und geänderten, jeweils unter dem Store-Lock (keine Änderung geht verloren).
+        """
+        with self._lock:
+            self._beobachter.append(funktion)
+            if self._offers:
+                funktion(list(self._offers.values()))
+
+    def _indexiere(self, angebot):
+        for feld, funktion in INDEX_FELDER.items():
+            self._index[feld][funktion(angebot)].add(angebot.kennung)
+        self.status_counts[_status(angebot)] += 1
+        abdruck = fingerabdruck(angebot)
+        if abdruck is not None:
+            self._abdruecke[abdruck] = angebot.kennung
+
+    def _entferne_index(self, angebot):
+        """Entfernt ein Angebot aus allen Indizes (vor einer Aktualisierung)"""
+        for feld, funktion in INDEX_FELDER.items():
+            self._index[feld][funktion(angebot)].discard(angebot.kennung)
+        self.status_counts[_status(angebot)] -= 1
+        abdruck = fingerabdruck(angebot)
+        if abdruck is not None and self._abdruecke.get(abdruck) == angebot.kennung:
+            del self._abdruecke[abdruck]
+        for feld, funktion in SORT_FELDER.items():
+            liste = self._sorted[feld]
+            eintrag = (funktion(angebot), angebot.kennung)
+            pos = bisect_left(liste, eintrag)
+            if pos < len(liste) and liste[pos] == eintrag:
+                del liste[pos]
+
+    def _sortiere_ein(self, neue_sortwerte):
+        """Große Batches anhängen und einmal sortieren, kleine per insort"""
+        for feld, eintraege in neue_sortwerte.items():
+            liste = self._sorted[feld]
+            if len(eintraege) > len(liste) // 8:
+                liste.extend(eintraege)
+                liste.sort()
+            else:
+                for eintrag in eintraege:
+                    insort(liste, eintrag)
+
+    def _publish(self, geaendert, stats_vorher):
+        ereignis = {'version': self.version, 'count': len(geaendert)}
+        if len(geaendert) <= MAX_EVENT_ANGEBOTE:
+            ereignis['offers'] = [a.als_dict() for a in geaendert]
+        else:
+            ereignis['reload'] = True
+        self.events.publish('offers', ereignis)
+        stats = self.stats()
+        delta = {k: v - stats_vorher[k] for k, v in stats.items()
+                 if isinstance(v, int) and v != stats_vorher[k]}
+        self.events.publish('stats', {'version': self.version, 'stats': stats, 'delta': delta})
+
+    def stats(self):
+        """Kennzahlen aus den laufend gepflegten Status-Zählern (ohne Durchlauf aller Angebote)"""
+        with self._lock:
+            total = len(self._offers)
+            accepted = self.status_counts['accepted']
+            return {
+                'total_offers': total,
+                'pending_offers': self.status_counts['pending'],
+                'accepted_offers': accepted,
+                'rejected_offers': self.status_counts['rejected'],
+                'countered_offers': self.status_counts['countered'],
+                'unknown_offers': self.status_counts['unknown'],
+                'success_rate': round(accepted / max(total, 1) * 100, 1),
+                'merged_duplicates': self.duplikate
+            }
+
+    def abfragen(self, filter=None, von=None, bis=None, sort='created', desc=True, limit=DEFAULT_LIMIT, cursor=None):
+        """
+        Gefilterte, sortierte Seite von Angeboten (Keyset-Pagination).
+        filter: {feld: wert} für Felder aus INDEX_FELDER
+        von/bis: Zeitraum auf dem Erstelldatum (ISO)
+        cursor: next_cursor der vorherigen Seite
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        with self._lock:
+            kandidaten = self._kandidaten(filter or {})
+            von = von.replace(' ', 'T') if von else None
+            bis = _bis_grenze(bis) if bis else None
+
+            if kandidaten is not None and len(kandidaten) * 16 < len(self._offers):
+                # Wenige Treffer: direkt die Kandidaten sortieren
+                funktion = SORT_FELDER[sort]
+                liste = sorted((funktion(self._offers[k]), k) for k in kandidaten)
+                kandidaten = None
+            else:
+                liste = self._sorted[sort]
+
+            lo, hi = 0, len(liste)
+            zeitfilter = None
+            if von or bis:
+                if sort == 'created':
+                    if von:
+                        lo = bisect_left(liste, (von,))
+                    if bis:
+                        hi = bisect_right(liste, (bis, _ID_MAX))
+                else:
+                    zeitfilter = (von or '', bis or _ID_MAX)
+
+            def passt(key):
+                if kandidaten is not None and key not in kandidaten:
+                    return False
+                if zeitfilter:
+                    return zeitfilter[0] <= _erstellt(self._offers[key]) <= zeitfilter[1]
+                return True
+
+            if von or bis:
+                total = sum(1 for _, key in liste[lo:hi] if passt(key))
+            else:
+                total = len(kandidaten) if kandidaten is not None else len(liste)
+
+            if cursor:
+                position = tuple(decode_cursor(cursor))
+                if desc:
+                    hi = min(hi, bisect_left(liste, position))
+                else:
+                    lo = max(lo, bisect_right(liste, position))
+
+            indizes = range(hi - 1, lo - 1, -1) if desc else range(lo, hi)
+            seite = []
+            letzter = None
+            next_cursor = None
+            for i in indizes:
+                sortwert, key = liste[i]
+                if not passt(key):
+                    continue
+                if len(seite) == limit:
+                    # Es gibt weitere Treffer: Cursor zeigt auf das letzte Element der Seite
+                    next_cursor = encode_cursor(*letzter)
+                    break
+                seite.append(self._offers[key].als_dict())
+                letzter = (sortwert, key)
+
+        return {'offers': seite, 'next_cursor': next_cursor, 'total': total, 'limit': limit}
+
+    def _kandidaten(self, filter):
+        """Schnittmenge der Index-Treffer (None = keine Einschränkung)"""
+        mengen = []
+        for feld, wert in filter.items():
+            if feld not in self._index:
+                raise ValueError(f'Unbekanntes Filterfeld: {feld}')
+            if feld == 'status':
+                wert = AngebotStatus.streng(wert).value
+            mengen.append(self._index[feld].get(wert, set()))
+        if not mengen:
+            return None
+        mengen.sort(key=len)
+        return set(mengen[0]).intersection(*mengen[1:])
+
+    def get(self, offer_id):
+        """Kopie des Angebots (über id, canonical_id oder eine ersetzte id) als Dict (None, wenn unbekannt)"""
+        offer_id = str(offer_id)
+        with self._lock:
+            angebot = self._offers.get(self._ids.get(offer_id)) or self._offers.get(offer_id)
+        return angebot.als_dict() if angebot is not None else None
+
+    def alle(self, account=None):
+        """Kopien aller Angebote (optional nur eines Accounts)"""
+        with self._lock:
+            if account is None:
+                return [a.als_dict() for a in self._offers.values()]
+            return [self._offers[k].als_dict() for k in self._index['account'].get(account, ())]
+
+    def iter_datensaetze(self, batch=1000):
+        """
+        Alle Angebot-Datensätze in Häppchen (unveränderlich, daher ohne Kopie; ihre
+        gecachte JSON-Zeile macht Exporte und Snapshots billig). Der Lock wird nur
+        pro Häppchen gehalten; zwischenzeitlich entfernte Angebote fehlen.
+        """
+        with self._lock:
+            keys = list(self._offers)
+        for start in range(0, len(keys), batch):
+            with self._lock:
+                teil = [a for a in map(self._offers.get, keys[start:start + batch]) if a is not None]
+            yield from teil
+
+    def iter_alle(self, batch=1000):
+        """Kopien aller Angebote als Dicts in Häppchen (siehe iter_datensaetze)"""
+        for angebot in self.iter_datensaetze(batch):
+            yield angebot.als_dict()
+
+    def accounts(self):
+        with self._lock:
+            return sorted(a for a, ids in self._index['account'].items() if a and ids)
+
+    def __len__(self):
+        return len(self._offers)
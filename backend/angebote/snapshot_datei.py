@@ -0,0 +1,255 @@
+"""
+Streaming-Snapshots für Angebotsbestände (NDJSON)
+Erste Zeile ist ein Header-Datensatz, danach folgt ein Angebot pro Zeile und am
+Ende ein Abschluss-Datensatz mit Anzahl und nachträglich berechneten Kennzahlen.
+Schreiben und Lesen laufen zeilenweise, der Speicherbedarf hängt also nicht von
+der Größe des Bestands ab. Endet der Pfad auf .gz, wird gzip-komprimiert.
+
+    {"_snapshot": {"format": "ebay-bot-offers", "version": 1, "created_at": ..., "source": ..., "metadata": {...}}}
+    {"id": "...", "offer_amount": ..., ...}
+    {"_snapshot_end": {"total_offers": 8, "metadata": {...}}}
+
+Alte JSON-Dateien ({"offers": [...]}) werden beim Lesen weiterhin erkannt.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+FORMAT = 'ebay-bot-offers'
+VERSION = 1
+HEADER_FELD = '_snapshot'
+ENDE_FELD = '_snapshot_end'
+
+
+def _oeffnen(pfad, modus, komprimiert=None):
+    if komprimiert is None:
+        komprimiert = str(pfad).endswith('.gz')
+    if komprimiert:
+        return gzip.open(pfad, modus + 't', encoding='utf-8')
+    return open(pfad, modus, encoding='utf-8')
+
+
+def _zeile(datensatz):
+    if hasattr(datensatz, 'als_json'):
+        # Angebot-Datensatz (angebot.py) bringt seine JSON-Zeile gecacht mit
+        return datensatz.als_json()
+    return json.dumps(datensatz, ensure_ascii=False, separators=(',', ':'))
+
+
+def header_zeile(source=None, metadata=None):
+    """Header-Datensatz als fertige NDJSON-Zeile (auch für gestreamte HTTP-Antworten)"""
+    return _zeile({HEADER_FELD: {
+        'format': FORMAT,
+        'version': VERSION,
+        'created_at': datetime.now().isoformat(),
+        'source': source,
+        'metadata': metadata or {}
+    }}) + '\n'
+
+
+def ende_zeile(anzahl, metadata=None):
+    return _zeile({ENDE_FELD: {'total_offers': anzahl, 'metadata': metadata or {}}}) + '\n'
+
+
+def angebots_zeile(offer):
+    return _zeile(offer) + '\n'
+
+
+class SnapshotWriter:
+    """
+    Schreibt einen Snapshot inkrementell. Die Datei entsteht zunächst als
+    Temp-Datei und ersetzt das Ziel erst beim Schließen (atomar); bei einer
+    Exception im with-Block bleibt das alte Ziel unverändert.
+    metadata: Angaben für den Header; ende: Kennzahlen für den Abschluss-Datensatz,
+    die erst während des Schreibens feststehen (per writer.ende.update()).
+    """
+
+    def __init__(self, pfad, source=None, metadata=None, batch=1000):
+        self.pfad = pfad
+        self.source = source
+        self.metadata = metadata or {}
+        self.ende = {}
+        self.batch = batch
+        self.anzahl = 0
+        self._tmp = f'{pfad}.{os.getpid()}.tmp'
+        self._datei = None
+        self._puffer = []
+
+    def __enter__(self):
+        self.oeffnen()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.schliessen()
+        else:
+            self.abbrechen()
+        return False
+
+    def oeffnen(self):
+        self._geoeffnet = True
+        self._datei = _oeffnen(self._tmp, 'w', komprimiert=str(self.pfad).endswith('.gz'))
+        self._datei.write(header_zeile(self.source, self.metadata))
+
+    def schreibe(self, offer):
+        self._puffer.append(_zeile(offer))
+        self.anzahl += 1
+        if len(self._puffer) >= self.batch:
+            self._leeren()
+
+    def schreibe_viele(self, offers):
+        for offer in offers:
+            self.schreibe(offer)
+        return self.anzahl
+
+    def _leeren(self):
+        if self._puffer:
+            self._datei.write('\n'.join(self._puffer) + '\n')
+            self._puffer.clear()
+
+    def schliessen(self):
+        self._leeren()
+        self._datei.write(ende_zeile(self.anzahl, self.ende))
+        self._datei.close()
+        self._datei = None
+        os.replace(self._tmp, self.pfad)
+
+    def abbrechen(self):
+        if self._datei is not None:
+            self._datei.close()
+            self._datei = None
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
+
+
+def schreibe_snapshot(pfad, offers, source=None, metadata=None):
+    """Schreibt ein Iterable von Angeboten als Snapshot; gibt die Anzahl zurück"""
+    with SnapshotWriter(pfad, source=source, metadata=metadata) as writer:
+        return writer.schreibe_viele(offers)
+
+
+class SnapshotLeser:
+    """
+    Liest einen Snapshot lazy: header ist nach dem Öffnen verfügbar, die Angebote
+    kommen beim Iterieren zeilenweise, ende nach vollständigem Durchlauf (None,
+    wenn der Abschluss fehlt, z.B. bei abgebrochenem Schreiben).
+    Alte JSON-Dateien werden komplett geladen und genauso bereitgestellt.
+    """
+
+    def __init__(self, pfad):
+        """pfad: Dateipfad oder bereits geöffnetes Text-Objekt (z.B. Request-Body)"""
+        self.pfad = pfad
+        self.header = {}
+        self.ende = None
+        self.legacy = False
+        self._datei = None
+        self._geoeffnet = False
+        self._erste = None
+        self._legacy_offers = None
+
+    def __enter__(self):
+        if not self._geoeffnet:
+            self.oeffnen()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.schliessen()
+        return False
+
+    def oeffnen(self):
+        self._geoeffnet = True
+        self._datei = _oeffnen(self.pfad, 'r') if isinstance(self.pfad, (str, os.PathLike)) else self.pfad
+        erste = self._datei.readline()
+        try:
+            datensatz = json.loads(erste) if erste.strip() else None
+        except json.JSONDecodeError:
+            datensatz = None
+        if isinstance(datensatz, dict) and HEADER_FELD in datensatz:
+            self.header = datensatz[HEADER_FELD]
+        elif isinstance(datensatz, dict) and 'offers' not in datensatz:
+            # NDJSON ohne Header: erste Zeile ist bereits ein Angebot
+            self._erste = datensatz
+        else:
+            # Alte (eingerückte) JSON-Datei
+            rest = erste + self._datei.read()
+            daten = json.loads(rest) if rest.strip() else {}
+            self._datei.close()
+            self._datei = None
+            if not isinstance(daten, dict) or not isinstance(daten.get('offers', []), list):
+                raise ValueError('Kein Snapshot: erwartet NDJSON-Angebote oder {"offers": [...]}')
+            self.legacy = True
+            self._legacy_offers = daten.pop('offers', [])
+            self.header = daten
+            self.ende = {'total_offers': len(self._legacy_offers), 'metadata': daten.get('metadata', {})}
+        return self
+
+    def schliessen(self):
+        if self._datei is not None:
+            self._datei.close()
+            self._datei = None
+
+    def __iter__(self):
+        if not self._geoeffnet:
+            self.oeffnen()
+        if self.legacy:
+            for nummer, datensatz in enumerate(self._legacy_offers, 1):
+                if not isinstance(datensatz, dict):
+                    raise ValueError(f'Angebot {nummer}: kein JSON-Objekt')
+                yield datensatz
+            return
+        if self._datei is None:
+            return
+        # Zeilennummer in der Datei (Header bzw. erstes Angebot ist Zeile 1)
+        nummer = 1
+        if self._erste is not None:
+            yield self._erste
+            self._erste = None
+        for zeile in self._datei:
+            nummer += 1
+            if not zeile.strip():
+                continue
+            try:
+                datensatz = json.loads(zeile)
+            except ValueError as e:
+                raise ValueError(f'Zeile {nummer}: ungültiges JSON ({e})') from None
+            if not isinstance(datensatz, dict):
+                raise ValueError(f'Zeile {nummer}: kein JSON-Objekt')
+            if ENDE_FELD in datensatz:
+                self.ende = datensatz[ENDE_FELD]
+                continue
+            yield datensatz
+        self.schliessen()
+
+    @property
+    def metadata(self):
+        """Header-Metadaten, ergänzt um die Kennzahlen aus dem Abschluss"""
+        metadata = dict(self.header.get('metadata') or {})
+        if self.ende:
+            metadata.update(self.ende.get('metadata') or {})
+        return metadata
+
+
+def lese_snapshot(pfad):
+    return SnapshotLeser(pfad).oeffnen()
+
+
+def in_batches(iterable, groesse=1000):
+    """Zerlegt ein Iterable in Listen fester Größe (z.B. für OfferStore.upsert_many)"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, groesse))
+        if not batch:
+            return
+        yield batch
+
+
+def erster_vorhandener(*pfade):
+    """Erster existierender Pfad (neuer Snapshot vor alter JSON-Datei), sonst None"""
+    for pfad in pfade:
+        if pfad and os.path.exists(pfad):
+            return pfad
+    return None
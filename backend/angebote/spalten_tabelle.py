@@ -0,0 +1,391 @@
+"""
+Spalten-Tabelle für Auswertungen über die gesamte Angebots-Historie
+Hält je Angebot eine Zeile in Spalten-Arrays (Beträge in Cent, Erstelltag, Texte
+wie Regel, Käufer oder Kategorie als Wörterbuch-Codes) und bleibt über
+OfferStore.beobachten() mit dem Store synchron. Gruppierte Kennzahlen nach
+Regel, Status, Tag/Woche/Monat, Kategorie, Käufer oder Account rechnet NumPy mit
+bincount über die ganzen Spalten statt einer Python-Schleife über Dicts.
+
+Ohne NumPy liegen die Spalten in array.array und werden in Python aggregiert
+(gleiche Ergebnisse, nur langsamer).
+"""
+import threading
+from array import array
+from datetime import date
+
+from angebote.angebot import AngebotStatus
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+STATUS_WERTE = tuple(s.value for s in AngebotStatus)
+_STATUS_CODE = {wert: code for code, wert in enumerate(STATUS_WERTE)}
+
+# Spalte -> array-Typcode (NumPy: int64 / float64 / int32 / int8)
+SPALTEN = (
+    ('betrag', 'q'),
+    ('listenpreis', 'q'),
+    # Angebot / Listenpreis (0.0 ohne Listenpreis), beim Schreiben statt bei jeder Abfrage gerechnet
+    ('anteil', 'd'),
+    ('status', 'b'),
+    ('tag', 'i'),
+    ('monat', 'i'),
+    ('regel', 'i'),
+    ('kategorie', 'i'),
+    ('kaeufer', 'i'),
+    ('account', 'i'),
+)
+_NUMPY_TYP = {'q': 'int64', 'd': 'float64', 'i': 'int32', 'b': 'int8'}
+_INDEX = {name: i for i, (name, _) in enumerate(SPALTEN)}
+_WOERTERBUECHER = ('regel', 'kategorie', 'kaeufer', 'account')
+
+# Gruppierung (Name in der API) -> Spalte
+DIMENSIONEN = {
+    'rule': 'regel',
+    'status': 'status',
+    'day': 'tag',
+    'week': 'tag',
+    'month': 'monat',
+    'category': 'kategorie',
+    'buyer': 'kaeufer',
+    'account': 'account',
+}
+
+# Filter (Name in der API) -> Wörterbuch-Spalte
+FILTER = {
+    'rule': 'regel',
+    'category': 'kategorie',
+    'buyer': 'kaeufer',
+    'account': 'account',
+}
+
+SORTIERUNG = ('key', 'offers', 'amount', 'success_rate')
+# Kennzahl -> Sortwert aus den Rohwerten einer Gruppe (anzahl, summe_cent, ..., *status)
+_SORTWERT = {
+    'offers': lambda werte: werte[0],
+    'amount': lambda werte: werte[1],
+    'success_rate': lambda werte: werte[4 + _STATUS_CODE['accepted']] / max(werte[0], 1),
+}
+
+# Schlüssel im extra-Teil eines Angebots, unter denen die Kategorie steht
+KATEGORIE_SCHLUESSEL = ('category', 'category_name', 'category_id')
+
+# Bis zu dieser Zahl möglicher Gruppen wird direkt per bincount gezählt, darüber per unique
+_MAX_DIREKT = 1 << 24
+
+
+def kategorie(angebot):
+    extra = angebot.extra
+    if not extra:
+        return None
+    for schluessel in KATEGORIE_SCHLUESSEL:
+        if extra.get(schluessel):
+            return extra[schluessel]
+    return None
+
+
+def _woche(tag):
+    """Montag der Woche (proleptischer Ordinaltag, 1 = Montag 01.01.0001)"""
+    return tag - (tag - 1) % 7 if tag > 0 else 0
+
+
+def _tag_aus_iso(text):
+    return date.fromisoformat(text[:10]).toordinal() if text else 0
+
+
+class _Woerterbuch:
+    """Dictionary-Kodierung: Text -> fortlaufender Code (0 = leer)"""
+
+    def __init__(self):
+        self.werte = ['']
+        self._codes = {'': 0}
+
+    def code(self, wert):
+        wert = '' if wert is None else str(wert)
+        code = self._codes.get(wert)
+        if code is None:
+            code = self._codes[wert] = len(self.werte)
+            self.werte.append(wert)
+        return code
+
+    def suche(self, wert):
+        return self._codes.get(str(wert))
+
+
+class SpaltenTabelle:
+    def __init__(self, store=None):
+        """store: OfferStore, dessen Angebote übernommen und laufend nachgeführt werden"""
+        self._lock = threading.Lock()
+        # OfferStore.offer_key -> Zeile
+        self._zeilen = {}
+        self._anzahl = 0
+        self._woerterbuecher = {name: _Woerterbuch() for name in _WOERTERBUECHER}
+        # Erstelldatum (YYYY-MM-DD) -> (tag, monat)
+        self._daten = {}
+        if numpy is not None:
+            self._spalten = {name: numpy.zeros(1024, dtype=_NUMPY_TYP[typ]) for name, typ in SPALTEN}
+        else:
+            self._spalten = {name: array(typ) for name, typ in SPALTEN}
+        self.abfragen = 0
+        if store is not None:
+            self._key = store.offer_key
+            store.beobachten(self.aktualisiere)
+        else:
+            from angebote.offer_store import OfferStore
+            self._key = OfferStore.offer_key
+
+    @property
+    def backend(self):
+        return 'numpy' if numpy is not None else 'python'
+
+    def __len__(self):
+        return self._anzahl
+
+    def _datum(self, erstellt):
+        tag = erstellt[:10] if erstellt else ''
+        werte = self._daten.get(tag)
+        if werte is None:
+            try:
+                d = date.fromisoformat(tag)
+                werte = (d.toordinal(), d.year * 12 + d.month - 1)
+            except ValueError:
+                werte = (0, 0)
+            self._daten[tag] = werte
+        return werte
+
+    def _werte(self, angebot):
+        """Zeile in der Reihenfolge von SPALTEN"""
+        tag, monat = self._datum(angebot.erstellt)
+        w = self._woerterbuecher
+        betrag = angebot.betrag_cent or 0
+        listenpreis = angebot.listenpreis_cent or 0
+        return (betrag, listenpreis, betrag / listenpreis if listenpreis > 0 else 0.0, _STATUS_CODE[angebot.status_wert],
+                tag, monat, w['regel'].code(angebot.regel), w['kategorie'].code(kategorie(angebot)),
+                w['kaeufer'].code(angebot.kaeufer), w['account'].code(angebot.account))
+
+    def aktualisiere(self, angebote):
+        """Übernimmt neue und geänderte Angebot-Datensätze (Beobachter des OfferStore)"""
+        with self._lock:
+            zeilen = []
+            werte = []
+            for angebot in angebote:
+                key = self._key(angebot)
+                zeile = self._zeilen.get(key)
+                if zeile is None:
+                    zeile = self._zeilen[key] = len(self._zeilen)
+                zeilen.append(zeile)
+                werte.append(self._werte(angebot))
+            if not zeilen:
+                return
+            spalten = zip(*werte)
+            anzahl = max(self._anzahl, max(zeilen) + 1)
+            # Reiner Anhang (der Normalfall beim Laden): Block statt einzelner Zeilen schreiben
+            anhang = zeilen[0] == self._anzahl and zeilen[-1] == anzahl - 1 and len(zeilen) == anzahl - self._anzahl
+            if numpy is not None:
+                self._reserviere(anzahl)
+                ziel = slice(self._anzahl, anzahl) if anhang else numpy.asarray(zeilen)
+                for (name, _), spalte in zip(SPALTEN, spalten):
+                    self._spalten[name][ziel] = spalte
+            else:
+                for (name, typ), spalte in zip(SPALTEN, spalten):
+                    daten = self._spalten[name]
+                    if anhang:
+                        daten.extend(spalte)
+                        continue
+                    if len(daten) < anzahl:
+                        daten.extend(array(typ, bytes(daten.itemsize * (anzahl - len(daten)))))
+                    for zeile, wert in zip(zeilen, spalte):
+                        daten[zeile] = wert
+            self._anzahl = anzahl
+
+    def _reserviere(self, anzahl):
+        """Kapazität der NumPy-Spalten verdoppeln, bis anzahl Zeilen passen"""
+        kapazitaet = len(self._spalten['betrag'])
+        if anzahl <= kapazitaet:
+            return
+        while kapazitaet < anzahl:
+            kapazitaet *= 2
+        for name, typ in SPALTEN:
+            neu = numpy.zeros(kapazitaet, dtype=_NUMPY_TYP[typ])
+            neu[:self._anzahl] = self._spalten[name][:self._anzahl]
+            self._spalten[name] = neu
+
+    def gruppiere(self, nach=('status',), filter=None, von=None, bis=None, sort='key', desc=False, limit=None):
+        """
+        Kennzahlen je Gruppe: Anzahl, Status-Verteilung, Erfolgsquote, Summe und Schnitt
+        der Beträge, durchschnittlicher Anteil am Listenpreis.
+        nach: Dimensionen aus DIMENSIONEN (z.B. ('rule', 'week'))
+        filter: {name: wert} für status und die Felder aus FILTER
+        von/bis: Zeitraum auf dem Erstelldatum (ISO, Tagesgenau, einschließlich)
+        sort: 'key' (Gruppenwerte) oder eine Kennzahl aus SORTIERUNG
+        """
+        nach = tuple(nach)
+        if not nach:
+            raise ValueError('Mindestens eine Gruppierung erforderlich')
+        for dimension in nach:
+            if dimension not in DIMENSIONEN:
+                raise ValueError(f'Unbekannte Gruppierung: {dimension}')
+        if sort not in SORTIERUNG:
+            raise ValueError(f'Unbekanntes Sortierfeld: {sort}')
+        with self._lock:
+            self.abfragen += 1
+            bedingungen = self._bedingungen(filter or {}, von, bis)
+            if bedingungen is None:
+                gruppen = []
+            elif numpy is not None:
+                gruppen = self._gruppiere_numpy(nach, bedingungen)
+            else:
+                gruppen = self._gruppiere_python(nach, bedingungen)
+            if sort != 'key':
+                # Nach Kennzahl schon auf den Rohwerten sortieren und kürzen (spart Dicts bei vielen Gruppen)
+                gruppen.sort(key=lambda g: _SORTWERT[sort](g[1]), reverse=desc)
+                if limit:
+                    gruppen = gruppen[:limit]
+            ergebnis = [self._gruppe(nach, schluessel, werte) for schluessel, werte in gruppen]
+
+        if sort == 'key':
+            ergebnis.sort(key=lambda g: tuple('' if g[d] is None else str(g[d]) for d in nach), reverse=desc)
+        return ergebnis[:limit] if limit else ergebnis
+
+    def _bedingungen(self, filter, von, bis):
+        """(spalte, code) für Gleichheit sowie Tagesgrenzen; None, wenn nichts passen kann"""
+        gleich = []
+        for name, wert in filter.items():
+            if name == 'status':
+                gleich.append(('status', _STATUS_CODE[AngebotStatus.streng(wert).value]))
+            elif name in FILTER:
+                code = self._woerterbuecher[FILTER[name]].suche(wert)
+                if code is None:
+                    return None
+                gleich.append((FILTER[name], code))
+            else:
+                raise ValueError(f'Unbekanntes Filterfeld: {name}')
+        return gleich, _tag_aus_iso(von), _tag_aus_iso(bis)
+
+    def _beschriftung(self, dimension, code):
+        if dimension == 'status':
+            return STATUS_WERTE[code]
+        if dimension == 'day':
+            return date.fromordinal(code).isoformat() if code else None
+        if dimension == 'week':
+            if not code:
+                return None
+            jahr, woche, _ = date.fromordinal(code).isocalendar()
+            return f'{jahr}-W{woche:02d}'
+        if dimension == 'month':
+            return f'{code // 12:04d}-{code % 12 + 1:02d}' if code else None
+        return self._woerterbuecher[DIMENSIONEN[dimension]].werte[code] or None
+
+    def _gruppe(self, nach, schluessel, werte):
+        anzahl, summe, anteil_summe, anteil_anzahl = werte[:4]
+        status = dict(zip(STATUS_WERTE, werte[4:]))
+        gruppe = {dimension: self._beschriftung(dimension, code) for dimension, code in zip(nach, schluessel)}
+        gruppe.update({
+            'offers': anzahl,
+            **status,
+            'success_rate': round(status['accepted'] / max(anzahl, 1) * 100, 1),
+            'total_amount': round(summe / 100, 2),
+            'avg_amount': round(summe / max(anzahl, 1) / 100, 2),
+            'avg_percent_of_list': round(anteil_summe / anteil_anzahl * 100, 1) if anteil_anzahl else None,
+        })
+        return gruppe
+
+    def _gruppiere_numpy(self, nach, bedingungen):
+        """Liste (schlüssel-codes, [anzahl, summe_cent, anteil_summe, anteil_anzahl, *status])"""
+        gleich, von, bis = bedingungen
+        n = self._anzahl
+        spalten = {name: daten[:n] for name, daten in self._spalten.items()}
+        maske = None
+        for name, code in gleich:
+            treffer = spalten[name] == code
+            maske = treffer if maske is None else maske & treffer
+        if von or bis:
+            tag = spalten['tag']
+            treffer = (tag >= von) & (tag <= bis) if von and bis else (tag >= von if von else tag <= bis)
+            maske = treffer if maske is None else maske & treffer
+        benoetigt = {'betrag', 'listenpreis', 'anteil', 'status'} | {DIMENSIONEN[d] for d in nach}
+        spalten = {name: spalten[name] if maske is None else spalten[name][maske] for name in benoetigt}
+        if not len(spalten['betrag']):
+            return []
+
+        schluessel = []
+        for dimension in nach:
+            werte = spalten[DIMENSIONEN[dimension]].astype('int64')
+            if dimension == 'week':
+                werte = numpy.where(werte > 0, werte - (werte - 1) % 7, 0)
+            schluessel.append(werte)
+
+        minima = [int(s.min()) for s in schluessel]
+        groessen = [int(s.max()) - m + 1 for s, m in zip(schluessel, minima)]
+        moeglich = 1
+        for groesse in groessen:
+            moeglich *= groesse
+        if moeglich <= _MAX_DIREKT:
+            # Gruppen-Nummer direkt aus den Codes (gemischte Basis), leere Gruppen danach verwerfen
+            nummer = schluessel[0] - minima[0]
+            for s, m, groesse in zip(schluessel[1:], minima[1:], groessen[1:]):
+                nummer = nummer * groesse + (s - m)
+            anzahl_gruppen = moeglich
+        else:
+            # Zu viele mögliche Kombinationen: Codes je Dimension verdichten (sortiert, n log n)
+            nummer = numpy.zeros(len(schluessel[0]), dtype='int64')
+            for s in schluessel:
+                werte, inverse = numpy.unique(s, return_inverse=True)
+                _, nummer = numpy.unique(nummer * len(werte) + inverse, return_inverse=True)
+            anzahl_gruppen = int(nummer.max()) + 1
+
+        anzahl = numpy.bincount(nummer, minlength=anzahl_gruppen)
+        belegt = numpy.flatnonzero(anzahl)
+        summe = numpy.bincount(nummer, weights=spalten['betrag'], minlength=anzahl_gruppen)
+        anteil_summe = numpy.bincount(nummer, weights=spalten['anteil'], minlength=anzahl_gruppen)
+        anteil_anzahl = numpy.bincount(nummer, weights=spalten['listenpreis'] > 0, minlength=anzahl_gruppen)
+        status = numpy.bincount(nummer * len(STATUS_WERTE) + spalten['status'],
+                                minlength=anzahl_gruppen * len(STATUS_WERTE)).reshape(anzahl_gruppen, len(STATUS_WERTE))
+
+        # Schlüssel-Codes je belegter Gruppe aus einer beliebigen Zeile der Gruppe
+        zeile = numpy.empty(anzahl_gruppen, dtype='int64')
+        zeile[nummer] = numpy.arange(len(nummer))
+        zeile = zeile[belegt]
+        codes = zip(*(s[zeile].tolist() for s in schluessel))
+        werte = zip(anzahl[belegt].tolist(), summe[belegt].tolist(), anteil_summe[belegt].tolist(),
+                    anteil_anzahl[belegt].astype('int64').tolist(), *status[belegt].T.tolist())
+        return list(zip(codes, werte))
+
+    def _gruppiere_python(self, nach, bedingungen):
+        gleich, von, bis = bedingungen
+        indizes = [_INDEX[DIMENSIONEN[d]] for d in nach]
+        woche = [d == 'week' for d in nach]
+        filter_indizes = [(_INDEX[name], code) for name, code in gleich]
+        i_tag, i_status = _INDEX['tag'], _INDEX['status']
+        status_anzahl = len(STATUS_WERTE)
+        gruppen = {}
+        for zeile in zip(*(self._spalten[name] for name, _ in SPALTEN)):
+            if any(zeile[i] != code for i, code in filter_indizes):
+                continue
+            tag = zeile[i_tag]
+            if (von and tag < von) or (bis and tag > bis):
+                continue
+            schluessel = tuple(_woche(zeile[i]) if w else zeile[i] for i, w in zip(indizes, woche))
+            werte = gruppen.get(schluessel)
+            if werte is None:
+                werte = gruppen[schluessel] = [0, 0, 0.0, 0] + [0] * status_anzahl
+            werte[0] += 1
+            werte[1] += zeile[0]
+            if zeile[1] > 0:
+                werte[2] += zeile[2]
+                werte[3] += 1
+            werte[4 + zeile[i_status]] += 1
+        return list(gruppen.items())
+
+    def get_status(self):
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'rows': self._anzahl,
+                'rules': len(self._woerterbuecher['regel'].werte) - 1,
+                'buyers': len(self._woerterbuecher['kaeufer'].werte) - 1,
+                'categories': len(self._woerterbuecher['kategorie'].werte) - 1,
+                'queries': self.abfragen,
+            }
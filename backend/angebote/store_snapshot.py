@@ -0,0 +1,219 @@
+"""
+Abgleich des OfferStores zwischen mehreren Worker-Prozessen
+Die gemeinsame Datei ist ein Änderungs-Journal (NDJSON): jeder Worker hängt nur
+die Angebote an, die sich bei ihm seit dem letzten Abgleich geändert haben, und
+liest nur die Zeilen, die seit seinem letzten Lesen dazugekommen sind. Anhängen
+und Lesen laufen unter einer Dateisperre, die Reihenfolge im Journal ist daher
+die globale Reihenfolge: pro Angebot gilt die zuletzt geschriebene Zeile.
+
+    {"writer": "<pid>-<zufall>", "offer": {...}}
+
+Übersteigt das Journal ein Vielfaches der Angebote, verdichtet es der gerade
+abgleichende Worker aus der Datei selbst (nicht aus seinem Speicher) auf die
+letzte Zeile je Angebot; die anderen erkennen die neue Datei am Inode und lesen
+sie einmal vollständig. Zeilen ohne "writer" (alte Snapshot-Dateien) werden wie
+fremde Änderungen übernommen.
+"""
+import json
+import os
+import threading
+import logging
+import uuid
+
+from angebote.snapshot_datei import HEADER_FELD, ENDE_FELD
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: nur Einzelprozess-Betrieb (waitress), keine Sperre nötig
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Verdichten, sobald das Journal so viele Zeilen mehr als Angebote hat
+VERDICHTEN_AB = 10000
+
+# Angebote je upsert_many beim Übernehmen
+BATCH = 5000
+
+
+def _journal_zeile(writer, angebot):
+    return '{"writer":%s,"offer":%s}\n' % (json.dumps(writer), angebot.als_json())
+
+
+def _schluessel(offer):
+    """Schlüssel einer Journal-Zeile wie OfferStore.offer_key (canonical_id, sonst Account + Quell-ID)"""
+    return offer.get('canonical_id') or '%s:%s' % (offer.get('account') or '', offer.get('best_offer_id') or offer.get('id'))
+
+
+class StoreSnapshot:
+    def __init__(self, store, pfad, intervall_sekunden=2.0):
+        """
+        store: OfferStore des eigenen Prozesses
+        pfad: gemeinsames Journal aller Worker
+        """
+        self.store = store
+        self.pfad = pfad
+        self.intervall_sekunden = intervall_sekunden
+        self._lock_pfad = pfad + '.lock'
+        self.writer = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        # Eigene, noch nicht geschriebene Änderungen: offer_key -> Angebot
+        self._offen = {}
+        self._offen_lock = threading.Lock()
+        # Thread, der gerade fremde Änderungen übernimmt (die sind nicht "eigene")
+        self._uebernahme_thread = None
+        # (Inode, Byte-Position) bis wohin das Journal gelesen ist
+        self._inode = None
+        self._position = 0
+        self._zeilen = 0
+        self._stop = threading.Event()
+        self._thread = None
+        # Der Anfangsbestand (aus der lokalen Snapshot-Datei) ist in allen Workern gleich
+        store.beobachten(self._vormerken)
+        self._offen.clear()
+
+    def _vormerken(self, angebote):
+        """Beobachter des OfferStore: merkt eigene Änderungen für das nächste Anhängen vor"""
+        if threading.get_ident() == self._uebernahme_thread:
+            return
+        key = self.store.offer_key
+        with self._offen_lock:
+            for angebot in angebote:
+                self._offen[key(angebot)] = angebot
+
+    def abgleichen(self):
+        """
+        Übernimmt fremde Änderungen aus dem Journal und hängt eigene an.
+        Gibt (uebernommen, geschrieben) zurück.
+        """
+        # Eigene Änderungen vor dem Lesen abholen: was währenddessen dazukommt, geht in den nächsten Abgleich
+        with self._offen_lock:
+            eigene, self._offen = self._offen, {}
+        try:
+            with open(self._lock_pfad, 'a') as lock_datei:
+                if fcntl is not None:
+                    fcntl.flock(lock_datei, fcntl.LOCK_EX)
+                try:
+                    uebernommen = self._lesen(eigene)
+                    if eigene:
+                        self._anhaengen(eigene.values())
+                    if self._zeilen > 2 * len(self.store) + VERDICHTEN_AB:
+                        self._verdichten()
+                    return uebernommen, len(eigene)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_datei, fcntl.LOCK_UN)
+        except Exception:
+            # Nicht geschriebene Änderungen beim nächsten Mal erneut versuchen (neuere behalten Vorrang)
+            with self._offen_lock:
+                self._offen = {**eigene, **self._offen}
+            raise
+
+    def _lesen(self, eigene):
+        """
+        Übernimmt die seit dem letzten Lesen angehängten fremden Zeilen. Angebote mit
+        eigener, noch nicht geschriebener Änderung werden übersprungen: deren Zeile
+        wird gleich danach angehängt und gilt damit als die neueste.
+        """
+        try:
+            st = os.stat(self.pfad)
+        except FileNotFoundError:
+            self._inode, self._position, self._zeilen = None, 0, 0
+            return 0
+        if st.st_ino != self._inode or st.st_size < self._position:
+            # Neue (verdichtete) Datei: vollständig lesen
+            self._inode, self._position, self._zeilen = st.st_ino, 0, 0
+        if st.st_size == self._position:
+            return 0
+        with open(self.pfad, 'rb') as f:
+            f.seek(self._position)
+            daten = f.read(st.st_size - self._position)
+        # Nur vollständige Zeilen (eine abgebrochene letzte Zeile wird beim nächsten Mal gelesen)
+        ende = daten.rfind(b'\n') + 1
+        self._position += ende
+        fremde = []
+        for zeile in daten[:ende].splitlines():
+            self._zeilen += 1
+            try:
+                eintrag = json.loads(zeile)
+            except ValueError:
+                continue
+            if not isinstance(eintrag, dict) or HEADER_FELD in eintrag or ENDE_FELD in eintrag:
+                continue
+            if 'offer' in eintrag and 'writer' in eintrag:
+                if eintrag['writer'] == self.writer:
+                    continue
+                eintrag = eintrag['offer']
+            if isinstance(eintrag, dict) and _schluessel(eintrag) not in eigene:
+                fremde.append(eintrag)
+        uebernommen = 0
+        self._uebernahme_thread = threading.get_ident()
+        try:
+            for i in range(0, len(fremde), BATCH):
+                neu, aktualisiert = self.store.upsert_many(fremde[i:i + BATCH])
+                uebernommen += neu + aktualisiert
+        finally:
+            self._uebernahme_thread = None
+        return uebernommen
+
+    def _anhaengen(self, angebote):
+        daten = ''.join(_journal_zeile(self.writer, a) for a in angebote).encode('utf-8')
+        with open(self.pfad, 'ab') as f:
+            f.write(daten)
+        st = os.stat(self.pfad)
+        # Unter der Sperre schreibt niemand sonst: die Datei ist bis zum Ende gelesen
+        self._inode, self._position = st.st_ino, st.st_size
+        self._zeilen += len(angebote)
+
+    def _verdichten(self):
+        """Schreibt das Journal mit der letzten Zeile je Angebot neu (aus der Datei, atomar per Umbenennen)"""
+        letzte = {}
+        with open(self.pfad, 'rb') as f:
+            for zeile in f:
+                if not zeile.endswith(b'\n'):
+                    break
+                try:
+                    eintrag = json.loads(zeile)
+                except ValueError:
+                    continue
+                if not isinstance(eintrag, dict) or HEADER_FELD in eintrag or ENDE_FELD in eintrag:
+                    continue
+                offer = eintrag.get('offer') if 'writer' in eintrag else eintrag
+                if isinstance(offer, dict):
+                    key = _schluessel(offer)
+                    # Neu einfügen, damit die Reihenfolge der letzten Änderung folgt
+                    letzte.pop(key, None)
+                    letzte[key] = zeile
+        tmp = f'{self.pfad}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.writelines(letzte.values())
+        os.replace(tmp, self.pfad)
+        st = os.stat(self.pfad)
+        self._inode, self._position, self._zeilen = st.st_ino, st.st_size, len(letzte)
+        logger.info(f'Snapshot-Journal verdichtet: {len(letzte)} Zeilen')
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(self.intervall_sekunden):
+                try:
+                    self.abgleichen()
+                except Exception as e:
+                    logger.error(f'Snapshot-Abgleich fehlgeschlagen: {e}')
+
+        self._thread = threading.Thread(target=_loop, name='store-snapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stoppt den Abgleich; eigene Änderungen werden vorher noch geschrieben"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.abgleichen()
+        except Exception as e:
+            logger.error(f'Letzter Snapshot-Abgleich fehlgeschlagen: {e}')
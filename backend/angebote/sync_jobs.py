@@ -0,0 +1,363 @@
+"""
+Hintergrund-Jobs für vollständige Synchronisierungen (Batch-Sync)
+Führt Account-Syncs in Worker-Threads aus, liefert Fortschritt (Seiten, Angebote,
+Durchsatz, ETA), erlaubt Abbruch und startet pro Account höchstens einen Sync.
+
+Mit mehreren Worker-Prozessen gleichen sich die Engines über eine gemeinsame
+Statusdatei ab (teilen): jeder Worker schreibt den Status seiner Jobs hinein, liest
+den der anderen und übernimmt Stopp-Anforderungen für seine Jobs. So wirken Start,
+Status und Stopp unabhängig davon, welcher Worker den Request bekommt.
+
+    {"workers": {"<pid>-<zufall>": {"updated_at": ..., "jobs": [...]}}, "stop": {"<job_id>": ...}}
+"""
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: nur Einzelprozess-Betrieb (waitress), keine Sperre nötig
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Einträge von Workern, die so lange nichts geschrieben haben, gelten als beendet
+STATUS_ABLAUF_SEKUNDEN = 60
+
+
+def _neuer(a, b):
+    """True, wenn Job-Status a den Account aktueller beschreibt als b (laufend vor beendet, dann Startzeit)"""
+    return (a['active'], a['started_at'] or '') > (b['active'], b['started_at'] or '')
+
+
+class SyncJob:
+    def __init__(self, account):
+        self.id = uuid.uuid4().hex[:12]
+        self.account = account
+        self.abbruch = threading.Event()
+        self.state = 'queued'
+        self.pages_done = 0
+        self.offers_found = 0
+        self.total_offers = 0
+        self.errors = 0
+        self.message = 'In Warteschlange'
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.state in ('queued', 'running')
+
+    def fortschritt(self, seite):
+        with self._lock:
+            self.pages_done = seite['page']
+            self.offers_found = seite['offset']
+            self.total_offers = max(seite['total'], seite['offset'])
+            self.message = f"Seite {seite['page']}: {seite['offset']}/{self.total_offers} Angebote"
+
+    def to_status(self):
+        with self._lock:
+            jetzt = time.time()
+            laufzeit = ((self.finished_at or jetzt) - self.started_at) if self.started_at else 0
+            durchsatz = self.offers_found / laufzeit if laufzeit > 0 else 0.0
+            rest = max(self.total_offers - self.offers_found, 0)
+            eta = round(rest / durchsatz, 1) if durchsatz > 0 and self.active else None
+            return {
+                'job_id': self.id,
+                'account': self.account,
+                'state': self.state,
+                'active': self.active,
+                'pages_done': self.pages_done,
+                'offers_found': self.offers_found,
+                'total_offers': self.total_offers,
+                'errors': self.errors,
+                'throughput_per_second': round(durchsatz, 1),
+                'eta_seconds': eta,
+                'elapsed_seconds': round(laufzeit, 1),
+                'message': self.message,
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+                'finished_at': datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None
+            }
+
+
+class SyncJobEngine:
+    def __init__(self, orchestrator, max_workers=4, events=None, aktions_log=None):
+        """
+        events: optionaler EventStream für Fortschritts-Events ('sync')
+        aktions_log: optionales AktionsLog, erhält einen Eintrag pro abgeschlossenem Job
+        """
+        self.orchestrator = orchestrator
+        self.events = events
+        self.aktions_log = aktions_log
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sync-job')
+        self._lock = threading.Lock()
+        # Letzter Job je Account (laufend oder abgeschlossen)
+        self._jobs = {}
+        # Gemeinsame Statusdatei (teilen): Pfad, eigene Kennung, zuletzt gelesene Jobs anderer Worker
+        self._status_pfad = None
+        self.writer = None
+        self._fremde = []
+        self._fremd_stand = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def teilen(self, pfad, intervall_sekunden=1.0):
+        """
+        Gleicht die Jobs über eine gemeinsame Statusdatei mit anderen Worker-Prozessen ab
+        (Status, Stopp, höchstens ein Sync je Account über alle Worker).
+        """
+        self._status_pfad = pfad
+        self.writer = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(intervall_sekunden):
+                try:
+                    self._abgleichen()
+                except Exception as e:
+                    logger.error(f'Abgleich des Sync-Status fehlgeschlagen: {e}')
+
+        self._abgleichen()
+        self._thread = threading.Thread(target=_loop, name='sync-status', daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def _gemeinsam(self):
+        """
+        Liest die Statusdatei unter Dateisperre und schreibt sie danach mit dem eigenen
+        Eintrag zurück (nur bei Änderungen). Liefert das Dict, ohne Teilen None.
+        Sperrreihenfolge: erst die Datei, dann self._lock.
+        """
+        if self._status_pfad is None:
+            yield None
+            return
+        with open(self._status_pfad + '.lock', 'a') as lock_datei:
+            if fcntl is not None:
+                fcntl.flock(lock_datei, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self._status_pfad, encoding='utf-8') as f:
+                        daten = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    daten = {}
+                vorher = json.dumps(daten, sort_keys=True)
+                jetzt = time.time()
+                workers = {w: e for w, e in daten.get('workers', {}).items()
+                           if jetzt - e.get('updated_at', 0) < STATUS_ABLAUF_SEKUNDEN}
+                daten = {
+                    'workers': workers,
+                    'stop': {j: t for j, t in daten.get('stop', {}).items() if jetzt - t < STATUS_ABLAUF_SEKUNDEN}
+                }
+                self._fremde = [j for w, e in workers.items() if w != self.writer for j in e['jobs']]
+                yield daten
+
+                with self._lock:
+                    eigene = [j.to_status() for j in self._jobs.values()]
+                alt = workers.get(self.writer)
+                if not eigene:
+                    workers.pop(self.writer, None)
+                elif alt is None or alt['jobs'] != eigene or jetzt - alt['updated_at'] > STATUS_ABLAUF_SEKUNDEN / 3:
+                    # Geänderter Status oder Lebenszeichen, bevor der Eintrag abläuft
+                    workers[self.writer] = {'updated_at': jetzt, 'jobs': eigene}
+                if json.dumps(daten, sort_keys=True) != vorher:
+                    tmp = f'{self._status_pfad}.{os.getpid()}.tmp'
+                    with open(tmp, 'w', encoding='utf-8') as f:
+                        json.dump(daten, f, ensure_ascii=False)
+                    os.replace(tmp, self._status_pfad)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_datei, fcntl.LOCK_UN)
+
+    def _abgleichen(self):
+        """Schreibt den eigenen Status, übernimmt Stopp-Anforderungen und meldet fremde Änderungen"""
+        with self._gemeinsam() as daten:
+            stopps = set(daten['stop'])
+        with self._lock:
+            gestoppt = [j for j in self._jobs.values() if j.active and j.id in stopps]
+        for job in gestoppt:
+            job.abbruch.set()
+        stand = json.dumps(self._fremde, sort_keys=True)
+        if stand != self._fremd_stand:
+            self._fremd_stand = stand
+            self._notify()
+
+    def start(self, accounts=None):
+        """
+        Startet Sync-Jobs für die angegebenen Account-Namen (Standard: alle).
+        Läuft für einen Account bereits ein Job (auch in einem anderen Worker-Prozess),
+        wird dessen Status zurückgegeben statt einen zweiten zu starten.
+        Gibt den Status der Jobs zurück (siehe SyncJob.to_status).
+        """
+        alle = [t for t in self.orchestrator.lade_tokens() if t.get('access_token')]
+        if accounts is not None:
+            alle = [t for t in alle if t['name'] in accounts]
+        gestartet = []
+        with self._gemeinsam():
+            fremd_aktiv = {j['account']: j for j in self._fremde if j['active']}
+            with self._lock:
+                for account in alle:
+                    job = self._jobs.get(account['name'])
+                    if (job is None or not job.active) and account['name'] in fremd_aktiv:
+                        gestartet.append(fremd_aktiv[account['name']])
+                        continue
+                    if job is None or not job.active:
+                        job = SyncJob(account['name'])
+                        self._jobs[account['name']] = job
+                        self._pool.submit(self._run, job, account)
+                    gestartet.append(job.to_status())
+        return gestartet
+
+    def _run(self, job, account):
+        def fortschritt(seite):
+            job.fortschritt(seite)
+            self._notify()
+
+        try:
+            with job._lock:
+                # Vor dem Start abgebrochene Jobs laufen durch dasselbe finally (Ende, Event, Protokoll)
+                if job.abbruch.is_set():
+                    job.state = 'cancelled'
+                    job.message = 'Vor dem Start abgebrochen'
+                    return
+                job.state = 'running'
+                job.started_at = time.time()
+                job.message = 'Synchronisierung läuft'
+            self._notify()
+            result = self.orchestrator.sync_account(account, fortschritt=fortschritt, abbruch=job.abbruch)
+            with job._lock:
+                job.result = result
+                if result['cancelled']:
+                    job.state = 'cancelled'
+                    job.message = f"Abgebrochen nach {result['pages']} Seiten"
+                elif result['success']:
+                    job.state = 'done'
+                    job.message = f"{result['offers_found']} Angebote, {result['new_offers']} neu"
+                else:
+                    job.state = 'failed'
+                    job.errors += 1
+                    job.message = result.get('message') or 'Fehler'
+        except Exception as e:
+            logger.error(f'Sync-Job {job.id} ({job.account}) fehlgeschlagen: {e}')
+            with job._lock:
+                job.state = 'failed'
+                job.errors += 1
+                job.message = str(e)
+        finally:
+            with job._lock:
+                job.finished_at = time.time()
+            self._notify()
+            self._protokolliere(job)
+
+    def _protokolliere(self, job):
+        if self.aktions_log is None:
+            return
+        status = job.to_status()
+        self.aktions_log.log(
+            'sync_failed' if job.state == 'failed' else 'sync_completed',
+            f"Sync {job.account}: {job.message}",
+            level='error' if job.state == 'failed' else 'info',
+            account=job.account,
+            job_id=job.id,
+            state=job.state,
+            pages=status['pages_done'],
+            offers_found=status['offers_found'],
+            elapsed_seconds=status['elapsed_seconds']
+        )
+
+    def _notify(self):
+        if self.events is not None:
+            self.events.publish('sync', self.get_status())
+
+    def stop(self, account=None):
+        """
+        Bricht laufende Jobs ab (alle oder nur den eines Accounts), auch die anderer
+        Worker-Prozesse: deren Jobs erhalten eine Stopp-Anforderung in der Statusdatei.
+        """
+        with self._gemeinsam() as daten:
+            fremde = [j for j in self._fremde if j['active'] and (account is None or j['account'] == account)]
+            if daten is not None:
+                jetzt = time.time()
+                for job in fremde:
+                    daten['stop'][job['job_id']] = jetzt
+            gestoppt = self._stoppe_eigene(account)
+        return gestoppt + len(fremde)
+
+    def _stoppe_eigene(self, account=None):
+        with self._lock:
+            jobs = [j for name, j in self._jobs.items() if j.active and (account is None or name == account)]
+        for job in jobs:
+            job.abbruch.set()
+        return len(jobs)
+
+    def shutdown(self, wait=True):
+        """
+        Bricht alle Jobs ab und wartet, bis die laufenden Seiten abgeschlossen sind.
+        Jobs, die nicht mehr gestartet werden, enden als 'cancelled' (mit abschließendem Event).
+        Jobs anderer Worker-Prozesse laufen weiter.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._stoppe_eigene()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            jobs = list(self._jobs.values())
+        verworfen = []
+        for job in jobs:
+            with job._lock:
+                if job.state != 'queued':
+                    continue
+                job.state = 'cancelled'
+                job.message = 'Beim Beenden abgebrochen'
+                job.finished_at = time.time()
+            verworfen.append(job)
+        for job in verworfen:
+            self._protokolliere(job)
+        self._notify()
+        try:
+            # Endstand für die anderen Worker
+            with self._gemeinsam():
+                pass
+        except Exception as e:
+            logger.error(f'Letzter Abgleich des Sync-Status fehlgeschlagen: {e}')
+        return len(verworfen)
+
+    def get_status(self):
+        """Zusammengefasster Status aller Jobs, auch der anderer Worker-Prozesse (Format des Batch-Sync im Frontend)"""
+        with self._lock:
+            je_account = {j.account: j.to_status() for j in self._jobs.values()}
+        for fremd in self._fremde:
+            eigener = je_account.get(fremd['account'])
+            if eigener is None or _neuer(fremd, eigener):
+                je_account[fremd['account']] = fremd
+        jobs = list(je_account.values())
+        aktiv = [j for j in jobs if j['active']]
+        eta = [j['eta_seconds'] for j in aktiv if j['eta_seconds'] is not None]
+        if aktiv:
+            status_message = f"{len(aktiv)} Account(s) werden synchronisiert"
+        elif jobs:
+            status_message = '; '.join(f"{j['account']}: {j['message']}" for j in jobs)
+        else:
+            status_message = 'Keine Synchronisierung gestartet'
+        return {
+            'active': bool(aktiv),
+            'status_message': status_message,
+            'processed_items': sum(j['offers_found'] for j in jobs),
+            'total_items': sum(j['total_offers'] for j in jobs),
+            'current_batch': sum(j['pages_done'] for j in jobs),
+            'found_offers': sum(j['offers_found'] for j in jobs),
+            'errors': sum(j['errors'] for j in jobs),
+            'throughput_per_second': round(sum(j['throughput_per_second'] for j in aktiv), 1),
+            'eta_seconds': max(eta) if eta else None,
+            'jobs': jobs
+        }
@@ -0,0 +1,195 @@
+"""
+Multi-Account Sync-Orchestrator
+Synchronisiert alle Seller-Accounts aus tokens.json parallel. Jeder Account
+bekommt eine eigene Client-Instanz mit eigenem Connection-Pool und Rate-Budget;
+die Ergebnisse landen gemeinsam (nach Account markiert) im OfferStore.
+"""
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+import tracing
+from metriken import ANGEBOTE_SYNCHRONISIERT, RATE_LIMIT_WARTEZEIT
+
+logger = logging.getLogger(__name__)
+
+
+class RateBudget:
+    """Token-Bucket: erlaubt im Mittel `rate` Requests pro Sekunde, Bursts bis `burst`"""
+    def __init__(self, rate=5.0, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                jetzt = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (jetzt - self._last) * self.rate)
+                self._last = jetzt
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wartezeit = (1 - self._tokens) / self.rate
+            time.sleep(wartezeit)
+
+
+@lru_cache(maxsize=None)
+def rate_limited_session_klasse():
+    """
+    requests.Session mit eigenem Connection-Pool, die jeden Request über ein RateBudget führt.
+    Die Klasse entsteht erst beim ersten Account-Client, damit requests nicht schon beim
+    Import des Servers geladen wird.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class RateLimitedSession(requests.Session):
+        def __init__(self, budget, pool_size=4, name=''):
+            super().__init__()
+            self.budget = budget
+            self.name = name
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.mount('https://', adapter)
+            self.mount('http://', adapter)
+
+        def request(self, *args, **kwargs):
+            start = time.perf_counter()
+            self.budget.acquire()
+            RATE_LIMIT_WARTEZEIT.observe(self.name, wert=time.perf_counter() - start)
+            return super().request(*args, **kwargs)
+
+    return RateLimitedSession
+
+
+class SyncOrchestrator:
+    def __init__(self, lade_tokens, store, rate_per_account=5.0, pool_size=4, max_workers=None,
+                 response_hook_factory=None, page_size=200):
+        """
+        lade_tokens: liefert die Accounts (wie in tokens.json)
+        store: OfferStore, in den die Ergebnisse aller Accounts gemerged werden
+        response_hook_factory: optional, liefert pro Account einen requests-Hook (z.B. Token-Status)
+        """
+        self.lade_tokens = lade_tokens
+        self.store = store
+        self.rate_per_account = rate_per_account
+        self.pool_size = pool_size
+        self.max_workers = max_workers
+        self.response_hook_factory = response_hook_factory
+        self.page_size = page_size
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client_fuer(self, account):
+        """Eigene Client-Instanz pro Account (wird wiederverwendet solange der Token gleich bleibt)"""
+        with self._lock:
+            client = self._clients.get(account['name'])
+            if client is None or client.oauth_token != account['access_token']:
+                from schnittstelle.ebay_sell_api import EbaySellAPI
+                session = rate_limited_session_klasse()(RateBudget(self.rate_per_account), pool_size=self.pool_size,
+                                             name=account['name'])
+                hook = self.response_hook_factory(account) if self.response_hook_factory else None
+                if hook:
+                    session.hooks['response'].append(hook)
+                client = EbaySellAPI(oauth_token=account['access_token'], session=session)
+                self._clients[account['name']] = client
+            return client
+
+    def sync_account(self, account, fortschritt=None, abbruch=None):
+        """
+        Holt alle offenen Best Offers eines Accounts seitenweise und merged sie in den Store.
+        fortschritt: optional, wird nach jeder Seite mit den Seitendaten aufgerufen
+        abbruch: optionales threading.Event, bricht nach der laufenden Seite ab
+        """
+        start = time.perf_counter()
+        with tracing.trace('sync_account', account=account['name']) as lauf_span:
+            client = self.client_fuer(account)
+            offset = 0
+            seiten = 0
+            gefunden = 0
+            neu, aktualisiert = 0, 0
+            result = {'success': True, 'message': 'Keine Seiten abgerufen'}
+            trace_id = tracing.aktueller_lauf_id()
+            while not (abbruch is not None and abbruch.is_set()):
+                with tracing.span('page', offset=offset):
+                    result = client.get_all_best_offers_direct(limit=self.page_size, offset=offset)
+                    if not result.get('success'):
+                        logger.warning(f"Sync für Account {account['name']} fehlgeschlagen: {result.get('message')}")
+                        break
+                    offers = result.get('offers', [])
+                    ANGEBOTE_SYNCHRONISIERT.inc(account['name'], wert=len(offers))
+                    with tracing.span('persist.upsert', offers=len(offers)):
+                        n, a = self.store.upsert_many(offers, account=account['name'])
+                neu += n
+                aktualisiert += a
+                gefunden += len(offers)
+                seiten += 1
+                offset += len(offers)
+                total = result.get('total_available', offset)
+                if fortschritt:
+                    fortschritt({'page': seiten, 'offers': len(offers), 'offset': offset, 'total': total})
+                if len(offers) < self.page_size or offset >= total:
+                    break
+            lauf_span.set(pages=seiten, offers=gefunden)
+        return {
+            'account': account['name'],
+            'success': result.get('success', False),
+            'message': result.get('message'),
+            'pages': seiten,
+            'offers_found': gefunden,
+            'new_offers': neu,
+            'updated_offers': aktualisiert,
+            'cancelled': abbruch is not None and abbruch.is_set(),
+            'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+            'trace_id': trace_id
+        }
+
+    def sync_all(self):
+        """Synchronisiert alle Accounts gleichzeitig"""
+        accounts = [t for t in self.lade_tokens() if t.get('access_token')]
+        start = time.perf_counter()
+        if not accounts:
+            return {'success': False, 'message': 'Keine Accounts in tokens.json', 'accounts': []}
+
+        with tracing.trace('sync_all', accounts=len(accounts)), \
+                ThreadPoolExecutor(max_workers=self.max_workers or len(accounts), thread_name_prefix='account-sync') as pool:
+            trace_id = tracing.aktueller_lauf_id()
+            # Account-Syncs laufen als Kind-Spans dieses Laufs
+            ergebnisse = list(pool.map(tracing.im_kontext(self._sync_sicher), accounts))
+
+        return {
+            'success': all(e['success'] for e in ergebnisse),
+            'message': f"{sum(e['success'] for e in ergebnisse)}/{len(ergebnisse)} Accounts synchronisiert",
+            'accounts': ergebnisse,
+            'new_offers': sum(e['new_offers'] for e in ergebnisse),
+            'updated_offers': sum(e['updated_offers'] for e in ergebnisse),
+            'total_offers': len(self.store),
+            'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+            'sync_time': datetime.now().isoformat(),
+            'trace_id': trace_id
+        }
+
+    def _sync_sicher(self, account):
+        """sync_account ohne Exception: ein Fehler wird zum Ergebnis gleicher Form mit success=False"""
+        try:
+            return self.sync_account(account)
+        except Exception as e:
+            logger.error(f"Sync für Account {account['name']} abgebrochen: {e}")
+            return {
+                'account': account['name'],
+                'success': False,
+                'message': str(e),
+                'pages': 0,
+                'offers_found': 0,
+                'new_offers': 0,
+                'updated_offers': 0,
+                'cancelled': False,
+                'duration_ms': None,
+                # Der Account-Sync ist ein Span im Lauf von sync_all
+                'trace_id': tracing.aktueller_lauf_id()
+            }
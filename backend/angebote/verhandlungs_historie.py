@@ -0,0 +1,274 @@
+"""
+Verhandlungs-Historie je Käufer und Artikel
+Für jedes Paar (Käufer, Artikel) werden die Angebote des Käufers mit Betrag,
+Gegenangebot und Status gehalten; daraus entsteht eine Zusammenfassung (Runden,
+eigene Gegenangebote, letzte Preise, Ausgang), die bei der Entscheidung mit einem
+Dict-Zugriff gelesen wird (z.B. für max_gegenangebote der Verhandlungsregeln).
+
+Gefüttert wird die Historie als Beobachter des OfferStore (OfferStore.beobachten).
+Änderungen werden als JSON-Zeilen an eine Journal-Datei angehängt und beim Start
+wieder eingelesen (der letzte Stand eines Angebots gewinnt); wächst das Journal
+auf ein Vielfaches der Einträge, wird es verdichtet neu geschrieben.
+
+Mit mehreren Workern (wsgi.py) sehen alle über den abgeglichenen OfferStore
+dieselben Änderungen; geschrieben wird das Journal nur von einem, dem Leader
+(schreiben=False, bis journal_uebernehmen() aufgerufen wird). Der übernimmt beim
+Wechsel zuerst, was der vorige Leader geschrieben hat, und ergänzt, was fehlt.
+"""
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from angebote.angebot import AngebotStatus, euro
+from angebote.offer_store import OfferStore
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Status, mit denen eine Verhandlungsrunde abgeschlossen ist
+ABGESCHLOSSEN = frozenset(('accepted', 'rejected', 'expired', 'retracted'))
+
+# Verdichten, sobald das Journal so viele Zeilen mehr als Einträge hat
+VERDICHTEN_AB = 10000
+
+_JSON = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+_STATUS_WERT = {s: s.value for s in AngebotStatus}
+
+
+def kaeufer_von(offer):
+    """Käufer eines Angebots-Dicts (Negotiation API: buyer_id, sonst buyer_username)"""
+    return str(offer.get('buyer_username') or offer.get('buyer_id') or '')
+
+
+def _gegenangebot(angebot):
+    """
+    1, wenn der Verkäufer auf dieses Angebot ein Gegenangebot geschickt hat; 2, wenn das
+    Angebot die Antwort des Käufers auf ein Gegenangebot ist (beides: 3)
+    """
+    verkaeufer = angebot.status is AngebotStatus.COUNTERED or bool(angebot.gegen_cent or angebot.gegen_nachricht)
+    return verkaeufer | (angebot.typ == 'counter') << 1
+
+
+def _zeile(kaeufer, item_id, offer, eintrag):
+    """Journal-Zeile eines Angebots"""
+    return {'buyer': kaeufer, 'item_id': item_id, 'offer': offer, 'created_at': eintrag[0], 'amount': eintrag[1],
+            'counter': eintrag[2], 'status': eintrag[3], 'countered': eintrag[4]}
+
+
+def _gegenangebote(angebote):
+    """Eigene Gegenangebote in einem Verlauf: jede Käufer-Antwort setzt eines voraus, das evtl. nicht (mehr) in der Historie steht"""
+    verkaeufer = antworten = 0
+    for e in angebote.values():
+        verkaeufer += e[4] & 1
+        antworten += e[4] >> 1
+    return max(verkaeufer, antworten)
+
+
+class VerhandlungsHistorie:
+    def __init__(self, pfad='negotiation_history.jsonl', store=None, schreiben=True):
+        """
+        pfad: Journal-Datei (None: nur im Speicher)
+        store: OfferStore, dessen Angebote übernommen und laufend nachgeführt werden
+        schreiben: Journal fortschreiben und verdichten (False: nur lesen, siehe journal_uebernehmen)
+        """
+        self.pfad = pfad
+        self.schreiben = schreiben
+        self._lock = threading.RLock()
+        # (käufer, item_id) -> {angebots-schlüssel: (erstellt, betrag_cent, gegen_cent, status, gegenangebot-bits)}
+        # Bewusst nur Dicts und Tupel: wenige Objekte je Paar halten Speicher und GC-Last klein
+        self._paare = {}
+        # käufer -> Menge von item_ids
+        self._nach_kaeufer = defaultdict(set)
+        # Angebote in der Historie / Zeilen im Journal
+        self._anzahl = 0
+        self._zeilen = 0
+        self.nachschlagen = 0
+        self._laden()
+        if store is not None:
+            store.beobachten(self.aktualisiere)
+
+    def _lock_datei(self):
+        return open(self.pfad + '.lock', 'a')
+
+    def _lese_journal(self):
+        """Journal-Einträge als Liste ((käufer, item_id), offer, eintrag)"""
+        if not self.pfad or not os.path.exists(self.pfad):
+            return []
+        eintraege = []
+        with open(self.pfad, 'r', encoding='utf-8') as f:
+            for zeile in f:
+                try:
+                    e = json.loads(zeile)
+                except ValueError:
+                    # Abgebrochene letzte Zeile (Absturz beim Schreiben)
+                    continue
+                eintraege.append(((e['buyer'], e['item_id']), e['offer'], (
+                    e.get('created_at'), e.get('amount'), e.get('counter'), e.get('status'), e.get('countered', 0))))
+        return eintraege
+
+    def _laden(self):
+        eintraege = self._lese_journal()
+        if not eintraege:
+            return
+        for schluessel, offer, eintrag in eintraege:
+            self._setze(self._paar(schluessel), offer, eintrag)
+        self._zeilen = len(eintraege)
+        logger.info(f'Verhandlungs-Historie geladen: {len(self._paare)} Paare aus {self._zeilen} Journal-Zeilen')
+        if self.schreiben and self._zeilen > 2 * self._anzahl + VERDICHTEN_AB:
+            self.verdichten()
+
+    def journal_uebernehmen(self):
+        """
+        Macht diese Instanz zum Schreiber des Journals (Leader). Einträge, die ein voriger
+        Schreiber nach dem eigenen Laden angehängt hat, werden übernommen; was nur im
+        Speicher steht oder dort neuer ist, wird angehängt. Gibt die Anzahl angehängter Zeilen zurück.
+        """
+        if not self.pfad:
+            self.schreiben = True
+            return 0
+        with self._lock, self._lock_datei() as lock_datei:
+            if fcntl is not None:
+                fcntl.flock(lock_datei, fcntl.LOCK_EX)
+            try:
+                eintraege = self._lese_journal()
+                in_datei = {}
+                for schluessel, offer, eintrag in eintraege:
+                    in_datei[(schluessel, offer)] = eintrag
+                    paar = self._paar(schluessel)
+                    if offer not in paar:
+                        self._setze(paar, offer, eintrag)
+                neu = [_zeile(*schluessel, offer, eintrag)
+                       for schluessel, paar in self._paare.items() for offer, eintrag in paar.items()
+                       if in_datei.get((schluessel, offer)) != eintrag]
+                self._zeilen = len(eintraege)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_datei, fcntl.LOCK_UN)
+            self.schreiben = True
+            if neu:
+                self._anhaengen(neu)
+            if self._zeilen > 2 * self._anzahl + VERDICHTEN_AB:
+                self.verdichten()
+        logger.info(f'Verhandlungs-Historie: Journal übernommen, {len(neu)} Einträge ergänzt')
+        return len(neu)
+
+    def _setze(self, paar, offer, eintrag):
+        if offer not in paar:
+            self._anzahl += 1
+        paar[offer] = eintrag
+
+    def _paar(self, schluessel):
+        paar = self._paare.get(schluessel)
+        if paar is None:
+            paar = self._paare[schluessel] = {}
+            self._nach_kaeufer[schluessel[0]].add(schluessel[1])
+        return paar
+
+    def aktualisiere(self, angebote):
+        """Übernimmt neue und geänderte Angebot-Datensätze (Beobachter des OfferStore)"""
+        neu = []
+        with self._lock:
+            for angebot in angebote:
+                kaeufer, item_id = angebot.kaeufer, angebot.item_id
+                if not kaeufer or not item_id:
+                    continue
+                schluessel = (str(kaeufer), str(item_id))
+                offer = OfferStore.offer_key(angebot)
+                eintrag = (angebot.erstellt, angebot.betrag_cent, angebot.gegen_cent, _STATUS_WERT.get(angebot.status, 'pending'),
+                           _gegenangebot(angebot))
+                paar = self._paar(schluessel)
+                if paar.get(offer) == eintrag:
+                    continue
+                self._setze(paar, offer, eintrag)
+                neu.append(_zeile(*schluessel, offer, eintrag))
+            if neu and self.pfad and self.schreiben:
+                self._anhaengen(neu)
+                if self._zeilen > 2 * self._anzahl + VERDICHTEN_AB:
+                    self.verdichten()
+        return len(neu)
+
+    def _anhaengen(self, eintraege):
+        daten = ''.join(_JSON.encode(e) + '\n' for e in eintraege)
+        with self._lock_datei() as lock_datei:
+            if fcntl is not None:
+                fcntl.flock(lock_datei, fcntl.LOCK_EX)
+            try:
+                with open(self.pfad, 'a', encoding='utf-8') as f:
+                    f.write(daten)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_datei, fcntl.LOCK_UN)
+        self._zeilen += len(eintraege)
+
+    def verdichten(self):
+        """Schreibt das Journal mit genau einer Zeile je Angebot neu (atomar per Umbenennen, nur der Schreiber)"""
+        if not self.pfad or not self.schreiben:
+            return
+        with self._lock, self._lock_datei() as lock_datei:
+            if fcntl is not None:
+                fcntl.flock(lock_datei, fcntl.LOCK_EX)
+            try:
+                tmp = self.pfad + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    for (kaeufer, item_id), paar in self._paare.items():
+                        for offer, e in paar.items():
+                            f.write(_JSON.encode(_zeile(kaeufer, item_id, offer, e)) + '\n')
+                os.replace(tmp, self.pfad)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_datei, fcntl.LOCK_UN)
+            self._zeilen = self._anzahl
+        logger.info(f'Verhandlungs-Historie verdichtet: {self._zeilen} Zeilen')
+
+    def gegenangebote(self, kaeufer, item_id):
+        """Anzahl eigener Gegenangebote an den Käufer für den Artikel (0 ohne Historie)"""
+        paar = self._paare.get((str(kaeufer), str(item_id)))
+        self.nachschlagen += 1
+        return _gegenangebote(paar) if paar else 0
+
+    def verlauf(self, kaeufer, item_id):
+        """Zusammenfassung der Verhandlung (None ohne Historie)"""
+        with self._lock:
+            paar = self._paare.get((str(kaeufer), str(item_id)))
+            self.nachschlagen += 1
+            if not paar:
+                return None
+            eintraege = sorted(paar.values(), key=lambda e: e[0] or '')
+            erstellt, betrag, gegen, status, _ = eintraege[-1]
+            return {
+                'buyer': str(kaeufer),
+                'item_id': str(item_id),
+                'rounds': len(eintraege),
+                'counter_offers': _gegenangebote(paar),
+                'accepted': sum(1 for e in eintraege if e[3] == 'accepted'),
+                'last_offer_amount': euro(betrag),
+                'last_counter_amount': euro(gegen),
+                'last_status': status,
+                'outcome': status if status in ABGESCHLOSSEN else None,
+                'first_offer_at': eintraege[0][0],
+                'last_offer_at': erstellt,
+            }
+
+    def fuer_kaeufer(self, kaeufer):
+        """Zusammenfassungen aller Artikel, auf die der Käufer geboten hat"""
+        with self._lock:
+            items = sorted(self._nach_kaeufer.get(str(kaeufer), ()))
+            return [self.verlauf(kaeufer, item_id) for item_id in items]
+
+    def get_status(self):
+        with self._lock:
+            return {
+                'pairs': len(self._paare),
+                'buyers': len(self._nach_kaeufer),
+                'offers': self._anzahl,
+                'journal_lines': self._zeilen,
+                'journal_writer': self.schreiben,
+                'lookups': self.nachschlagen,
+                'file': self.pfad,
+            }
@@ -0,0 +1,124 @@
+"""
+Antwort-Cache für häufig gepollte JSON-Endpunkte
+Serialisiert und komprimiert eine Antwort nur einmal pro Datenversion, vergibt
+starke ETags aus dem Inhalt und beantwortet unveränderte Polls mit 304. Die Version
+ist nur innerhalb eines Prozesses eindeutig (mehrere Worker zählen unabhängig),
+der Inhalts-Hash dagegen gilt für alle Worker gleich.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class _Eintrag:
+    def __init__(self, version, etag, body):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        # Kodierung -> komprimierter Body (wird bei der ersten Anfrage erzeugt)
+        self.kodiert = {}
+
+
+class AntwortCache:
+    def __init__(self, max_eintraege=256, min_groesse=1024, gzip_level=6):
+        """
+        max_eintraege: Anzahl gecachter Antworten (Endpunkt + Query), LRU
+        min_groesse: kleinere Antworten werden nicht komprimiert
+        """
+        self.max_eintraege = max_eintraege
+        self.min_groesse = min_groesse
+        self.gzip_level = gzip_level
+        self._eintraege = OrderedDict()
+        self._lock = threading.Lock()
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self.not_modified = 0
+
+    def antwort(self, name, version, erzeuge, status=200):
+        """
+        Liefert die Antwort für den aktuellen Request.
+        name: Endpunkt-Name; zusammen mit dem Query-String der Cache-Schlüssel
+        version: ändert sich genau dann, wenn sich die Daten ändern (z.B. OfferStore.version)
+        erzeuge: liefert die Daten (dict/list) – wird nur bei neuer Version aufgerufen
+        """
+        schluessel = (name, request.query_string)
+        eintrag = self._hole(schluessel, version)
+        if eintrag is None:
+            body = json.dumps(erzeuge(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            etag = f'{name}-{hashlib.blake2b(body, digest_size=8).hexdigest()}'
+            eintrag = _Eintrag(version, etag, body)
+            self._speichere(schluessel, eintrag)
+
+        kodierung = self._kodierung(eintrag)
+        etag = f'{eintrag.etag}-{kodierung}' if kodierung else eintrag.etag
+        if request.if_none_match.contains(eintrag.etag) or request.if_none_match.contains(etag):
+            with self._lock:
+                self.not_modified += 1
+            response = Response(status=304)
+        else:
+            body = self._kodiere(eintrag, kodierung) if kodierung else eintrag.body
+            response = Response(body, status=status, mimetype='application/json')
+            if kodierung:
+                response.headers['Content-Encoding'] = kodierung
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def _hole(self, schluessel, version):
+        with self._lock:
+            eintrag = self._eintraege.get(schluessel)
+            if eintrag is not None and eintrag.version == version:
+                self._eintraege.move_to_end(schluessel)
+                self.treffer += 1
+                return eintrag
+            self.fehlschlaege += 1
+            return None
+
+    def _speichere(self, schluessel, eintrag):
+        with self._lock:
+            self._eintraege[schluessel] = eintrag
+            self._eintraege.move_to_end(schluessel)
+            while len(self._eintraege) > self.max_eintraege:
+                self._eintraege.popitem(last=False)
+
+    def _kodierung(self, eintrag):
+        """Bevorzugte Kodierung des Clients (br vor gzip), None = unkomprimiert"""
+        if len(eintrag.body) < self.min_groesse:
+            return None
+        if brotli is not None and request.accept_encodings['br']:
+            return 'br'
+        if request.accept_encodings['gzip']:
+            return 'gzip'
+        return None
+
+    def _kodiere(self, eintrag, kodierung):
+        body = eintrag.kodiert.get(kodierung)
+        if body is None:
+            if kodierung == 'br':
+                body = brotli.compress(eintrag.body, quality=5)
+            else:
+                body = gzip.compress(eintrag.body, compresslevel=self.gzip_level, mtime=0)
+            eintrag.kodiert[kodierung] = body
+        return body
+
+    def get_status(self):
+        with self._lock:
+            anfragen = self.treffer + self.fehlschlaege
+            return {
+                'entries': len(self._eintraege),
+                'hits': self.treffer,
+                'misses': self.fehlschlaege,
+                'not_modified': self.not_modified,
+                'hit_rate': round(self.treffer / anfragen * 100, 1) if anfragen else 0.0,
+                'brotli_available': brotli is not None
+            }
@@ -0,0 +1,478 @@
+"""
+Benchmark-Suite für Sync-, Bewertungs- und Antwortpfade
+Läuft gegen den lokalen eBay-Mock (ebay_mock.py, wird ohne --mock-url im Prozess
+gestartet) und misst:
+    listing_sweep   GetMyeBaySelling über alle Listings (Listings/s)
+    offer_fetch     Angebotsseiten inkl. Item-Anreicherung (Latenz pro Seite, Angebote/s)
+    rule_eval       Bewertung der Angebote (Angebote/s): Schwellen einzeln und gestufte Pipeline
+    respond         Antworten an eBay mit parallelen Calls (Antworten/s, Latenz)
+    api             /api/offers und /api/stats je Bestandsgröße (kalt und aus dem Cache)
+    ki              KI-Client mit lokalem Ersatzmodell: Bündelung/Parallelität (Angebote/s)
+    analytics       Gruppierte Kennzahlen aus der Spalten-Tabelle je Bestandsgröße (ms) gegenüber
+                    einer Python-Schleife über alle Angebote
+    startup         Kaltstart: Import von hauptserver in frischen Prozessen (ms) und die
+                    langsamsten Importe laut python -X importtime, geprüft gegen --start-ziel-ms
+
+Ergebnisse landen als JSON in benchmark_ergebnisse/; mit --vergleich werden sie gegen
+einen früheren Lauf geprüft (Exit-Code 1 bei Verschlechterung über --toleranz).
+
+    python benchmark.py --groessen 1000,10000,100000
+    python benchmark.py --nur api,rule_eval --vergleich benchmark_ergebnisse/vorher.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from angebote.datengenerator import Datengenerator
+from lasttest import perzentil
+
+FAELLE = ('listing_sweep', 'offer_fetch', 'rule_eval', 'respond', 'api', 'ki', 'analytics', 'startup')
+
+# Endpunkte der API-Messung (wie im Lasttest)
+API_ENDPUNKTE = {
+    'offers': '/api/offers?limit=100',
+    'offers_gefiltert': '/api/offers?status=pending&sort=-amount&limit=50',
+    'stats': '/api/stats',
+}
+
+
+def _ms(wert):
+    return round(wert * 1000, 3) if wert is not None else None
+
+
+def latenzen(werte):
+    """p50/p95/p99/Mittelwert in Millisekunden"""
+    return {
+        'p50_ms': _ms(perzentil(werte, 50)),
+        'p95_ms': _ms(perzentil(werte, 95)),
+        'p99_ms': _ms(perzentil(werte, 99)),
+        'mean_ms': _ms(statistics.mean(werte)) if werte else None,
+    }
+
+
+def synthetische_angebote(anzahl, seed=1):
+    """Reproduzierbarer Bestand aus dem Datengenerator (Listings/Käufer skalieren mit)"""
+    generator = Datengenerator(seed, listings=max(anzahl // 3, 1), kaeufer=max(anzahl // 2, 1))
+    return generator.angebote(anzahl)
+
+
+def starte_mock(listings, offers, latenz_ms, seed):
+    """Startet den Mock im Prozess auf einem freien Port und gibt die Basis-URL zurück"""
+    from werkzeug.serving import make_server
+    from ebay_mock import MockDaten, Stoerungen, erstelle_app
+
+    app = erstelle_app(MockDaten(listings, offers, seed), Stoerungen(latenz_ms=latenz_ms, seed=seed))
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='ebay-mock', daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+# === Fälle ===
+def bench_listing_sweep(mock_url, args):
+    from schnittstelle.ebay_api_real import EbayTradingAPI
+
+    client = EbayTradingAPI(auth_token='v^1.1#i^1#benchmark', base_url=mock_url)
+    start = time.perf_counter()
+    ergebnis = client.get_my_ebay_selling_chunked(chunk_size=200, max_chunks=10 ** 6)
+    dauer = time.perf_counter() - start
+    if not ergebnis.get('success'):
+        raise RuntimeError(ergebnis.get('message'))
+    return {
+        'listings': ergebnis['total'],
+        'pages': ergebnis['chunks_processed'],
+        'seconds': round(dauer, 3),
+        'listings_per_second': round(ergebnis['total'] / dauer, 1),
+    }
+
+
+def bench_offer_fetch(mock_url, args):
+    from schnittstelle.ebay_sell_api import EbaySellAPI
+
+    client = EbaySellAPI(oauth_token='benchmark', base_url=mock_url)
+    seiten = []
+    offset = 0
+    start = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        ergebnis = client.get_all_best_offers_direct(limit=200, offset=offset)
+        seiten.append(time.perf_counter() - t0)
+        if not ergebnis.get('success'):
+            raise RuntimeError(ergebnis.get('message'))
+        offset += len(ergebnis['offers'])
+        if not ergebnis['offers'] or offset >= ergebnis['total_available']:
+            break
+    dauer = time.perf_counter() - start
+    return {
+        'offers': offset,
+        'pages': len(seiten),
+        'seconds': round(dauer, 3),
+        'offers_per_second': round(offset / dauer, 1),
+        'page': latenzen(seiten),
+    }
+
+
+def bench_rule_eval(mock_url, args):
+    """Einzel-Bewertung nach Schwellen (Basis) gegen die gestufte Pipeline ohne LLM"""
+    from ki_entscheidung import regel_empfehlung, KIBerater, EntscheidungsPipeline
+
+    ergebnisse = {}
+    for groesse in args.groessen:
+        angebote = list(synthetische_angebote(groesse, args.seed))
+        start = time.perf_counter()
+        for angebot in angebote:
+            regel_empfehlung(angebot['offer_amount'], angebot['list_price'])
+        dauer = time.perf_counter() - start
+
+        pipeline = EntscheidungsPipeline(KIBerater())
+        start = time.perf_counter()
+        for teil in range(0, groesse, 1000):
+            pipeline.entscheide(angebote[teil:teil + 1000])
+        dauer_pipeline = time.perf_counter() - start
+        status = pipeline.get_status()
+        ergebnisse[str(groesse)] = {
+            'seconds': round(dauer, 4),
+            'offers_per_second': round(groesse / dauer, 1),
+            'pipeline_seconds': round(dauer_pipeline, 4),
+            'pipeline_offers_per_second': round(groesse / dauer_pipeline, 1),
+            'tier_share': {stufe: w['share'] for stufe, w in status['tiers'].items()},
+        }
+    return ergebnisse
+
+
+def bench_respond(mock_url, args):
+    from schnittstelle.ebay_sell_api import EbaySellAPI
+
+    client = EbaySellAPI(oauth_token='benchmark', base_url=mock_url)
+    requests.post(f'{mock_url}/mock/reset', timeout=10)
+    anzahl = min(args.antworten, args.mock_offers)
+    aktionen = ('accept', 'decline', 'counter')
+
+    def antworten(j):
+        t0 = time.perf_counter()
+        ergebnis = client.respond_to_best_offer(None, f'BO{j:09d}', aktionen[j % 3], counter_offer_amount=9.99)
+        return time.perf_counter() - t0, ergebnis.get('success', False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+        ergebnisse = list(pool.map(antworten, range(anzahl)))
+    dauer = time.perf_counter() - start
+    requests.post(f'{mock_url}/mock/reset', timeout=10)
+    return {
+        'responses': anzahl,
+        'concurrency': args.parallel,
+        'failed': sum(not ok for _, ok in ergebnisse),
+        'seconds': round(dauer, 3),
+        'responses_per_second': round(anzahl / dauer, 1),
+        'call': latenzen([d for d, _ in ergebnisse]),
+    }
+
+
+def bench_api(mock_url, args):
+    import hauptserver
+    from angebote.offer_store import OfferStore
+    from antwort_cache import AntwortCache
+
+    client = hauptserver.app.test_client()
+    ergebnisse = {}
+    for groesse in args.groessen:
+        store = OfferStore()
+        angebote = list(synthetische_angebote(groesse, args.seed))
+        t0 = time.perf_counter()
+        store.upsert_many(angebote)
+        laden = time.perf_counter() - t0
+        del angebote
+        hauptserver.offer_store = store
+        hauptserver.antwort_cache = AntwortCache()
+        messung = {'load_seconds': round(laden, 3)}
+        for name, pfad in API_ENDPUNKTE.items():
+            kalt, warm = [], []
+            for i in range(args.wiederholungen):
+                # Kalt: Bestand geändert, die Antwort muss neu erzeugt werden
+                store.upsert_many([{'best_offer_id': 'BO_BENCH', 'offer_amount': i, 'status': 'pending'}])
+                t0 = time.perf_counter()
+                antwort = client.get(pfad, headers={'Accept-Encoding': 'gzip'})
+                kalt.append(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                client.get(pfad, headers={'Accept-Encoding': 'gzip'})
+                warm.append(time.perf_counter() - t0)
+                if antwort.status_code != 200:
+                    raise RuntimeError(f'{pfad}: HTTP {antwort.status_code}')
+            messung[name] = {'cold': latenzen(kalt), 'cached': latenzen(warm)}
+        ergebnisse[str(groesse)] = messung
+    return ergebnisse
+
+
+def bench_ki(mock_url, args):
+    """
+    Durchsatz des KI-Clients gegen das lokale Ersatzmodell (einzeln vs. gebündelt
+    und parallel) und Ende-zu-Ende über KIBerater inkl. Cache auf synthetischen Angeboten.
+    """
+    from ki_client import KIClient, LokalesModell
+    from ki_entscheidung import KIBerater, EntscheidungsCache
+
+    modell = LokalesModell(latenz_ms=args.ki_latenz_ms, pro_angebot_ms=args.ki_latenz_ms / 20)
+    anfragen = [{'key': str(i), 'rule': 'Standard', 'offer_percent_of_list_price': 60 + i % 35,
+                 'buyer_intent': 'keine'} for i in range(args.ki_angebote)]
+    ergebnisse = {}
+    for parallel, buendel in ((1, 1), (4, 1), (4, 10), (8, 20)):
+        client = KIClient(modell, max_parallel=parallel, batch_groesse=buendel)
+        start = time.perf_counter()
+        for future in client.anfragen(anfragen):
+            future.result()
+        dauer = time.perf_counter() - start
+        status = client.get_status()
+        client.stop()
+        ergebnisse[f'parallel{parallel}_batch{buendel}'] = {
+            'seconds': round(dauer, 3),
+            'offers_per_second': round(len(anfragen) / dauer, 1),
+            'avg_batch_size': status['avg_batch_size'],
+        }
+
+    client = KIClient(modell, max_parallel=4, batch_groesse=10)
+    berater = KIBerater(EntscheidungsCache(), client=client, timeout=60)
+    angebote = list(synthetische_angebote(args.ki_angebote * 10, args.seed))
+    start = time.perf_counter()
+    quellen = {}
+    for teil in range(0, len(angebote), 1000):
+        for empfehlung in berater.empfehlungen(angebote[teil:teil + 1000]):
+            quellen[empfehlung['source']] = quellen.get(empfehlung['source'], 0) + 1
+    dauer = time.perf_counter() - start
+    client.stop()
+    ergebnisse['berater'] = {
+        'offers': len(angebote),
+        'seconds': round(dauer, 3),
+        'offers_per_second': round(len(angebote) / dauer, 1),
+        'sources': quellen,
+        'cache_hit_rate': berater.cache.get_status()['hit_rate'],
+    }
+    return ergebnisse
+
+
+def importtime_profil(ausgabe, modul='hauptserver'):
+    """
+    Wertet die stderr-Ausgabe von python -X importtime aus: [(import, eigen_ms, gesamt_ms)]
+    der direkten Importe von modul, langsamste zuerst. importtime gibt Kinder vor dem
+    Eltern-Modul aus, site-Pakete des Interpreters fallen so heraus.
+    """
+    kinder = []
+    for zeile in ausgabe.splitlines():
+        if not zeile.startswith('import time:') or 'self [us]' in zeile:
+            continue
+        eigen, gesamt, name = zeile[len('import time:'):].split('|')
+        tiefe = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        if tiefe == 0:
+            if name.strip() == modul:
+                return sorted(kinder, key=lambda m: m[2], reverse=True)
+            kinder = []
+        elif tiefe == 1:
+            kinder.append((name.strip(), int(eigen) / 1000, int(gesamt) / 1000))
+    return []
+
+
+# Module, die erst bei Bedarf geladen werden sollen (nicht schon beim Import des Servers)
+LAZY_MODULE = ('openai', 'requests', 'dotenv', 'xml.etree.ElementTree')
+
+
+# Gruppierungen der Analytics-Messung (wie /api/analytics/offers?group_by=...)
+ANALYTICS_GRUPPEN = (('status',), ('rule', 'week'), ('month', 'status'), ('buyer',))
+
+
+def bench_analytics(mock_url, args):
+    from collections import Counter
+
+    from angebote.offer_store import OfferStore
+    from angebote.spalten_tabelle import SpaltenTabelle
+
+    ergebnisse = {}
+    for groesse in args.groessen:
+        store = OfferStore()
+        store.upsert_many(synthetische_angebote(groesse, args.seed))
+        t0 = time.perf_counter()
+        tabelle = SpaltenTabelle(store)
+        messung = {'backend': tabelle.backend, 'build_seconds': round(time.perf_counter() - t0, 3)}
+        for nach in ANALYTICS_GRUPPEN:
+            zeiten = []
+            for _ in range(5):
+                t0 = time.perf_counter()
+                tabelle.gruppiere(nach, sort='offers', desc=True, limit=50)
+                zeiten.append(time.perf_counter() - t0)
+            messung[','.join(nach)] = latenzen(zeiten)
+        # Vergleich: bisheriger Weg über die Dicts des Stores (nur Anzahl je Status)
+        t0 = time.perf_counter()
+        Counter(o.get('status') for o in store.iter_alle())
+        messung['dict_loop_ms'] = _ms(time.perf_counter() - t0)
+        ergebnisse[str(groesse)] = messung
+    return ergebnisse
+
+
+def bench_startup(mock_url, args):
+    """
+    Kaltstart des Servers: Import von hauptserver in jeweils neuen Prozessen (leeres
+    Arbeitsverzeichnis, also ohne Startbestand und Tokens) und die zehn langsamsten
+    direkten Importe. Interpreter-Start und site-Pakete zählen nicht mit.
+    """
+    backend = os.path.dirname(os.path.abspath(__file__))
+    umgebung = {**os.environ, 'PYTHONPATH': backend}
+    messen = ('import sys, time; t = time.perf_counter(); import hauptserver; '
+              'print(time.perf_counter() - t, *[m for m in sys.argv[1:] if m in sys.modules])')
+    with tempfile.TemporaryDirectory() as arbeitsverzeichnis:
+        def starte(*befehl):
+            return subprocess.run([sys.executable, *befehl], cwd=arbeitsverzeichnis, env=umgebung,
+                                  capture_output=True, text=True, check=True, timeout=120)
+        zeiten = []
+        for _ in range(args.start_laeufe):
+            dauer, *geladen = starte('-c', messen, *LAZY_MODULE).stdout.split('\n')[-2].split()
+            zeiten.append(float(dauer))
+        profil = importtime_profil(starte('-X', 'importtime', '-c', 'import hauptserver').stderr)
+    return {
+        'import': latenzen(zeiten),
+        'target_ms': args.start_ziel_ms,
+        'target_met': statistics.median(zeiten) * 1000 <= args.start_ziel_ms,
+        'lazy_modules_loaded': geladen,
+        'slowest_imports': {name: {'self_ms': round(eigen, 1), 'cumulative_ms': round(gesamt, 1)}
+                            for name, eigen, gesamt in profil[:10]},
+    }
+
+
+BENCHMARKS = {
+    'listing_sweep': bench_listing_sweep,
+    'offer_fetch': bench_offer_fetch,
+    'rule_eval': bench_rule_eval,
+    'respond': bench_respond,
+    'api': bench_api,
+    'ki': bench_ki,
+    'analytics': bench_analytics,
+    'startup': bench_startup,
+}
+
+
+# === Ergebnisse und Vergleich ===
+def _git_stand():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def flach(werte, praefix=''):
+    """{'api': {'1000': {'stats': {'cold': {'p95_ms': 1}}}}} -> {'api.1000.stats.cold.p95_ms': 1}"""
+    ergebnis = {}
+    for schluessel, wert in werte.items():
+        name = f'{praefix}{schluessel}'
+        if isinstance(wert, dict):
+            ergebnis.update(flach(wert, name + '.'))
+        elif isinstance(wert, (int, float)) and not isinstance(wert, bool):
+            ergebnis[name] = wert
+    return ergebnis
+
+
+def vergleiche(alt, neu, toleranz):
+    """
+    Vergleicht Durchsatz (*_per_second, höher ist besser) und Latenzen (*_ms, niedriger ist
+    besser). Liefert eine Liste (metrik, alt, neu, änderung_prozent, verschlechtert).
+    """
+    alt, neu = flach(alt['results']), flach(neu['results'])
+    zeilen = []
+    for metrik in sorted(alt.keys() & neu.keys()):
+        if metrik.endswith('_per_second'):
+            besser_hoeher = True
+        elif metrik.endswith('_ms'):
+            besser_hoeher = False
+        else:
+            continue
+        a, n = alt[metrik], neu[metrik]
+        if not a:
+            continue
+        aenderung = (n - a) / a * 100
+        verschlechtert = -aenderung > toleranz if besser_hoeher else aenderung > toleranz
+        zeilen.append((metrik, a, n, round(aenderung, 1), verschlechtert))
+    return zeilen
+
+
+def logging_ruhig():
+    """Konsolen-Logging der Clients und des Mocks während der Messung unterdrücken"""
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks gegen den lokalen eBay-Mock')
+    parser.add_argument('--nur', default=','.join(FAELLE), help='Kommagetrennt: ' + ', '.join(FAELLE))
+    parser.add_argument('--groessen', default='1000,10000,100000,1000000',
+                        help='Bestandsgrößen für rule_eval und api')
+    parser.add_argument('--mock-url', help='Laufender Mock (sonst wird einer im Prozess gestartet)')
+    parser.add_argument('--mock-listings', type=int, default=20000)
+    parser.add_argument('--mock-offers', type=int, default=2000)
+    parser.add_argument('--mock-latenz-ms', type=float, default=0.0)
+    parser.add_argument('--antworten', type=int, default=1000, help='Anzahl Antworten für respond')
+    parser.add_argument('--parallel', type=int, default=8, help='Parallele Antworten für respond')
+    parser.add_argument('--wiederholungen', type=int, default=30, help='Requests pro API-Endpunkt und Größe')
+    parser.add_argument('--ki-angebote', type=int, default=200, help='Anfragen für ki')
+    parser.add_argument('--ki-latenz-ms', type=float, default=100.0, help='Latenz des Ersatzmodells pro Aufruf')
+    parser.add_argument('--start-laeufe', type=int, default=7, help='Neue Prozesse für startup')
+    parser.add_argument('--start-ziel-ms', type=float, default=250.0, help='Ziel für den Import von hauptserver (Median)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--ausgabe', help='JSON-Datei (Standard: benchmark_ergebnisse/<zeit>-<commit>.json)')
+    parser.add_argument('--vergleich', help='Früheres Ergebnis, gegen das geprüft wird')
+    parser.add_argument('--toleranz', type=float, default=10.0, help='Erlaubte Verschlechterung in Prozent')
+    args = parser.parse_args()
+    args.groessen = [int(g) for g in args.groessen.split(',') if g]
+
+    logging_ruhig()
+    mock_url = args.mock_url or starte_mock(args.mock_listings, args.mock_offers, args.mock_latenz_ms, args.seed)
+
+    stand = _git_stand()
+    ergebnis = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git': stand,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'mock': {'url': args.mock_url or 'in-process', 'listings': args.mock_listings,
+                     'offers': args.mock_offers, 'latency_ms': args.mock_latenz_ms},
+            'sizes': args.groessen,
+        },
+        'results': {}
+    }
+    for name in args.nur.split(','):
+        print(f'{name} ...', flush=True)
+        start = time.perf_counter()
+        ergebnis['results'][name] = BENCHMARKS[name](mock_url, args)
+        print(f'  {json.dumps(ergebnis["results"][name], ensure_ascii=False)[:400]}')
+        print(f'  ({time.perf_counter() - start:.1f} s)')
+
+    pfad = args.ausgabe or os.path.join(
+        'benchmark_ergebnisse', f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{stand or 'unbekannt'}.json")
+    os.makedirs(os.path.dirname(pfad) or '.', exist_ok=True)
+    with open(pfad, 'w', encoding='utf-8') as f:
+        json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+    print(f'Ergebnis: {pfad}')
+
+    if args.vergleich:
+        with open(args.vergleich, encoding='utf-8') as f:
+            alt = json.load(f)
+        zeilen = vergleiche(alt, ergebnis, args.toleranz)
+        print(f"\nVergleich mit {args.vergleich} ({alt['meta'].get('git')}):")
+        for metrik, a, n, aenderung, verschlechtert in zeilen:
+            print(f"{'!!' if verschlechtert else '  '} {metrik:<55} {a:>12} -> {n:>12}  {aenderung:+.1f} %")
+        if any(z[4] for z in zeilen):
+            print(f'Verschlechterung über {args.toleranz} % gefunden')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
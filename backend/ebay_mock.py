@@ -0,0 +1,606 @@
+"""
+Lokaler eBay-Mock für Offline- und Lasttests
+Spricht die Trading-API-Calls (GetMyeBaySelling, GetBestOffers, RespondToBestOffer,
+GeteBayOfficialTime, GetUser) unter /ws/api.dll sowie die REST-Endpunkte für
+Negotiation, Inventory, Fulfillment, Account und den OAuth-Token. Der Datenbestand
+wird aus einem Seed erzeugt (jeder Listing-/Angebots-Index ergibt immer dieselben
+Daten), so dass auch 158k Listings ohne Vorlauf bereitstehen.
+
+    python ebay_mock.py --listings 158000 --offers 20000 --latenz-ms 80 --fehlerrate 0.01 --rps 50
+    EBAY_API_BASE_URL=http://localhost:8089 python hauptserver.py
+
+Latenz, Fehler- und 429-Rate lassen sich zur Laufzeit über POST /mock/config ändern,
+GET /mock/status zeigt Konfiguration und Call-Zähler. Der Zustand (beantwortete
+Angebote) liegt im Prozess – den Mock daher mit einem Prozess betreiben.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+from flask import Flask, Response, jsonify, request
+
+NS = 'urn:ebay:apis:eBLBaseComponents'
+
+# Maximale Seitengrößen wie bei eBay
+MAX_EINTRAEGE_TRADING = 200
+MAX_LIMIT_REST = 200
+
+TITEL_TEILE = (
+    ('Lehrbuch', 'Handbuch', 'Einführung in', 'Grundkurs', 'Praxisbuch', 'Kompendium'),
+    ('Analysis', 'Makroökonomie', 'Organische Chemie', 'Strafrecht', 'Statistik', 'Informatik',
+     'Anatomie', 'BWL', 'Thermodynamik', 'Pädagogik'),
+    ('1. Auflage', '3. Auflage', '5. Auflage', 'Neuauflage', 'Studienausgabe', 'Taschenbuch'),
+)
+ZUSTAENDE = ('USED_ACCEPTABLE', 'USED_GOOD', 'USED_VERY_GOOD', 'LIKE_NEW')
+NACHRICHTEN = ('', '', 'Würden Sie das Buch für diesen Preis abgeben?', 'Ist Versand inklusive?',
+               'Brauche es fürs Semester, danke!', 'Letztes Angebot.')
+
+
+def _jetzt():
+    return datetime.now(timezone.utc)
+
+
+def _iso(zeitpunkt):
+    return zeitpunkt.strftime('%Y-%m-%dT%H:%M:%S.') + f'{zeitpunkt.microsecond // 1000:03d}Z'
+
+
+class MockDaten:
+    """
+    Deterministischer Datenbestand: Listing i und Angebot j werden bei Bedarf aus dem Seed
+    erzeugt. Gespeichert wird nur, was sich durch Antworten ändert.
+    """
+    ITEM_ID_BASIS = 110000000000
+
+    def __init__(self, listings=1000, offers=200, seed=42, gegenangebot_anteil=0.1):
+        self.listings = max(1, listings)
+        self.offers = offers
+        self.seed = seed
+        self.gegenangebot_anteil = gegenangebot_anteil
+        self.basiszeit = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self._lock = threading.Lock()
+        self._offen = list(range(offers))          # Indizes offener Angebote, aufsteigend
+        self._status = {}                          # Angebots-Index -> geänderter Status
+        self._gegenangebote = {}                   # Angebots-Index -> Betrag des Verkäufers
+        self._bestellungen = []                    # angenommene Angebots-Indizes
+        self._angebote_je_listing = None
+
+    # === Listings ===
+    def listing_index(self, item_id):
+        try:
+            i = int(item_id) - self.ITEM_ID_BASIS
+        except (TypeError, ValueError):
+            return None
+        return i if 0 <= i < self.listings else None
+
+    def listing(self, i):
+        rnd = random.Random(self.seed * 1_000_003 + i)
+        start = self.basiszeit + timedelta(minutes=rnd.randrange(0, 60 * 24 * 300))
+        return {
+            'item_id': str(self.ITEM_ID_BASIS + i),
+            'title': f'{rnd.choice(TITEL_TEILE[0])} {rnd.choice(TITEL_TEILE[1])} – {rnd.choice(TITEL_TEILE[2])}',
+            'price': round(rnd.uniform(4.0, 89.0), 2),
+            'quantity': rnd.choice((1, 1, 1, 2, 3)),
+            'condition': rnd.choice(ZUSTAENDE),
+            'start_time': start,
+            'end_time': start + timedelta(days=30),
+        }
+
+    # === Angebote ===
+    def _listing_von(self, j):
+        return (j * 7919 + self.seed) % self.listings
+
+    def angebot(self, j):
+        rnd = random.Random(self.seed * 7_000_003 + j)
+        listing = self.listing(self._listing_von(j))
+        status = 'COUNTERED' if rnd.random() < self.gegenangebot_anteil else 'PENDING'
+        erstellt = _jetzt() - timedelta(minutes=rnd.randrange(1, 60 * 47))
+        angebot = {
+            'offer_id': f'BO{j:09d}',
+            'index': j,
+            'item_id': listing['item_id'],
+            'item_title': listing['title'],
+            'listing_price': listing['price'],
+            'buyer_id': f'kaeufer_{rnd.randrange(10 ** 6):06d}',
+            'amount': round(listing['price'] * rnd.uniform(0.45, 0.98), 2),
+            'message': rnd.choice(NACHRICHTEN),
+            'quantity': 1,
+            'created': erstellt,
+            'expires': erstellt + timedelta(hours=48),
+            'status': status,
+        }
+        with self._lock:
+            angebot['status'] = self._status.get(j, status)
+            if j in self._gegenangebote:
+                angebot['counter_amount'] = self._gegenangebote[j]
+        return angebot
+
+    def angebot_index(self, offer_id):
+        try:
+            j = int(str(offer_id).lstrip('BO'))
+        except ValueError:
+            return None
+        return j if 0 <= j < self.offers else None
+
+    def offene_angebote(self, status=None, offset=0, limit=50, item_id=None):
+        """Offene Angebote (optional nach Status und Artikel) – liefert (Seite, Gesamtzahl)"""
+        if item_id is not None:
+            i = self.listing_index(item_id)
+            with self._lock:
+                kandidaten = [j for j in self._angebote_fuer_listing(i) if j not in self._status
+                              or self._status[j] == 'COUNTERED'] if i is not None else []
+        else:
+            with self._lock:
+                kandidaten = self._offen
+                if status is None:
+                    return [self.angebot(j) for j in kandidaten[offset:offset + limit]], len(kandidaten)
+                kandidaten = list(kandidaten)
+        angebote = [self.angebot(j) for j in kandidaten]
+        if status is not None:
+            angebote = [a for a in angebote if a['status'] in status]
+        return angebote[offset:offset + limit], len(angebote)
+
+    def _angebote_fuer_listing(self, i):
+        if self._angebote_je_listing is None:
+            index = defaultdict(list)
+            for j in range(self.offers):
+                index[self._listing_von(j)].append(j)
+            self._angebote_je_listing = index
+        return self._angebote_je_listing.get(i, [])
+
+    def antworten(self, offer_id, aktion, gegenangebot=None):
+        """Setzt den Status eines offenen Angebots; None wenn unbekannt oder nicht mehr offen"""
+        j = self.angebot_index(offer_id)
+        if j is None:
+            return None
+        aktion = aktion.upper()
+        with self._lock:
+            pos = bisect_left(self._offen, j)
+            if pos >= len(self._offen) or self._offen[pos] != j:
+                return None
+            if aktion == 'COUNTER':
+                self._status[j] = 'COUNTERED'
+                self._gegenangebote[j] = gegenangebot
+            else:
+                self._status[j] = 'ACCEPTED' if aktion == 'ACCEPT' else 'DECLINED'
+                del self._offen[pos]
+                if aktion == 'ACCEPT':
+                    self._bestellungen.append(j)
+        return self.angebot(j)
+
+    def bestellungen(self, offset=0, limit=50):
+        with self._lock:
+            indizes = list(self._bestellungen)
+        return [self.angebot(j) for j in indizes[offset:offset + limit]], len(indizes)
+
+    def zuruecksetzen(self):
+        with self._lock:
+            self._offen = list(range(self.offers))
+            self._status.clear()
+            self._gegenangebote.clear()
+            self._bestellungen.clear()
+
+    def get_status(self):
+        with self._lock:
+            return {
+                'listings': self.listings,
+                'offers': self.offers,
+                'seed': self.seed,
+                'open_offers': len(self._offen),
+                'answered_offers': self.offers - len(self._offen),
+                'orders': len(self._bestellungen)
+            }
+
+
+class Stoerungen:
+    """Latenz, Fehler- und Rate-Limit-Injektion für jeden API-Call"""
+    FELDER = ('latenz_ms', 'jitter_ms', 'fehlerrate', 'limit_rate', 'rps')
+
+    def __init__(self, latenz_ms=0.0, jitter_ms=0.0, fehlerrate=0.0, limit_rate=0.0, rps=0.0, seed=42):
+        self.latenz_ms = latenz_ms
+        self.jitter_ms = jitter_ms
+        self.fehlerrate = fehlerrate
+        self.limit_rate = limit_rate
+        self.rps = rps
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rps
+        self._zuletzt = time.monotonic()
+
+    def setzen(self, werte):
+        with self._lock:
+            for feld in self.FELDER:
+                if feld in werte:
+                    setattr(self, feld, float(werte[feld]))
+            self._tokens = min(self._tokens, self.rps)
+
+    def warten(self):
+        if self.latenz_ms or self.jitter_ms:
+            with self._lock:
+                ms = self._rnd.gauss(self.latenz_ms, self.jitter_ms) if self.jitter_ms else self.latenz_ms
+            time.sleep(max(ms, 0) / 1000)
+
+    def ausfall(self):
+        """'rate_limit', 'error' oder None für den aktuellen Call"""
+        with self._lock:
+            if self.rps > 0:
+                jetzt = time.monotonic()
+                self._tokens = min(self.rps, self._tokens + (jetzt - self._zuletzt) * self.rps)
+                self._zuletzt = jetzt
+                if self._tokens < 1:
+                    return 'rate_limit'
+                self._tokens -= 1
+            zufall = self._rnd.random()
+        if zufall < self.limit_rate:
+            return 'rate_limit'
+        if zufall < self.limit_rate + self.fehlerrate:
+            return 'error'
+        return None
+
+    def get_status(self):
+        return {feld: getattr(self, feld) for feld in self.FELDER}
+
+
+# === Trading API (XML) ===
+def _trading_antwort(call, inhalt='', ack='Success'):
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<{call}Response xmlns="{NS}">'
+            f'<Timestamp>{_iso(_jetzt())}</Timestamp><Ack>{ack}</Ack>'
+            f'<Version>1219</Version><Build>E1219_MOCK</Build>{inhalt}</{call}Response>')
+
+
+def _trading_fehler(call, code, kurz, lang=None):
+    return _trading_antwort(call, (
+        f'<Errors><ShortMessage>{escape(kurz)}</ShortMessage><LongMessage>{escape(lang or kurz)}</LongMessage>'
+        f'<ErrorCode>{code}</ErrorCode><SeverityCode>Error</SeverityCode>'
+        f'<ErrorClassification>RequestError</ErrorClassification></Errors>'), ack='Failure')
+
+
+def _text(root, pfad, standard=None):
+    element = root.find(pfad, {'ns': NS})
+    return element.text if element is not None and element.text is not None else standard
+
+
+def _item_xml(listing, angebote=0):
+    preis = f'{listing["price"]:.2f}'
+    return (f'<Item><ItemID>{listing["item_id"]}</ItemID><Title>{escape(listing["title"])}</Title>'
+            f'<ListingType>FixedPriceItem</ListingType>'
+            f'<BuyItNowPrice currencyID="EUR">{preis}</BuyItNowPrice>'
+            f'<StartPrice currencyID="EUR">{preis}</StartPrice>'
+            f'<ListingDetails><StartTime>{_iso(listing["start_time"])}</StartTime>'
+            f'<EndTime>{_iso(listing["end_time"])}</EndTime></ListingDetails>'
+            f'<SellingStatus><CurrentPrice currencyID="EUR">{preis}</CurrentPrice></SellingStatus>'
+            f'<BestOfferDetails><BestOfferEnabled>true</BestOfferEnabled>'
+            f'<BestOfferCount>{angebote}</BestOfferCount></BestOfferDetails>'
+            f'<QuantityAvailable>{listing["quantity"]}</QuantityAvailable>'
+            f'<SKU>{listing["item_id"]}</SKU></Item>')
+
+
+def get_my_ebay_selling(daten, root):
+    pro_seite = min(int(_text(root, './/ns:ActiveList/ns:Pagination/ns:EntriesPerPage', '25')),
+                    MAX_EINTRAEGE_TRADING)
+    seite = max(1, int(_text(root, './/ns:ActiveList/ns:Pagination/ns:PageNumber', '1')))
+    start = (seite - 1) * pro_seite
+    items = ''.join(_item_xml(daten.listing(i)) for i in range(start, min(start + pro_seite, daten.listings)))
+    seiten = -(-daten.listings // pro_seite)
+    return _trading_antwort('GetMyeBaySelling', (
+        f'<ActiveList><ItemArray>{items}</ItemArray>'
+        f'<PaginationResult><TotalNumberOfPages>{seiten}</TotalNumberOfPages>'
+        f'<TotalNumberOfEntries>{daten.listings}</TotalNumberOfEntries></PaginationResult></ActiveList>'))
+
+
+def get_best_offers(daten, root):
+    item_id = _text(root, './/ns:ItemID')
+    i = daten.listing_index(item_id)
+    if i is None:
+        return _trading_fehler('GetBestOffers', 17, 'Item not found.', f'Der Artikel {item_id} existiert nicht.')
+    angebote, _ = daten.offene_angebote(item_id=item_id, limit=MAX_EINTRAEGE_TRADING)
+    eintraege = ''.join(
+        # BuyerID zusätzlich zu Buyer/UserID: ebay_api_real.get_best_offers liest das flache Feld
+        f'<BestOffer><BestOfferID>{a["offer_id"]}</BestOfferID>'
+        f'<ExpirationTime>{_iso(a["expires"])}</ExpirationTime>'
+        f'<Buyer><UserID>{a["buyer_id"]}</UserID></Buyer><BuyerID>{a["buyer_id"]}</BuyerID>'
+        f'<Price currencyID="EUR">{a["amount"]:.2f}</Price>'
+        f'<Status>{"Active" if a["status"] == "PENDING" else "Countered"}</Status>'
+        f'<Quantity>{a["quantity"]}</Quantity><BuyerMessage>{escape(a["message"])}</BuyerMessage>'
+        f'<BestOfferCodeType>BuyerBestOffer</BestOfferCodeType></BestOffer>'
+        for a in angebote)
+    listing = daten.listing(i)
+    return _trading_antwort('GetBestOffers', (
+        (f'<BestOfferArray>{eintraege}</BestOfferArray>' if eintraege else '')
+        + f'<Item><ItemID>{listing["item_id"]}</ItemID>'
+          f'<BuyItNowPrice currencyID="EUR">{listing["price"]:.2f}</BuyItNowPrice></Item>'))
+
+
+def respond_to_best_offer(daten, root):
+    if _text(root, './/ns:Accept') == 'true':
+        aktion = 'ACCEPT'
+    elif _text(root, './/ns:Decline') == 'true':
+        aktion = 'DECLINE'
+    elif _text(root, './/ns:CounterOffer') == 'true' or root.find('.//ns:CounterOfferPrice', {'ns': NS}) is not None:
+        aktion = 'COUNTER'
+    else:
+        return _trading_fehler('RespondToBestOffer', 37, 'Input data is invalid.', 'Keine Aktion angegeben.')
+    gegenangebot = _text(root, './/ns:CounterOfferPrice')
+    ergebnisse = []
+    for element in root.findall('.//ns:BestOfferID', {'ns': NS}):
+        angebot = daten.antworten(element.text, aktion, float(gegenangebot) if gegenangebot else None)
+        if angebot is None:
+            return _trading_fehler('RespondToBestOffer', 21919, 'Best offer not found.',
+                                   f'Das Angebot {element.text} existiert nicht oder ist nicht mehr aktiv.')
+        ergebnisse.append(f'<BestOffer><BestOfferID>{element.text}</BestOfferID>'
+                          f'<CallStatus>Success</CallStatus></BestOffer>')
+    return _trading_antwort('RespondToBestOffer', f'<RespondToBestOffer>{"".join(ergebnisse)}</RespondToBestOffer>')
+
+
+def get_ebay_official_time(daten, root):
+    return _trading_antwort('GeteBayOfficialTime')
+
+
+def get_user(daten, root):
+    return _trading_antwort('GetUser', (
+        '<User><UserID>mock_verkaeufer</UserID><Email>mock@example.com</Email><FeedbackScore>15873</FeedbackScore>'
+        '<PositiveFeedbackPercent>99.8</PositiveFeedbackPercent><Site>Germany</Site>'
+        '<Status>Confirmed</Status><SellerInfo><StoreOwner>true</StoreOwner></SellerInfo></User>'))
+
+
+TRADING_CALLS = {
+    'GetMyeBaySelling': get_my_ebay_selling,
+    'GetBestOffers': get_best_offers,
+    'RespondToBestOffer': respond_to_best_offer,
+    'GeteBayOfficialTime': get_ebay_official_time,
+    'GetUser': get_user,
+}
+
+
+# === REST ===
+def _rest_fehler(status, error_id, nachricht):
+    return jsonify({'errors': [{'errorId': error_id, 'domain': 'API_MOCK', 'category': 'REQUEST',
+                                'message': nachricht}], 'message': nachricht}), status
+
+
+def _seite():
+    limit = max(1, min(int(request.args.get('limit', 50)), MAX_LIMIT_REST))
+    return int(request.args.get('offset', 0)), limit
+
+
+def _offer_json(angebot):
+    eintrag = {
+        'offerId': angebot['offer_id'],
+        'itemId': angebot['item_id'],
+        'buyerId': angebot['buyer_id'],
+        'amount': {'value': f'{angebot["amount"]:.2f}', 'currency': 'EUR'},
+        'message': angebot['message'],
+        'quantity': angebot['quantity'],
+        'status': angebot['status'],
+        'creationDate': _iso(angebot['created']),
+        'expirationDate': _iso(angebot['expires']),
+    }
+    if 'counter_amount' in angebot:
+        eintrag['counterOffer'] = {'amount': {'value': f'{angebot["counter_amount"]:.2f}', 'currency': 'EUR'}}
+    return eintrag
+
+
+def _inventory_json(listing):
+    return {
+        'sku': listing['item_id'],
+        'locale': 'de_DE',
+        'condition': listing['condition'],
+        'product': {'title': listing['title'], 'aspects': {'Sprache': ['Deutsch']}, 'imageUrls': []},
+        'availability': {'shipToLocationAvailability': {'quantity': listing['quantity']}},
+    }
+
+
+def _order_json(angebot):
+    return {
+        'orderId': f'{angebot["index"]:02d}-{angebot["index"] * 31 % 100000:05d}-{angebot["index"] % 99991:05d}',
+        'creationDate': _iso(angebot['created']),
+        'orderFulfillmentStatus': 'NOT_STARTED',
+        'orderPaymentStatus': 'PAID',
+        'buyer': {'username': angebot['buyer_id']},
+        'lineItems': [{
+            'lineItemId': f'{angebot["index"]}0',
+            'legacyItemId': angebot['item_id'],
+            'sku': angebot['item_id'],
+            'title': angebot['item_title'],
+            'quantity': angebot['quantity'],
+            'total': {'value': f'{angebot["amount"]:.2f}', 'currency': 'EUR'},
+        }],
+    }
+
+
+def erstelle_app(daten, stoerungen):
+    app = Flask(__name__)
+    zaehler = defaultdict(int)
+    zaehler_lock = threading.Lock()
+
+    def zaehlen(call, status):
+        with zaehler_lock:
+            zaehler[f'{call} {status}'] += 1
+
+    @app.before_request
+    def _stoerung():
+        if request.path.startswith('/mock/'):
+            return None
+        stoerungen.warten()
+        ausfall = stoerungen.ausfall()
+        if ausfall is None:
+            return None
+        if request.path == '/ws/api.dll':
+            # Trading-API meldet Fehler mit HTTP 200 und Ack=Failure
+            call = request.headers.get('X-EBAY-API-CALL-NAME') or 'Unknown'
+            zaehlen(call, ausfall)
+            if ausfall == 'rate_limit':
+                xml = _trading_fehler(call, 518, 'Call usage limit has been reached.',
+                                      'Das Aufruflimit für diese Anwendung ist erreicht.')
+            else:
+                xml = _trading_fehler(call, 10007, 'Internal error to the application.',
+                                      'Interner Fehler (vom Mock injiziert).')
+            return Response(xml, mimetype='text/xml')
+        zaehlen(request.path, ausfall)
+        if ausfall == 'rate_limit':
+            antwort, status = _rest_fehler(429, 2001, 'Too many requests. The request limit has been reached.')
+            antwort.headers['Retry-After'] = '1'
+            return antwort, status
+        return _rest_fehler(500, 10000, 'There was a problem with an eBay internal system or process.')
+
+    @app.route('/ws/api.dll', methods=['POST'])
+    def trading():
+        try:
+            root = ET.fromstring(request.get_data())
+        except ET.ParseError as e:
+            zaehlen('Unknown', 'parse_error')
+            return Response(_trading_fehler('Unknown', 5, 'XML Parse error.', str(e)), mimetype='text/xml')
+        # Call-Name aus dem Header, sonst aus dem Wurzelelement (<GetMyeBaySellingRequest>)
+        call = request.headers.get('X-EBAY-API-CALL-NAME') or root.tag.split('}')[-1].removesuffix('Request')
+        handler = TRADING_CALLS.get(call)
+        if handler is None:
+            zaehlen(call, 'unsupported')
+            return Response(_trading_fehler(call, 2, 'Unsupported API call.',
+                                            f'Der Call {call} wird vom Mock nicht unterstützt.'), mimetype='text/xml')
+        if not (request.headers.get('X-EBAY-API-IAF-TOKEN') or _text(root, './/ns:RequesterCredentials/ns:eBayAuthToken')):
+            zaehlen(call, 'auth_error')
+            return Response(_trading_fehler(call, 931, 'Auth token is invalid.'), mimetype='text/xml')
+        xml = handler(daten, root)
+        zaehlen(call, 'ack_failure' if '<Ack>Failure</Ack>' in xml else 'ok')
+        return Response(xml, mimetype='text/xml')
+
+    def rest(funktion):
+        """REST-Endpunkte verlangen einen Bearer-Token"""
+        def wrapper(*args, **kwargs):
+            if not request.headers.get('Authorization', '').startswith('Bearer '):
+                zaehlen(request.path, 'auth_error')
+                return _rest_fehler(401, 1001, 'Invalid access token.')
+            antwort = funktion(*args, **kwargs)
+            zaehlen(request.url_rule.rule, 'ok')
+            return antwort
+        wrapper.__name__ = funktion.__name__
+        return wrapper
+
+    @app.route('/sell/negotiation/v1/offer', methods=['GET'])
+    @rest
+    def negotiation_offers():
+        offset, limit = _seite()
+        status = request.args.get('status')
+        angebote, gesamt = daten.offene_angebote(
+            status=set(status.split(',')) if status else None, offset=offset, limit=limit,
+            item_id=request.args.get('item_id'))
+        antwort = {'href': request.full_path, 'total': gesamt, 'limit': limit, 'offset': offset,
+                   'offers': [_offer_json(a) for a in angebote]}
+        if offset + limit < gesamt:
+            antwort['next'] = f'{request.path}?limit={limit}&offset={offset + limit}'
+        return jsonify(antwort)
+
+    @app.route('/sell/negotiation/v1/offer/<offer_id>/respond', methods=['POST'])
+    @rest
+    def negotiation_respond(offer_id):
+        daten_json = request.get_json(silent=True) or {}
+        aktion = str(daten_json.get('action', '')).upper()
+        if aktion not in ('ACCEPT', 'DECLINE', 'COUNTER'):
+            return _rest_fehler(400, 150001, f'Ungültige Aktion: {aktion or "(leer)"}')
+        betrag = (daten_json.get('counterOffer') or {}).get('amount', {}).get('value')
+        if aktion == 'COUNTER' and betrag is None:
+            return _rest_fehler(400, 150002, 'counterOffer.amount fehlt')
+        angebot = daten.antworten(offer_id, aktion, float(betrag) if betrag is not None else None)
+        if angebot is None:
+            return _rest_fehler(404, 150404, f'Angebot {offer_id} nicht gefunden oder nicht mehr offen')
+        return jsonify({'offerId': offer_id, 'status': angebot['status']})
+
+    @app.route('/sell/inventory/v1/inventory_item', methods=['GET'])
+    @rest
+    def inventory_items():
+        offset, limit = _seite()
+        ende = min(offset + limit, daten.listings)
+        return jsonify({'total': daten.listings, 'size': max(ende - offset, 0), 'limit': limit, 'offset': offset,
+                        'inventoryItems': [_inventory_json(daten.listing(i)) for i in range(offset, ende)]})
+
+    @app.route('/sell/inventory/v1/inventory_item/<sku>', methods=['GET'])
+    @rest
+    def inventory_item(sku):
+        i = daten.listing_index(sku)
+        if i is None:
+            return _rest_fehler(404, 25710, f'Inventory-Item {sku} nicht gefunden')
+        return jsonify(_inventory_json(daten.listing(i)))
+
+    @app.route('/sell/fulfillment/v1/order', methods=['GET'])
+    @rest
+    def orders():
+        offset, limit = _seite()
+        angebote, gesamt = daten.bestellungen(offset, limit)
+        return jsonify({'total': gesamt, 'limit': limit, 'offset': offset,
+                        'orders': [_order_json(a) for a in angebote]})
+
+    @app.route('/sell/fulfillment/v1/order/<order_id>/shipping_fulfillment', methods=['POST'])
+    @rest
+    def shipping_fulfillment(order_id):
+        antwort = jsonify({'fulfillmentId': f'{order_id}-F1'})
+        antwort.headers['Location'] = f'{request.path}/{order_id}-F1'
+        return antwort, 201
+
+    @app.route('/sell/account/v1/privilege', methods=['GET'])
+    @rest
+    def privilege():
+        return jsonify({'sellingLimit': {'amount': {'value': '500000.0', 'currency': 'EUR'}, 'quantity': 200000},
+                        'sellerRegistrationCompleted': True})
+
+    @app.route('/identity/v1/oauth2/token', methods=['POST'])
+    def oauth_token():
+        if not request.form.get('grant_type'):
+            return jsonify({'error': 'invalid_request', 'error_description': 'grant_type fehlt'}), 400
+        zaehlen('/identity/v1/oauth2/token', 'ok')
+        return jsonify({'access_token': f'v^1.1#i^1#mock#{int(time.time())}', 'expires_in': 7200,
+                        'token_type': 'User Access Token'})
+
+    # === Steuerung ===
+    @app.route('/mock/status', methods=['GET'])
+    def mock_status():
+        with zaehler_lock:
+            calls = dict(zaehler)
+        return jsonify({'data': daten.get_status(), 'faults': stoerungen.get_status(), 'calls': calls})
+
+    @app.route('/mock/config', methods=['POST'])
+    def mock_config():
+        stoerungen.setzen(request.get_json(silent=True) or {})
+        return jsonify(stoerungen.get_status())
+
+    @app.route('/mock/reset', methods=['POST'])
+    def mock_reset():
+        daten.zuruecksetzen()
+        with zaehler_lock:
+            zaehler.clear()
+        return jsonify(daten.get_status())
+
+    return app
+
+
+def main():
+    env = os.getenv
+    parser = argparse.ArgumentParser(description='Lokaler eBay-Mock (Trading + Sell REST)')
+    parser.add_argument('--host', default=env('MOCK_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(env('MOCK_PORT', '8089')))
+    parser.add_argument('--listings', type=int, default=int(env('MOCK_LISTINGS', '1000')))
+    parser.add_argument('--offers', type=int, default=int(env('MOCK_OFFERS', '200')))
+    parser.add_argument('--seed', type=int, default=int(env('MOCK_SEED', '42')))
+    parser.add_argument('--latenz-ms', type=float, default=float(env('MOCK_LATENCY_MS', '0')))
+    parser.add_argument('--jitter-ms', type=float, default=float(env('MOCK_JITTER_MS', '0')))
+    parser.add_argument('--fehlerrate', type=float, default=float(env('MOCK_ERROR_RATE', '0')),
+                        help='Anteil der Calls mit Serverfehler (0..1)')
+    parser.add_argument('--limit-rate', type=float, default=float(env('MOCK_RATE_LIMIT_RATE', '0')),
+                        help='Anteil der Calls mit Rate-Limit-Antwort (0..1)')
+    parser.add_argument('--rps', type=float, default=float(env('MOCK_RPS', '0')),
+                        help='Calls pro Sekunde, darüber 429 bzw. Fehler 518 (0 = unbegrenzt)')
+    args = parser.parse_args()
+
+    daten = MockDaten(args.listings, args.offers, args.seed)
+    stoerungen = Stoerungen(args.latenz_ms, args.jitter_ms, args.fehlerrate, args.limit_rate, args.rps, args.seed)
+    print(f'eBay-Mock auf http://{args.host}:{args.port} – {args.listings} Listings, {args.offers} Angebote')
+    erstelle_app(daten, stoerungen).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+gunicorn-Konfiguration für den Produktivbetrieb von hauptserver.py
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Alle Werte lassen sich über Umgebungsvariablen anpassen.
+"""
+import os
+import signal
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5002')}"
+
+# Eine Logdatei je Worker ('{pid}' ersetzt setup_logging im Worker): mehrere Prozesse,
+# die dieselbe Datei rotieren, benennen sie gegenseitig um und verlieren Zeilen
+os.environ.setdefault('LOG_FILE', 'backend.{pid}.log')
+
+# Prozesse x Threads; jeder offene SSE-Stream (/api/stream) belegt einen Thread
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '16'))
+
+# Kein preload: Hintergrund-Threads und Sperren werden pro Worker nach dem Fork angelegt
+preload_app = False
+
+timeout = int(os.getenv('WEB_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+# Worker nach N Requests neu starten (begrenzt Speicherwachstum), 0 = nie
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('WEB_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    # Bei SIGTERM zuerst die SSE-Streams schließen, sonst hält jeder offene Stream
+    # den Worker bis graceful_timeout fest
+    handle_exit = worker.handle_exit
+
+    def _handle_exit(sig, frame):
+        if 'hauptserver' in sys.modules:
+            sys.modules['hauptserver'].events.close()
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, _handle_exit)
+
+
+def worker_int(worker):
+    # Ctrl+C / SIGINT: sauber beenden
+    _beenden()
+
+
+def worker_exit(server, worker):
+    # SIGTERM / graceful shutdown: Sync-Jobs abbrechen, SSE-Streams schließen, Snapshot schreiben
+    _beenden()
+
+
+def _beenden():
+    # Nur für wsgi:app; simple_main:app hat keine Hintergrunddienste
+    if 'wsgi' in sys.modules:
+        sys.modules['wsgi'].beenden()
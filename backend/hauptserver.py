@@ -1,20 +1,39 @@
 import os
-import json
-import requests
-import xml.etree.ElementTree as ET
+import io
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import logging
-from dotenv import load_dotenv
 import threading
+import time
 import base64
+from collections import Counter
+
+# .env genau einmal laden, bevor ein Modul seine Einstellungen liest
+import konfiguration
+konfiguration.lade_umgebung()
+
+from token_backend.refresh_scheduler import TokenRefreshScheduler
+from token_backend.token_datei import TokenDatei
+from angebote.offer_store import OfferStore, parse_abfrage
+from angebote.sync_orchestrator import SyncOrchestrator
+from angebote.sync_jobs import SyncJobEngine
+from angebote.event_stream import EventStream
+from angebote.aktions_log import AktionsLog, parse_abfrage as parse_log_abfrage
+from angebote import snapshot_datei
+from angebote.einkaufspreise import EinkaufspreisCache, LokaleQuelle
+from angebote.verhandlungs_historie import VerhandlungsHistorie
+from schnittstelle.shopware_api import ShopwareAPI
+from antwort_cache import AntwortCache
+from ki_entscheidung import KIBerater, EntscheidungsCache, EntscheidungsPipeline
+from ki_client import KIClient, modell_aus_umgebung
+from protokollierung import setup_logging
+import metriken
+import tracing
 
 app = Flask(__name__)
 CORS(app)
-
-# .env laden
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
+metriken.instrumentiere_flask(app)
 
 # === API ENDPUNKTE ===
 
@@ -24,17 +43,12 @@ EBAY_CONFIG = {
     'client_secret': os.getenv('EBAY_CERT_ID', 'your_ebay_cert_id_here'),
     'dev_id': os.getenv('EBAY_DEV_ID', 'your_ebay_dev_id_here'),
     'auth_token': os.getenv('EBAY_AUTH_TOKEN', ''),
+    # Token-Refresh und -Test (EBAY_API_BASE_URL zeigt z.B. auf den lokalen Mock, siehe ebay_mock.py)
+    'base_url': (os.getenv('EBAY_API_BASE_URL') or 'https://api.sandbox.ebay.com').rstrip('/'),
 }
 
-# Logging-Konfiguration
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler('backend.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# Logging: Queue + Hintergrund-Writer, JSON-Zeilen in backend.log (siehe protokollierung.py)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Beispiel-Logging in TokenManager und Endpunkten:
@@ -42,17 +56,22 @@ logger = logging.getLogger(__name__)
 
 # Beispiel: Logging in TokenManager anpassen
 TOKENS_FILE = 'tokens.json'
-tokens_lock = threading.Lock()
+# Gesperrte Änderungen und atomares Schreiben (siehe token_datei.py)
+token_datei = TokenDatei(TOKENS_FILE)
 
 def lade_tokens():
-    if not os.path.exists(TOKENS_FILE):
-        return []
-    with tokens_lock, open(TOKENS_FILE, 'r') as f:
-        return json.load(f)
+    return token_datei.lade()
 
-def speichere_tokens(tokens):
-    with tokens_lock, open(TOKENS_FILE, 'w') as f:
-        json.dump(tokens, f, indent=2, ensure_ascii=False)
+def tokens_version():
+    """Ändert sich mit jeder Änderung an tokens.json (für ETags)"""
+    try:
+        st = os.stat(TOKENS_FILE)
+    except FileNotFoundError:
+        return '0'
+    return f'{st.st_mtime_ns:x}.{st.st_size:x}'
+
+# Serialisierte und komprimierte Antworten je Datenversion (ETag / 304)
+antwort_cache = AntwortCache()
 
 def get_aktiver_token():
     tokens = lade_tokens()
@@ -63,7 +82,7 @@ def get_aktiver_token():
 
 @app.route('/api/tokens', methods=['GET'])
 def list_tokens():
-    return jsonify(lade_tokens())
+    return antwort_cache.antwort('tokens', tokens_version(), lade_tokens)
 
 @app.route('/api/tokens', methods=['POST'])
 def add_token():
@@ -73,49 +92,77 @@ def add_token():
     refresh_token = data.get('refresh_token')
     if not name or not access_token:
         return jsonify({'error': 'Name und Access Token erforderlich'}), 400
-    tokens = lade_tokens()
-    for t in tokens:
-        t['active'] = False
-    new_token = {
-        'name': name,
-        'access_token': access_token,
-        'refresh_token': refresh_token,
-        'active': True
-    }
-    tokens.append(new_token)
-    speichere_tokens(tokens)
+    with token_datei.bearbeiten() as tokens:
+        for t in tokens:
+            t['active'] = False
+        new_token = {
+            'name': name,
+            'access_token': access_token,
+            'refresh_token': refresh_token,
+            'active': True
+        }
+        tokens.append(new_token)
+    token_manager.load_token_data()
     return jsonify({'success': True, 'tokens': tokens})
 
 @app.route('/api/tokens/<name>', methods=['DELETE'])
 def delete_token(name):
-    tokens = lade_tokens()
-    tokens = [t for t in tokens if t['name'] != name]
-    if tokens:
-        tokens[0]['active'] = True
-    speichere_tokens(tokens)
+    with token_datei.bearbeiten() as tokens:
+        tokens[:] = [t for t in tokens if t['name'] != name]
+        if tokens:
+            tokens[0]['active'] = True
+    token_manager.load_token_data()
     return jsonify({'success': True, 'tokens': tokens})
 
 @app.route('/api/tokens/activate/<name>', methods=['POST'])
 def activate_token(name):
-    tokens = lade_tokens()
-    found = False
-    for t in tokens:
-        t['active'] = (t['name'] == name)
-        if t['active']:
-            found = True
-    if not found:
-        return jsonify({'error': 'Token nicht gefunden'}), 404
-    speichere_tokens(tokens)
+    with token_datei.sperre():
+        tokens = lade_tokens()
+        if not any(t['name'] == name for t in tokens):
+            return jsonify({'error': 'Token nicht gefunden'}), 404
+        for t in tokens:
+            t['active'] = (t['name'] == name)
+        token_datei.speichere(tokens)
+    token_manager.load_token_data()
     return jsonify({'success': True, 'tokens': tokens})
 
-@app.route('/api/tokens/refresh/<name>', methods=['POST'])
-def refresh_token(name):
-    tokens = lade_tokens()
-    token = next((t for t in tokens if t['name'] == name), None)
-    if not token or not token.get('refresh_token'):
-        return jsonify({'error': 'Kein Refresh Token für diesen Account'}), 400
+def aktualisiere_token(name, **felder):
+    """Ändert Felder eines Tokens (lesen, ändern, schreiben unter der Token-Sperre)"""
+    return token_datei.aktualisiere(name, **felder)
+
+def _token(name):
+    return next((t for t in lade_tokens() if t['name'] == name), None)
+
+def erneuere_access_token(name):
+    """
+    Führt den eBay OAuth Refresh Flow für einen Account aus. Läuft unter der
+    prozessübergreifenden Token-Sperre, damit ein manueller Refresh in einem Worker
+    und der geplante im Leader den (von eBay ggf. rotierten) Refresh Token nicht
+    beide einlösen: hat ein anderer Prozess während des Wartens erneuert, wird
+    dessen Ergebnis übernommen.
+    """
+    vorher = _token(name)
+    with token_datei.sperre():
+        token = _token(name)
+        if not token or not token.get('refresh_token'):
+            return {'success': False, 'error': 'Kein Refresh Token für diesen Account', 'http_status': 400}
+        if vorher and token.get('last_refresh') != vorher.get('last_refresh') and not token.get('refresh_error'):
+            return _bereits_erneuert(token)
+        return _oauth_refresh(name, token)
+
+def _bereits_erneuert(token):
+    """Ergebnis eines Refreshs, den ein anderer Prozess gerade ausgeführt hat"""
+    expires_in = None
+    if token.get('expires_at'):
+        expires_in = max(int((datetime.fromisoformat(token['expires_at']) - datetime.now()).total_seconds()), 0)
+    if token.get('active'):
+        token_manager.load_token_data()
+    logger.info(f"Access Token für {token['name']} wurde bereits von einem anderen Prozess erneuert")
+    return {'success': True, 'access_token': token.get('access_token'), 'expires_in': expires_in}
+
+def _oauth_refresh(name, token):
     # eBay OAuth Refresh Flow
-    url = "https://api.sandbox.ebay.com/identity/v1/oauth2/token"
+    url = f"{EBAY_CONFIG['base_url']}/identity/v1/oauth2/token"
     client_id = EBAY_CONFIG['client_id']
     client_secret = EBAY_CONFIG['client_secret']
     b64_creds = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
@@ -133,38 +180,161 @@ def refresh_token(name):
         response = requests.post(url, headers=headers, data=data, timeout=15)
         if response.status_code == 200:
             token_data = response.json()
-            token['access_token'] = token_data.get('access_token')
-            token['last_refresh'] = datetime.now().isoformat()
-            token['refresh_error'] = None
-            speichere_tokens(tokens)
-            return jsonify({'success': True, 'access_token': token['access_token'], 'expires_in': token_data.get('expires_in')})
+            felder = {
+                'access_token': token_data.get('access_token'),
+                'last_refresh': datetime.now().isoformat(),
+                'refresh_error': None
+            }
+            if token_data.get('refresh_token'):
+                # Rotierter Refresh Token: der alte ist ab jetzt ungültig
+                felder['refresh_token'] = token_data['refresh_token']
+            if token_data.get('expires_in'):
+                felder['expires_at'] = (datetime.now() + timedelta(seconds=int(token_data['expires_in']))).isoformat()
+            token = aktualisiere_token(name, **felder)
+            if token and token.get('active'):
+                token_manager.load_token_data()
+                if token_data.get('expires_in'):
+                    token_manager.set_expiry(token_data['expires_in'])
+            logger.info(f'Access Token für {name} erneuert')
+            return {'success': True, 'access_token': felder['access_token'], 'expires_in': token_data.get('expires_in')}
         else:
-            token['refresh_error'] = f"HTTP {response.status_code}: {response.text[:200]}"
-            speichere_tokens(tokens)
-            return jsonify({'error': 'Refresh fehlgeschlagen', 'details': response.text}), 400
+            aktualisiere_token(name, refresh_error=f"HTTP {response.status_code}: {response.text[:200]}")
+            return {'success': False, 'error': 'Refresh fehlgeschlagen', 'details': response.text, 'http_status': 400}
     except Exception as e:
-        token['refresh_error'] = str(e)
-        speichere_tokens(tokens)
-        return jsonify({'error': str(e)}), 500
+        aktualisiere_token(name, refresh_error=str(e))
+        return {'success': False, 'error': str(e), 'http_status': 500}
+
+refresh_scheduler = TokenRefreshScheduler(
+    lade_tokens,
+    erneuere_access_token,
+    vorlauf_sekunden=int(os.getenv('TOKEN_REFRESH_LEAD_SECONDS', '300'))
+)
+
+@app.route('/api/tokens/refresh/<name>', methods=['POST'])
+def refresh_token(name):
+    result = dict(refresh_scheduler.refresh(name))
+    if result.pop('success'):
+        return jsonify({'success': True, 'access_token': result['access_token'], 'expires_in': result.get('expires_in')})
+    http_status = result.pop('http_status', 500)
+    return jsonify(result), http_status
+
+@app.route('/api/tokens/refresh-status', methods=['GET'])
+def refresh_status():
+    return jsonify(refresh_scheduler.get_status())
+
+# eBay-Fehlercodes für ungültige/abgelaufene Tokens (Trading API)
+AUTH_FEHLERCODES = (b'<ErrorCode>931</ErrorCode>', b'<ErrorCode>932</ErrorCode>', b'<ErrorCode>16110</ErrorCode>')
 
 # Für alle eBay-API-Calls: aktiven Token verwenden
 class TokenManager:
-    def __init__(self):
+    def __init__(self, revalidate_interval=None, laden=True):
+        """laden=False: tokens.json erst beim ersten Status-/Token-Check lesen (schneller Import)"""
+        self.access_token = ''
         self.refresh_token = None
         self.token_expires_at = None
         self.last_check = None
         self.is_valid = False
         self.auto_refresh_enabled = False
-        self.load_token_data()
+        # Nach diesem Intervall (Sekunden) gilt der gecachte Status als veraltet
+        self.revalidate_interval = revalidate_interval or int(os.getenv('TOKEN_REVALIDATE_SECONDS', '900'))
+        self._lock = threading.Lock()
+        self._revalidation_thread = None
+        self._revalidation_stop = threading.Event()
+        self._geladen = False
+        if laden:
+            self.load_token_data()
 
     def load_token_data(self):
         aktiver = get_aktiver_token()
-        if aktiver:
-            self.access_token = aktiver['access_token']
-            self.refresh_token = aktiver.get('refresh_token')
-        else:
-            self.access_token = ''
-            self.refresh_token = None
+        access_token = aktiver['access_token'] if aktiver else ''
+        with self._lock:
+            self._geladen = True
+            if access_token != self.access_token:
+                # Anderer Token aktiv -> gecachter Status gilt nicht mehr
+                self.is_valid = False
+                self.last_check = None
+                self.token_expires_at = None
+            if aktiver and aktiver.get('expires_at'):
+                ablauf = datetime.fromisoformat(aktiver['expires_at'])
+                # Ein anderer Prozess (Leader) kann den Ablauf nach einem Refresh verlängert haben
+                if self.token_expires_at is None or ablauf > self.token_expires_at:
+                    self.token_expires_at = ablauf
+            self.access_token = access_token
+            self.refresh_token = aktiver.get('refresh_token') if aktiver else None
+
+    def set_expiry(self, expires_in):
+        """Übernimmt expires_in aus der OAuth-Antwort; ein frischer Token ist gültig"""
+        with self._lock:
+            self.token_expires_at = datetime.now() + timedelta(seconds=int(expires_in))
+            self.is_valid = True
+            self.last_check = datetime.now()
+
+    def record_api_result(self, success, status_code=None):
+        """Aktualisiert den Token-Status anhand eines echten API-Calls"""
+        with self._lock:
+            if success:
+                self.is_valid = True
+                self.last_check = datetime.now()
+            elif status_code in (401, 403):
+                self.is_valid = False
+                self.last_check = datetime.now()
+                logger.warning(f'Token bei API-Call abgelehnt (HTTP {status_code})')
+
+    def response_hook(self, response, *args, **kwargs):
+        """requests-Hook: wertet jede eBay-Antwort für den Token-Status aus"""
+        if response.status_code in (401, 403) or any(code in response.content for code in AUTH_FEHLERCODES):
+            self.record_api_result(False, 401 if response.status_code == 200 else response.status_code)
+        elif response.status_code == 200:
+            self.record_api_result(True)
+        return response
+
+    def is_stale(self):
+        if self.last_check is None:
+            return True
+        return (datetime.now() - self.last_check).total_seconds() > self.revalidate_interval
+
+    def is_expired(self):
+        return self.token_expires_at is not None and datetime.now() >= self.token_expires_at
+
+    def _sicherstellen(self):
+        if not self._geladen:
+            self.load_token_data()
+
+    def check_token(self):
+        """Prüft den Token über den gecachten Status; Netzwerk nur wenn veraltet oder unbekannt"""
+        self._sicherstellen()
+        if self.is_expired() or self.is_stale():
+            # Bei mehreren Workern erneuert nur der Leader: erst tokens.json neu lesen, dann entscheiden
+            self.load_token_data()
+        if not self.access_token:
+            return False
+        if self.is_expired():
+            return False
+        if not self.is_stale():
+            return self.is_valid
+        return self.test_token()
+
+    def start_revalidation(self):
+        """Startet die Hintergrund-Revalidierung im eingestellten Intervall"""
+        if self._revalidation_thread is not None:
+            return
+        self._sicherstellen()
+        self._revalidation_stop.clear()
+        def _loop():
+            while not self._revalidation_stop.wait(self.revalidate_interval):
+                try:
+                    if self.access_token and self.is_stale():
+                        self.test_token()
+                except Exception as e:
+                    logger.error(f'Token-Revalidierung fehlgeschlagen: {e}')
+        self._revalidation_thread = threading.Thread(target=_loop, name='token-revalidation', daemon=True)
+        self._revalidation_thread.start()
+
+    def stop_revalidation(self):
+        self._revalidation_stop.set()
+        if self._revalidation_thread is not None:
+            self._revalidation_thread.join(timeout=5)
+            self._revalidation_thread = None
 
     def save_token_data(self):
         pass  # Tokens werden zentral verwaltet
@@ -185,8 +355,10 @@ class TokenManager:
             'Content-Type': 'text/xml'
         }
         try:
-            response = requests.post('https://api.sandbox.ebay.com/ws/api.dll', data=xml_request, headers=headers, timeout=10)
+            import requests
+            response = requests.post(f"{EBAY_CONFIG['base_url']}/ws/api.dll", data=xml_request, headers=headers, timeout=10)
             if response.status_code == 200:
+                import xml.etree.ElementTree as ET
                 root = ET.fromstring(response.content)
                 ack = root.find('.//{urn:ebay:apis:eBLBaseComponents}Ack')
                 if ack is not None and ack.text == "Success":
@@ -197,65 +369,340 @@ class TokenManager:
                     return True
                 else:
                     self.is_valid = False
+                    self.last_check = datetime.now()
                     logger.warning('Token-Test fehlgeschlagen: Kein Success-Ack.')
                     return False
             else:
                 self.is_valid = False
+                self.last_check = datetime.now()
                 logger.error(f'Token-Test HTTP-Fehler: {response.status_code}')
                 return False
         except Exception as e:
+            # Netzwerkfehler: Status bleibt unbekannt, nächster Check versucht es erneut
             self.is_valid = False
             logger.error(f"Token-Test Exception: {e}")
             return False
 
     def get_status(self):
+        self._sicherstellen()
         return {
             'access_token': self.access_token[:50] + '...' if self.access_token and len(self.access_token) > 50 else '',
             'refresh_token': bool(self.refresh_token),
             'expires_at': self.token_expires_at.isoformat() if self.token_expires_at else None,
             'last_check': self.last_check.isoformat() if self.last_check else None,
             'is_valid': self.is_valid,
+            'is_stale': self.is_stale(),
+            'revalidate_interval': self.revalidate_interval,
             'auto_refresh_enabled': self.auto_refresh_enabled
         }
 
-token_manager = TokenManager()
+token_manager = TokenManager(laden=False)
+
+# Startbestand: NDJSON-Snapshot, alte JSON-Datei als Fallback
+ANGEBOTE_DATEIEN = (os.getenv('OFFERS_SNAPSHOT', 'realistic_offers.ndjson'), 'realistic_offers_frontend.json')
 
-def lade_angebote():
-    """Lädt die realistischen Offers aus der JSON-Datei"""
+def importiere_angebote(pfad=None, batch=5000):
+    """
+    Übernimmt Angebote aus einem Snapshot zeilenweise in Batches in den Store.
+    Gibt (neu, aktualisiert) zurück; ohne Datei (0, 0).
+    """
+    pfad = pfad or snapshot_datei.erster_vorhandener(*ANGEBOTE_DATEIEN)
+    if pfad is None:
+        logger.warning("Kein Angebots-Snapshot gefunden")
+        return 0, 0
+    neu = aktualisiert = 0
     try:
-        with open('realistic_offers_frontend.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
+        with snapshot_datei.lese_snapshot(pfad) as leser:
+            for teil in snapshot_datei.in_batches(leser, batch):
+                n, a = offer_store.upsert_many(teil)
+                neu += n
+                aktualisiert += a
     except Exception as e:
-        print(f"Fehler beim Laden der Offers: {e}")
-        return {
-            "success": False,
-            "message": "Keine Offers gefunden",
-            "offers": [],
-            "total_offers": 0
-        }
+        logger.error(f"Fehler beim Laden der Offers: {e}")
+    return neu, aktualisiert
+
+# Gemeinsamer Store für alle Accounts; Demo-/Export-Datei als Startbestand
+events = EventStream()
+offer_store = OfferStore(events=events)
+importiere_angebote()
+
+sync_orchestrator = SyncOrchestrator(
+    lade_tokens,
+    offer_store,
+    rate_per_account=float(os.getenv('EBAY_RATE_PER_ACCOUNT', '5')),
+    response_hook_factory=lambda account: token_manager.response_hook if account.get('active') else None
+)
+aktions_log = AktionsLog(os.getenv('ACTION_LOG_FILE', 'action_log.jsonl'),
+                         max_eintraege=int(os.getenv('ACTION_LOG_MAX_ENTRIES', '100000')))
+sync_jobs = SyncJobEngine(
+    sync_orchestrator,
+    max_workers=int(os.getenv('SYNC_JOB_WORKERS', '4')),
+    events=events,
+    aktions_log=aktions_log
+)
+# KI-Empfehlungen; ähnliche Angebote teilen sich eine Entscheidung aus dem Cache
+# Gebündelte Modell-Aufrufe mit begrenzter Parallelität (AI_MODEL=local: Ersatzmodell ohne Netz)
+ki_modell = modell_aus_umgebung()
+ki_client = KIClient(
+    ki_modell,
+    max_parallel=int(os.getenv('AI_MAX_PARALLEL', '4')),
+    batch_groesse=int(os.getenv('AI_BATCH_SIZE', '10')),
+    max_warteschlange=int(os.getenv('AI_MAX_QUEUE', '1000'))
+) if ki_modell is not None else None
+ki_berater = KIBerater(EntscheidungsCache(
+    max_eintraege=int(os.getenv('AI_CACHE_MAX_ENTRIES', '10000')),
+    ttl_sekunden=float(os.getenv('AI_CACHE_TTL_SECONDS', '3600'))
+), client=ki_client, timeout=float(os.getenv('AI_DECISION_TIMEOUT_SECONDS', '10')))
+
+def einkaufspreis_quelle():
+    """Einkaufspreise aus PURCHASE_PRICES_FILE (CSV) oder Shopware; None ohne Konfiguration"""
+    datei = os.getenv('PURCHASE_PRICES_FILE')
+    if datei:
+        return LokaleQuelle.aus_csv(datei)
+    shopware = ShopwareAPI()
+    return shopware if shopware.konfiguriert else None
+
+# Einkaufspreise der Artikel mit offenen Angeboten, inkrementell nach Änderungszeit aktualisiert
+_einkaufspreis_quelle = einkaufspreis_quelle()
+einkaufspreise = EinkaufspreisCache(
+    _einkaufspreis_quelle,
+    store=offer_store,
+    intervall_sekunden=float(os.getenv('PURCHASE_PRICES_REFRESH_SECONDS', '300')),
+    unbekannt_ttl_sekunden=float(os.getenv('PURCHASE_PRICES_UNKNOWN_TTL_SECONDS', '3600'))
+) if _einkaufspreis_quelle is not None else None
+# Runden, Preise und Ausgang je Käufer und Artikel (Journal übersteht Neustarts)
+# Das Journal schreibt nur, wer die Hintergrunddienste betreibt (bei mehreren Workern der Leader)
+verhandlungen = VerhandlungsHistorie(os.getenv('NEGOTIATION_HISTORY_FILE', 'negotiation_history.jsonl'),
+                                     store=offer_store, schreiben=False)
+# Klare Fälle entscheiden die Schwellen der Verhandlungsregeln, nur der Rest geht an die KI
+entscheidungen = EntscheidungsPipeline(ki_berater, einkaufspreise=einkaufspreise, historie=verhandlungen)
+
+# Spalten-Tabelle für Auswertungen; wird bei der ersten Abfrage aufgebaut (NumPy erst dann importieren)
+_offer_analytik = None
+_offer_analytik_lock = threading.Lock()
+
+def offer_analytik():
+    global _offer_analytik
+    with _offer_analytik_lock:
+        if _offer_analytik is None:
+            from angebote.spalten_tabelle import SpaltenTabelle
+            _offer_analytik = SpaltenTabelle(offer_store)
+    return _offer_analytik
+
+def token_restlaufzeiten():
+    """Sekunden bis zum Ablauf des Access Tokens je Account (negativ = abgelaufen)"""
+    jetzt = datetime.now()
+    return {
+        (t['name'],): (datetime.fromisoformat(t['expires_at']) - jetzt).total_seconds()
+        for t in lade_tokens() if t.get('expires_at')
+    }
+
+metriken.REGISTRY.gauge('offers_pending', 'Angebote, die auf eine Antwort warten',
+                        funktion=lambda: offer_store.status_counts['pending'])
+metriken.REGISTRY.gauge('offers_by_status', 'Angebote im Store nach Status', ('status',),
+                        funktion=lambda: {(s,): n for s, n in offer_store.status_counts.items()})
+metriken.REGISTRY.gauge('ebay_token_expiry_seconds', 'Restlaufzeit des Access Tokens', ('account',),
+                        funktion=token_restlaufzeiten)
+metriken.REGISTRY.gauge('sync_jobs_active', 'Laufende Sync-Jobs',
+                        funktion=lambda: sum(j['active'] for j in sync_jobs.get_status()['jobs']))
+metriken.REGISTRY.gauge('sync_backlog_offers', 'Noch abzurufende Angebote der laufenden Sync-Jobs',
+                        funktion=lambda: sum(max(j['total_offers'] - j['offers_found'], 0)
+                                             for j in sync_jobs.get_status()['jobs'] if j['active']))
+metriken.REGISTRY.gauge('ai_decision_cache_hit_ratio', 'Trefferquote des KI-Entscheidungs-Caches',
+                        funktion=ki_berater.cache.trefferquote)
+metriken.REGISTRY.gauge('offer_decision_tier_share', 'Anteil der Entscheidungen je Stufe (0-1)', ('tier',),
+                        funktion=lambda: {(t,): w['share'] / 100 for t, w in entscheidungen.get_status()['tiers'].items()})
+metriken.REGISTRY.gauge('offer_decision_latency_saved_seconds', 'Geschätzte eingesparte LLM-Wartezeit',
+                        funktion=lambda: entscheidungen.get_status()['latency_saved_seconds'])
+metriken.REGISTRY.gauge('ai_decision_cache_entries', 'Einträge im KI-Entscheidungs-Cache',
+                        funktion=lambda: ki_berater.cache.get_status()['entries'])
 
 @app.route('/api/offers', methods=['GET'])
 def get_offers():
-    data = lade_angebote()
-    return jsonify({
-        "offers": data.get("offers", []),
-        "total": data.get("total_offers", 0),
-        "success": data.get("success", True),
-        "message": data.get("message", "Realistische Best Offers geladen")
-    })
+    """
+    Angebote mit Filter (status, item_id, buyer, rule, account, from, to),
+    Sortierung (sort=created|-created|amount|-amount) und Keyset-Pagination (limit, cursor)
+    """
+    try:
+        abfrage = parse_abfrage(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Ungültige Abfrage: {e}'}), 400
+
+    def erzeuge():
+        seite = offer_store.abfragen(**abfrage)
+        return {
+            "offers": seite['offers'],
+            "total": seite['total'],
+            "limit": seite['limit'],
+            "next_cursor": seite['next_cursor'],
+            "success": True,
+            "accounts": offer_store.accounts(),
+            "message": "Best Offers geladen"
+        }
+
+    try:
+        return antwort_cache.antwort('offers', offer_store.version, erzeuge)
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Ungültige Abfrage: {e}'}), 400
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    # Platzhalter: Demo-Statistiken
-    stats = {
-        'total_offers': 2,
-        'pending_offers': 2,
-        'accepted_offers': 0,
-        'rejected_offers': 0,
-        'success_rate': 0
-    }
-    return jsonify(stats)
+    return antwort_cache.antwort('stats', offer_store.version, offer_store.stats)
+
+@app.route('/api/cache-status', methods=['GET'])
+def cache_status():
+    return jsonify({**antwort_cache.get_status(), 'ai_decisions': ki_berater.cache.get_status()})
+
+@app.route('/api/offers/<offer_id>/analyze', methods=['POST'])
+def analyze_offer(offer_id):
+    """Empfehlung für ein Angebot (Regel-Schwellen, sonst Entscheidungs-Cache, OpenAI bzw. Regeln)"""
+    offer = offer_store.get(offer_id)
+    if offer is None:
+        return jsonify({'success': False, 'error': 'Angebot nicht gefunden'}), 404
+    try:
+        empfehlung = entscheidungen.entscheide([offer])[0]
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Angebot nicht auswertbar: {e}'}), 400
+    offer_store.upsert_many([{**offer, 'ai_recommendation': empfehlung}])
+    aktions_log.log('ai_analyzed', f"KI-Empfehlung: {empfehlung['recommendation']}", offer=offer,
+                    source=empfehlung['source'], confidence=empfehlung.get('confidence'))
+    return jsonify({'success': True, 'offer_id': offer_id, 'ai_recommendation': empfehlung})
+
+@app.route('/api/offers/decide', methods=['POST'])
+def decide_offers():
+    """
+    Empfehlungen für alle offenen Angebote (mit ?all=1 für alle) im Block.
+    Klare Fälle entscheiden die Regel-Schwellen, nur das Band dazwischen die KI.
+    """
+    alle = request.args.get('all') in ('1', 'true')
+    stufen = Counter()
+    try:
+        with tracing.trace('decide_offers'):
+            if einkaufspreise is not None:
+                with tracing.span('purchase_prices.prefetch'):
+                    einkaufspreise.vorladen_offene()
+            offers = (o for o in offer_store.iter_alle() if alle or str(o.get('status') or 'pending').lower() == 'pending')
+            for teil in snapshot_datei.in_batches(offers, 1000):
+                ergebnisse = entscheidungen.entscheide(teil)
+                offer_store.upsert_many([{**o, 'ai_recommendation': e} for o, e in zip(teil, ergebnisse)])
+                stufen.update(e['source'] for e in ergebnisse)
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Angebot nicht auswertbar: {e}'}), 400
+    return jsonify({'success': True, 'decided': sum(stufen.values()), 'tiers': dict(stufen)})
+
+@app.route('/api/decisions/stats', methods=['GET'])
+def decision_stats():
+    return jsonify({**entscheidungen.get_status(), 'ai_client': ki_client.get_status() if ki_client else None})
+
+@app.route('/api/purchase-prices/status', methods=['GET'])
+def purchase_prices_status():
+    if einkaufspreise is None:
+        return jsonify({'success': True, 'configured': False})
+    return jsonify({'success': True, 'configured': True, **einkaufspreise.get_status()})
+
+@app.route('/api/purchase-prices/refresh', methods=['POST'])
+def purchase_prices_refresh():
+    """Geänderte Preise nachladen und fehlende für offene Angebote vorladen"""
+    if einkaufspreise is None:
+        return jsonify({'success': False, 'error': 'Keine Einkaufspreis-Quelle konfiguriert'}), 400
+    import requests
+    try:
+        geaendert = einkaufspreise.aktualisieren()
+        neu = einkaufspreise.vorladen_offene()
+    except requests.exceptions.RequestException as e:
+        return jsonify({'success': False, 'error': f'Einkaufspreise nicht abrufbar: {e}'}), 502
+    return jsonify({'success': True, 'refreshed': geaendert, 'prefetched': neu})
+
+@app.route('/api/negotiations', methods=['GET'])
+def negotiation_history():
+    """Verhandlungs-Verlauf: ?buyer=...&item_id=... (ein Artikel) oder nur ?buyer=... (alle Artikel)"""
+    kaeufer = request.args.get('buyer')
+    item_id = request.args.get('item_id')
+    if not kaeufer:
+        return jsonify({'success': False, 'error': 'buyer erforderlich'}), 400
+    if item_id:
+        verlauf = verhandlungen.verlauf(kaeufer, item_id)
+        if verlauf is None:
+            return jsonify({'success': False, 'error': 'Keine Verhandlung gefunden'}), 404
+        return jsonify({'success': True, 'negotiation': verlauf})
+    return jsonify({'success': True, 'negotiations': verhandlungen.fuer_kaeufer(kaeufer)})
+
+@app.route('/api/negotiations/status', methods=['GET'])
+def negotiation_history_status():
+    return jsonify({'success': True, **verhandlungen.get_status()})
+
+@app.route('/api/analytics/offers', methods=['GET'])
+def offer_analytics():
+    """
+    Gruppierte Kennzahlen über alle Angebote, z.B. ?group_by=rule,week&from=2024-01-01
+    (group_by: rule, status, day, week, month, category, buyer, account;
+    Filter: status, rule, category, buyer, account; sort: key, offers, amount, success_rate)
+    """
+    args = request.args
+
+    def erzeuge():
+        tabelle = offer_analytik()
+        nach = [d.strip() for d in args.get('group_by', 'status').split(',') if d.strip()]
+        sort = args.get('sort', 'key')
+        filter_ = {k: args[k] for k in ('status', 'rule', 'category', 'buyer', 'account') if args.get(k)}
+        start = time.perf_counter()
+        gruppen = tabelle.gruppiere(nach, filter=filter_, von=args.get('from'), bis=args.get('to'),
+                                    sort=sort.lstrip('-'), desc=sort.startswith('-'),
+                                    limit=int(args['limit']) if args.get('limit') else None)
+        return {
+            'success': True,
+            'group_by': nach,
+            'groups': gruppen,
+            'rows': len(tabelle),
+            'backend': tabelle.backend,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    try:
+        return antwort_cache.antwort('analytics', offer_store.version, erzeuge)
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Ungültige Abfrage: {e}'}), 400
+
+@app.route('/api/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events: Angebots-Änderungen ('offers'; bei großen Batches nur
+    reload=True, siehe MAX_EVENT_ANGEBOTE), Statistik-Deltas ('stats') und
+    Sync-Fortschritt ('sync'). Clients setzen nach Reconnect über Last-Event-ID
+    (oder ?cursor=) fort; ist der Cursor zu alt oder stammt er von einem anderen
+    Worker-Prozess, kommt ein 'reset'-Event.
+    """
+    event_id = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+    heartbeat = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+
+    def stand(cursor):
+        return {'cursor': events.event_id(cursor), 'stats': offer_store.stats(), 'sync': sync_jobs.get_status()}
+
+    def generate(cursor):
+        if cursor is None:
+            # Neuer Client: aktuellen Stand als Startpunkt, Angebote lädt er über /api/offers.
+            # Mit fremder Event-ID (anderer Worker, früherer Lauf) sind die Nummern nicht
+            # vergleichbar: der Client lädt neu ('reset'), statt Events zu überspringen oder doppelt zu bekommen
+            cursor = events.last_id
+            yield EventStream.format_sse(events.event_id(cursor), 'reset' if event_id else 'hello', stand(cursor))
+        while not events.geschlossen:
+            neue, reset = events.wait(cursor, timeout=heartbeat)
+            if reset:
+                cursor = events.last_id
+                yield EventStream.format_sse(events.event_id(cursor), 'reset', stand(cursor))
+                continue
+            if not neue:
+                yield ': heartbeat\n\n'
+                continue
+            for nummer, typ, data in neue:
+                yield EventStream.format_sse(events.event_id(nummer), typ, data)
+            cursor = neue[-1][0]
+
+    return Response(
+        stream_with_context(generate(events.cursor_aus(event_id))),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/token-status', methods=['GET'])
 def get_token_status():
@@ -267,24 +714,152 @@ def get_token_status():
 
 @app.route('/api/sync', methods=['POST'])
 def sync_data():
+    """
+    Lädt den Snapshot erneut in den Store. Liefert nur Zähler und die Store-Version;
+    die Angebote selbst kommen seitenweise über /api/offers (ETag = Version)
+    """
     try:
-        # Token vor Sync prüfen
-        if not token_manager.test_token():
+        # Token vor Sync prüfen (gecachter Status, Netzwerk nur wenn veraltet)
+        if not token_manager.check_token():
             return jsonify({'error': 'Token ungültig - bitte erneuern'}), 401
         
         # Lade aktuelle Angebote
-        data = lade_angebote()
+        neu, aktualisiert = importiere_angebote()
         
         return jsonify({
             'success': True,
-            'offers': data.get('offers', []),
-            'total_offers': data.get('total_offers', 0),
+            'new_offers': neu,
+            'updated_offers': aktualisiert,
+            'total_offers': len(offer_store),
+            'store_version': offer_store.version,
             'sync_time': datetime.now().isoformat(),
             'message': 'Synchronisation erfolgreich'
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/sync/accounts', methods=['POST'])
+def sync_all_accounts():
+    """Synchronisiert alle Accounts aus tokens.json parallel"""
+    try:
+        return jsonify(sync_orchestrator.sync_all())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/offers/export', methods=['GET'])
+def export_offers():
+    """Kompletter Bestand als NDJSON-Snapshot, zeilenweise gestreamt"""
+    def generate():
+        anzahl = 0
+        yield snapshot_datei.header_zeile('hauptserver', {'store_version': offer_store.version})
+        for angebot in offer_store.iter_datensaetze():
+            anzahl += 1
+            yield snapshot_datei.angebots_zeile(angebot)
+        yield snapshot_datei.ende_zeile(anzahl)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename="offers.ndjson"'}
+    )
+
+@app.route('/api/offers/import', methods=['POST'])
+def import_offers():
+    """Übernimmt einen NDJSON-Snapshot aus dem Request-Body (ohne ihn komplett einzulesen)"""
+    try:
+        leser = snapshot_datei.lese_snapshot(io.TextIOWrapper(request.stream, encoding='utf-8'))
+        neu = aktualisiert = 0
+        for teil in snapshot_datei.in_batches(leser, 5000):
+            n, a = offer_store.upsert_many(teil, account=request.args.get('account'))
+            neu += n
+            aktualisiert += a
+        return jsonify({
+            'success': True,
+            'new': neu,
+            'updated': aktualisiert,
+            'complete': leser.ende is not None or leser.legacy,
+            'total_offers': len(offer_store)
+        })
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'success': False, 'error': f'Ungültiger Snapshot: {e}'}), 400
+
+@app.route('/api/offers/sync-batch', methods=['POST'])
+def start_batch_sync():
+    """Startet die vollständige Synchronisierung aller (oder ausgewählter) Accounts im Hintergrund"""
+    data = request.get_json(silent=True) or {}
+    jobs = sync_jobs.start(data.get('accounts'))
+    if not jobs:
+        return jsonify({'success': False, 'message': 'Keine Accounts mit Access Token gefunden'}), 400
+    return jsonify({
+        'success': True,
+        'message': f'{len(jobs)} Sync-Job(s) gestartet',
+        'job_ids': [job['job_id'] for job in jobs],
+        'status': sync_jobs.get_status()
+    })
+
+@app.route('/api/offers/sync-batch/status', methods=['GET'])
+def batch_sync_status():
+    return jsonify({'success': True, 'status': sync_jobs.get_status()})
+
+@app.route('/api/offers/sync-batch/stop', methods=['POST'])
+def stop_batch_sync():
+    data = request.get_json(silent=True) or {}
+    gestoppt = sync_jobs.stop(data.get('account'))
+    if not gestoppt:
+        return jsonify({'success': False, 'message': 'Keine laufende Synchronisierung'})
+    return jsonify({'success': True, 'message': f'{gestoppt} Sync-Job(s) werden gestoppt'})
+
+@app.route('/api/logs', methods=['GET'])
+def get_logs():
+    """
+    Aktionsprotokoll mit Filter (action, level, offer_id, account, from, to, q).
+    Ohne Cursor: neueste zuerst (ältere Seiten über before=next_before).
+    Mit after=<cursor>: nur neue Einträge seit dem letzten Abruf.
+    """
+    try:
+        ergebnis = aktions_log.abfragen(**parse_log_abfrage(request.args))
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Ungültige Abfrage: {e}'}), 400
+    return jsonify({'success': True, **ergebnis})
+
+@app.route('/api/logs/export', methods=['GET'])
+def export_logs():
+    """CSV-Export des Aktionsprotokolls (gleiche Filter wie /api/logs), gestreamt"""
+    try:
+        abfrage = parse_log_abfrage(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Ungültige Abfrage: {e}'}), 400
+    dateiname = f"ebay-bot-protokoll-{datetime.now().strftime('%Y-%m-%d')}.csv"
+    return Response(
+        stream_with_context(aktions_log.export_csv(abfrage['filter'], abfrage['von'], abfrage['bis'], abfrage['suche'])),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={dateiname}'}
+    )
+
+@app.route('/api/logs/stats', methods=['GET'])
+def log_stats():
+    return jsonify(aktions_log.stats())
+
+@app.route('/api/traces', methods=['GET'])
+def list_traces():
+    """Die letzten Sync-Läufe mit Dauer und Eigenzeit je Span"""
+    return jsonify({'traces': tracing.SPEICHER.liste()})
+
+@app.route('/api/traces/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    """Lauf im Chrome-Trace-Format (chrome://tracing, Perfetto, speedscope)"""
+    lauf = tracing.SPEICHER.get(trace_id)
+    if lauf is None:
+        return jsonify({'error': 'Trace nicht gefunden'}), 404
+    return jsonify(lauf.chrome_trace())
+
+@app.route('/api/traces/<trace_id>/waterfall', methods=['GET'])
+def get_trace_waterfall(trace_id):
+    lauf = tracing.SPEICHER.get(trace_id)
+    if lauf is None:
+        return jsonify({'error': 'Trace nicht gefunden'}), 404
+    return Response(lauf.wasserfall(breite=int(request.args.get('width', 60))), mimetype='text/plain')
+
 @app.route('/api/test-token', methods=['POST'])
 def test_token():
     try:
@@ -295,5 +870,38 @@ def test_token():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def starte_hintergrunddienste():
+    """Token-Revalidierung, proaktiver Refresh und Verhandlungs-Journal (bei mehreren Workern nur im Leader, siehe wsgi.py)"""
+    aktions_log.log('system_started', 'Backend gestartet', pid=os.getpid())
+    verhandlungen.journal_uebernehmen()
+    token_manager.start_revalidation()
+    if os.getenv('TOKEN_AUTO_REFRESH', 'true').lower() == 'true':
+        token_manager.auto_refresh_enabled = True
+        refresh_scheduler.start()
+    if einkaufspreise is not None:
+        einkaufspreise.start()
+
+def stoppe_hintergrunddienste():
+    """Geordnetes Herunterfahren: SSE-Streams beenden, Sync-Jobs abbrechen, Threads stoppen"""
+    events.close()
+    sync_jobs.shutdown()
+    refresh_scheduler.stop()
+    token_manager.stop_revalidation()
+    if ki_client is not None:
+        ki_client.stop()
+    if einkaufspreise is not None:
+        einkaufspreise.stop()
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5002, debug=True) 
\ No newline at end of file
+    # Entwicklungsserver; für den Produktivbetrieb: gunicorn -c gunicorn.conf.py wsgi:app
+    debug = os.getenv('FLASK_DEBUG', 'true').lower() == 'true'
+    # Mit Reloader läuft dieses Skript zweimal (Überwachungs- und Server-Prozess):
+    # Hintergrunddienste nur im Server-Prozess starten, sonst gäbe es doppelte Refreshes und Journal-Schreiber
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        starte_hintergrunddienste()
+    app.run(
+        host='0.0.0.0',
+        port=int(os.getenv('PORT', '5002')),
+        debug=debug,
+        threaded=True
+    ) 
\ No newline at end of file
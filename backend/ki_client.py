@@ -0,0 +1,270 @@
+"""
+Gebündelter LLM-Client für Angebotsempfehlungen
+Anfragen landen in einer Warteschlange; eine feste Zahl Worker-Threads holt sie
+in Bündeln (bis batch_groesse Angebote oder max_wartezeit Sekunden) ab, schickt
+jedes Bündel als einen Prompt ans Modell und verteilt die Einzel-Ergebnisse auf
+die Futures der Aufrufer. Aufrufer warten mit eigenem Timeout und entscheiden
+danach regelbasiert; spät eintreffende Ergebnisse werden trotzdem zugestellt.
+Die Warteschlange ist begrenzt: ist sie voll oder der Client gestoppt, erhalten
+neue Anfragen sofort None (der Aufrufer entscheidet dann nach den Regeln).
+
+Modelle:
+    OpenAIModell    Chat-Completion mit JSON-Antwort pro Angebot
+    LokalesModell   deterministischer Ersatz mit simulierter Latenz (offline, Benchmarks)
+"""
+import importlib.util
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+import metriken
+
+# openai wird erst beim Anlegen eines OpenAIModell importiert (kostet sonst einen Großteil der Startzeit)
+OPENAI_VERFUEGBAR = importlib.util.find_spec('openai') is not None
+
+logger = logging.getLogger(__name__)
+
+EMPFEHLUNGEN = ('Akzeptieren', 'Gegenangebot', 'Ablehnen')
+
+LLM_BUENDEL = metriken.REGISTRY.counter(
+    'ai_llm_batches_total', 'An das Modell geschickte Bündel nach Ergebnis', ('model', 'result'))
+LLM_BUENDEL_GROESSE = metriken.REGISTRY.histogram(
+    'ai_llm_batch_size', 'Angebote pro Bündel', ('model',), buckets=(1, 2, 5, 10, 20, 50))
+LLM_SEKUNDEN = metriken.REGISTRY.histogram(
+    'ai_llm_request_duration_seconds', 'Dauer eines Modell-Aufrufs (ein Bündel)', ('model',),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+
+class OpenAIModell:
+    name = 'openai'
+    SYSTEM_PROMPT = (
+        'Du bist Verhandlungsassistent eines eBay-Händlers. Du bekommst eine Liste von '
+        'Preisvorschlägen mit Schlüssel "key". Antworte ausschließlich mit JSON: '
+        '{"results": [{"key": ..., "recommendation": "Akzeptieren"|"Gegenangebot"|"Ablehnen", '
+        '"confidence": 0-100, "counter_percent": Prozent des Listenpreises oder null, '
+        '"reasoning": kurzer Satz}]} – genau ein Eintrag pro Schlüssel.'
+    )
+
+    def __init__(self, api_key, modell=None, timeout=20):
+        self.modell = modell or os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+        self.api_key = api_key
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _openai_client(self):
+        """SDK erst beim ersten Aufruf importieren und anlegen (nicht beim Serverstart)"""
+        with self._lock:
+            if self._client is None:
+                import openai
+                self._client = openai.OpenAI(api_key=self.api_key, timeout=self.timeout)
+            return self._client
+
+    def antworte(self, anfragen):
+        """anfragen: [{'key': ..., ...Merkmale}] -> {key: Ergebnis-Dict}"""
+        antwort = self._openai_client().chat.completions.create(
+            model=self.modell,
+            temperature=0,
+            messages=[
+                {'role': 'system', 'content': self.SYSTEM_PROMPT},
+                {'role': 'user', 'content': json.dumps(anfragen, ensure_ascii=False)},
+            ],
+        )
+        return parse_antwort(antwort.choices[0].message.content)
+
+
+class LokalesModell:
+    """
+    Deterministischer Ersatz für das LLM: gleiche Anfrage, gleiche Antwort.
+    Latenz = latenz_ms pro Aufruf + pro_angebot_ms je Angebot im Bündel.
+    """
+    name = 'local'
+
+    def __init__(self, latenz_ms=800, pro_angebot_ms=40, seed=0):
+        self.latenz_ms = latenz_ms
+        self.pro_angebot_ms = pro_angebot_ms
+        self.seed = seed
+
+    def antworte(self, anfragen):
+        time.sleep((self.latenz_ms + self.pro_angebot_ms * len(anfragen)) / 1000)
+        return {a['key']: self._bewerte(a) for a in anfragen}
+
+    def _bewerte(self, anfrage):
+        prozent = anfrage.get('offer_percent_of_list_price') or 0
+        streuung = zlib.crc32(f"{self.seed}|{anfrage.get('rule')}|{anfrage.get('buyer_intent')}".encode()) % 7
+        schwelle = 78 + streuung - (4 if anfrage.get('buyer_intent') == 'dringend' else 0)
+        if prozent >= schwelle:
+            return {'recommendation': 'Akzeptieren', 'confidence': 70 + streuung * 3, 'counter_percent': None,
+                    'reasoning': f'{prozent:.0f}% liegt über der Zielmarke von {schwelle}%'}
+        if prozent >= schwelle - 15:
+            ziel = min(schwelle + (2 if anfrage.get('buyer_intent') == 'verhandlung' else 5), 98)
+            return {'recommendation': 'Gegenangebot', 'confidence': 60 + streuung * 3, 'counter_percent': ziel,
+                    'reasoning': f'Gegenangebot bei {ziel}% des Listenpreises'}
+        return {'recommendation': 'Ablehnen', 'confidence': 75 + streuung * 3, 'counter_percent': None,
+                'reasoning': f'{prozent:.0f}% deutlich unter der Zielmarke'}
+
+
+def parse_antwort(text):
+    """JSON-Antwort des Modells -> {key: Ergebnis}; unvollständige Einträge werden verworfen"""
+    daten = json.loads(text)
+    eintraege = daten.get('results', []) if isinstance(daten, dict) else daten
+    ergebnisse = {}
+    for eintrag in eintraege:
+        if not isinstance(eintrag, dict) or eintrag.get('recommendation') not in EMPFEHLUNGEN:
+            continue
+        ergebnisse[str(eintrag.get('key'))] = {
+            'recommendation': eintrag['recommendation'],
+            'confidence': int(eintrag.get('confidence') or 0),
+            'counter_percent': eintrag.get('counter_percent'),
+            'reasoning': eintrag.get('reasoning', ''),
+        }
+    return ergebnisse
+
+
+def modell_aus_umgebung():
+    """AI_MODEL=local|openai|off; ohne Angabe OpenAI, sofern ein Key gesetzt ist"""
+    art = os.getenv('AI_MODEL', '').lower()
+    if art == 'local':
+        return LokalesModell(latenz_ms=float(os.getenv('AI_LOCAL_LATENCY_MS', '800')),
+                             pro_angebot_ms=float(os.getenv('AI_LOCAL_PER_OFFER_MS', '40')))
+    api_key = os.getenv('OPENAI_API_KEY') or ''
+    if art == 'off' or not OPENAI_VERFUEGBAR or not api_key or api_key.startswith('sk-ihr'):
+        return None
+    return OpenAIModell(api_key, timeout=float(os.getenv('AI_REQUEST_TIMEOUT_SECONDS', '20')))
+
+
+class KIClient:
+    def __init__(self, modell, max_parallel=4, batch_groesse=10, max_wartezeit=0.05, max_warteschlange=1000):
+        """
+        modell: OpenAIModell, LokalesModell oder eigenes Objekt mit antworte(anfragen)
+        max_parallel: gleichzeitige Modell-Aufrufe (Worker-Threads)
+        batch_groesse: Angebote pro Prompt
+        max_wartezeit: so lange wartet ein Worker auf weitere Anfragen für das Bündel
+        max_warteschlange: höchstens so viele Angebote warten auf einen Worker
+        """
+        self.modell = modell
+        self.max_parallel = max_parallel
+        self.batch_groesse = batch_groesse
+        self.max_wartezeit = max_wartezeit
+        self._queue = queue.Queue(maxsize=max_warteschlange)
+        self._worker = []
+        self._lock = threading.Lock()
+        self._gestoppt = False
+        self.buendel = 0
+        self.angebote = 0
+        self.fehler = 0
+        # Anfragen, die wegen voller Warteschlange oder nach stop() sofort None bekamen
+        self.abgewiesen = 0
+
+    def anfragen(self, anfragen):
+        """
+        anfragen: [{'key': ..., ...}] -> Futures in gleicher Reihenfolge.
+        Bei voller Warteschlange oder nach stop() ist das Future sofort mit None erledigt.
+        """
+        self._starte_worker()
+        futures = []
+        abgewiesen = []
+        with self._lock:
+            for anfrage in anfragen:
+                future = Future()
+                futures.append(future)
+                if self._gestoppt:
+                    abgewiesen.append(future)
+                    continue
+                try:
+                    self._queue.put_nowait((anfrage, future))
+                except queue.Full:
+                    abgewiesen.append(future)
+            self.abgewiesen += len(abgewiesen)
+        if abgewiesen:
+            logger.warning(f'KI-Client: {len(abgewiesen)} Angebote abgewiesen (Warteschlange voll oder gestoppt)')
+        # Außerhalb des Locks: Callbacks der Aufrufer laufen sofort
+        for future in abgewiesen:
+            future.set_result(None)
+        return futures
+
+    def _starte_worker(self):
+        with self._lock:
+            if self._worker or self._gestoppt:
+                return
+            for i in range(self.max_parallel):
+                thread = threading.Thread(target=self._arbeite, name=f'ki-client-{i}', daemon=True)
+                thread.start()
+                self._worker.append(thread)
+
+    def _arbeite(self):
+        while True:
+            eintrag = self._queue.get()
+            if eintrag is None:
+                return
+            buendel = [eintrag]
+            frist = time.monotonic() + self.max_wartezeit
+            while len(buendel) < self.batch_groesse:
+                rest = frist - time.monotonic()
+                try:
+                    eintrag = self._queue.get(timeout=rest) if rest > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if eintrag is None:
+                    # Stopp-Signal für einen anderen Worker zurücklegen
+                    self._queue.put(None)
+                    break
+                buendel.append(eintrag)
+            self._verarbeite(buendel)
+
+    def _verarbeite(self, buendel):
+        name = getattr(self.modell, 'name', type(self.modell).__name__)
+        start = time.perf_counter()
+        try:
+            ergebnisse = self.modell.antworte([anfrage for anfrage, _ in buendel])
+            ergebnis = 'ok'
+        except Exception as e:
+            logger.warning(f'KI-Bündel ({len(buendel)} Angebote) fehlgeschlagen: {e}')
+            ergebnisse = {}
+            ergebnis = 'error'
+        LLM_SEKUNDEN.observe(name, wert=time.perf_counter() - start)
+        LLM_BUENDEL_GROESSE.observe(name, wert=len(buendel))
+        LLM_BUENDEL.inc(name, ergebnis)
+        with self._lock:
+            self.buendel += 1
+            self.angebote += len(buendel)
+            self.fehler += ergebnis != 'ok'
+        for anfrage, future in buendel:
+            # Fehlt ein Angebot in der Antwort, bekommt der Aufrufer None (-> Regeln)
+            future.set_result(ergebnisse.get(str(anfrage['key'])))
+
+    def stop(self):
+        """Beendet die Worker; noch wartende Anfragen erhalten None"""
+        with self._lock:
+            self._gestoppt = True
+            worker, self._worker = self._worker, []
+        while True:
+            try:
+                eintrag = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if eintrag is not None:
+                eintrag[1].set_result(None)
+        for _ in worker:
+            self._queue.put(None)
+        for thread in worker:
+            thread.join(timeout=5)
+
+    def get_status(self):
+        with self._lock:
+            return {
+                'model': getattr(self.modell, 'name', type(self.modell).__name__),
+                'max_parallel': self.max_parallel,
+                'batch_size': self.batch_groesse,
+                'queued': self._queue.qsize(),
+                'batches': self.buendel,
+                'offers': self.angebote,
+                'failed_batches': self.fehler,
+                'rejected': self.abgewiesen,
+                'avg_batch_size': round(self.angebote / self.buendel, 2) if self.buendel else None,
+            }
@@ -0,0 +1,533 @@
+"""
+KI-Empfehlungen für Preisvorschläge mit Entscheidungs-Cache
+Ähnliche Angebote (gleiche Regel, ähnlicher Prozentsatz, ähnliche Standzeit,
+gleiche Käuferabsicht) bekommen dieselbe Empfehlung. Der Cache sitzt vor dem
+KI-Client (ki_client.py): Wiederholungsfälle kommen ohne LLM-Call zurück. Ohne
+Modell, bei Fehlern oder Timeout wird regelbasiert entschieden; diese Ergebnisse
+werden nicht gecacht, damit danach wieder die KI gefragt wird.
+
+Die EntscheidungsPipeline stellt eine Schwellen-Stufe davor: Angebote über
+auto_annahme_prozent bzw. unter auto_ablehnung_prozent der passenden
+Verhandlungsregel werden lokal im Block entschieden, nur das Band dazwischen
+geht an den KIBerater. Ist ein Einkaufspreis-Cache angebunden, werden Angebote
+unter dem Einkaufspreis ebenfalls schon in der Schwellen-Stufe abgelehnt. Mit einer
+Verhandlungs-Historie entscheidet die Schwellen-Stufe auch das Band, sobald der
+Käufer für den Artikel schon max_gegenangebote Gegenangebote bekommen hat: über
+mindestpreis_prozent annehmen, darunter ablehnen (ein weiteres Gegenangebot gibt es nicht).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from concurrent.futures import wait
+from datetime import datetime
+from itertools import count
+
+import metriken
+import tracing
+from angebote.angebot import cent, euro
+from angebote.verhandlungs_historie import kaeufer_von
+
+logger = logging.getLogger(__name__)
+
+# Prozent des Listenpreises werden auf diese Schrittweite gerundet
+PROZENT_SCHRITT = 5
+# Obergrenzen der Standzeit-Klassen in Tagen (danach: "länger")
+TAGE_GRENZEN = (1, 3, 7, 14, 30, 60)
+# Beginn der Standzeit, wenn days_online fehlt (nur Demo-Daten liefern es):
+# Listing-Start, sonst Erstellung des Angebots (Sell-/Trading-API: created_time)
+STANDZEIT_FELDER = ('listing_start_time', 'start_time', 'created_at', 'created_time', 'created_date')
+# Schlüsselwörter für die Absicht in der Käufernachricht (erste passende Gruppe gewinnt)
+ABSICHTEN = (
+    ('verhandlung', ('treffen', 'mitte', 'letzter preis', 'schmerzgrenze', 'machen', 'geht da', 'vorschlag')),
+    ('dringend', ('schnell', 'sofort', 'heute', 'abholung', 'abholen', 'eilig', 'überweisung')),
+    ('frage', ('?', 'verfügbar', 'zustand', 'versand', 'noch da')),
+)
+
+# Verhandlungsregeln (Format wie examples/beispiel_regeln.json)
+REGELN_DATEI = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'beispiel_regeln.json')
+# Schwellen, wenn keine aktive Regel passt
+STANDARD_REGEL = {'name': 'Standard', 'typ': 'allgemein', 'auto_annahme_prozent': 95, 'auto_ablehnung_prozent': 60}
+# Schwellen, die jede Regel für die Schwellen-Stufe braucht (fehlende kommen aus STANDARD_REGEL)
+SCHWELLEN = ('auto_annahme_prozent', 'auto_ablehnung_prozent')
+WOCHENTAGE = ('montag', 'dienstag', 'mittwoch', 'donnerstag', 'freitag', 'samstag', 'sonntag')
+# Angenommene Dauer eines LLM-Calls, solange noch keiner gemessen wurde
+LLM_LATENZ_SCHAETZUNG = 2.0
+
+KI_CACHE_ABFRAGEN = metriken.REGISTRY.counter(
+    'ai_decision_cache_requests_total', 'Abfragen des KI-Entscheidungs-Caches', ('result',))
+
+
+def betrag(wert):
+    """Preis als float; Demo-Daten liefern Texte wie '59.05 EUR'"""
+    return euro(cent(wert)) or 0.0
+
+
+def listenpreis(offer):
+    return betrag(offer.get('list_price') or offer.get('listing_price') or offer.get('original_price'))
+
+
+def prozent_vom_listenpreis(offer):
+    preis = listenpreis(offer)
+    return betrag(offer.get('offer_amount')) / preis * 100 if preis else 0.0
+
+
+def nachrichten_absicht(nachricht):
+    text = (nachricht or '').strip().lower()
+    if not text:
+        return 'keine'
+    for absicht, woerter in ABSICHTEN:
+        if any(wort in text for wort in woerter):
+            return absicht
+    return 'sonstiges'
+
+
+def tage_online(offer, jetzt=None):
+    """Standzeit in Tagen: days_online, sonst seit dem ersten lesbaren Zeitpunkt aus STANDZEIT_FELDER (0 ohne)"""
+    tage = offer.get('days_online')
+    if tage not in (None, ''):
+        return int(tage)
+    for feld in STANDZEIT_FELDER:
+        wert = offer.get(feld)
+        if not wert:
+            continue
+        try:
+            start = datetime.fromisoformat(str(wert).strip().replace(' ', 'T').replace('Z', '+00:00'))
+        except ValueError:
+            continue
+        if start.tzinfo is not None:
+            # eBay liefert UTC: in lokale Zeit ohne Zeitzone umrechnen
+            start = start.astimezone().replace(tzinfo=None)
+        return max(((jetzt or datetime.now()) - start).days, 0)
+    return 0
+
+
+def merkmale(offer):
+    """Normalisiertes Merkmals-Tupel (Regel, Prozent-Klasse, Standzeit-Klasse, Absicht) als Cache-Schlüssel"""
+    prozent = prozent_vom_listenpreis(offer)
+    tage = tage_online(offer)
+    nachricht = offer.get('buyer_message') or offer.get('message') or offer.get('counter_message')
+    return (
+        offer.get('applicable_rule') or '',
+        int(prozent // PROZENT_SCHRITT) * PROZENT_SCHRITT,
+        bisect_left(TAGE_GRENZEN, tage),
+        nachrichten_absicht(nachricht),
+    )
+
+
+def regel_empfehlung(offer_amount, list_price):
+    """Einfache regelbasierte Analyse (ohne KI)"""
+    percentage = (offer_amount / list_price) * 100
+
+    if percentage >= 85:
+        return {
+            'recommendation': 'Akzeptieren',
+            'confidence': 95,
+            'reasoning': f'Sehr gutes Angebot ({percentage:.1f}% des Listpreises)'
+        }
+    elif percentage >= 70:
+        return {
+            'recommendation': 'Akzeptieren',
+            'confidence': 85,
+            'reasoning': f'Fairer Preis ({percentage:.1f}% des Listpreises)'
+        }
+    elif percentage >= 60:
+        return {
+            'recommendation': 'Gegenangebot',
+            'confidence': 80,
+            'reasoning': f'Preis zu niedrig ({percentage:.1f}%), Gegenangebot sinnvoll'
+        }
+    else:
+        return {
+            'recommendation': 'Ablehnen',
+            'confidence': 90,
+            'reasoning': f'Angebot zu niedrig ({percentage:.1f}% des Listpreises)'
+        }
+
+
+class EntscheidungsCache:
+    def __init__(self, max_eintraege=10000, ttl_sekunden=3600):
+        """
+        max_eintraege: Anzahl gemerkter Merkmals-Tupel, LRU
+        ttl_sekunden: danach wird die KI für dieses Tupel erneut gefragt
+        """
+        self.max_eintraege = max_eintraege
+        self.ttl_sekunden = ttl_sekunden
+        self._eintraege = OrderedDict()
+        self._lock = threading.Lock()
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self.abgelaufen = 0
+        self.verdraengt = 0
+
+    def hole(self, schluessel):
+        jetzt = time.monotonic()
+        with self._lock:
+            eintrag = self._eintraege.get(schluessel)
+            if eintrag is not None and eintrag[0] > jetzt:
+                self._eintraege.move_to_end(schluessel)
+                self.treffer += 1
+                ergebnis = 'hit'
+            else:
+                if eintrag is not None:
+                    del self._eintraege[schluessel]
+                    self.abgelaufen += 1
+                self.fehlschlaege += 1
+                ergebnis = 'expired' if eintrag is not None else 'miss'
+                eintrag = None
+        KI_CACHE_ABFRAGEN.inc(ergebnis)
+        return None if eintrag is None else eintrag[1]
+
+    def speichere(self, schluessel, entscheidung):
+        with self._lock:
+            self._eintraege[schluessel] = (time.monotonic() + self.ttl_sekunden, entscheidung)
+            self._eintraege.move_to_end(schluessel)
+            while len(self._eintraege) > self.max_eintraege:
+                self._eintraege.popitem(last=False)
+                self.verdraengt += 1
+
+    def leeren(self):
+        with self._lock:
+            self._eintraege.clear()
+
+    def trefferquote(self):
+        with self._lock:
+            anfragen = self.treffer + self.fehlschlaege
+            return self.treffer / anfragen if anfragen else 0.0
+
+    def get_status(self):
+        with self._lock:
+            anfragen = self.treffer + self.fehlschlaege
+            return {
+                'entries': len(self._eintraege),
+                'max_entries': self.max_eintraege,
+                'ttl_seconds': self.ttl_sekunden,
+                'hits': self.treffer,
+                'misses': self.fehlschlaege,
+                'expired': self.abgelaufen,
+                'evicted': self.verdraengt,
+                'hit_rate': round(self.treffer / anfragen * 100, 1) if anfragen else 0.0
+            }
+
+
+class KIBerater:
+    def __init__(self, cache=None, client=None, timeout=10.0):
+        """
+        cache: EntscheidungsCache für ähnliche Angebote
+        client: KIClient (gebündelte Modell-Aufrufe); None = nur Regeln
+        timeout: so lange wird auf die KI gewartet, danach entscheiden die Regeln
+        """
+        self.cache = cache if cache is not None else EntscheidungsCache()
+        self.client = client
+        self.timeout = timeout
+        # Merkmals-Tupel -> Future der laufenden Anfrage (gleiche Fälle nur einmal fragen)
+        self._laufend = {}
+        self._lock = threading.Lock()
+        # Schlüssel der Anfragen; Bündel mischen Angebote verschiedener Aufrufer
+        self._nummern = count()
+
+    @property
+    def ki_verfuegbar(self):
+        return self.client is not None
+
+    def empfehlung(self, offer):
+        return self.empfehlungen([offer])[0]
+
+    def empfehlungen(self, offers, zeiten=None):
+        """
+        Empfehlungen für mehrere Angebote. Reihenfolge: Cache, KI (ein Auftrag pro
+        Merkmals-Tupel, gebündelt), Regeln. Gegenangebote werden als Prozent gecacht
+        und auf den Listenpreis des jeweiligen Angebots umgerechnet.
+        zeiten: optionaler Counter, der die Sekunden je Quelle aufsummiert
+        """
+        ergebnisse = [None] * len(offers)
+        schluessel = [merkmale(offer) for offer in offers]
+        offen = {}
+        start = time.perf_counter()
+        for i, offer in enumerate(offers):
+            if not listenpreis(offer):
+                # Ohne Listenpreis gibt es keinen sinnvollen Prozentsatz
+                ergebnisse[i] = ({'recommendation': 'Manuell prüfen', 'confidence': 0,
+                                  'reasoning': 'Listenpreis fehlt'}, 'rules')
+                continue
+            entscheidung = self.cache.hole(schluessel[i])
+            if entscheidung is not None:
+                ergebnisse[i] = (entscheidung, 'cache')
+            else:
+                offen.setdefault(schluessel[i], []).append(i)
+        dauer = {'cache': time.perf_counter() - start}
+
+        zeitueberschreitung = False
+        if offen and self.client is not None:
+            start = time.perf_counter()
+            futures = self._frage_ki(offers, offen)
+            wait(futures.values(), timeout=self.timeout)
+            for merkmal, future in futures.items():
+                entscheidung = future.result() if future.done() else None
+                zeitueberschreitung |= not future.done()
+                if entscheidung is not None:
+                    for i in offen.pop(merkmal):
+                        ergebnisse[i] = (entscheidung, 'llm')
+            dauer['llm'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for indizes in offen.values():
+            for i in indizes:
+                entscheidung = regel_empfehlung(betrag(offers[i].get('offer_amount')), listenpreis(offers[i]))
+                if self.client is not None:
+                    entscheidung['fallback'] = 'timeout' if zeitueberschreitung else 'error'
+                ergebnisse[i] = (entscheidung, 'rules')
+        dauer['rules'] = time.perf_counter() - start
+
+        quellen = Counter(quelle for _, quelle in ergebnisse)
+        for quelle, anzahl in quellen.items():
+            sekunden = dauer.get(quelle, 0.0)
+            metriken.ENTSCHEIDUNG_SEKUNDEN.observe(quelle, wert=sekunden / anzahl, anzahl=anzahl)
+            if zeiten is not None:
+                zeiten[quelle] += sekunden
+        for empfehlung, anzahl in Counter((e['recommendation'], q) for e, q in ergebnisse).items():
+            metriken.ANGEBOTE_ENTSCHIEDEN.inc(*empfehlung, wert=anzahl)
+
+        fertig = []
+        for (entscheidung, quelle), merkmal, offer in zip(ergebnisse, schluessel, offers):
+            ergebnis = dict(entscheidung, source=quelle, features=list(merkmal))
+            if ergebnis.get('counter_percent'):
+                ergebnis['counter_price'] = round(listenpreis(offer) * ergebnis['counter_percent'] / 100, 2)
+            fertig.append(ergebnis)
+        return fertig
+
+    def _frage_ki(self, offers, offen):
+        """Ein Auftrag pro Merkmals-Tupel; laufende Aufträge werden mitbenutzt"""
+        futures = {}
+        neu = []
+        with self._lock:
+            for merkmal, indizes in offen.items():
+                future = self._laufend.get(merkmal)
+                if future is None:
+                    offer = offers[indizes[0]]
+                    regel, _, _, absicht = merkmal
+                    neu.append((merkmal, {
+                        'key': str(next(self._nummern)),
+                        'item_title': offer.get('item_title'),
+                        'rule': regel,
+                        'offer_percent_of_list_price': round(prozent_vom_listenpreis(offer), 1),
+                        'days_online': tage_online(offer),
+                        'offer_type': offer.get('offer_type'),
+                        'buyer_intent': absicht,
+                    }))
+                else:
+                    futures[merkmal] = future
+            gestartet = list(zip(neu, self.client.anfragen([a for _, a in neu]))) if neu else []
+            for (merkmal, _), future in gestartet:
+                self._laufend[merkmal] = future
+                futures[merkmal] = future
+        # Außerhalb des Locks: ist die Antwort schon da, läuft der Callback sofort
+        for (merkmal, _), future in gestartet:
+            future.add_done_callback(lambda f, m=merkmal: self._erledigt(m, f))
+        return futures
+
+    def _erledigt(self, merkmal, future):
+        """Auch nach Timeout eintreffende Antworten landen im Cache"""
+        with self._lock:
+            self._laufend.pop(merkmal, None)
+        if future.result() is not None:
+            self.cache.speichere(merkmal, future.result())
+
+
+class Regelwerk:
+    """Aktive Verhandlungsregeln; zeitbasierte Regeln haben Vorrang vor allgemeinen"""
+
+    def __init__(self, regeln=()):
+        self.regeln = [self._mit_schwellen(r) for r in regeln if r.get('aktiv', True)]
+        self._nach_name = {r['name']: r for r in self.regeln if r.get('name')}
+        self._zeitbasiert = [r for r in self.regeln if r.get('typ') == 'zeitbasiert']
+        allgemein = [r for r in self.regeln if r.get('typ') != 'zeitbasiert']
+        self._allgemein = allgemein[0] if allgemein else STANDARD_REGEL
+
+    @staticmethod
+    def _mit_schwellen(regel):
+        """Regel mit allen SCHWELLEN (ohne gespeicherte Werte die aus STANDARD_REGEL)"""
+        fehlend = {feld: STANDARD_REGEL[feld] for feld in SCHWELLEN if regel.get(feld) is None}
+        return {**regel, **fehlend} if fehlend else regel
+
+    @classmethod
+    def aus_datei(cls, pfad=None):
+        pfad = pfad or os.getenv('NEGOTIATION_RULES_FILE') or REGELN_DATEI
+        try:
+            with open(pfad, 'r', encoding='utf-8') as f:
+                daten = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Verhandlungsregeln nicht lesbar ({pfad}): {e}; nutze Standard-Schwellen')
+            return cls()
+        regeln = daten.get('verhandlungsregeln_beispiele', daten.get('regeln', daten))
+        return cls(regeln.values() if isinstance(regeln, dict) else regeln)
+
+    def regel_fuer(self, offer, wochentag=None):
+        """Regel laut applicable_rule, sonst passende zeitbasierte, sonst die allgemeine"""
+        regel = self._nach_name.get(offer.get('applicable_rule'))
+        if regel is not None:
+            return regel
+        tage = tage_online(offer)
+        for regel in self._zeitbasiert:
+            if 'wochentage' in regel:
+                if wochentag is None:
+                    wochentag = WOCHENTAGE[datetime.now().weekday()]
+                if wochentag in regel['wochentage']:
+                    return regel
+            elif regel.get('zeitbereich_von', 0) <= tage <= regel.get('zeitbereich_bis', 999):
+                return regel
+        return self._allgemein
+
+
+class EntscheidungsPipeline:
+    """
+    Gestufte Entscheidung: Schwellen der Regel (lokal, im Block), danach
+    KIBerater (Cache, OpenAI, Regeln) nur für das Band zwischen den Schwellen.
+    Zählt pro Stufe Angebote und Zeit und schätzt die gesparte LLM-Latenz.
+    einkaufspreise: optionaler EinkaufspreisCache (angebote/einkaufspreise.py)
+    historie: optionale VerhandlungsHistorie (angebote/verhandlungs_historie.py)
+    """
+    STUFEN = ('threshold', 'cache', 'llm', 'rules')
+
+    def __init__(self, berater, regelwerk=None, einkaufspreise=None, historie=None):
+        self.berater = berater
+        self.regelwerk = regelwerk if regelwerk is not None else Regelwerk.aus_datei()
+        self.einkaufspreise = einkaufspreise
+        self.historie = historie
+        self._lock = threading.Lock()
+        self._anzahl = Counter()
+        self._sekunden = Counter()
+
+    def entscheide(self, offers):
+        """Empfehlungen für eine Liste von Angeboten (gleiche Reihenfolge)"""
+        offers = list(offers)
+        ergebnisse = [None] * len(offers)
+        unklar = []
+        kosten = [self.einkaufspreise.preis_fuer(o) for o in offers] if self.einkaufspreise else [None] * len(offers)
+        with tracing.span('decide', offers=len(offers)):
+            start = time.perf_counter()
+            with tracing.span('decide.threshold'):
+                entschieden = Counter()
+                wochentag = WOCHENTAGE[datetime.now().weekday()]
+                for i, offer in enumerate(offers):
+                    regel = self.regelwerk.regel_fuer(offer, wochentag)
+                    prozent = prozent_vom_listenpreis(offer)
+                    if kosten[i] is not None and betrag(offer.get('offer_amount')) < kosten[i]:
+                        ergebnisse[i] = self._unter_einkauf(offer, kosten[i], regel)
+                        entschieden['Ablehnen'] += 1
+                        continue
+                    if not prozent:
+                        unklar.append(i)
+                        continue
+                    if prozent >= regel['auto_annahme_prozent']:
+                        ergebnisse[i] = self._schwellen_ergebnis('Akzeptieren', prozent, regel, 'auto_annahme_prozent')
+                    elif prozent < regel['auto_ablehnung_prozent']:
+                        ergebnisse[i] = self._schwellen_ergebnis('Ablehnen', prozent, regel, 'auto_ablehnung_prozent')
+                    elif self._gegenangebote_ausgeschoepft(offer, regel):
+                        ergebnisse[i] = self._letzte_runde(offer, prozent, regel)
+                    else:
+                        unklar.append(i)
+                        continue
+                    entschieden[ergebnisse[i]['recommendation']] += 1
+            n = len(offers) - len(unklar)
+            if n:
+                dauer = time.perf_counter() - start
+                for entscheidung, anzahl in entschieden.items():
+                    metriken.ANGEBOTE_ENTSCHIEDEN.inc(entscheidung, 'threshold', wert=anzahl)
+                metriken.ENTSCHEIDUNG_SEKUNDEN.observe('threshold', wert=dauer / n, anzahl=n)
+                self._zaehle('threshold', n, dauer)
+
+            if unklar:
+                with tracing.span('decide.ai', offers=len(unklar)):
+                    zeiten = Counter()
+                    empfehlungen = self.berater.empfehlungen([offers[i] for i in unklar], zeiten)
+                    for i, empfehlung in zip(unklar, empfehlungen):
+                        ergebnisse[i] = empfehlung
+                    for quelle, anzahl in Counter(e['source'] for e in empfehlungen).items():
+                        self._zaehle(quelle, anzahl, zeiten[quelle])
+        for i, preis in enumerate(kosten):
+            if preis is not None:
+                # Kopie: Empfehlungen aus dem Cache können von mehreren Angeboten geteilt werden
+                ergebnisse[i] = dict(ergebnisse[i], purchase_price=preis,
+                                     margin=round(betrag(offers[i].get('offer_amount')) - preis, 2))
+        return ergebnisse
+
+    def _gegenangebote_ausgeschoepft(self, offer, regel):
+        if self.historie is None or regel.get('max_gegenangebote') is None:
+            return False
+        bisher = self.historie.gegenangebote(kaeufer_von(offer), offer.get('item_id'))
+        return bisher >= regel['max_gegenangebote']
+
+    @staticmethod
+    def _letzte_runde(offer, prozent, regel):
+        mindest = regel.get('mindestpreis_prozent', regel['auto_ablehnung_prozent'])
+        entscheidung = 'Akzeptieren' if prozent >= mindest else 'Ablehnen'
+        vergleich = '≥' if entscheidung == 'Akzeptieren' else '<'
+        return {
+            'recommendation': entscheidung,
+            'confidence': 100,
+            'reasoning': f'{regel["max_gegenangebote"]} Gegenangebote ausgeschöpft, '
+                         f'{prozent:.1f}% {vergleich} Mindestpreis {mindest}% ({regel.get("name")})',
+            'rule': regel.get('name'),
+            'source': 'threshold',
+        }
+
+    @staticmethod
+    def _unter_einkauf(offer, preis, regel):
+        return {
+            'recommendation': 'Ablehnen',
+            'confidence': 100,
+            'reasoning': f'{betrag(offer.get("offer_amount")):.2f} unter Einkaufspreis {preis:.2f}',
+            'rule': regel.get('name'),
+            'source': 'threshold',
+        }
+
+    @staticmethod
+    def _schwellen_ergebnis(entscheidung, prozent, regel, feld):
+        vergleich = '≥' if entscheidung == 'Akzeptieren' else '<'
+        return {
+            'recommendation': entscheidung,
+            'confidence': 100,
+            'reasoning': f'{prozent:.1f}% {vergleich} {regel[feld]}% ({regel.get("name")})',
+            'rule': regel.get('name'),
+            'source': 'threshold',
+        }
+
+    def _zaehle(self, stufe, anzahl, sekunden):
+        with self._lock:
+            self._anzahl[stufe] += anzahl
+            self._sekunden[stufe] += sekunden
+
+    def llm_latenz(self):
+        """Gemessene mittlere Dauer eines LLM-Calls (Schätzung, solange keiner lief)"""
+        with self._lock:
+            if self._anzahl['llm']:
+                return self._sekunden['llm'] / self._anzahl['llm']
+        return LLM_LATENZ_SCHAETZUNG
+
+    def get_status(self):
+        llm_latenz = self.llm_latenz()
+        with self._lock:
+            gesamt = sum(self._anzahl.values())
+            stufen = {
+                stufe: {
+                    'offers': self._anzahl[stufe],
+                    'share': round(self._anzahl[stufe] / gesamt * 100, 1) if gesamt else 0.0,
+                    'avg_ms': round(self._sekunden[stufe] / self._anzahl[stufe] * 1000, 3) if self._anzahl[stufe] else None,
+                }
+                for stufe in self.STUFEN
+            }
+            # Schwellen- und Cache-Entscheidungen sparen (abzüglich ihrer eigenen Dauer) je einen Call;
+            # Regel-Fallbacks zählen nicht, dort war die KI nicht verfügbar
+            gespart = sum(self._anzahl[s] * llm_latenz - self._sekunden[s] for s in ('threshold', 'cache'))
+        return {
+            'total': gesamt,
+            'tiers': stufen,
+            'llm_latency_ms': round(llm_latenz * 1000, 1),
+            'llm_latency_measured': stufen['llm']['offers'] > 0,
+            'latency_saved_seconds': round(gespart, 3),
+            'rules': [r.get('name') for r in self.regelwerk.regeln] or [STANDARD_REGEL['name']],
+        }
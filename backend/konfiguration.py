@@ -0,0 +1,31 @@
+"""
+Einmaliges Laden der Konfiguration (.env)
+Alle Module lesen ihre Einstellungen über os.getenv; die .env-Datei neben
+hauptserver.py wird genau einmal pro Prozess geladen, egal wie viele Module
+lade_umgebung() aufrufen. Bereits gesetzte Umgebungsvariablen haben Vorrang.
+"""
+import os
+import threading
+
+ENV_DATEI = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+_lock = threading.Lock()
+_geladen = None
+
+
+def lade_umgebung(pfad=None):
+    """Lädt die .env-Datei beim ersten Aufruf; gibt den geladenen Pfad zurück (None ohne Datei)"""
+    global _geladen
+    if _geladen is not None:
+        return _geladen or None
+    with _lock:
+        if _geladen is None:
+            pfad = pfad or os.getenv('ENV_FILE') or ENV_DATEI
+            if os.path.exists(pfad):
+                # python-dotenv nur importieren, wenn es auch eine Datei gibt
+                from dotenv import load_dotenv
+                load_dotenv(dotenv_path=pfad)
+                _geladen = pfad
+            else:
+                _geladen = ''
+    return _geladen or None
@@ -0,0 +1,109 @@
+"""
+Lasttest für die gepollten API-Endpunkte
+Misst Requests/Sekunde und Latenzen (p50/p95/p99) für /api/offers und /api/stats
+mit mehreren parallelen Clients.
+
+    python lasttest.py --url http://localhost:5002 --clients 32 --dauer 20
+    python lasttest.py --etag        # Clients senden If-None-Match wie ein Browser
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+import requests
+
+ENDPUNKTE = {
+    'offers': '/api/offers?limit=100',
+    'offers_gefiltert': '/api/offers?status=pending&sort=-amount&limit=50',
+    'stats': '/api/stats',
+}
+
+
+def client(basis_url, pfad, ende, etag_verwenden, ergebnis):
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = 'gzip'
+    etag = None
+    while time.perf_counter() < ende:
+        headers = {'If-None-Match': etag} if etag_verwenden and etag else {}
+        start = time.perf_counter()
+        try:
+            response = session.get(basis_url + pfad, headers=headers, timeout=10)
+            dauer = time.perf_counter() - start
+            ergebnis['latenzen'].append(dauer)
+            ergebnis['status'][response.status_code] = ergebnis['status'].get(response.status_code, 0) + 1
+            ergebnis['bytes'] += len(response.content)
+            etag = response.headers.get('ETag', etag)
+        except requests.RequestException:
+            ergebnis['fehler'] += 1
+
+
+def perzentil(werte, p):
+    if not werte:
+        return None
+    werte = sorted(werte)
+    return werte[min(len(werte) - 1, int(len(werte) * p / 100))]
+
+
+def messe(basis_url, name, pfad, clients, dauer, etag_verwenden):
+    ergebnisse = [{'latenzen': [], 'status': {}, 'bytes': 0, 'fehler': 0} for _ in range(clients)]
+    ende = time.perf_counter() + dauer
+    threads = [
+        threading.Thread(target=client, args=(basis_url, pfad, ende, etag_verwenden, e), daemon=True)
+        for e in ergebnisse
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    laufzeit = time.perf_counter() - start
+
+    latenzen = [l for e in ergebnisse for l in e['latenzen']]
+    status = {}
+    for e in ergebnisse:
+        for code, anzahl in e['status'].items():
+            status[code] = status.get(code, 0) + anzahl
+    ms = lambda wert: round(wert * 1000, 2) if wert is not None else None
+    return {
+        'endpoint': name,
+        'path': pfad,
+        'clients': clients,
+        'requests': len(latenzen),
+        'requests_per_second': round(len(latenzen) / laufzeit, 1),
+        'p50_ms': ms(perzentil(latenzen, 50)),
+        'p95_ms': ms(perzentil(latenzen, 95)),
+        'p99_ms': ms(perzentil(latenzen, 99)),
+        'mean_ms': ms(statistics.mean(latenzen)) if latenzen else None,
+        'status_codes': status,
+        'errors': sum(e['fehler'] for e in ergebnisse),
+        'kib_per_second': round(sum(e['bytes'] for e in ergebnisse) / 1024 / laufzeit, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lasttest für /api/offers und /api/stats')
+    parser.add_argument('--url', default='http://localhost:5002')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--dauer', type=float, default=10, help='Sekunden pro Endpunkt')
+    parser.add_argument('--endpunkte', default=','.join(ENDPUNKTE), help='Kommagetrennt: ' + ', '.join(ENDPUNKTE))
+    parser.add_argument('--etag', action='store_true', help='If-None-Match senden (bedingte Requests)')
+    parser.add_argument('--json', help='Ergebnisse zusätzlich als JSON-Datei speichern')
+    args = parser.parse_args()
+
+    ergebnisse = []
+    for name in args.endpunkte.split(','):
+        ergebnis = messe(args.url.rstrip('/'), name, ENDPUNKTE[name], args.clients, args.dauer, args.etag)
+        ergebnisse.append(ergebnis)
+        print(f"{name:18} {ergebnis['requests_per_second']:>9} req/s   "
+              f"p50 {ergebnis['p50_ms']} ms   p95 {ergebnis['p95_ms']} ms   p99 {ergebnis['p99_ms']} ms   "
+              f"Status {ergebnis['status_codes']}   Fehler {ergebnis['errors']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'url': args.url, 'etag': args.etag, 'results': ergebnisse}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
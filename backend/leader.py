@@ -0,0 +1,70 @@
+"""
+Leader-Wahl zwischen Worker-Prozessen über eine Dateisperre
+Der Prozess, der die Sperre hält, betreibt die Hintergrunddienste mit
+Seiteneffekten (Token-Refresh, Revalidierung, Verhandlungs-Journal); die anderen
+bewerben sich periodisch und übernehmen, sobald der Leader beendet ist.
+"""
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """Nicht-blockierende Dateisperre: genau ein Prozess hält sie (Leader)"""
+    def __init__(self, pfad, intervall_sekunden=10.0):
+        self.pfad = pfad
+        self.intervall_sekunden = intervall_sekunden
+        self._datei = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def ist_leader(self):
+        return self._datei is not None
+
+    def versuche(self):
+        if self.ist_leader:
+            return True
+        if fcntl is None:
+            # Ohne fcntl gibt es nur einen Prozess
+            self._datei = open(self.pfad, 'a')
+            return True
+        datei = open(self.pfad, 'a')
+        try:
+            fcntl.flock(datei, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            datei.close()
+            return False
+        self._datei = datei
+        return True
+
+    def bewerben(self, bei_erfolg):
+        """Versucht periodisch Leader zu werden (z.B. nachdem der bisherige Leader beendet wurde)"""
+        if self.versuche():
+            bei_erfolg()
+            return
+
+        def _loop():
+            while not self._stop.wait(self.intervall_sekunden):
+                if self.versuche():
+                    logger.info(f'Worker {os.getpid()} ist jetzt Leader')
+                    bei_erfolg()
+                    return
+
+        self._thread = threading.Thread(target=_loop, name='leader-election', daemon=True)
+        self._thread.start()
+
+    def freigeben(self):
+        self._stop.set()
+        if self._datei is not None:
+            if fcntl is not None:
+                fcntl.flock(self._datei, fcntl.LOCK_UN)
+            self._datei.close()
+            self._datei = None
@@ -0,0 +1,285 @@
+"""
+Metriken im Prometheus-Textformat (ohne zusätzliche Abhängigkeit)
+Zähler, Gauges und Histogramme mit Labels; /metrics gibt alle registrierten
+Metriken aus. Bei mehreren Worker-Prozessen liefert jeder Worker seine eigenen Werte.
+"""
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+
+import tracing
+
+# Latenz-Buckets für HTTP-Calls (Sekunden)
+STANDARD_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_START = time.time()
+
+
+def _labels_text(namen, werte, extra=''):
+    teile = [f'{n}="{_escape(v)}"' for n, v in zip(namen, werte)]
+    if extra:
+        teile.append(extra)
+    return '{' + ','.join(teile) + '}' if teile else ''
+
+
+def _escape(wert):
+    return str(wert).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _zahl(wert):
+    if wert == float('inf'):
+        return '+Inf'
+    return repr(float(wert)) if isinstance(wert, float) else str(wert)
+
+
+class _Metrik:
+    typ = None
+
+    def __init__(self, name, hilfe, labels=()):
+        self.name = name
+        self.hilfe = hilfe
+        self.label_namen = tuple(labels)
+        self._werte = {}
+        self._lock = threading.Lock()
+
+    def _schluessel(self, labels):
+        if len(labels) != len(self.label_namen):
+            raise ValueError(f'{self.name}: erwartet Labels {self.label_namen}')
+        return tuple(str(l) for l in labels)
+
+    def kopf(self):
+        return [f'# HELP {self.name} {self.hilfe}', f'# TYPE {self.name} {self.typ}']
+
+
+class Counter(_Metrik):
+    typ = 'counter'
+
+    def inc(self, *labels, wert=1):
+        schluessel = self._schluessel(labels)
+        with self._lock:
+            self._werte[schluessel] = self._werte.get(schluessel, 0) + wert
+
+    def zeilen(self):
+        with self._lock:
+            werte = list(self._werte.items())
+        return [f'{self.name}{_labels_text(self.label_namen, s)} {_zahl(w)}' for s, w in werte]
+
+
+class Gauge(_Metrik):
+    typ = 'gauge'
+
+    def __init__(self, name, hilfe, labels=(), funktion=None):
+        """funktion: optional, liefert beim Abruf {label-tupel: wert} (oder eine Zahl ohne Labels)"""
+        super().__init__(name, hilfe, labels)
+        self.funktion = funktion
+
+    def set(self, *labels, wert):
+        with self._lock:
+            self._werte[self._schluessel(labels)] = wert
+
+    def zeilen(self):
+        if self.funktion is not None:
+            werte = self.funktion()
+            werte = list(werte.items()) if isinstance(werte, dict) else [((), werte)]
+        else:
+            with self._lock:
+                werte = list(self._werte.items())
+        return [f'{self.name}{_labels_text(self.label_namen, s)} {_zahl(w)}' for s, w in werte if w is not None]
+
+
+class Histogram(_Metrik):
+    typ = 'histogram'
+
+    def __init__(self, name, hilfe, labels=(), buckets=STANDARD_BUCKETS):
+        super().__init__(name, hilfe, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels, wert, anzahl=1):
+        """anzahl: mehrere gleich lange Beobachtungen auf einmal (z.B. Mittelwert eines Blocks)"""
+        schluessel = self._schluessel(labels)
+        with self._lock:
+            eintrag = self._werte.get(schluessel)
+            if eintrag is None:
+                # Zähler pro Bucket (nicht kumuliert), Summe, Anzahl
+                eintrag = self._werte[schluessel] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            eintrag[0][bisect_left(self.buckets, wert)] += anzahl
+            eintrag[1] += wert * anzahl
+            eintrag[2] += anzahl
+
+    def zeit(self, *labels):
+        """Kontextmanager: misst die Dauer des Blocks"""
+        return _Stoppuhr(self, labels)
+
+    def zeilen(self):
+        with self._lock:
+            werte = [(s, (list(e[0]), e[1], e[2])) for s, e in self._werte.items()]
+        zeilen = []
+        for schluessel, (zaehler, summe, anzahl) in werte:
+            kumuliert = 0
+            for grenze, n in zip(self.buckets + (float('inf'),), zaehler):
+                kumuliert += n
+                le = 'le="' + _zahl(float(grenze)) + '"'
+                zeilen.append(f'{self.name}_bucket{_labels_text(self.label_namen, schluessel, le)} {kumuliert}')
+            zeilen.append(f'{self.name}_sum{_labels_text(self.label_namen, schluessel)} {_zahl(summe)}')
+            zeilen.append(f'{self.name}_count{_labels_text(self.label_namen, schluessel)} {anzahl}')
+        return zeilen
+
+
+class _Stoppuhr:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(*self.labels, wert=time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metriken = {}
+        self._lock = threading.Lock()
+
+    def registriere(self, metrik):
+        with self._lock:
+            return self._metriken.setdefault(metrik.name, metrik)
+
+    def counter(self, name, hilfe, labels=()):
+        return self.registriere(Counter(name, hilfe, labels))
+
+    def gauge(self, name, hilfe, labels=(), funktion=None):
+        return self.registriere(Gauge(name, hilfe, labels, funktion))
+
+    def histogram(self, name, hilfe, labels=(), buckets=STANDARD_BUCKETS):
+        return self.registriere(Histogram(name, hilfe, labels, buckets))
+
+    def ausgabe(self):
+        with self._lock:
+            metriken = list(self._metriken.values())
+        zeilen = []
+        for metrik in metriken:
+            try:
+                werte = metrik.zeilen()
+            except Exception as e:
+                werte = [f'# {metrik.name}: Fehler beim Abruf ({_escape(e)})']
+            zeilen.extend(metrik.kopf())
+            zeilen.extend(werte)
+        return '\n'.join(zeilen) + '\n'
+
+
+REGISTRY = Registry()
+
+# === eBay-Calls ===
+EBAY_CALL_SEKUNDEN = REGISTRY.histogram(
+    'ebay_api_request_duration_seconds', 'Dauer der eBay-API-Calls (ohne Wartezeit im Rate-Budget)',
+    ('api', 'call', 'status'))
+RATE_LIMIT_WARTEZEIT = REGISTRY.histogram(
+    'ebay_rate_limit_wait_seconds', 'Wartezeit im Rate-Budget pro Account vor einem Call', ('account',),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+# === Angebote und Entscheidungen ===
+ANGEBOTE_SYNCHRONISIERT = REGISTRY.counter(
+    'offers_synced_total', 'Beim Sync abgerufene Angebote', ('account',))
+ANGEBOTE_ENTSCHIEDEN = REGISTRY.counter(
+    'offers_decided_total', 'Entschiedene Angebote nach Entscheidung und Quelle', ('decision', 'source'))
+ENTSCHEIDUNG_SEKUNDEN = REGISTRY.histogram(
+    'offer_decision_duration_seconds', 'Dauer einer Angebotsentscheidung', ('source',),
+    buckets=(0.0001, 0.001, 0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0))
+
+# === Flask ===
+HTTP_SEKUNDEN = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Dauer der Requests an dieses Backend', ('endpoint', 'method', 'status'))
+
+
+# === Prozess ===
+def _prozess_speicher():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _offene_dateien():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+REGISTRY.gauge('process_resident_memory_bytes', 'Residenter Speicher des Prozesses', funktion=_prozess_speicher)
+REGISTRY.gauge('process_cpu_seconds_total', 'Verbrauchte CPU-Zeit (User + System)', funktion=time.process_time)
+REGISTRY.gauge('process_start_time_seconds', 'Startzeit des Prozesses (Unix-Zeit)', funktion=lambda: _START)
+REGISTRY.gauge('process_open_fds', 'Offene Dateideskriptoren', funktion=_offene_dateien)
+REGISTRY.gauge('process_threads', 'Anzahl Python-Threads', funktion=threading.active_count)
+
+
+# Pfadsegmente, die IDs sind (Zahlen, Item-IDs wie v1|123|0, lange Token)
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[\w|.-]{6,}$|^\d+$|\|')
+
+
+def rest_call_name(url):
+    """REST-Pfad als Call-Name mit {id} statt konkreter IDs (begrenzte Label-Kardinalität)"""
+    pfad = url.split('://', 1)[-1].split('/', 1)[-1].split('?', 1)[0]
+    return '/' + '/'.join('{id}' if _ID_SEGMENT.search(s) else s for s in pfad.split('/') if s)
+
+
+def instrumentiere_session(session, api, call_name, ist_fehler=None):
+    """
+    Misst jeden über die Session gesendeten Request (Session.send, d.h. ohne Wartezeit
+    im Rate-Budget) als ebay_api_request_duration_seconds{api, call, status}
+    und als Span 'http.<api>' im aktiven Trace.
+    call_name: liefert aus dem PreparedRequest den Call-Namen
+    ist_fehler: optional, erkennt fachliche Fehler in HTTP-200-Antworten (status="ack_failure")
+    """
+    if getattr(session, '_metriken_api', None):
+        return session
+    senden = session.send
+
+    def send(prepared, **kwargs):
+        name = call_name(prepared)
+        status = 'error'
+        start = time.perf_counter()
+        with tracing.span(f'http.{api}', call=name) as span:
+            try:
+                response = senden(prepared, **kwargs)
+                status = str(response.status_code)
+                if ist_fehler is not None and response.status_code == 200 and ist_fehler(response):
+                    status = 'ack_failure'
+                return response
+            finally:
+                span.set(status=status)
+                EBAY_CALL_SEKUNDEN.observe(api, name, status, wert=time.perf_counter() - start)
+
+    session.send = send
+    session._metriken_api = api
+    return session
+
+
+def instrumentiere_flask(app):
+    """Request-Dauer pro Endpunkt messen und /metrics bereitstellen"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _metriken_start():
+        g.metriken_start = time.perf_counter()
+
+    @app.after_request
+    def _metriken_ende(response):
+        start = g.get('metriken_start')
+        if start is not None and request.endpoint != 'metrics':
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_SEKUNDEN.observe(endpoint, request.method, response.status_code, wert=time.perf_counter() - start)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(REGISTRY.ausgabe(), content_type=CONTENT_TYPE)
@@ -0,0 +1,158 @@
+"""
+Logging-Pipeline für das Backend
+Request-Threads legen Log-Records nur in eine Queue; ein Hintergrund-Thread schreibt
+sie als JSON-Zeilen in eine rotierende Datei (und lesbar auf die Konsole). Häufige
+Debug-Logs pro API-Call werden gesampelt, damit der Aufwand unter Last konstant bleibt.
+
+Konfiguration über Umgebungsvariablen:
+    LOG_FILE           Zieldatei (Standard backend.log, '{pid}' wird ersetzt; unter
+                       gunicorn backend.{pid}.log, da mehrere Prozesse eine Datei beim
+                       Rotieren gegenseitig umbenennen würden, siehe gunicorn.conf.py)
+    LOG_LEVEL          Mindest-Level (Standard INFO)
+    LOG_ROTATE         'size' oder 'time' (Standard size)
+    LOG_MAX_BYTES      Dateigröße vor der Rotation (Standard 10 MB)
+    LOG_ROTATE_WHEN    Zeitpunkt der Rotation bei LOG_ROTATE=time (Standard midnight)
+    LOG_BACKUP_COUNT   Anzahl aufbewahrter Dateien (Standard 5)
+    LOG_SAMPLE_RATE    Anteil geschriebener Call-Logs, 0..1 (Standard 0.01)
+    LOG_QUEUE_SIZE     Maximale Queue-Länge, danach wird verworfen (Standard 10000)
+"""
+import atexit
+import copy
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+# Standard-Attribute eines LogRecords; alles andere stammt aus extra={...}
+_RECORD_FELDER = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_lock = threading.Lock()
+_traceback_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile pro Record: Zeit, Level, Logger, Thread, Nachricht und extra-Felder"""
+    def format(self, record):
+        eintrag = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        for feld, wert in record.__dict__.items():
+            if feld not in _RECORD_FELDER and not feld.startswith('_'):
+                eintrag[feld] = wert
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            eintrag['exc'] = record.exc_text
+        if record.stack_info:
+            eintrag['stack'] = record.stack_info
+        return json.dumps(eintrag, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lässt von gesampelten Records (extra={'sample': True}) nur jeden n-ten durch.
+    Der Zähler läuft pro Logger; die Rate steht im Record (sample_rate) für Hochrechnungen.
+    """
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self.jeder = max(1, round(1 / rate)) if rate > 0 else 0
+        self._zaehler = {}
+
+    def filter(self, record):
+        if not getattr(record, 'sample', False):
+            return True
+        if not self.jeder:
+            return False
+        zaehler = self._zaehler.get(record.name)
+        if zaehler is None:
+            zaehler = self._zaehler.setdefault(record.name, itertools.count())
+        if next(zaehler) % self.jeder:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+class NichtBlockierenderQueueHandler(QueueHandler):
+    """QueueHandler, der bei voller Queue verwirft statt den Request-Thread zu blockieren"""
+    def __init__(self, q):
+        super().__init__(q)
+        self.verworfen = 0
+
+    def prepare(self, record):
+        """
+        Kopie mit fertiger Nachricht für die Queue. Anders als QueueHandler.prepare bleibt
+        der Traceback in exc_text (statt an msg angehängt), damit JsonFormatter ihn als
+        eigenes Feld 'exc' schreibt; exc_info (Frames) wird nicht mitgeschickt.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.verworfen += 1
+
+
+def setup_logging(datei=None, level=None):
+    """
+    Richtet die Queue-basierte Pipeline am Root-Logger ein (mehrfacher Aufruf ist harmlos).
+    Gibt den QueueHandler zurück (Zähler für verworfene Records).
+    """
+    global _listener
+    with _lock:
+        root = logging.getLogger()
+        if _listener is not None:
+            return next(h for h in root.handlers if isinstance(h, NichtBlockierenderQueueHandler))
+
+        datei = (datei or os.getenv('LOG_FILE', 'backend.log')).replace('{pid}', str(os.getpid()))
+        backups = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+        if os.getenv('LOG_ROTATE', 'size') == 'time':
+            datei_handler = TimedRotatingFileHandler(
+                datei, when=os.getenv('LOG_ROTATE_WHEN', 'midnight'), backupCount=backups, encoding='utf-8')
+        else:
+            datei_handler = RotatingFileHandler(
+                datei, maxBytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+                backupCount=backups, encoding='utf-8')
+        datei_handler.setFormatter(JsonFormatter())
+        konsole = logging.StreamHandler()
+        konsole.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+
+        log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+        queue_handler = NichtBlockierenderQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(float(os.getenv('LOG_SAMPLE_RATE', '0.01'))))
+
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level or os.getenv('LOG_LEVEL', 'INFO').upper())
+
+        _listener = QueueListener(log_queue, datei_handler, konsole, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return queue_handler
+
+
+def stop_logging():
+    """Schreibt die restlichen Records und beendet den Writer-Thread"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
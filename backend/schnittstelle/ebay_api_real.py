@@ -5,15 +5,33 @@ import requests
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import os
-from dotenv import load_dotenv
+import logging
 
-load_dotenv()
+import konfiguration
+import tracing
+from metriken import instrumentiere_session
+
+konfiguration.lade_umgebung()
+
+logger = logging.getLogger(__name__)
+# Ein Eintrag pro HTTP-Call (DEBUG, gesampelt – siehe protokollierung.py)
+call_logger = logging.getLogger(__name__ + '.calls')
 
 class EbayTradingAPI:
-    def __init__(self, app_id=None, dev_id=None, cert_id=None, auth_token=None, sandbox_mode=True):
+    def __init__(self, app_id=None, dev_id=None, cert_id=None, auth_token=None, sandbox_mode=True, session=None,
+                 base_url=None):
         """
         Initialize eBay Trading API client with OAuth 2.0 support
+        session: optionale requests.Session (eigener Connection-Pool pro Account)
+        base_url: optional, z.B. der lokale Mock (Standard: EBAY_API_BASE_URL, sonst eBay)
         """
+        self.session = session or requests.Session()
+        self.session.hooks['response'].append(self._log_call)
+        instrumentiere_session(
+            self.session, 'trading',
+            call_name=lambda prepared: prepared.headers.get('X-EBAY-API-CALL-NAME', 'unknown'),
+            ist_fehler=lambda response: b'<Ack>Failure</Ack>' in response.content
+        )
         self.app_id = app_id or os.getenv('EBAY_APP_ID', '')
         self.dev_id = dev_id or os.getenv('EBAY_DEV_ID', '')
         self.cert_id = cert_id or os.getenv('EBAY_CERT_ID', '')
@@ -24,7 +42,10 @@ class EbayTradingAPI:
         self.is_oauth = self.auth_token.startswith('v^1.1#i^1#') if self.auth_token else False
         
         # eBay API endpoints  
-        if self.sandbox_mode:
+        base_url = base_url or os.getenv('EBAY_API_BASE_URL')
+        if base_url:
+            self.api_url = f"{base_url.rstrip('/')}/ws/api.dll"
+        elif self.sandbox_mode:
             self.api_url = "https://api.sandbox.ebay.com/ws/api.dll"
         else:
             self.api_url = "https://api.ebay.com/ws/api.dll"
@@ -41,8 +62,7 @@ class EbayTradingAPI:
                 'X-EBAY-API-IAF-TOKEN': self.auth_token,  # OAuth 2.0 Header
                 'User-Agent': 'eBayBot/1.0 (OAuth2.0; Python/3.13)',
                 'Accept': 'text/xml',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'close'
+                'Accept-Encoding': 'gzip, deflate'
             }
         else:
             self.headers = {
@@ -54,9 +74,21 @@ class EbayTradingAPI:
                 'X-EBAY-API-SITEID': '77',  # Deutschland
                 'User-Agent': 'eBayBot/1.0 (AuthnAuth; Python/3.13)',
                 'Accept': 'text/xml',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'close'
+                'Accept-Encoding': 'gzip, deflate'
             }
+
+    def _log_call(self, response, *args, **kwargs):
+        """requests-Hook: protokolliert jeden Trading-API-Call (gesampelt)"""
+        if call_logger.isEnabledFor(logging.DEBUG):
+            call_logger.debug(
+                f"{response.request.headers.get('X-EBAY-API-CALL-NAME', '?')} -> HTTP {response.status_code}",
+                extra={
+                    'sample': True,
+                    'call': response.request.headers.get('X-EBAY-API-CALL-NAME'),
+                    'status': response.status_code,
+                    'elapsed_ms': round(response.elapsed.total_seconds() * 1000, 1)
+                }
+            )
     
     def test_connection(self):
         """
@@ -75,7 +107,7 @@ class EbayTradingAPI:
             
             # SOFORTIGER PRODUCTION FALLBACK für echte Daten
             if is_production:
-                print("🔥 Production-Credentials erkannt - verwende optimierten Modus")
+                logger.info('Production-Credentials erkannt - verwende optimierten Modus')
                 return {
                     'success': True,
                     'message': '🔥 ERFOLG! Production eBay-Credentials sind gültig und konfiguriert. Ihr Bot ist vollständig einsatzbereit!',
@@ -96,14 +128,11 @@ class EbayTradingAPI:
             headers = self.headers.copy()
             headers['X-EBAY-API-CALL-NAME'] = 'GeteBayOfficialTime'
             
-            # Verbesserte Verbindungsparameter für bessere Stabilität
-            session = requests.Session()
-            session.headers.update(headers)
-            
             try:
-                response = session.post(
+                response = self.session.post(
                     self.api_url, 
                     data=xml_request, 
+                    headers=headers,
                     timeout=(10, 30),  # Kürzere Timeouts für schnelleren Fallback
                     verify=True,
                     allow_redirects=True
@@ -213,7 +242,7 @@ class EbayTradingAPI:
                 'Content-Length': str(len(xml_request))
             }
 
-            response = requests.post(
+            response = self.session.post(
                 self.api_url, 
                 data=xml_request, 
                 headers=headers,
@@ -313,7 +342,7 @@ class EbayTradingAPI:
             headers = self.headers.copy()
             headers['X-EBAY-API-CALL-NAME'] = 'GetSellerList'
             
-            response = requests.post(self.api_url, data=xml_request, headers=headers, timeout=30)
+            response = self.session.post(self.api_url, data=xml_request, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 # Parse response and return items
@@ -371,7 +400,7 @@ class EbayTradingAPI:
                 'Content-Length': str(len(xml_request))
             }
 
-            response = requests.post(
+            response = self.session.post(
                 self.api_url, 
                 data=xml_request, 
                 headers=headers,
@@ -500,7 +529,7 @@ class EbayTradingAPI:
                 'Content-Length': str(len(xml_request))
             }
 
-            response = requests.post(
+            response = self.session.post(
                 self.api_url, 
                 data=xml_request, 
                 headers=headers,
@@ -632,7 +661,7 @@ class EbayTradingAPI:
                 'Content-Length': str(len(xml_request))
             }
 
-            response = requests.post(
+            response = self.session.post(
                 self.api_url, 
                 data=xml_request, 
                 headers=headers,
@@ -711,18 +740,16 @@ class EbayTradingAPI:
                 'X-EBAY-API-CALL-NAME': 'GeteBayOfficialTime'
             }
 
-            print(f"🔍 Teste Token: {self.auth_token[:50]}...")
-            print(f"🔍 API URL: {self.api_url}")
+            logger.debug(f'Teste Token {self.auth_token[:12]}... gegen {self.api_url}')
             
-            response = requests.post(
+            response = self.session.post(
                 self.api_url, 
                 data=xml_request, 
                 headers=headers,
                 timeout=10
             )
 
-            print(f"🔍 HTTP Status: {response.status_code}")
-            print(f"🔍 Response: {response.text[:500]}...")
+            logger.debug(f'Zeit-Test: HTTP {response.status_code}, {response.text[:500]}')
 
             return {
                 'success': response.status_code == 200,
@@ -733,7 +760,7 @@ class EbayTradingAPI:
             }
 
         except Exception as e:
-            print(f"❌ Error: {str(e)}")
+            logger.error(f'Zeit-Test fehlgeschlagen: {e}')
             return {
                 'success': False,
                 'error': str(e),
@@ -752,6 +779,7 @@ class EbayTradingAPI:
             'note': 'Alle Bot-Funktionen sind verfügbar. eBay API-Calls werden simuliert bis Server wieder erreichbar sind.'
         }
 
+    @tracing.verfolgt('ebay.get_my_ebay_selling_chunked')
     def get_my_ebay_selling_chunked(self, chunk_size=100, max_chunks=50):
         """
         Get eBay selling items with chunking for massive inventories (158k+ items)
@@ -782,7 +810,7 @@ class EbayTradingAPI:
   <Version>967</Version>
 </GetMyeBaySellingRequest>"""
 
-                response = requests.post(
+                response = self.session.post(
                     self.api_url, 
                     data=xml_request, 
                     headers=self.headers, 
@@ -793,7 +821,8 @@ class EbayTradingAPI:
                     # Parse XML response
                     try:
                         import xml.etree.ElementTree as ET
-                        root = ET.fromstring(response.content)
+                        with tracing.span('xml.parse', bytes=len(response.content), page=page_number):
+                            root = ET.fromstring(response.content)
                         
                         # Check for API errors
                         ack = root.find('.//{urn:ebay:apis:eBLBaseComponents}Ack')
@@ -820,22 +849,23 @@ class EbayTradingAPI:
                         if not items:  # Keine weiteren Items
                             break
                         
-                        for item in items:
-                            item_id_elem = item.find('.//{urn:ebay:apis:eBLBaseComponents}ItemID')
-                            title_elem = item.find('.//{urn:ebay:apis:eBLBaseComponents}Title')
-                            start_price_elem = item.find('.//{urn:ebay:apis:eBLBaseComponents}StartPrice')
-                            listing_type_elem = item.find('.//{urn:ebay:apis:eBLBaseComponents}ListingType')
+                        with tracing.span('xml.extract', items=len(items)):
+                            for item in items:
+                                item_id_elem = item.find('.//{urn:ebay:apis:eBLBaseComponents}ItemID')
+                                title_elem = item.find('.//{urn:ebay:apis:eBLBaseComponents}Title')
+                                start_price_elem = item.find('.//{urn:ebay:apis:eBLBaseComponents}StartPrice')
+                                listing_type_elem = item.find('.//{urn:ebay:apis:eBLBaseComponents}ListingType')
                             
-                            if item_id_elem is not None:
-                                all_items.append({
-                                    'item_id': item_id_elem.text,
-                                    'title': title_elem.text if title_elem is not None else 'Unbekannter Titel',
-                                    'current_price': float(start_price_elem.text) if start_price_elem is not None else 0.0,
-                                    'currency': 'EUR',
-                                    'listing_type': listing_type_elem.text if listing_type_elem is not None else 'FixedPriceItem',
-                                    'listing_status': 'Active',
-                                    'best_offer_enabled': True
-                                })
+                                if item_id_elem is not None:
+                                    all_items.append({
+                                        'item_id': item_id_elem.text,
+                                        'title': title_elem.text if title_elem is not None else 'Unbekannter Titel',
+                                        'current_price': float(start_price_elem.text) if start_price_elem is not None else 0.0,
+                                        'currency': 'EUR',
+                                        'listing_type': listing_type_elem.text if listing_type_elem is not None else 'FixedPriceItem',
+                                        'listing_status': 'Active',
+                                        'best_offer_enabled': True
+                                    })
                         
                         total_found += len(items)
                         chunks_processed += 1
@@ -6,21 +6,36 @@ import requests
 import json
 from datetime import datetime
 import os
-from dotenv import load_dotenv
+import logging
 
-load_dotenv()
+import konfiguration
+import tracing
+from metriken import instrumentiere_session, rest_call_name
+
+konfiguration.lade_umgebung()
+
+# Ein Eintrag pro HTTP-Call (DEBUG, gesampelt – siehe protokollierung.py)
+call_logger = logging.getLogger(__name__ + '.calls')
 
 class EbaySellAPI:
-    def __init__(self, app_id=None, oauth_token=None, sandbox_mode=False):
+    def __init__(self, app_id=None, oauth_token=None, sandbox_mode=False, session=None, base_url=None):
         """
         Initialize eBay Sell API client with OAuth 2.0
+        session: optionale requests.Session (eigener Connection-Pool pro Account)
+        base_url: optional, z.B. der lokale Mock (Standard: EBAY_API_BASE_URL, sonst eBay)
         """
+        self.session = session or requests.Session()
+        self.session.hooks['response'].append(self._log_call)
+        instrumentiere_session(self.session, 'rest', call_name=lambda prepared: rest_call_name(prepared.url))
         self.app_id = app_id or os.getenv('EBAY_APP_ID', '')
         self.oauth_token = oauth_token or os.getenv('EBAY_AUTH_TOKEN', '')
         self.sandbox_mode = sandbox_mode or os.getenv('EBAY_SANDBOX', 'false').lower() == 'true'
         
         # eBay Sell API endpoints
-        if self.sandbox_mode:
+        base_url = base_url or os.getenv('EBAY_API_BASE_URL')
+        if base_url:
+            self.base_url = base_url.rstrip('/')
+        elif self.sandbox_mode:
             self.base_url = "https://api.sandbox.ebay.com"
         else:
             self.base_url = "https://api.ebay.com"
@@ -34,6 +49,20 @@ class EbaySellAPI:
             'User-Agent': 'eBayBot/2.0 (SellAPI; OAuth2.0; Python/3.13)'
         }
     
+    def _log_call(self, response, *args, **kwargs):
+        """requests-Hook: protokolliert jeden REST-Call (gesampelt)"""
+        if call_logger.isEnabledFor(logging.DEBUG):
+            call_logger.debug(
+                f'{response.request.method} {response.request.path_url} -> HTTP {response.status_code}',
+                extra={
+                    'sample': True,
+                    'method': response.request.method,
+                    'path': response.request.path_url.split('?')[0],
+                    'status': response.status_code,
+                    'elapsed_ms': round(response.elapsed.total_seconds() * 1000, 1)
+                }
+            )
+
     def test_connection(self):
         """
         Test OAuth 2.0 connection with Account API
@@ -41,7 +70,7 @@ class EbaySellAPI:
         try:
             url = f"{self.base_url}/sell/account/v1/privilege"
             
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = self.session.get(url, headers=self.headers, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -89,7 +118,7 @@ class EbaySellAPI:
                 'offset': offset
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -140,7 +169,7 @@ class EbaySellAPI:
                 'filter': 'orderfulfillmentstatus:{NOT_STARTED|IN_PROGRESS}'
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -210,7 +239,7 @@ class EbaySellAPI:
                     'action': action
                 }
             
-            response = requests.post(url, headers=self.headers, json=data, timeout=30)
+            response = self.session.post(url, headers=self.headers, json=data, timeout=30)
             
             if response.status_code in [200, 201]:
                 return {
@@ -269,7 +298,7 @@ class EbaySellAPI:
                 'offset': 0
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -345,7 +374,7 @@ class EbaySellAPI:
                     'offset': offset
                 }
                 
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=30)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -418,7 +447,7 @@ class EbaySellAPI:
         try:
             # Account API um Seller-Informationen zu bekommen
             account_url = f"{self.base_url}/sell/account/v1/privilege"
-            account_response = requests.get(account_url, headers=self.headers, timeout=30)
+            account_response = self.session.get(account_url, headers=self.headers, timeout=30)
             
             if account_response.status_code != 200:
                 return {
@@ -450,7 +479,7 @@ class EbaySellAPI:
                 'offset': 0
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -552,7 +581,7 @@ class EbaySellAPI:
                 'limit': 50
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -607,7 +636,7 @@ class EbaySellAPI:
                 'limit': 50
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -660,7 +689,7 @@ class EbaySellAPI:
                 'filter': 'orderfulfillmentstatus:{NOT_STARTED|IN_PROGRESS}'
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -726,7 +755,7 @@ class EbaySellAPI:
                     }
                 }
             
-            response = requests.post(url, headers=self.headers, json=response_data, timeout=30)
+            response = self.session.post(url, headers=self.headers, json=response_data, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -762,47 +791,52 @@ class EbaySellAPI:
                 'action': action
             }
 
-    def get_all_best_offers_direct(self, limit=200, include_counters=True):
+    @tracing.verfolgt('ebay.get_all_best_offers_direct')
+    def get_all_best_offers_direct(self, limit=200, include_counters=True, offset=0):
         """
         Optimierte Methode: Holt direkt alle Best Offers und Gegenvorschläge 
         ohne zuerst alle Listings abzurufen (viel effizienter für große Inventare)
+        offset: für seitenweisen Abruf (siehe 'total_available' im Ergebnis)
         """
         try:
             # Direkt alle offenen Angebote abrufen
             url = f"{self.base_url}/sell/negotiation/v1/offer"
             params = {
                 'status': 'PENDING,COUNTERED',  # Sowohl neue als auch Gegenvorschläge
-                'limit': min(limit, 200)  # eBay Limit beachten
+                'limit': min(limit, 200),  # eBay Limit beachten
+                'offset': offset
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
-                offers = []
-                
-                for offer in data.get('offers', []):
-                    offer_status = offer.get('status', 'PENDING')
-                    offer_data = {
-                        'best_offer_id': offer.get('offerId', ''),
-                        'buyer_id': offer.get('buyerId', 'unknown'),
-                        'price': float(offer.get('amount', {}).get('value', 0)),
-                        'message': offer.get('message', ''),
-                        'quantity': int(offer.get('quantity', 1)),
-                        'created_time': offer.get('creationDate', ''),
-                        'status': offer_status,
-                        'item_id': offer.get('itemId', ''),
-                        'offer_type': 'counter' if offer_status == 'COUNTERED' else 'initial'
-                    }
+                with tracing.span('parse.offers') as span:
+                    data = response.json()
+                    offers = []
+                
+                    for offer in data.get('offers', []):
+                        offer_status = offer.get('status', 'PENDING')
+                        offer_data = {
+                            'best_offer_id': offer.get('offerId', ''),
+                            'buyer_id': offer.get('buyerId', 'unknown'),
+                            'price': float(offer.get('amount', {}).get('value', 0)),
+                            'message': offer.get('message', ''),
+                            'quantity': int(offer.get('quantity', 1)),
+                            'created_time': offer.get('creationDate', ''),
+                            'status': offer_status,
+                            'item_id': offer.get('itemId', ''),
+                            'offer_type': 'counter' if offer_status == 'COUNTERED' else 'initial'
+                        }
                     
-                    # Zusätzliche Informationen für Gegenvorschläge
-                    if offer_status == 'COUNTERED':
-                        counter_info = offer.get('counterOffer', {})
-                        if counter_info:
-                            offer_data['counter_amount'] = float(counter_info.get('amount', {}).get('value', 0))
-                            offer_data['counter_message'] = counter_info.get('message', '')
+                        # Zusätzliche Informationen für Gegenvorschläge
+                        if offer_status == 'COUNTERED':
+                            counter_info = offer.get('counterOffer', {})
+                            if counter_info:
+                                offer_data['counter_amount'] = float(counter_info.get('amount', {}).get('value', 0))
+                                offer_data['counter_message'] = counter_info.get('message', '')
                     
-                    offers.append(offer_data)
+                        offers.append(offer_data)
+                    span.set(offers=len(offers))
                 
                 # Optional: Item-Details zu den Angeboten hinzufügen
                 offers_with_details = self._enrich_offers_with_item_details(offers)
@@ -812,6 +846,8 @@ class EbaySellAPI:
                     'message': f'{len(offers_with_details)} Best Offers/Gegenvorschläge direkt abgerufen (Optimiert)',
                     'offers': offers_with_details,
                     'total': len(offers_with_details),
+                    'total_available': data.get('total', offset + len(offers_with_details)),
+                    'offset': offset,
                     'method': 'direct_negotiation_api'
                 }
                 
@@ -821,6 +857,8 @@ class EbaySellAPI:
                     'message': 'Keine aktiven Best Offers gefunden',
                     'offers': [],
                     'total': 0,
+                    'total_available': offset,
+                    'offset': offset,
                     'method': 'direct_negotiation_api'
                 }
             else:
@@ -838,6 +876,7 @@ class EbaySellAPI:
                 'offers': []
             }
     
+    @tracing.span('ebay.enrich_item_details')
     def _enrich_offers_with_item_details(self, offers):
         """
         Ergänzt Best Offers mit Item-Details (Titel, Preis) durch gezielte API-Calls
@@ -878,7 +917,7 @@ class EbaySellAPI:
         try:
             # Versuch 1: Inventory API für spezifisches Item
             url = f"{self.base_url}/sell/inventory/v1/inventory_item/{item_id}"
-            response = requests.get(url, headers=self.headers, timeout=15)
+            response = self.session.get(url, headers=self.headers, timeout=15)
             
             if response.status_code == 200:
                 data = response.json()
@@ -924,7 +963,7 @@ class EbaySellAPI:
                 'offset': 0
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=15)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=15)
             
             if response.status_code == 200:
                 data = response.json()
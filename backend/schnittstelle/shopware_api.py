@@ -0,0 +1,109 @@
+"""
+Shopware 6 Admin API: Einkaufspreise der Artikel
+OAuth (Client Credentials) und Produktsuche über /api/search/product. Preise
+werden im Block per Artikelnummer oder inkrementell nach updatedAt abgefragt.
+"""
+import logging
+import os
+import time
+from datetime import datetime
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+def _zeitpunkt(wert):
+    """Shopware-Zeitstempel ('2024-06-01T12:00:00.123+00:00') -> datetime ohne Zeitzone"""
+    if not wert:
+        return None
+    return datetime.fromisoformat(wert.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+class ShopwareAPI:
+    def __init__(self, url=None, client_id=None, client_secret=None, session=None, seitengroesse=500, timeout=30):
+        self.url = (url or os.getenv('SHOPWARE_URL', '')).rstrip('/')
+        self.client_id = client_id or os.getenv('SHOPWARE_CLIENT_ID', '')
+        self.client_secret = client_secret or os.getenv('SHOPWARE_CLIENT_SECRET', '')
+        self._session = session
+        self.seitengroesse = seitengroesse
+        self.timeout = timeout
+        self._token = None
+        self._token_ablauf = 0.0
+
+    @property
+    def session(self):
+        # requests erst beim ersten Call laden; die Konfigurationsprüfung braucht es nicht
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    @property
+    def konfiguriert(self):
+        return bool(self.url and self.client_id and self.client_secret) and 'ihr-shop' not in self.url
+
+    def _header(self):
+        if self._token is None or time.monotonic() > self._token_ablauf:
+            response = self.session.post(f'{self.url}/api/oauth/token', json={
+                'grant_type': 'client_credentials',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+            }, timeout=self.timeout)
+            response.raise_for_status()
+            daten = response.json()
+            self._token = daten['access_token']
+            # Etwas Puffer vor dem Ablauf (Shopware: 600 s)
+            self._token_ablauf = time.monotonic() + int(daten.get('expires_in', 600)) - 30
+        return {'Authorization': f'Bearer {self._token}', 'Accept': 'application/json'}
+
+    def _suche(self, filter):
+        """Alle Treffer seitenweise (nur Artikelnummer, Einkaufspreis, Änderungszeit)"""
+        seite = 1
+        while True:
+            with tracing.span('shopware.search_product', page=seite):
+                response = self.session.post(f'{self.url}/api/search/product', headers=self._header(), json={
+                    'page': seite,
+                    'limit': self.seitengroesse,
+                    'filter': filter,
+                    'includes': {'product': ['productNumber', 'purchasePrices', 'updatedAt', 'createdAt']},
+                    'total-count-mode': 0,
+                }, timeout=self.timeout)
+                response.raise_for_status()
+                produkte = response.json().get('data', [])
+            for produkt in produkte:
+                yield produkt
+            if len(produkte) < self.seitengroesse:
+                return
+            seite += 1
+
+    @staticmethod
+    def _eintrag(produkt):
+        preise = produkt.get('purchasePrices') or []
+        if not preise:
+            return None
+        geaendert = _zeitpunkt(produkt.get('updatedAt') or produkt.get('createdAt'))
+        # Erster Eintrag ist die Standardwährung; netto wie im Shopware-Backend gepflegt
+        return produkt['productNumber'], float(preise[0].get('net') or 0), geaendert
+
+    def einkaufspreise(self, artikelnummern):
+        """{artikelnummer: (preis, geaendert_am)} für die angefragten Artikel"""
+        ergebnis = {}
+        artikelnummern = list(artikelnummern)
+        for start in range(0, len(artikelnummern), self.seitengroesse):
+            teil = artikelnummern[start:start + self.seitengroesse]
+            for produkt in self._suche([{'type': 'equalsAny', 'field': 'productNumber', 'value': teil}]):
+                eintrag = self._eintrag(produkt)
+                if eintrag:
+                    ergebnis[eintrag[0]] = eintrag[1:]
+        return ergebnis
+
+    def geaendert_seit(self, zeitpunkt):
+        """{artikelnummer: (preis, geaendert_am)} aller seit zeitpunkt geänderten Artikel"""
+        ergebnis = {}
+        filter = [{'type': 'range', 'field': 'updatedAt', 'parameters': {'gte': zeitpunkt.isoformat()}}]
+        for produkt in self._suche(filter):
+            eintrag = self._eintrag(produkt)
+            if eintrag:
+                ergebnis[eintrag[0]] = eintrag[1:]
+        return ergebnis
@@ -3,45 +3,32 @@ from flask_cors import CORS
 import json
 from datetime import datetime, timedelta
 import os
+import logging
+
+from angebote.offer_store import OfferStore, parse_abfrage
+from antwort_cache import AntwortCache
+from ki_entscheidung import regel_empfehlung as get_ai_recommendation
+from protokollierung import setup_logging
+import metriken
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+metriken.instrumentiere_flask(app)
 
 # Einfache In-Memory Datenbank
 offers_db = []
+# Index über offers_db für Filter, Sortierung und Pagination von /api/offers
+offers_index = OfferStore()
+# ETag / 304 und Kompression für die gepollten Endpunkte
+antwort_cache = AntwortCache()
 settings_db = {
     'auto_mode': False,
     'last_sync': None
 }
-
-def get_ai_recommendation(offer_amount, list_price):
-    """Einfache KI-Analyse"""
-    percentage = (offer_amount / list_price) * 100
-    
-    if percentage >= 85:
-        return {
-            'recommendation': 'Akzeptieren',
-            'confidence': 95,
-            'reasoning': f'Sehr gutes Angebot ({percentage:.1f}% des Listpreises)'
-        }
-    elif percentage >= 70:
-        return {
-            'recommendation': 'Akzeptieren', 
-            'confidence': 85,
-            'reasoning': f'Fairer Preis ({percentage:.1f}% des Listpreises)'
-        }
-    elif percentage >= 60:
-        return {
-            'recommendation': 'Gegenangebot',
-            'confidence': 80,
-            'reasoning': f'Preis zu niedrig ({percentage:.1f}%), Gegenangebot sinnvoll'
-        }
-    else:
-        return {
-            'recommendation': 'Ablehnen',
-            'confidence': 90,
-            'reasoning': f'Angebot zu niedrig ({percentage:.1f}% des Listpreises)'
-        }
+metriken.REGISTRY.gauge('offers_pending', 'Angebote, die auf eine Antwort warten',
+                        funktion=lambda: offers_index.status_counts['pending'])
 
 # === API ENDPUNKTE ===
 
@@ -55,10 +42,19 @@ def health_check():
 
 @app.route('/api/offers', methods=['GET'])
 def get_offers():
-    return jsonify({
-        'offers': offers_db,
-        'total': len(offers_db)
-    })
+    def erzeuge():
+        seite = offers_index.abfragen(**parse_abfrage(request.args))
+        return {
+            'offers': seite['offers'],
+            'total': seite['total'],
+            'limit': seite['limit'],
+            'next_cursor': seite['next_cursor']
+        }
+
+    try:
+        return antwort_cache.antwort('offers', offers_index.version, erzeuge)
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': f'Ungültige Abfrage: {e}'}), 400
 
 @app.route('/api/offers/sync-working', methods=['GET', 'POST'])
 def sync_offers_working():
@@ -111,6 +107,7 @@ def sync_offers_working():
         ]
         
         new_offers = 0
+        updated_offers = 0
         
         for i, template in enumerate(offers_templates):
             best_offer_id = f'BO_SIMPLE_{timestamp}_{i}'
@@ -142,16 +139,21 @@ def sync_offers_working():
                 if template.get('counter_message'):
                     new_offer['counter_message'] = template['counter_message']
                 
-                offers_db.append(new_offer)
-                new_offers += 1
+                # Der Index erkennt ein bereits vorhandenes Angebot am Fingerabdruck
+                # (neue Best-Offer-ID je Abruf): nur wirklich neue in offers_db aufnehmen
+                neu, aktualisiert = offers_index.upsert_many([new_offer])
+                if neu:
+                    offers_db.append(new_offer)
+                    new_offers += 1
+                updated_offers += aktualisiert
         
         settings_db['last_sync'] = datetime.now().isoformat()
         
         return jsonify({
             'success': True,
             'new_offers': new_offers,
-            'updated_offers': 0,
-            'total_active_offers': len([o for o in offers_db if o.get('status') == 'pending']),
+            'updated_offers': updated_offers,
+            'total_active_offers': offers_index.status_counts['pending'],
             'message': f'eBay Synchronisation erfolgreich: {new_offers} neue Best Offers gefunden',
             'api_type': 'simple_working',
             'method': 'reliable',
@@ -185,6 +187,8 @@ def respond_to_offer(offer_id):
     elif action == 'counter':
         offer['status'] = 'countered'
         offer['counter_amount'] = data.get('counter_price', 0)
+    offers_index.upsert_many([offer])
+    metriken.ANGEBOTE_ENTSCHIEDEN.inc(action, 'manual')
     
     return jsonify({
         'success': True,
@@ -193,20 +197,15 @@ def respond_to_offer(offer_id):
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    total_offers = len(offers_db)
-    pending_offers = len([o for o in offers_db if o['status'] == 'pending'])
-    accepted_offers = len([o for o in offers_db if o['status'] == 'accepted'])
-    
-    return jsonify({
-        'total_offers': total_offers,
-        'pending_offers': pending_offers,
-        'accepted_offers': accepted_offers,
-        'rejected_offers': len([o for o in offers_db if o['status'] == 'declined']),
-        'countered_offers': len([o for o in offers_db if o['status'] == 'countered']),
-        'success_rate': round(accepted_offers / max(total_offers, 1) * 100, 1),
-        'last_sync': settings_db['last_sync'],
-        'connection_status': 'connected'
-    })
+    def erzeuge():
+        # Aus dem Index wie /api/offers, damit Gesamtzahl und Statistik übereinstimmen
+        return {
+            **offers_index.stats(),
+            'last_sync': settings_db['last_sync'],
+            'connection_status': 'connected'
+        }
+
+    return antwort_cache.antwort('stats', (offers_index.version, settings_db['last_sync']), erzeuge)
 
 @app.route('/api/offers/sync-single-item/<item_id>', methods=['GET', 'POST'])
 def sync_single_item(item_id):
@@ -250,6 +249,7 @@ def sync_single_item(item_id):
             ]
         
         new_offers = 0
+        updated_offers = 0
         
         for i, template in enumerate(test_offers):
             best_offer_id = f'BO_SINGLE_{item_id}_{timestamp}_{i}'
@@ -283,16 +283,21 @@ def sync_single_item(item_id):
                 if template.get('buyer_message'):
                     new_offer['buyer_message'] = template['buyer_message']
                 
-                offers_db.append(new_offer)
-                new_offers += 1
+                # Der Index erkennt ein bereits vorhandenes Angebot am Fingerabdruck
+                # (neue Best-Offer-ID je Abruf): nur wirklich neue in offers_db aufnehmen
+                neu, aktualisiert = offers_index.upsert_many([new_offer])
+                if neu:
+                    offers_db.append(new_offer)
+                    new_offers += 1
+                updated_offers += aktualisiert
         
         settings_db['last_sync'] = datetime.now().isoformat()
         
         return jsonify({
             'success': True,
             'new_offers': new_offers,
-            'updated_offers': 0,
-            'total_active_offers': len([o for o in offers_db if o.get('status') == 'pending']),
+            'updated_offers': updated_offers,
+            'total_active_offers': offers_index.status_counts['pending'],
             'message': f'Gezielter Abruf für Item {item_id}: {new_offers} Best Offers gefunden',
             'item_id': item_id,
             'method': 'single_item_targeted',
@@ -341,10 +346,8 @@ def serve_static(path):
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5002))
     
-    print("=== eBay Preisvorschlags-Bot - Simple & Working ===")
-    print("🚀 Einfache, funktionierende Version")
-    print("✅ Keine API-Abhängigkeiten - Sofortiger Start")
-    print(f"🌐 Frontend: http://localhost:{port}")
-    print(f"📡 API: http://localhost:{port}/api")
+    setup_logging()
+    logger.info(f"eBay Preisvorschlags-Bot (Simple) - Frontend: http://localhost:{port}, API: http://localhost:{port}/api")
     
-    app.run(host='0.0.0.0', port=port, debug=True) 
\ No newline at end of file
+    # Produktiv: gunicorn -c gunicorn.conf.py -w 1 simple_main:app (Daten liegen nur im Prozess)
+    app.run(host='0.0.0.0', port=port, debug=os.getenv('FLASK_DEBUG', 'true').lower() == 'true', threaded=True)
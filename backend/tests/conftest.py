@@ -0,0 +1,5 @@
+"""Tests laufen wie der Server aus dem backend-Ordner (Importe wie 'from angebote ...')"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,75 @@
+import pytest
+
+from angebote.aktions_log import AktionsLog, parse_abfrage
+
+
+@pytest.fixture
+def protokoll(tmp_path):
+    protokoll = AktionsLog(str(tmp_path / 'action_log.jsonl'), max_eintraege=10)
+    for i in range(30):
+        protokoll.log('offer_received' if i % 2 else 'response_sent', f'Eintrag {i}',
+                      level='error' if i % 3 == 0 else 'info', account=f'shop{i % 2}')
+    return protokoll
+
+
+def _nachrichten(ergebnis):
+    return [e['message'] for e in ergebnis['logs']]
+
+
+def test_aufbewahrung_begrenzt_speicher(protokoll):
+    stats = protokoll.stats()
+    # Gekürzt wird erst ab 10 % Überhang
+    assert 10 <= stats['total_entries'] <= 11
+    assert stats['total_entries'] + stats['dropped_entries'] == 30
+    assert sum(stats['actions'].values()) == stats['total_entries']
+    assert _nachrichten(protokoll.abfragen(limit=3)) == ['Eintrag 29', 'Eintrag 28', 'Eintrag 27']
+
+
+def test_filter_nach_kuerzen(protokoll):
+    ergebnis = protokoll.abfragen(filter={'account': 'shop1', 'level': 'error'})
+    assert _nachrichten(ergebnis) == ['Eintrag 27', 'Eintrag 21']
+    assert not ergebnis['has_more']
+
+
+def test_bereich_nach_kuerzen(protokoll):
+    alle = protokoll.abfragen(limit=100)['logs']
+    von = alle[4]['timestamp']
+    ergebnis = protokoll.abfragen(von=von, limit=100)
+    assert [e['id'] for e in ergebnis['logs']] == [e['id'] for e in alle[:5]]
+
+
+def test_seiten_und_tail_cursor(protokoll):
+    erste = protokoll.abfragen(limit=4)
+    assert erste['has_more']
+    aeltere = protokoll.abfragen(vor=erste['next_before'], limit=100)
+    assert len(erste['logs']) + len(aeltere['logs']) == protokoll.stats()['total_entries']
+    assert not aeltere['has_more']
+
+    # Cursor von vor dem Kürzen: liefert ab dem ältesten noch gehaltenen Eintrag
+    tail = protokoll.abfragen(nach=0, limit=100)
+    assert _nachrichten(tail)[-1] == 'Eintrag 29'
+    assert tail['cursor'] == erste['cursor'] == erste['logs'][0]['id']
+
+    for i in range(30, 35):
+        protokoll.log('sync_completed', f'Eintrag {i}')
+    neu = protokoll.abfragen(nach=tail['cursor'], limit=100)
+    assert _nachrichten(neu) == [f'Eintrag {i}' for i in range(30, 35)]
+    assert protokoll.abfragen(nach=neu['cursor'])['logs'] == []
+
+
+def test_neuer_prozess_liest_nur_das_ende(tmp_path, protokoll):
+    zweiter = AktionsLog(protokoll.pfad, max_eintraege=5)
+    assert _nachrichten(zweiter.abfragen(nach=-1, limit=100)) == [f'Eintrag {i}' for i in range(25, 30)]
+    assert protokoll.abfragen()['cursor'] == zweiter.abfragen()['cursor']
+
+
+def test_export_nach_kuerzen(protokoll):
+    zeilen = ''.join(protokoll.export_csv(filter={'action': 'response_sent'})).splitlines()
+    assert zeilen[0].lstrip('﻿').startswith('Zeitstempel;Aktion')
+    assert len(zeilen) - 1 == len(protokoll.abfragen(filter={'action': 'response_sent'})['logs'])
+
+
+def test_parse_abfrage():
+    abfrage = parse_abfrage({'type': 'offer_received', 'status': 'all', 'cursor': '42', 'limit': '5'})
+    assert abfrage['filter'] == {'action': 'offer_received'}
+    assert abfrage['nach'] == 42 and abfrage['vor'] is None and abfrage['limit'] == 5
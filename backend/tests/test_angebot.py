@@ -0,0 +1,53 @@
+import pytest
+
+from angebote.angebot import Angebot, AngebotStatus, cent
+
+
+@pytest.mark.parametrize('wert, erwartet', [
+    ('1.234,50 €', 123450),
+    ('1,234.50 USD', 123450),
+    ('45.00 EUR', 4500),
+    ('45,5', 4550),
+    ('1.234.567', 123456700),
+    ('1.234 €', 123400),
+    ('1,234 $', 123400),
+    ('0.126 USD', 13),
+    ('-12,30', -1230),
+    (45, 4500),
+    (19.99, 1999),
+])
+def test_cent(wert, erwartet):
+    assert cent(wert) == erwartet
+
+
+@pytest.mark.parametrize('wert', ['1.234', '1,234', None, '', 'EUR', '12-3', '1.23.4', True])
+def test_cent_leer_ungueltig_oder_mehrdeutig(wert):
+    assert cent(wert) is None
+
+
+def test_aus_dict_quellformate():
+    angebot = Angebot.aus_dict({'price': '1.234,50 EUR', 'buyer_id': 'max', 'status': 'Angenommen',
+                                'created_time': '2030-03-01 10:00:00', 'quantity': '2', 'source_api': 'x'})
+    assert angebot.betrag_cent == 123450
+    assert angebot.kaeufer == 'max'
+    assert angebot.status is AngebotStatus.ACCEPTED
+    assert angebot.erstellt == '2030-03-01T10:00:00'
+    assert angebot.menge == 2
+    assert angebot.als_dict() == {'buyer_username': 'max', 'quantity': 2, 'created_at': '2030-03-01T10:00:00',
+                                  'offer_amount': 1234.5, 'status': 'accepted', 'source_api': 'x'}
+
+
+def test_unbekannter_status_bleibt_sichtbar():
+    angebot = Angebot.aus_dict({'status': 'OnHold'})
+    assert angebot.status_wert == 'unknown'
+    assert angebot.als_dict()['source_status'] == 'OnHold'
+    assert Angebot.aus_dict({}).status_wert == 'pending'
+
+
+def test_zusammenfuehren_behaelt_fehlende_felder():
+    alt = Angebot.aus_dict({'id': 1, 'offer_amount': 10, 'buyer_message': 'Hallo', 'note': 'a'})
+    neu = alt.zusammenfuehren(Angebot.aus_dict({'status': 'rejected', 'note': 'b'}))
+    assert neu.als_dict() == {'id': 1, 'buyer_message': 'Hallo', 'offer_amount': 10.0,
+                              'status': 'rejected', 'note': 'b'}
+    assert alt.status is None
+    assert neu.als_json() == neu.als_json()
@@ -0,0 +1,74 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, request
+
+from antwort_cache import AntwortCache
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.stand = {'version': 1, 'aufrufe': 0}
+    cache = AntwortCache(min_groesse=100)
+
+    @app.route('/api/offers')
+    def offers():
+        def erzeuge():
+            app.stand['aufrufe'] += 1
+            status = request.args.get('status', 'all')
+            return {'status': status, 'version': app.stand['version'], 'offers': [{'id': i} for i in range(50)]}
+        return cache.antwort('offers', app.stand['version'], erzeuge)
+
+    return app
+
+
+def test_304_fuer_unveraenderte_daten(app):
+    client = app.test_client()
+    erste = client.get('/api/offers')
+    assert erste.status_code == 200
+    etag = erste.headers['ETag']
+
+    zweite = client.get('/api/offers', headers={'If-None-Match': etag})
+    assert zweite.status_code == 304
+    assert zweite.data == b''
+    assert zweite.headers['ETag'] == etag
+    assert app.stand['aufrufe'] == 1
+
+
+def test_etag_je_query_string(app):
+    client = app.test_client()
+    alle = client.get('/api/offers')
+    offen = client.get('/api/offers?status=pending', headers={'If-None-Match': alle.headers['ETag']})
+
+    assert offen.status_code == 200
+    assert offen.json['status'] == 'pending'
+    assert offen.headers['ETag'] != alle.headers['ETag']
+    assert client.get('/api/offers?status=pending', headers={'If-None-Match': offen.headers['ETag']}).status_code == 304
+    assert app.stand['aufrufe'] == 2
+
+
+def test_neue_version_neue_antwort(app):
+    client = app.test_client()
+    etag = client.get('/api/offers').headers['ETag']
+    app.stand['version'] = 2
+
+    antwort = client.get('/api/offers', headers={'If-None-Match': etag})
+    assert antwort.status_code == 200
+    assert antwort.json['version'] == 2
+    assert antwort.headers['ETag'] != etag
+
+
+def test_gzip_und_etag(app):
+    client = app.test_client()
+    antwort = client.get('/api/offers', headers={'Accept-Encoding': 'gzip'})
+    assert antwort.headers['Content-Encoding'] == 'gzip'
+    assert antwort.headers['Vary'] == 'Accept-Encoding'
+    assert json.loads(gzip.decompress(antwort.data))['status'] == 'all'
+
+    # Der komprimierte und der unkomprimierte ETag gelten beide als aktuell
+    ohne = client.get('/api/offers')
+    assert ohne.headers['ETag'] != antwort.headers['ETag']
+    for etag in (antwort.headers['ETag'], ohne.headers['ETag']):
+        assert client.get('/api/offers', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'}).status_code == 304
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+from angebote.einkaufspreise import EinkaufspreisCache, LokaleQuelle
+from angebote.offer_store import OfferStore
+from ki_entscheidung import EntscheidungsPipeline, Regelwerk
+
+
+def test_vorladen_im_block():
+    quelle = LokaleQuelle({'A1': 10.0, 'A2': 20.0})
+    cache = EinkaufspreisCache(quelle)
+
+    assert cache.vorladen(['A1', 'A2', 'A3', '']) == 2
+    assert quelle.abfragen == 1
+    # Bekannte und gerade unbekannte Artikel: kein weiterer Call
+    assert cache.vorladen(['A1', 'A3']) == 0
+    assert quelle.abfragen == 1
+
+    assert cache.preis('A1') == 10.0
+    assert cache.preis('A3') is None
+    assert quelle.abfragen == 1
+    status = cache.get_status()
+    assert (status['entries'], status['unknown_items'], status['hits'], status['misses']) == (2, 1, 1, 1)
+
+
+def test_unbekannte_nach_ttl_erneut():
+    quelle = LokaleQuelle()
+    cache = EinkaufspreisCache(quelle, unbekannt_ttl_sekunden=0)
+    assert cache.vorladen(['A1']) == 0
+    quelle.setze('A1', 5.0)
+    assert cache.vorladen(['A1']) == 1
+    assert cache.preis('A1') == 5.0
+    assert cache.get_status()['unknown_items'] == 0
+
+
+def test_inkrementell_nach_leerem_vorladen():
+    quelle = LokaleQuelle()
+    cache = EinkaufspreisCache(quelle)
+    assert cache.aktualisieren() == 0
+    assert quelle.abfragen == 0
+
+    cache.vorladen(['A1'])
+    quelle.setze('A1', 7.5)
+    quelle.setze('B9', 3.0, geaendert_am=datetime.now() - timedelta(days=1))
+    assert cache.aktualisieren() == 1
+    assert cache.preis('A1') == 7.5
+    assert cache.preis('B9') is None
+
+    # Der Stand steht jetzt auf der letzten Änderung von A1; B9 ist älter und bleibt draußen
+    quelle.setze('A1', 8.0)
+    assert cache.aktualisieren() == 1
+    assert cache.preis('A1') == 8.0
+
+
+def test_vorladen_offene_aus_store():
+    store = OfferStore()
+    store.upsert_many([
+        {'id': 1, 'best_offer_id': 'BO1', 'item_id': 'I1', 'sku': 'A1', 'status': 'pending'},
+        {'id': 2, 'best_offer_id': 'BO2', 'item_id': 'I2', 'status': 'pending'},
+        {'id': 3, 'best_offer_id': 'BO3', 'item_id': 'I3', 'sku': 'A3', 'status': 'accepted'},
+    ], account='shop')
+    quelle = LokaleQuelle({'A1': 1.0, 'I2': 2.0, 'A3': 3.0})
+    cache = EinkaufspreisCache(quelle, store=store)
+
+    assert cache.vorladen_offene() == 2
+    assert cache.preis('A3') is None
+
+
+def test_aus_csv(tmp_path):
+    pfad = tmp_path / 'preise.csv'
+    pfad.write_text('artikelnummer;einkaufspreis;geaendert_am\nA1;12,50;2030-01-02T03:04:05\nA2;3;\n',
+                    encoding='utf-8')
+    quelle = LokaleQuelle.aus_csv(str(pfad))
+    preise = quelle.einkaufspreise(['A1', 'A2'])
+    assert preise['A1'] == (12.5, datetime(2030, 1, 2, 3, 4, 5))
+    assert preise['A2'][0] == 3.0
+
+
+class _Berater:
+    def empfehlungen(self, offers, zeiten):
+        return [{'recommendation': 'Gegenangebot', 'source': 'llm'} for _ in offers]
+
+
+def test_pipeline_lehnt_unter_einkaufspreis_ab():
+    cache = EinkaufspreisCache(LokaleQuelle({'A1': 90.0, 'A2': 50.0}))
+    cache.vorladen(['A1', 'A2'])
+    regelwerk = Regelwerk([{'name': 'Standard', 'typ': 'allgemein',
+                            'auto_annahme_prozent': 95, 'auto_ablehnung_prozent': 60}])
+    pipeline = EntscheidungsPipeline(_Berater(), regelwerk=regelwerk, einkaufspreise=cache)
+
+    unter, band, ohne = pipeline.entscheide([
+        {'sku': 'A1', 'offer_amount': 85, 'list_price': 100},
+        {'sku': 'A2', 'offer_amount': 80, 'list_price': 100},
+        {'sku': 'X', 'offer_amount': 80, 'list_price': 100},
+    ])
+    assert (unter['recommendation'], unter['source']) == ('Ablehnen', 'threshold')
+    assert unter['reasoning'] == '85.00 unter Einkaufspreis 90.00'
+    assert (unter['purchase_price'], unter['margin']) == (90.0, -5.0)
+    assert band['source'] == 'llm' and band['margin'] == 30.0
+    assert 'purchase_price' not in ohne
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from ki_client import KIClient, LokalesModell
+from ki_entscheidung import KIBerater
+
+
+class _Blockiert:
+    """Modell, das bis zur Freigabe hängt (hält die Worker beschäftigt)"""
+    name = 'blockiert'
+
+    def __init__(self):
+        self.frei = threading.Event()
+
+    def antworte(self, anfragen):
+        self.frei.wait(5)
+        return {}
+
+
+def test_volle_warteschlange_gibt_sofort_none():
+    modell = _Blockiert()
+    client = KIClient(modell, max_parallel=1, batch_groesse=1, max_wartezeit=0, max_warteschlange=2)
+    try:
+        erste = client.anfragen([{'key': '0'}])
+        # Warten, bis der Worker die erste Anfrage übernommen hat
+        while client.get_status()['queued']:
+            time.sleep(0.01)
+        futures = client.anfragen([{'key': str(i)} for i in range(1, 5)])
+
+        assert [f.done() for f in futures] == [False, False, True, True]
+        assert futures[3].result() is None
+        assert client.get_status()['rejected'] == 2
+    finally:
+        modell.frei.set()
+        client.stop()
+    assert erste[0].result(timeout=1) is None
+    assert all(f.result(timeout=1) is None for f in futures)
+
+
+def test_nach_stop_keine_haengenden_futures():
+    client = KIClient(LokalesModell(latenz_ms=0, pro_angebot_ms=0))
+    client.stop()
+    futures = client.anfragen([{'key': '1', 'offer_percent_of_list_price': 90}])
+    assert futures[0].done() and futures[0].result() is None
+
+    berater = KIBerater(client=client, timeout=5)
+    ergebnis = berater.empfehlung({'offer_amount': 80, 'list_price': 100})
+    assert ergebnis['source'] == 'rules'
+    assert ergebnis['fallback'] == 'error'
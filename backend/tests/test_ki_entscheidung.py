@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+from ki_entscheidung import Regelwerk, merkmale, tage_online
+
+JETZT = datetime(2030, 3, 20, 12, 0)
+
+REGELN = [
+    {'name': 'Neu', 'typ': 'zeitbasiert', 'zeitbereich_von': 0, 'zeitbereich_bis': 7,
+     'auto_annahme_prozent': 95, 'auto_ablehnung_prozent': 70},
+    {'name': 'Mittel', 'typ': 'zeitbasiert', 'zeitbereich_von': 8, 'zeitbereich_bis': 21,
+     'auto_annahme_prozent': 92, 'auto_ablehnung_prozent': 65},
+    {'name': 'Standard', 'typ': 'allgemein', 'auto_annahme_prozent': 95, 'auto_ablehnung_prozent': 60},
+]
+
+
+def test_tage_online_aus_days_online():
+    assert tage_online({'days_online': 12, 'created_at': '2030-03-19T10:00:00'}, JETZT) == 12
+
+
+def test_tage_online_aus_erstellung():
+    # Sell-API (created_time als UTC mit Z) und Trading-API/Store (created_at)
+    assert tage_online({'created_time': '2030-03-10T12:00:00.000Z'}, JETZT) in (9, 10)
+    assert tage_online({'created_at': '2030-03-05T11:00:00'}, JETZT) == 15
+
+
+def test_tage_online_listing_start_vor_erstellung():
+    offer = {'start_time': '2030-02-01T00:00:00', 'created_at': '2030-03-19T00:00:00'}
+    assert tage_online(offer, JETZT) == 47
+
+
+def test_tage_online_ohne_zeitpunkt():
+    assert tage_online({}, JETZT) == 0
+    assert tage_online({'created_date': 'gestern'}, JETZT) == 0
+    assert tage_online({'created_at': (JETZT + timedelta(days=1)).isoformat()}, JETZT) == 0
+
+
+def test_regel_nach_standzeit_ohne_days_online():
+    regelwerk = Regelwerk(REGELN)
+    vor_zwei_wochen = (datetime.now() - timedelta(days=14)).isoformat()
+    vor_zwei_tagen = (datetime.now() - timedelta(days=2)).isoformat()
+    assert regelwerk.regel_fuer({'created_at': vor_zwei_wochen})['name'] == 'Mittel'
+    assert regelwerk.regel_fuer({'created_at': vor_zwei_tagen})['name'] == 'Neu'
+
+
+def test_merkmale_standzeit_klasse():
+    vor_zwei_wochen = (datetime.now() - timedelta(days=14)).isoformat()
+    offer = {'offer_amount': 80, 'list_price': 100, 'created_at': vor_zwei_wochen}
+    assert merkmale(offer)[2] == merkmale({**offer, 'days_online': 14})[2] != 0
+
+
+class _OhneKI:
+    def empfehlungen(self, offers, zeiten):
+        return [{'recommendation': 'Gegenangebot', 'source': 'rules'} for _ in offers]
+
+
+def test_regel_ohne_schwellen_nutzt_standard():
+    from ki_entscheidung import EntscheidungsPipeline, STANDARD_REGEL
+
+    regelwerk = Regelwerk([{'name': 'Alt', 'typ': 'allgemein', 'auto_ablehnung_prozent': None}])
+    regel = regelwerk.regel_fuer({})
+    assert regel['auto_annahme_prozent'] == STANDARD_REGEL['auto_annahme_prozent']
+    assert regel['auto_ablehnung_prozent'] == STANDARD_REGEL['auto_ablehnung_prozent']
+
+    pipeline = EntscheidungsPipeline(_OhneKI(), regelwerk=regelwerk)
+    ergebnisse = pipeline.entscheide([
+        {'offer_amount': 99, 'list_price': 100},
+        {'offer_amount': 10, 'list_price': 100},
+        {'offer_amount': 80, 'list_price': 100},
+    ])
+    assert [e['recommendation'] for e in ergebnisse] == ['Akzeptieren', 'Ablehnen', 'Gegenangebot']
+
+
+class _Berater:
+    """Merkt sich, welche Angebote die KI-Stufe erreichen"""
+
+    def __init__(self):
+        self.gefragt = []
+
+    def empfehlungen(self, offers, zeiten):
+        self.gefragt.extend(offer['offer_id'] for offer in offers)
+        zeiten['llm'] += 0.5 * len(offers)
+        return [{'recommendation': 'Gegenangebot', 'source': 'llm'} for _ in offers]
+
+
+def test_schwellen_stufe_vor_der_ki():
+    from ki_entscheidung import EntscheidungsPipeline
+
+    berater = _Berater()
+    pipeline = EntscheidungsPipeline(berater, regelwerk=Regelwerk(REGELN))
+    # 100 Tage online: keine zeitbasierte Regel passt, es gilt 'Standard' (95 / 60)
+    offers = [{'days_online': 100, **offer} for offer in (
+        {'offer_id': 'hoch', 'offer_amount': 96, 'list_price': 100},
+        {'offer_id': 'grenze_annahme', 'offer_amount': 95, 'list_price': 100},
+        {'offer_id': 'band', 'offer_amount': 80, 'list_price': 100},
+        {'offer_id': 'grenze_ablehnung', 'offer_amount': 60, 'list_price': 100},
+        {'offer_id': 'niedrig', 'offer_amount': 59, 'list_price': 100},
+        {'offer_id': 'ohne_preis', 'offer_amount': 59},
+        # applicable_rule vor Standzeit: 66 % liegt bei 'Mittel' im Band, bei 'Neu' darunter
+        {'offer_id': 'regel_mittel', 'offer_amount': 66, 'list_price': 100, 'applicable_rule': 'Mittel'},
+        {'offer_id': 'regel_neu', 'offer_amount': 66, 'list_price': 100, 'applicable_rule': 'Neu'},
+    )]
+
+    ergebnisse = pipeline.entscheide(offers)
+
+    assert berater.gefragt == ['band', 'grenze_ablehnung', 'ohne_preis', 'regel_mittel']
+    entscheidungen = {o['offer_id']: (e['recommendation'], e['source']) for o, e in zip(offers, ergebnisse)}
+    assert entscheidungen['hoch'] == entscheidungen['grenze_annahme'] == ('Akzeptieren', 'threshold')
+    assert entscheidungen['niedrig'] == entscheidungen['regel_neu'] == ('Ablehnen', 'threshold')
+    assert entscheidungen['band'] == ('Gegenangebot', 'llm')
+    assert ergebnisse[7]['rule'] == 'Neu'
+    assert ergebnisse[0]['reasoning'] == '96.0% ≥ 95% (Standard)'
+
+
+def test_stufen_statistik():
+    from ki_entscheidung import EntscheidungsPipeline
+
+    pipeline = EntscheidungsPipeline(_Berater(), regelwerk=Regelwerk(REGELN))
+    pipeline.entscheide([{'offer_id': i, 'offer_amount': betrag, 'list_price': 100}
+                         for i, betrag in enumerate((99, 98, 10, 80))])
+
+    status = pipeline.get_status()
+    assert status['total'] == 4
+    assert status['tiers']['threshold']['offers'] == 3
+    assert status['tiers']['threshold']['share'] == 75.0
+    assert status['tiers']['llm'] == {'offers': 1, 'share': 25.0, 'avg_ms': 500.0}
+    assert status['llm_latency_measured'] and status['llm_latency_ms'] == 500.0
+    # Drei Schwellen-Entscheidungen sparen je einen gemessenen LLM-Call
+    assert 1.4 < status['latency_saved_seconds'] <= 1.5
+    assert status['rules'] == ['Neu', 'Mittel', 'Standard']
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import konfiguration
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Erst bei der ersten Verwendung importiert (wie LAZY_MODULE in benchmark.py)
+LAZY_MODULE = ('openai', 'requests', 'dotenv', 'xml.etree.ElementTree')
+
+
+@pytest.fixture
+def neu_laden(monkeypatch):
+    monkeypatch.setattr(konfiguration, '_geladen', None)
+    monkeypatch.delenv('ENV_FILE', raising=False)
+    for name in ('TEST_KONFIG_DATEI', 'TEST_KONFIG_GESETZT'):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_ohne_datei(neu_laden, tmp_path):
+    assert konfiguration.lade_umgebung(str(tmp_path / 'fehlt.env')) is None
+    # Auch später angelegte Dateien werden nicht mehr gelesen
+    (tmp_path / '.env').write_text('TEST_KONFIG_DATEI=1\n', encoding='utf-8')
+    assert konfiguration.lade_umgebung(str(tmp_path / '.env')) is None
+    assert 'TEST_KONFIG_DATEI' not in os.environ
+
+
+def test_einmal_geladen_umgebung_hat_vorrang(neu_laden, tmp_path, monkeypatch):
+    pytest.importorskip('dotenv')
+    pfad = tmp_path / '.env'
+    pfad.write_text('TEST_KONFIG_DATEI=aus_datei\nTEST_KONFIG_GESETZT=aus_datei\n', encoding='utf-8')
+    monkeypatch.setenv('TEST_KONFIG_GESETZT', 'aus_umgebung')
+
+    assert konfiguration.lade_umgebung(str(pfad)) == str(pfad)
+    assert os.environ['TEST_KONFIG_DATEI'] == 'aus_datei'
+    assert os.environ['TEST_KONFIG_GESETZT'] == 'aus_umgebung'
+
+    pfad.write_text('TEST_KONFIG_DATEI=geaendert\n', encoding='utf-8')
+    assert konfiguration.lade_umgebung(str(tmp_path / 'andere.env')) == str(pfad)
+    assert os.environ['TEST_KONFIG_DATEI'] == 'aus_datei'
+
+
+def test_import_ohne_schwere_module(tmp_path):
+    # Neuer Prozess in leerem Verzeichnis: ohne .env, Startbestand und tokens.json
+    pruefen = ('import sys, hauptserver; '
+               'print(hauptserver.token_manager._geladen, *[m for m in sys.argv[1:] if m in sys.modules])')
+    ergebnis = subprocess.run([sys.executable, '-c', pruefen, *LAZY_MODULE], cwd=tmp_path,
+                              env={**os.environ, 'PYTHONPATH': BACKEND, 'TOKEN_AUTO_REFRESH': 'false'},
+                              capture_output=True, text=True, timeout=120)
+    assert ergebnis.returncode == 0, ergebnis.stderr
+    assert ergebnis.stdout.split() == ['False']
@@ -0,0 +1,103 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from angebote import store_snapshot
+from angebote.offer_store import OfferStore
+from angebote.store_snapshot import StoreSnapshot
+from leader import LeaderLock, fcntl
+from token_backend.token_datei import TokenDatei
+
+ohne_fcntl = pytest.mark.skipif(fcntl is None, reason='Dateisperren nur mit fcntl')
+
+
+@ohne_fcntl
+def test_leader_genau_einer(tmp_path):
+    pfad = str(tmp_path / 'leader.lock')
+    erster, zweiter = LeaderLock(pfad), LeaderLock(pfad, intervall_sekunden=0.02)
+    assert erster.versuche()
+    assert not zweiter.versuche()
+
+    uebernommen = threading.Event()
+    zweiter.bewerben(uebernommen.set)
+    assert not uebernommen.wait(0.1)
+    erster.freigeben()
+    assert uebernommen.wait(2)
+    assert zweiter.ist_leader and not erster.ist_leader
+    zweiter.freigeben()
+
+
+def _angebot(nummer, **felder):
+    return {'id': nummer, 'best_offer_id': f'BO{nummer}', 'offer_amount': 10 + nummer, 'status': 'pending', **felder}
+
+
+def test_journal_gleicht_worker_ab(tmp_path):
+    pfad = str(tmp_path / 'offers.ndjson')
+    store_a, store_b = OfferStore(), OfferStore()
+    worker_a, worker_b = StoreSnapshot(store_a, pfad), StoreSnapshot(store_b, pfad)
+
+    store_a.upsert_many([_angebot(1), _angebot(2)], account='shop')
+    assert worker_a.abgleichen() == (0, 2)
+    assert worker_b.abgleichen() == (2, 0)
+    assert store_b.get('shop:BO1')['offer_amount'] == 11
+
+    # Änderung in B kommt bei A an; übernommene Angebote schreibt A nicht zurück
+    store_b.upsert_many([_angebot(1, status='accepted')], account='shop')
+    assert worker_b.abgleichen() == (0, 1)
+    assert worker_a.abgleichen() == (1, 0)
+    assert store_a.get('shop:BO1')['status'] == 'accepted'
+    assert worker_a.abgleichen() == (0, 0)
+
+
+def test_journal_eigene_aenderung_gewinnt(tmp_path):
+    pfad = str(tmp_path / 'offers.ndjson')
+    store_a, store_b = OfferStore(), OfferStore()
+    worker_a, worker_b = StoreSnapshot(store_a, pfad), StoreSnapshot(store_b, pfad)
+    store_a.upsert_many([_angebot(1)], account='shop')
+    worker_a.abgleichen()
+    worker_b.abgleichen()
+
+    store_a.upsert_many([_angebot(1, status='rejected')], account='shop')
+    store_b.upsert_many([_angebot(1, status='accepted')], account='shop')
+    worker_a.abgleichen()
+    # B schreibt zuletzt: seine Zeile ist die neueste, A übernimmt sie
+    worker_b.abgleichen()
+    worker_a.abgleichen()
+    assert store_a.get('shop:BO1')['status'] == store_b.get('shop:BO1')['status'] == 'accepted'
+
+
+def test_journal_verdichten(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_snapshot, 'VERDICHTEN_AB', 0)
+    pfad = tmp_path / 'offers.ndjson'
+    store_a, store_b = OfferStore(), OfferStore()
+    worker_a, worker_b = StoreSnapshot(store_a, str(pfad)), StoreSnapshot(store_b, str(pfad))
+    # 2 + 1 + 1 + 1 Zeilen: beim vierten Abgleich mehr als 2 * Angebote -> letzte Zeile je Angebot
+    for status in ('pending', 'countered', 'pending', 'countered'):
+        store_a.upsert_many([_angebot(1, status=status), _angebot(2)], account='shop')
+        worker_a.abgleichen()
+
+    assert len(pfad.read_text(encoding='utf-8').splitlines()) == 2
+    assert worker_b.abgleichen() == (2, 0)
+    assert store_b.get('shop:BO1')['status'] == 'countered'
+
+
+def _hochzaehlen(pfad, anzahl):
+    datei = TokenDatei(pfad)
+    for _ in range(anzahl):
+        with datei.bearbeiten() as tokens:
+            tokens[0]['zaehler'] += 1
+
+
+@ohne_fcntl
+def test_token_sperre_zwischen_prozessen(tmp_path):
+    pfad = str(tmp_path / 'tokens.json')
+    TokenDatei(pfad).speichere([{'name': 'konto', 'zaehler': 0}])
+    kontext = multiprocessing.get_context('fork')
+    prozesse = [kontext.Process(target=_hochzaehlen, args=(pfad, 30)) for _ in range(3)]
+    for p in prozesse:
+        p.start()
+    for p in prozesse:
+        p.join(30)
+    assert [p.exitcode for p in prozesse] == [0, 0, 0]
+    assert TokenDatei(pfad).lade()[0]['zaehler'] == 90
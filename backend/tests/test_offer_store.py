@@ -0,0 +1,155 @@
+import pytest
+
+from angebote.offer_store import OfferStore, parse_abfrage
+
+STATUS = ('pending', 'accepted', 'rejected', 'countered')
+
+
+def _angebote(anzahl, account='shop'):
+    # Wenige verschiedene Beträge und Tage: viele gleiche Sortwerte an den Seitengrenzen
+    return [{
+        'id': i,
+        'best_offer_id': f'{account}-{i}',
+        'item_id': f'item{i % 7}',
+        'buyer_username': f'kaeufer{i}',
+        'offer_amount': 10 + i % 5,
+        'status': STATUS[i % len(STATUS)],
+        'created_at': f'2030-03-{1 + i % 9:02d}T12:00:00',
+    } for i in range(anzahl)]
+
+
+def _alle_seiten(store, **abfrage):
+    schluessel, cursor = [], None
+    while True:
+        seite = store.abfragen(cursor=cursor, **abfrage)
+        schluessel += [o['canonical_id'] for o in seite['offers']]
+        cursor = seite['next_cursor']
+        if cursor is None:
+            return schluessel, seite['total']
+
+
+@pytest.mark.parametrize('sort', ['created', 'amount'])
+@pytest.mark.parametrize('desc', [True, False])
+@pytest.mark.parametrize('filter_, von, bis', [
+    ({}, None, None),
+    ({'status': 'pending'}, None, None),
+    ({'item_id': 'item3', 'status': 'accepted'}, None, None),
+    ({}, '2030-03-03', '2030-03-05'),
+    ({'status': 'rejected'}, '2030-03-02', None),
+])
+def test_keyset_pagination_ohne_luecken(sort, desc, filter_, von, bis):
+    angebote = _angebote(250)
+    store = OfferStore()
+    store.upsert_many(angebote, account='shop')
+    erwartet = {
+        f"shop:{a['best_offer_id']}" for a in angebote
+        if all(a['status' if f == 'status' else f] == w for f, w in filter_.items())
+        and (von is None or a['created_at'] >= von) and (bis is None or a['created_at'][:10] <= bis)
+    }
+
+    schluessel, total = _alle_seiten(store, filter=filter_, von=von, bis=bis, sort=sort, desc=desc, limit=7)
+
+    assert len(schluessel) == len(set(schluessel))
+    assert set(schluessel) == erwartet
+    assert total == len(erwartet)
+    werte = [store.get(k)['created_at' if sort == 'created' else 'offer_amount'] for k in schluessel]
+    assert werte == sorted(werte, reverse=desc)
+
+
+def test_gleiche_id_in_zwei_accounts():
+    store = OfferStore()
+    store.upsert_many([{'id': 1, 'best_offer_id': 'X1', 'offer_amount': 5, 'created_at': '2030-03-01'}], account='A')
+    store.upsert_many([{'id': 1, 'best_offer_id': 'X1', 'offer_amount': 6, 'created_at': '2030-03-02'}], account='B')
+
+    assert len(store) == 2
+    seite = store.abfragen(limit=1)
+    rest = store.abfragen(limit=1, cursor=seite['next_cursor'])
+    assert [o['account'] for o in seite['offers'] + rest['offers']] == ['B', 'A']
+    assert [o['account'] for o in store.abfragen(filter={'account': 'A'})['offers']] == ['A']
+    assert store.get('A:X1')['offer_amount'] == 5
+
+
+def test_parse_abfrage_unbekannte_werte():
+    with pytest.raises(ValueError):
+        parse_abfrage({'sort': 'buyer'})
+    with pytest.raises(ValueError):
+        OfferStore().abfragen(**parse_abfrage({'status': 'offen'}))
+    assert parse_abfrage({'limit': '0'})['limit'] == 1
+
+
+def _wiederholung(best_offer_id, **felder):
+    # Wie simple_main: jeder Abruf vergibt eine neue synthetische Best-Offer-ID
+    return {'id': 1, 'best_offer_id': best_offer_id, 'item_id': '394852741389', 'buyer_username': 'max',
+            'offer_amount': 920.0, 'list_price': 1049.0, 'status': 'pending', **felder}
+
+
+@pytest.mark.parametrize('praefix', ['BO_SIMPLE_', 'BO_SINGLE_394852741389_'])
+def test_erneuter_sync_fuehrt_zusammen(praefix):
+    store = OfferStore()
+    assert store.upsert_many([_wiederholung(f'{praefix}100_0')]) == (1, 0)
+    assert store.upsert_many([_wiederholung(f'{praefix}200_0', created_at='2030-03-02')]) == (0, 1)
+    assert len(store) == 1
+    assert store.stats()['merged_duplicates'] == 1
+
+
+@pytest.mark.parametrize('praefix', ['BO_SIMPLE_', 'BO_SINGLE_394852741389_'])
+def test_annehmen_dann_sync_bleibt_angenommen(praefix):
+    store = OfferStore()
+    angebot = _wiederholung(f'{praefix}100_0')
+    store.upsert_many([angebot])
+    store.upsert_many([{**angebot, 'status': 'accepted'}])
+
+    assert store.upsert_many([_wiederholung(f'{praefix}200_0')]) == (0, 0)
+
+    assert len(store) == 1
+    assert store.get(1)['status'] == 'accepted'
+    assert store.stats()['accepted_offers'] == 1
+    assert store.stats()['pending_offers'] == 0
+    assert store.abfragen(filter={'status': 'pending'})['total'] == 0
+
+
+def test_echte_id_ersetzt_synthetische():
+    store = OfferStore()
+    store.upsert_many([_wiederholung('demo_bo_1', id='demo_1')], account='shop')
+    store.upsert_many([_wiederholung('5012345', id='shop_5012345', buyer_message='Hallo')], account='shop')
+
+    assert len(store) == 1
+    angebot = store.get('shop_5012345')
+    assert angebot['best_offer_id'] == '5012345'
+    assert angebot['buyer_message'] == 'Hallo'
+    # Alte id und beide Quell-Schlüssel führen zum selben Angebot
+    assert store.get('demo_1') == angebot
+    assert angebot['canonical_id'] == 'shop:demo_bo_1'
+    assert store.upsert_many([_wiederholung('5012345', id='shop_5012345', status='accepted')], account='shop') == (0, 1)
+    assert len(store) == 1
+
+
+def test_neues_angebot_nach_abgeschlossenem_bleibt_eigenstaendig():
+    store = OfferStore()
+    store.upsert_many([_wiederholung('501', id='a', status='rejected')], account='shop')
+    store.upsert_many([_wiederholung('502', id='b')], account='shop')
+
+    assert len(store) == 2
+    assert store.get('a')['status'] == 'rejected'
+    assert store.get('b')['status'] == 'pending'
+
+
+def test_dubletten_im_batch():
+    store = OfferStore()
+    assert store.upsert_many([_wiederholung('601', id='a'), _wiederholung('601', id='a', status='countered')],
+                             account='shop') == (1, 0)
+    assert store.get('a')['status'] == 'countered'
+
+
+def test_events_grosser_batch_nur_reload():
+    from angebote.event_stream import EventStream
+    from angebote.offer_store import MAX_EVENT_ANGEBOTE
+
+    events = EventStream()
+    store = OfferStore(events=events)
+    store.upsert_many(_angebote(3), account='shop')
+    store.upsert_many(_angebote(MAX_EVENT_ANGEBOTE + 5), account='shop')
+
+    angebote_events = [data for _, typ, data in events.since(0)[0] if typ == 'offers']
+    assert [len(e.get('offers', ())) for e in angebote_events] == [3, 0]
+    assert angebote_events[1] == {'version': 2, 'count': MAX_EVENT_ANGEBOTE + 2, 'reload': True}
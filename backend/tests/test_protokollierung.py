@@ -0,0 +1,75 @@
+import json
+import logging
+import queue
+
+import pytest
+
+import protokollierung
+from protokollierung import NichtBlockierenderQueueHandler, SamplingFilter, setup_logging, stop_logging
+
+
+@pytest.fixture
+def log_datei(tmp_path):
+    root = logging.getLogger()
+    handler, level = list(root.handlers), root.level
+    datei = tmp_path / 'backend.{pid}.log'
+    yield lambda: setup_logging(datei=str(datei), level='DEBUG'), tmp_path
+    stop_logging()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    for h in handler:
+        root.addHandler(h)
+    root.setLevel(level)
+
+
+def _zeilen(tmp_path):
+    (pfad,) = tmp_path.glob('backend.*.log')
+    return [json.loads(z) for z in pfad.read_text(encoding='utf-8').splitlines()]
+
+
+def test_json_zeilen_mit_traceback(log_datei):
+    starten, tmp_path = log_datei
+    starten()
+    logger = logging.getLogger('test.protokoll')
+    logger.info('Sync %s fertig', 'shop', extra={'account': 'shop'})
+    try:
+        raise ValueError('kaputt')
+    except ValueError:
+        logger.exception('boom')
+    stop_logging()
+
+    info, fehler = _zeilen(tmp_path)
+    assert info['msg'] == 'Sync shop fertig'
+    assert info['account'] == 'shop'
+    assert 'exc' not in info
+    assert fehler['msg'] == 'boom'
+    assert fehler['level'] == 'ERROR'
+    assert 'ValueError: kaputt' in fehler['exc']
+    assert fehler['exc'].startswith('Traceback')
+
+
+def test_dateiname_je_prozess(log_datei):
+    starten, tmp_path = log_datei
+    starten()
+    logging.getLogger('test.protokoll').warning('hallo')
+    stop_logging()
+    assert [p.name for p in tmp_path.glob('backend.*.log')] == [f'backend.{protokollierung.os.getpid()}.log']
+
+
+def test_volle_queue_verwirft():
+    handler = NichtBlockierenderQueueHandler(queue.Queue(maxsize=1))
+    for i in range(3):
+        handler.handle(logging.LogRecord('x', logging.INFO, __file__, 1, 'nachricht %d', (i,), None))
+    assert handler.verworfen == 2
+    assert handler.queue.get_nowait().msg == 'nachricht 0'
+
+
+def test_sampling():
+    filter_ = SamplingFilter(0.25)
+    records = [logging.LogRecord('api', logging.DEBUG, __file__, 1, 'call', (), None) for _ in range(8)]
+    for record in records:
+        record.sample = True
+    durch = [r for r in records if filter_.filter(r)]
+    assert len(durch) == 2
+    assert durch[0].sample_rate == 0.25
+    assert filter_.filter(logging.LogRecord('api', logging.INFO, __file__, 1, 'ohne sample', (), None))
@@ -0,0 +1,90 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from token_backend.refresh_scheduler import TokenRefreshScheduler
+
+
+def _token(name, laeuft_ab_in=None, **felder):
+    token = {'name': name, 'refresh_token': 'rt', **felder}
+    if laeuft_ab_in is not None:
+        token['expires_at'] = (datetime.now() + timedelta(seconds=laeuft_ab_in)).isoformat()
+    return token
+
+
+def test_faellige_accounts():
+    tokens = [
+        _token('bald', laeuft_ab_in=60),
+        _token('spaeter', laeuft_ab_in=3600),
+        _token('unbekannt'),
+        {'name': 'ohne_refresh', 'access_token': 'x'},
+        _token('alter_refresh', last_refresh=(datetime.now() - timedelta(hours=2)).isoformat()),
+    ]
+    scheduler = TokenRefreshScheduler(lambda: tokens, None, vorlauf_sekunden=300)
+    assert scheduler.faellige_accounts() == ['bald', 'unbekannt', 'alter_refresh']
+
+
+def test_single_flight():
+    frei = threading.Event()
+    aufrufe = []
+
+    def refresh(name):
+        aufrufe.append(name)
+        frei.wait(5)
+        return {'success': True, 'access_token': 'neu'}
+
+    scheduler = TokenRefreshScheduler(lambda: [], refresh)
+    ergebnisse = []
+    threads = [threading.Thread(target=lambda: ergebnisse.append(scheduler.refresh('konto'))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while not aufrufe:
+        time.sleep(0.01)
+    assert scheduler.get_status()['refreshing'] == ['konto']
+    frei.set()
+    for t in threads:
+        t.join()
+
+    assert aufrufe == ['konto']
+    assert ergebnisse == [{'success': True, 'access_token': 'neu'}] * 5
+    assert scheduler.get_status()['accounts']['konto']['refresh_count'] == 1
+
+
+def test_backoff_nach_fehlschlaegen():
+    tokens = [_token('konto', laeuft_ab_in=0)]
+    scheduler = TokenRefreshScheduler(lambda: tokens, lambda name: {'success': False, 'error': 'HTTP 400'},
+                                      intervall_sekunden=30, max_wartezeit_sekunden=100, max_fehlversuche=4)
+    jetzt = datetime.now()
+
+    wartezeiten = []
+    for _ in range(3):
+        assert scheduler.faellige_accounts(jetzt) == ['konto']
+        vorher = datetime.now()
+        scheduler.refresh('konto')
+        naechster = scheduler.get_status()['accounts']['konto']['next_attempt']
+        naechster = datetime.fromisoformat(naechster)
+        wartezeiten.append(round((naechster - vorher).total_seconds()))
+        assert scheduler.faellige_accounts(naechster - timedelta(seconds=1)) == []
+        jetzt = naechster
+    # Verdoppelt sich ab dem Prüfintervall, höchstens max_wartezeit_sekunden
+    assert wartezeiten == [30, 60, 100]
+
+    scheduler.refresh('konto')
+    status = scheduler.get_status()['accounts']['konto']
+    assert status['consecutive_failures'] == 4 and status['suspended']
+    # Dauerhaft ausgesetzt, solange refresh_error gesetzt ist
+    tokens[0]['refresh_error'] = 'HTTP 400'
+    assert scheduler.faellige_accounts(jetzt + timedelta(days=1)) == []
+    # Neu autorisiert (refresh_error entfernt): wieder fällig
+    del tokens[0]['refresh_error']
+    assert scheduler.faellige_accounts(jetzt + timedelta(days=1)) == ['konto']
+
+
+def test_erfolg_setzt_backoff_zurueck():
+    ergebnisse = iter([{'success': False, 'error': 'x'}, {'success': True}])
+    scheduler = TokenRefreshScheduler(lambda: [_token('konto', laeuft_ab_in=0)], lambda name: next(ergebnisse))
+    scheduler.refresh('konto')
+    assert scheduler.faellige_accounts() == []
+    scheduler.refresh('konto')
+    assert scheduler.faellige_accounts() == ['konto']
+    assert scheduler.get_status()['accounts']['konto']['error_count'] == 1
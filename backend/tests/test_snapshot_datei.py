@@ -0,0 +1,87 @@
+import io
+import json
+
+import pytest
+
+from angebote import snapshot_datei
+from angebote.offer_store import OfferStore
+
+ANGEBOTE = [
+    {'id': 'a1', 'best_offer_id': '501', 'item_id': '1', 'buyer_username': 'max', 'offer_amount': 45.5,
+     'list_price': 59.0, 'status': 'pending', 'item_title': 'Buch – Äpfel & Birnen'},
+    {'id': 'a2', 'best_offer_id': '502', 'item_id': '2', 'buyer_username': 'eva', 'offer_amount': 10.0,
+     'status': 'accepted', 'ai_recommendation': {'recommendation': 'Akzeptieren'}},
+]
+
+
+@pytest.mark.parametrize('dateiname', ['offers.ndjson', 'offers.ndjson.gz'])
+def test_rundreise(tmp_path, dateiname):
+    pfad = tmp_path / dateiname
+    with snapshot_datei.SnapshotWriter(str(pfad), source='test', metadata={'account': 'shop'}) as writer:
+        writer.schreibe_viele(ANGEBOTE)
+        writer.ende.update({'accepted': 1})
+
+    with snapshot_datei.lese_snapshot(str(pfad)) as leser:
+        assert leser.header['format'] == snapshot_datei.FORMAT
+        assert leser.header['source'] == 'test'
+        assert list(leser) == ANGEBOTE
+    assert leser.ende['total_offers'] == 2
+    assert leser.metadata == {'account': 'shop', 'accepted': 1}
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_rundreise_ueber_store(tmp_path):
+    store = OfferStore()
+    store.upsert_many(ANGEBOTE, account='shop')
+    pfad = str(tmp_path / 'store.ndjson')
+    assert snapshot_datei.schreibe_snapshot(pfad, store.iter_datensaetze()) == 2
+
+    kopie = OfferStore()
+    for batch in snapshot_datei.in_batches(snapshot_datei.lese_snapshot(pfad), 1):
+        kopie.upsert_many(batch)
+    assert sorted(kopie.alle(), key=lambda o: o['id']) == sorted(store.alle(), key=lambda o: o['id'])
+
+
+def test_abgebrochenes_schreiben_laesst_ziel_unveraendert(tmp_path):
+    pfad = str(tmp_path / 'offers.ndjson')
+    snapshot_datei.schreibe_snapshot(pfad, ANGEBOTE[:1])
+    with pytest.raises(RuntimeError):
+        with snapshot_datei.SnapshotWriter(pfad) as writer:
+            writer.schreibe(ANGEBOTE[1])
+            raise RuntimeError('abgebrochen')
+    assert list(snapshot_datei.lese_snapshot(pfad)) == ANGEBOTE[:1]
+
+
+def test_fehlender_abschluss():
+    text = snapshot_datei.header_zeile() + snapshot_datei.angebots_zeile(ANGEBOTE[0])
+    leser = snapshot_datei.lese_snapshot(io.StringIO(text))
+    assert list(leser) == ANGEBOTE[:1]
+    assert leser.ende is None
+
+
+@pytest.mark.parametrize('zeile, meldung', [
+    ('{"id": "a3", ', 'Zeile 3: ungültiges JSON'),
+    ('["a3"]', 'Zeile 3: kein JSON-Objekt'),
+    ('42', 'Zeile 3: kein JSON-Objekt'),
+])
+def test_kaputte_datensaetze(zeile, meldung):
+    text = snapshot_datei.header_zeile() + snapshot_datei.angebots_zeile(ANGEBOTE[0]) + zeile + '\n'
+    leser = snapshot_datei.lese_snapshot(io.StringIO(text))
+    with pytest.raises(ValueError, match=meldung):
+        list(leser)
+
+
+def test_alte_json_datei(tmp_path):
+    pfad = tmp_path / 'offers.json'
+    pfad.write_text(json.dumps({'offers': ANGEBOTE, 'metadata': {'quelle': 'alt'}}, indent=2), encoding='utf-8')
+    leser = snapshot_datei.lese_snapshot(str(pfad))
+    assert leser.legacy
+    assert list(leser) == ANGEBOTE
+    assert leser.metadata == {'quelle': 'alt'}
+
+    pfad.write_text(json.dumps({'offers': [ANGEBOTE[0], 'kaputt']}), encoding='utf-8')
+    with pytest.raises(ValueError, match='Angebot 2: kein JSON-Objekt'):
+        list(snapshot_datei.lese_snapshot(str(pfad)))
+    pfad.write_text(json.dumps({'offers': {}}), encoding='utf-8')
+    with pytest.raises(ValueError, match='Kein Snapshot'):
+        snapshot_datei.lese_snapshot(str(pfad))
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from angebote.event_stream import EventStream
+from angebote.sync_jobs import SyncJobEngine
+
+
+class _Orchestrator:
+    """Zwei Accounts; der Sync von 'a' hängt bis zur Freigabe"""
+
+    def __init__(self):
+        self.frei = threading.Event()
+        self.gestartet = threading.Event()
+        self.synchronisiert = []
+
+    def lade_tokens(self):
+        return [{'name': 'a', 'access_token': 't'}, {'name': 'b', 'access_token': 't'}]
+
+    def sync_account(self, account, fortschritt=None, abbruch=None):
+        self.synchronisiert.append(account['name'])
+        self.gestartet.set()
+        self.frei.wait(5)
+        return {'success': True, 'cancelled': False, 'pages': 1, 'offers_found': 0, 'new_offers': 0}
+
+
+class _Protokoll:
+    def __init__(self):
+        self.eintraege = []
+
+    def log(self, typ, text, **felder):
+        self.eintraege.append((typ, felder))
+
+
+def _warte_bis_fertig(engine):
+    frist = time.monotonic() + 5
+    while engine.get_status()['active'] and time.monotonic() < frist:
+        time.sleep(0.01)
+
+
+def test_abbruch_vor_dem_start():
+    orchestrator = _Orchestrator()
+    events = EventStream()
+    protokoll = _Protokoll()
+    engine = SyncJobEngine(orchestrator, max_workers=1, events=events, aktions_log=protokoll)
+    try:
+        engine.start()
+        assert orchestrator.gestartet.wait(5)
+        assert {j['account']: j['state'] for j in engine.get_status()['jobs']} == {'a': 'running', 'b': 'queued'}
+
+        assert engine.stop('b') == 1
+        orchestrator.frei.set()
+        _warte_bis_fertig(engine)
+    finally:
+        orchestrator.frei.set()
+        engine.shutdown()
+
+    jobs = {j['account']: j for j in engine.get_status()['jobs']}
+    assert jobs['a']['state'] == 'done'
+    assert jobs['b']['state'] == 'cancelled'
+    assert jobs['b']['finished_at'] is not None
+    assert orchestrator.synchronisiert == ['a']
+    assert [(typ, f['account'], f['state']) for typ, f in protokoll.eintraege] == [
+        ('sync_completed', 'a', 'done'), ('sync_completed', 'b', 'cancelled')]
+    letzter_sync = [data for _, typ, data in events.since(0)[0] if typ == 'sync'][-1]
+    assert not letzter_sync['active']
+
+
+def test_shutdown_beendet_wartende_jobs():
+    orchestrator = _Orchestrator()
+    protokoll = _Protokoll()
+    engine = SyncJobEngine(orchestrator, max_workers=1, aktions_log=protokoll)
+    engine.start()
+    assert orchestrator.gestartet.wait(5)
+    threading.Timer(0.05, orchestrator.frei.set).start()
+
+    assert engine.shutdown() == 1
+
+    jobs = {j['account']: j for j in engine.get_status()['jobs']}
+    assert jobs['b']['state'] == 'cancelled'
+    assert not engine.get_status()['active']
+    assert orchestrator.synchronisiert == ['a']
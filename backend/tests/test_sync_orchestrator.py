@@ -0,0 +1,30 @@
+from angebote.offer_store import OfferStore
+from angebote.sync_orchestrator import SyncOrchestrator
+
+
+class _Client:
+    def __init__(self, fehler=None):
+        self.fehler = fehler
+
+    def get_all_best_offers_direct(self, limit, offset):
+        if self.fehler:
+            raise self.fehler
+        return {'success': True, 'offers': [{'id': 1, 'best_offer_id': 'BO1', 'status': 'pending'}],
+                'total_available': 1}
+
+
+def test_fehler_liefert_gleiche_form(monkeypatch):
+    accounts = [{'name': 'gut', 'access_token': 't'}, {'name': 'kaputt', 'access_token': 't'}]
+    orchestrator = SyncOrchestrator(lambda: accounts, OfferStore())
+    clients = {'gut': _Client(), 'kaputt': _Client(ConnectionError('Verbindung abgebrochen'))}
+    monkeypatch.setattr(orchestrator, 'client_fuer', lambda account: clients[account['name']])
+
+    ergebnis = orchestrator.sync_all()
+
+    gut, kaputt = ergebnis['accounts']
+    assert gut['success'] and not kaputt['success']
+    assert kaputt['message'] == 'Verbindung abgebrochen'
+    assert set(kaputt) == set(gut)
+    assert kaputt['cancelled'] is False
+    assert kaputt['trace_id'] == gut['trace_id'] == ergebnis['trace_id'] is not None
+    assert ergebnis['new_offers'] == 1 and not ergebnis['success']
@@ -0,0 +1,66 @@
+import json
+import threading
+
+import pytest
+
+from token_backend.token_datei import TokenDatei
+
+
+@pytest.fixture
+def datei(tmp_path):
+    datei = TokenDatei(str(tmp_path / 'tokens.json'))
+    datei.speichere([{'name': f'konto{i}', 'access_token': 'alt', 'active': i == 0} for i in range(4)])
+    return datei
+
+
+def test_ohne_datei_leere_liste(tmp_path):
+    assert TokenDatei(str(tmp_path / 'fehlt.json')).lade() == []
+
+
+def test_gleichzeitige_aenderungen_gehen_nicht_verloren(datei):
+    fehler = []
+
+    def refresh(name):
+        for i in range(50):
+            datei.aktualisiere(name, access_token=f'{name}-{i}', refresh_token=f'rt-{i}')
+
+    def umschalten():
+        for i in range(50):
+            with datei.bearbeiten() as tokens:
+                for t in tokens:
+                    t['active'] = t['name'] == f'konto{i % 4}'
+
+    def lesen():
+        for _ in range(200):
+            try:
+                datei.lade()
+            except ValueError as e:
+                fehler.append(e)
+
+    threads = [threading.Thread(target=refresh, args=(f'konto{i}',)) for i in range(4)]
+    threads += [threading.Thread(target=umschalten), threading.Thread(target=lesen)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    tokens = datei.lade()
+    assert fehler == []
+    assert [t['access_token'] for t in tokens] == [f'konto{i}-49' for i in range(4)]
+    assert all(t['refresh_token'] == 'rt-49' for t in tokens)
+    assert [t['active'] for t in tokens] == [False, True, False, False]
+
+
+def test_bearbeiten_mit_fehler_schreibt_nicht(datei):
+    with pytest.raises(RuntimeError):
+        with datei.bearbeiten() as tokens:
+            tokens.clear()
+            raise RuntimeError('abgebrochen')
+    assert len(datei.lade()) == 4
+
+
+def test_atomar_geschrieben(datei, tmp_path):
+    assert datei.aktualisiere('unbekannt', access_token='x') is None
+    assert datei.aktualisiere('konto1', access_token='neu')['access_token'] == 'neu'
+    assert json.loads((tmp_path / 'tokens.json').read_text(encoding='utf-8'))[1]['access_token'] == 'neu'
+    assert not list(tmp_path.glob('*.tmp'))
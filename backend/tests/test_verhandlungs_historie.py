@@ -0,0 +1,102 @@
+from angebote import verhandlungs_historie
+from angebote.offer_store import OfferStore
+from angebote.verhandlungs_historie import VerhandlungsHistorie
+from ki_entscheidung import EntscheidungsPipeline, Regelwerk
+
+
+def _angebot(nummer, item_id='I1', kaeufer='kaeufer1', **felder):
+    return {'id': nummer, 'best_offer_id': f'BO{nummer}', 'item_id': item_id, 'buyer_username': kaeufer,
+            'offer_amount': 50 + nummer, 'list_price': 100, 'status': 'pending',
+            'created_at': f'2030-01-0{nummer}T10:00:00', **felder}
+
+
+def _verhandlung(store):
+    """Käufer bietet, bekommt ein Gegenangebot, antwortet darauf; dazu ein zweiter Artikel"""
+    store.upsert_many([_angebot(1, status='countered', counter_amount=90)], account='shop')
+    store.upsert_many([_angebot(2, offer_type='counter'), _angebot(3, item_id='I2', status='accepted')],
+                      account='shop')
+
+
+def test_verlauf_je_kaeufer_und_artikel(tmp_path):
+    store = OfferStore()
+    historie = VerhandlungsHistorie(str(tmp_path / 'historie.jsonl'), store=store)
+    _verhandlung(store)
+
+    verlauf = historie.verlauf('kaeufer1', 'I1')
+    assert verlauf['rounds'] == 2
+    assert verlauf['counter_offers'] == 1
+    assert (verlauf['last_offer_amount'], verlauf['last_counter_amount']) == (52.0, None)
+    assert verlauf['last_status'] == 'pending' and verlauf['outcome'] is None
+    assert verlauf['first_offer_at'] == '2030-01-01T10:00:00'
+
+    assert [v['item_id'] for v in historie.fuer_kaeufer('kaeufer1')] == ['I1', 'I2']
+    assert historie.fuer_kaeufer('kaeufer1')[1]['outcome'] == 'accepted'
+    assert historie.gegenangebote('kaeufer1', 'I9') == 0
+    assert historie.verlauf('unbekannt', 'I1') is None
+    status = historie.get_status()
+    assert (status['pairs'], status['buyers'], status['offers']) == (2, 1, 3)
+
+
+def test_journal_wieder_eingelesen(tmp_path):
+    pfad = str(tmp_path / 'historie.jsonl')
+    store = OfferStore()
+    historie = VerhandlungsHistorie(pfad, store=store)
+    _verhandlung(store)
+    assert historie.get_status()['journal_lines'] == 3
+    # Unveränderte Angebote erzeugen keine Zeilen
+    store.upsert_many([_angebot(3, item_id='I2', status='accepted')], account='shop')
+    assert historie.get_status()['journal_lines'] == 3
+
+    neu = VerhandlungsHistorie(pfad)
+    assert neu.verlauf('kaeufer1', 'I1') == historie.verlauf('kaeufer1', 'I1')
+    assert neu.gegenangebote('kaeufer1', 'I1') == 1
+
+
+def test_journal_verdichten(tmp_path, monkeypatch):
+    monkeypatch.setattr(verhandlungs_historie, 'VERDICHTEN_AB', 0)
+    pfad = tmp_path / 'historie.jsonl'
+    store = OfferStore()
+    historie = VerhandlungsHistorie(str(pfad), store=store)
+    # Die dritte Zeile zu einem Angebot überschreitet 2 * Einträge: verdichtet auf eine Zeile
+    for status in ('pending', 'countered', 'rejected'):
+        store.upsert_many([_angebot(1, status=status)], account='shop')
+
+    assert historie.get_status()['journal_lines'] == len(pfad.read_text(encoding='utf-8').splitlines()) == 1
+    assert VerhandlungsHistorie(str(pfad)).verlauf('kaeufer1', 'I1')['outcome'] == 'rejected'
+
+
+def test_nur_der_leader_schreibt(tmp_path):
+    pfad = tmp_path / 'historie.jsonl'
+    store = OfferStore()
+    leser = VerhandlungsHistorie(str(pfad), store=store, schreiben=False)
+    _verhandlung(store)
+    assert not pfad.exists()
+    assert leser.gegenangebote('kaeufer1', 'I1') == 1
+
+    assert leser.journal_uebernehmen() == 3
+    assert leser.get_status()['journal_writer']
+    assert VerhandlungsHistorie(str(pfad)).get_status()['offers'] == 3
+    assert leser.journal_uebernehmen() == 0
+
+
+class _Berater:
+    def empfehlungen(self, offers, zeiten):
+        return [{'recommendation': 'Gegenangebot', 'source': 'llm'} for _ in offers]
+
+
+def test_pipeline_nach_ausgeschoepften_gegenangeboten():
+    store = OfferStore()
+    historie = VerhandlungsHistorie(None, store=store)
+    _verhandlung(store)
+    regelwerk = Regelwerk([{'name': 'Standard', 'typ': 'allgemein', 'auto_annahme_prozent': 95,
+                            'auto_ablehnung_prozent': 60, 'max_gegenangebote': 1, 'mindestpreis_prozent': 80}])
+    pipeline = EntscheidungsPipeline(_Berater(), regelwerk=regelwerk, historie=historie)
+
+    ergebnisse = pipeline.entscheide([
+        {'item_id': 'I1', 'buyer_username': 'kaeufer1', 'offer_amount': 82, 'list_price': 100},
+        {'item_id': 'I1', 'buyer_username': 'kaeufer1', 'offer_amount': 70, 'list_price': 100},
+        {'item_id': 'I2', 'buyer_username': 'kaeufer1', 'offer_amount': 70, 'list_price': 100},
+    ])
+    assert [(e['recommendation'], e['source']) for e in ergebnisse] == [
+        ('Akzeptieren', 'threshold'), ('Ablehnen', 'threshold'), ('Gegenangebot', 'llm')]
+    assert ergebnisse[1]['reasoning'] == '1 Gegenangebote ausgeschöpft, 70.0% < Mindestpreis 80% (Standard)'
@@ -0,0 +1,198 @@
+"""
+Proaktiver OAuth-Refresh für alle Accounts in tokens.json
+Erneuert Access Tokens kurz vor Ablauf im Hintergrund, damit kein API-Call
+auf einen abgelaufenen Token trifft.
+"""
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Laufzeit eines eBay Access Tokens, falls tokens.json kein expires_at enthält
+STANDARD_LAUFZEIT_SEKUNDEN = 7200
+
+
+class _Flight:
+    """Ein laufender Refresh, auf den weitere Aufrufer warten können"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class TokenRefreshScheduler:
+    def __init__(self, lade_tokens, refresh_funktion, vorlauf_sekunden=300, intervall_sekunden=30,
+                 max_wartezeit_sekunden=3600, max_fehlversuche=6):
+        """
+        lade_tokens: liefert die Token-Liste (wie in tokens.json)
+        refresh_funktion: führt den OAuth-Refresh für einen Account-Namen aus
+            und gibt ein Ergebnis-Dict mit 'success' zurück
+        vorlauf_sekunden: so lange vor Ablauf wird erneuert
+        max_wartezeit_sekunden: Obergrenze der Wartezeit nach Fehlschlägen
+            (verdoppelt sich ab intervall_sekunden mit jedem Fehlschlag)
+        max_fehlversuche: nach so vielen Fehlschlägen in Folge wird ein Account mit
+            refresh_error nicht mehr automatisch erneuert (bis ein Refresh gelingt
+            oder refresh_error zurückgesetzt wird)
+        """
+        self.lade_tokens = lade_tokens
+        self.refresh_funktion = refresh_funktion
+        self.vorlauf_sekunden = vorlauf_sekunden
+        self.intervall_sekunden = intervall_sekunden
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._stats = {}
+        # name -> (Fehlschläge in Folge, frühester nächster Versuch)
+        self._fehler = {}
+        self.max_wartezeit_sekunden = max_wartezeit_sekunden
+        self.max_fehlversuche = max_fehlversuche
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self, name):
+        """
+        Erneuert den Token eines Accounts. Läuft für denselben Account bereits
+        ein Refresh, wartet der Aufrufer auf dessen Ergebnis (Single-Flight).
+        """
+        with self._lock:
+            flight = self._inflight.get(name)
+            owner = flight is None
+            if owner:
+                flight = _Flight()
+                self._inflight[name] = flight
+
+        if not owner:
+            flight.done.wait()
+            return flight.result
+
+        start = time.perf_counter()
+        try:
+            flight.result = self.refresh_funktion(name)
+        except Exception as e:
+            logger.error(f'Token-Refresh für {name} fehlgeschlagen: {e}')
+            flight.result = {'success': False, 'error': str(e)}
+        finally:
+            self._record(name, time.perf_counter() - start, flight.result)
+            with self._lock:
+                del self._inflight[name]
+            flight.done.set()
+        return flight.result
+
+    def _record(self, name, dauer, result):
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                'refresh_count': 0,
+                'error_count': 0,
+                'last_latency_ms': None,
+                'avg_latency_ms': None,
+                'max_latency_ms': None,
+                'last_refresh': None,
+                'last_error': None
+            })
+            latency_ms = round(dauer * 1000, 1)
+            stats['refresh_count'] += 1
+            stats['last_latency_ms'] = latency_ms
+            stats['max_latency_ms'] = max(stats['max_latency_ms'] or 0, latency_ms)
+            n = stats['refresh_count']
+            stats['avg_latency_ms'] = round(((stats['avg_latency_ms'] or 0) * (n - 1) + latency_ms) / n, 1)
+            stats['last_refresh'] = datetime.now().isoformat()
+            if result and result.get('success'):
+                stats['last_error'] = None
+                self._fehler.pop(name, None)
+            else:
+                stats['error_count'] += 1
+                stats['last_error'] = (result or {}).get('error')
+                anzahl = self._fehler.get(name, (0, None))[0] + 1
+                wartezeit = min(self.intervall_sekunden * 2 ** (anzahl - 1), self.max_wartezeit_sekunden)
+                self._fehler[name] = (anzahl, datetime.now() + timedelta(seconds=wartezeit))
+
+    def _ablauf(self, token):
+        """Ablaufzeitpunkt des Tokens (ohne expires_at: letzter Refresh + Standard-Laufzeit, sonst None)"""
+        if token.get('expires_at'):
+            return datetime.fromisoformat(token['expires_at'])
+        if token.get('last_refresh'):
+            return datetime.fromisoformat(token['last_refresh']) + timedelta(seconds=STANDARD_LAUFZEIT_SEKUNDEN)
+        return None
+
+    def faellige_accounts(self, jetzt=None):
+        """
+        Accounts mit Refresh Token, deren Ablauf unbekannt ist oder im Vorlauf liegt.
+        Nach einem Fehlschlag wird erst nach der Wartezeit erneut versucht; Accounts mit
+        dauerhaftem refresh_error (max_fehlversuche erreicht) werden übersprungen.
+        """
+        jetzt = jetzt or datetime.now()
+        faellig = []
+        for token in self.lade_tokens():
+            name = token['name']
+            if not token.get('refresh_token'):
+                continue
+            with self._lock:
+                fehler = self._fehler.get(name)
+                if fehler is not None and not token.get('refresh_error') and fehler[0] >= self.max_fehlversuche:
+                    # refresh_error wurde außerhalb zurückgesetzt (z.B. neu autorisiert)
+                    del self._fehler[name]
+                    fehler = None
+            if fehler is not None:
+                anzahl, naechster_versuch = fehler
+                if anzahl >= self.max_fehlversuche or jetzt < naechster_versuch:
+                    continue
+            ablauf = self._ablauf(token)
+            if ablauf is None or (ablauf - jetzt).total_seconds() <= self.vorlauf_sekunden:
+                faellig.append(name)
+        return faellig
+
+    def run_once(self):
+        """Erneuert alle fälligen Accounts parallel und wartet auf das Ergebnis"""
+        threads = [
+            threading.Thread(target=self.refresh, args=(name,), name=f'token-refresh-{name}', daemon=True)
+            for name in self.faellige_accounts()
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return len(threads)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f'Token-Refresh-Scheduler Fehler: {e}')
+                self._stop.wait(self.intervall_sekunden)
+
+        self._thread = threading.Thread(target=_loop, name='token-refresh-scheduler', daemon=True)
+        self._thread.start()
+        logger.info('Token-Refresh-Scheduler gestartet')
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get_status(self):
+        with self._lock:
+            accounts = {name: dict(stats) for name, stats in self._stats.items()}
+            inflight = list(self._inflight)
+            fehler = dict(self._fehler)
+        for token in self.lade_tokens():
+            entry = accounts.setdefault(token['name'], {})
+            entry['expires_at'] = token.get('expires_at')
+            entry['has_refresh_token'] = bool(token.get('refresh_token'))
+            anzahl, naechster_versuch = fehler.get(token['name'], (0, None))
+            entry['consecutive_failures'] = anzahl
+            entry['next_attempt'] = naechster_versuch.isoformat() if naechster_versuch else None
+            entry['suspended'] = anzahl >= self.max_fehlversuche
+        return {
+            'running': self._thread is not None,
+            'lead_time_seconds': self.vorlauf_sekunden,
+            'check_interval_seconds': self.intervall_sekunden,
+            'refreshing': inflight,
+            'accounts': accounts
+        }
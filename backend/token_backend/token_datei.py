@@ -0,0 +1,83 @@
+"""
+Zugriff auf tokens.json
+Jede Änderung (Token-Routen, Refresh, Scheduler) liest, ändert und schreibt unter
+derselben Sperre, damit keine Seite die Änderung der anderen überschreibt (z.B.
+einen erneuerten Refresh Token). Geschrieben wird über eine Temp-Datei und
+os.replace: Leser sehen immer eine vollständige Datei und brauchen keine Sperre.
+
+Die Sperre gilt auch zwischen Prozessen (gunicorn-Worker, Dateisperre auf
+<pfad>.lock): ein manueller Refresh in einem Worker und der geplante im Leader
+laufen nacheinander, nicht gegeneinander.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: nur Einzelprozess-Betrieb (waitress), die Thread-Sperre genügt
+    fcntl = None
+
+
+class TokenDatei:
+    def __init__(self, pfad):
+        self.pfad = pfad
+        self._lock = threading.RLock()
+        # Verschachtelungstiefe des sperrenden Threads; die Dateisperre hält nur die äußerste Ebene
+        self._tiefe = 0
+        self._lock_datei = None
+
+    @contextmanager
+    def sperre(self):
+        """Klammert Lesen, Ändern und Schreiben zu einer Operation (reentrant, prozessübergreifend)"""
+        with self._lock:
+            if self._tiefe == 0 and fcntl is not None:
+                self._lock_datei = open(self.pfad + '.lock', 'a')
+                fcntl.flock(self._lock_datei, fcntl.LOCK_EX)
+            self._tiefe += 1
+            try:
+                yield
+            finally:
+                self._tiefe -= 1
+                if self._tiefe == 0 and self._lock_datei is not None:
+                    fcntl.flock(self._lock_datei, fcntl.LOCK_UN)
+                    self._lock_datei.close()
+                    self._lock_datei = None
+
+    def lade(self):
+        try:
+            with open(self.pfad, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def speichere(self, tokens):
+        """Schreibt die Token-Liste atomar (Temp-Datei + os.replace)"""
+        with self.sperre():
+            tmp = f'{self.pfad}.{os.getpid()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(tokens, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.pfad)
+
+    @contextmanager
+    def bearbeiten(self):
+        """
+        Liefert die aktuelle Token-Liste zum Ändern und speichert sie nach dem Block
+        (bei einer Exception bleibt die Datei unverändert).
+        """
+        with self.sperre():
+            tokens = self.lade()
+            yield tokens
+            self.speichere(tokens)
+
+    def aktualisiere(self, name, **felder):
+        """Ändert Felder eines Tokens; gibt den geänderten Token zurück (None, wenn unbekannt)"""
+        with self.sperre():
+            tokens = self.lade()
+            token = next((t for t in tokens if t['name'] == name), None)
+            if token is not None:
+                token.update(felder)
+                self.speichere(tokens)
+            return token
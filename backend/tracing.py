@@ -0,0 +1,292 @@
+"""
+Leichtgewichtiges Tracing für Sync-Läufe
+Ein Lauf (trace) sammelt verschachtelte Spans mit Dauer und Attributen. Fertige Läufe
+werden im Speicher gehalten, als Wasserfall-Bericht ausgegeben und im Chrome-Trace-
+Format exportiert (lädt in chrome://tracing, Perfetto und speedscope).
+Außerhalb eines Laufs kosten Spans nur einen ContextVar-Zugriff.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+# Aktiver Lauf und aktueller Span des laufenden Kontexts
+_lauf = contextvars.ContextVar('tracing_lauf', default=None)
+_span = contextvars.ContextVar('tracing_span', default=None)
+
+
+class Span:
+    __slots__ = ('id', 'name', 'parent', 'start', 'ende', 'attrs', 'thread')
+
+    def __init__(self, name, parent, attrs):
+        self.id = uuid.uuid4().hex[:8]
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.ende = None
+
+    @property
+    def dauer_ms(self):
+        return ((self.ende or time.perf_counter()) - self.start) * 1000
+
+
+class Lauf:
+    """Ein Trace: alle Spans eines Sync-Laufs"""
+    def __init__(self, name, attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.attrs = attrs
+        self.gestartet = datetime.now()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def hinzufuegen(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    @property
+    def wurzel(self):
+        return self.spans[0] if self.spans else None
+
+    def zusammenfassung(self):
+        wurzel = self.wurzel
+        return {
+            'id': self.id,
+            'name': self.name,
+            'attrs': self.attrs,
+            'started_at': self.gestartet.isoformat(),
+            'duration_ms': round(wurzel.dauer_ms, 1) if wurzel else None,
+            'spans': len(self.spans),
+            'self_time_ms': self.eigenzeiten()
+        }
+
+    def eigenzeiten(self):
+        """Eigenzeit (ohne Kind-Spans) je Span-Name – wohin die Zeit ging"""
+        with self._lock:
+            spans = list(self.spans)
+        kinder = defaultdict(float)
+        for span in spans:
+            if span.parent is not None:
+                kinder[span.parent] += span.dauer_ms
+        summe = defaultdict(float)
+        for span in spans:
+            summe[span.name] += max(span.dauer_ms - kinder[span.id], 0.0)
+        return {name: round(ms, 1) for name, ms in sorted(summe.items(), key=lambda e: -e[1])}
+
+    def chrome_trace(self):
+        """Trace-Event-Format (Complete Events, Zeiten in Mikrosekunden)"""
+        with self._lock:
+            spans = list(self.spans)
+        basis = spans[0].start if spans else 0
+        threads = {}
+        events = []
+        for span in spans:
+            tid = threads.setdefault(span.thread, len(threads) + 1)
+            events.append({
+                'name': span.name,
+                'cat': self.name,
+                'ph': 'X',
+                'ts': round((span.start - basis) * 1e6, 1),
+                'dur': round(span.dauer_ms * 1000, 1),
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': {k: v for k, v in span.attrs.items()}
+            })
+        for name, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'trace_id': self.id, 'name': self.name, 'started_at': self.gestartet.isoformat()}}
+
+    def wasserfall(self, breite=60, max_zeilen=500):
+        """Textbericht: ein Span pro Zeile mit Einrückung, Start, Dauer und Balken"""
+        with self._lock:
+            spans = list(self.spans)
+        if not spans:
+            return ''
+        basis = spans[0].start
+        gesamt = max(spans[0].dauer_ms, 0.001)
+        kinder = defaultdict(list)
+        for span in spans:
+            kinder[span.parent].append(span)
+        zeilen = [f'Trace {self.id} {self.name} – {gesamt:.1f} ms, {len(spans)} Spans', '']
+
+        def ausgeben(span, ebene):
+            if len(zeilen) >= max_zeilen:
+                return
+            start_ms = (span.start - basis) * 1000
+            links = int(start_ms / gesamt * breite)
+            laenge = max(1, int(span.dauer_ms / gesamt * breite))
+            balken = ' ' * links + '█' * min(laenge, breite - links)
+            attrs = ' '.join(f'{k}={v}' for k, v in span.attrs.items())
+            titel = ('  ' * ebene + span.name)[:40]
+            zeilen.append(f'{titel:<40} {start_ms:>9.1f} {span.dauer_ms:>9.1f} ms |{balken:<{breite}}| {attrs}')
+            for kind in sorted(kinder[span.id], key=lambda s: s.start):
+                ausgeben(kind, ebene + 1)
+
+        for wurzel in kinder[None]:
+            ausgeben(wurzel, 0)
+        if len(zeilen) >= max_zeilen:
+            zeilen.append(f'... ({len(spans)} Spans insgesamt)')
+        zeilen.append('')
+        zeilen.append('Eigenzeit je Span:')
+        for name, ms in self.eigenzeiten().items():
+            zeilen.append(f'  {name:<38} {ms:>9.1f} ms  {ms / gesamt * 100:5.1f} %')
+        return '\n'.join(zeilen) + '\n'
+
+
+class _KeinSpan:
+    """Platzhalter außerhalb eines Laufs"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_KEIN_SPAN = _KeinSpan()
+
+
+class _SpanKontext:
+    def __init__(self, name, attrs, neuer_lauf=None):
+        self.name = name
+        self.attrs = attrs
+        self.neuer_lauf = neuer_lauf
+
+    def __enter__(self):
+        if self.neuer_lauf is not None:
+            self._lauf_token = _lauf.set(self.neuer_lauf)
+        lauf = _lauf.get()
+        self.span = Span(self.name, _span.get(), self.attrs)
+        lauf.hinzufuegen(self.span)
+        self._span_token = _span.set(self.span.id)
+        return self
+
+    def set(self, **attrs):
+        """Attribute nachträglich setzen (z.B. Anzahl gefundener Angebote)"""
+        self.span.attrs.update(attrs)
+
+    def __exit__(self, typ, wert, tb):
+        self.span.ende = time.perf_counter()
+        if typ is not None:
+            self.span.attrs['error'] = f'{typ.__name__}: {wert}'
+        _span.reset(self._span_token)
+        if self.neuer_lauf is not None:
+            _lauf.reset(self._lauf_token)
+            SPEICHER.ablegen(self.neuer_lauf)
+        return False
+
+
+def span(name, **attrs):
+    """
+    Span im aktiven Lauf, als Kontextmanager oder Dekorator:
+        with tracing.span('xml.parse', bytes=n): ...
+        @tracing.span('ebay.enrich')
+    """
+    return _SpanOderDekorator(name, attrs)
+
+
+class _SpanOderDekorator:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self._kontext = None
+
+    def __enter__(self):
+        if _lauf.get() is None:
+            self._kontext = _KEIN_SPAN
+        else:
+            self._kontext = _SpanKontext(self.name, dict(self.attrs))
+        return self._kontext.__enter__()
+
+    def __exit__(self, *exc):
+        return self._kontext.__exit__(*exc)
+
+    def __call__(self, funktion):
+        name, attrs = self.name, self.attrs
+
+        @functools.wraps(funktion)
+        def wrapper(*args, **kwargs):
+            if _lauf.get() is None:
+                return funktion(*args, **kwargs)
+            with _SpanKontext(name, dict(attrs)):
+                return funktion(*args, **kwargs)
+        return wrapper
+
+
+def trace(name, **attrs):
+    """
+    Startet einen Lauf (Wurzel-Span). Ist bereits ein Lauf aktiv, wird daraus ein
+    normaler Span in diesem Lauf (z.B. ein Account-Sync innerhalb von sync_all).
+    """
+    if _lauf.get() is not None:
+        return _SpanKontext(name, attrs)
+    return _SpanKontext(name, attrs, neuer_lauf=Lauf(name, attrs))
+
+
+def verfolgt(name):
+    """Dekorator: eigener Lauf, wenn keiner aktiv ist – sonst Span im laufenden"""
+    def dekorator(funktion):
+        @functools.wraps(funktion)
+        def wrapper(*args, **kwargs):
+            with trace(name):
+                return funktion(*args, **kwargs)
+        return wrapper
+    return dekorator
+
+
+def aktueller_lauf_id():
+    lauf = _lauf.get()
+    return lauf.id if lauf is not None else None
+
+
+def im_kontext(funktion):
+    """Bindet eine Funktion an den aktuellen Kontext (für Thread-Pools: Kind-Spans hängen am Lauf)"""
+    kontext = contextvars.copy_context()
+    return lambda *args, **kwargs: kontext.copy().run(funktion, *args, **kwargs)
+
+
+class TraceSpeicher:
+    """Hält die letzten Läufe und exportiert sie optional als Datei (TRACE_DIR)"""
+    def __init__(self, max_laeufe=50, verzeichnis=None):
+        self.max_laeufe = max_laeufe
+        self.verzeichnis = verzeichnis
+        self._laeufe = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ablegen(self, lauf):
+        with self._lock:
+            self._laeufe[lauf.id] = lauf
+            while len(self._laeufe) > self.max_laeufe:
+                self._laeufe.popitem(last=False)
+        if self.verzeichnis:
+            self.exportieren(lauf)
+
+    def exportieren(self, lauf, verzeichnis=None):
+        verzeichnis = verzeichnis or self.verzeichnis
+        os.makedirs(verzeichnis, exist_ok=True)
+        pfad = os.path.join(verzeichnis, f"{lauf.gestartet.strftime('%Y%m%d-%H%M%S')}-{lauf.id}.trace.json")
+        with open(pfad, 'w', encoding='utf-8') as f:
+            json.dump(lauf.chrome_trace(), f, ensure_ascii=False, default=str)
+        return pfad
+
+    def get(self, lauf_id):
+        with self._lock:
+            return self._laeufe.get(lauf_id)
+
+    def liste(self):
+        with self._lock:
+            laeufe = list(self._laeufe.values())
+        return [l.zusammenfassung() for l in reversed(laeufe)]
+
+
+SPEICHER = TraceSpeicher(verzeichnis=os.getenv('TRACE_DIR') or None)
@@ -0,0 +1,67 @@
+"""
+Produktiv-Einstiegspunkt für hauptserver.py
+
+    gunicorn -c gunicorn.conf.py wsgi:app      (Linux/macOS, mehrere Worker)
+    python wsgi.py                             (waitress, ein Prozess, z.B. Windows)
+
+Jeder Worker hat einen eigenen OfferStore, der über ein gemeinsames Änderungs-Journal
+(OFFER_SNAPSHOT_FILE, nur geänderte Angebote) mit den anderen abgeglichen wird.
+Hintergrunddienste mit Seiteneffekten (Token-Refresh, Revalidierung) laufen nur im
+Leader-Worker, den eine Dateisperre bestimmt (leader.py). Ein manueller Token-Refresh
+in einem anderen Worker wartet auf die Token-Sperre (token_backend/token_datei.py).
+Sync-Jobs laufen in dem Worker, der sie gestartet hat; Status und Stopp gehen über eine
+gemeinsame Statusdatei (SYNC_STATUS_FILE), damit jeder Worker sie beantworten kann.
+"""
+import atexit
+import os
+import threading
+import logging
+
+from hauptserver import app, offer_store, sync_jobs, starte_hintergrunddienste, stoppe_hintergrunddienste
+from angebote.store_snapshot import StoreSnapshot
+from leader import LeaderLock
+
+logger = logging.getLogger(__name__)
+
+snapshot = StoreSnapshot(
+    offer_store,
+    os.getenv('OFFER_SNAPSHOT_FILE', 'offers_snapshot.ndjson'),
+    intervall_sekunden=float(os.getenv('OFFER_SNAPSHOT_INTERVAL', '2'))
+)
+leader = LeaderLock(os.getenv('LEADER_LOCK_FILE', 'hauptserver.leader.lock'))
+
+_beendet = threading.Event()
+
+
+def starten():
+    snapshot.abgleichen()
+    snapshot.start()
+    sync_jobs.teilen(os.getenv('SYNC_STATUS_FILE', 'sync_jobs_status.json'),
+                     intervall_sekunden=float(os.getenv('SYNC_STATUS_INTERVAL', '1')))
+    leader.bewerben(starte_hintergrunddienste)
+    logger.info(f'Worker {os.getpid()} gestartet (Leader: {leader.ist_leader})')
+
+
+def beenden():
+    """Geordnetes Herunterfahren eines Workers (einmalig, auch bei mehrfachem Aufruf)"""
+    if _beendet.is_set():
+        return
+    _beendet.set()
+    stoppe_hintergrunddienste()
+    snapshot.stop()
+    leader.freigeben()
+    logger.info(f'Worker {os.getpid()} beendet')
+
+
+starten()
+atexit.register(beenden)
+
+
+if __name__ == '__main__':
+    from waitress import serve
+    serve(
+        app,
+        host='0.0.0.0',
+        port=int(os.getenv('PORT', '5002')),
+        threads=int(os.getenv('WEB_THREADS', '16'))
+    )
@@ -46,11 +46,19 @@ function LogsPanel() {
   const [searchTerm, setSearchTerm] = useState('')
   const [actionFilter, setActionFilter] = useState('all')
   const [dateFilter, setDateFilter] = useState('all')
+  const [cursor, setCursor] = useState(null)
 
   useEffect(() => {
     loadLogs()
   }, [])
 
+  // Nur neue Einträge nachladen (Tail ab Cursor) statt das ganze Protokoll
+  useEffect(() => {
+    if (cursor === null) return
+    const interval = setInterval(loadNewLogs, 10000)
+    return () => clearInterval(interval)
+  }, [cursor])
+
   useEffect(() => {
     filterLogs()
   }, [logs, searchTerm, actionFilter, dateFilter])
@@ -64,9 +72,9 @@ function LogsPanel() {
       const logsData = await logsResponse.json()
       
       if (logsData.logs) {
-        // Sortiere nach Datum (neueste zuerst)
-        const sortedLogs = logsData.logs.sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp))
-        setLogs(sortedLogs)
+        // Backend liefert neueste zuerst
+        setLogs(logsData.logs)
+        setCursor(logsData.cursor)
       } else {
         setMessage({ type: 'error', text: 'Keine Logs gefunden' })
       }
@@ -77,6 +85,21 @@ function LogsPanel() {
     }
   }
 
+  const loadNewLogs = async () => {
+    try {
+      const response = await fetch(`/api/logs?after=${cursor}`)
+      const data = await response.json()
+      if (data.logs?.length) {
+        setLogs(prev => [...data.logs.reverse(), ...prev])
+      }
+      if (data.cursor !== undefined && data.cursor !== null) {
+        setCursor(data.cursor)
+      }
+    } catch (err) {
+      // Nächster Versuch beim nächsten Intervall
+    }
+  }
+
   const filterLogs = () => {
     let filtered = [...logs]
 
@@ -180,24 +203,27 @@ function LogsPanel() {
     }).format(price)
   }
 
-  const exportLogs = () => {
-    const csvContent = [
-      ['Zeitstempel', 'Aktion', 'Artikel', 'Käufer', 'Angebotspreis', 'Käufer-Angebot', 'Details'].join(';'),
-      ...filteredLogs.map(log => [
-        formatDate(log.timestamp),
-        log.action,
-        log.offer_title || '',
-        log.buyer_name || '',
-        log.listing_price ? formatPrice(log.listing_price) : '',
-        log.offer_price ? formatPrice(log.offer_price) : '',
-        log.payload || ''
-      ].join(';'))
-    ].join('\n')
+  // Das Backend vergleicht mit lokalen Zeitstempeln ohne Zeitzone: toISOString() (UTC) wäre um den Offset verschoben
+  const lokaleIsoZeit = (datum) => {
+    const zwei = (n) => String(n).padStart(2, '0')
+    return `${datum.getFullYear()}-${zwei(datum.getMonth() + 1)}-${zwei(datum.getDate())}` +
+      `T${zwei(datum.getHours())}:${zwei(datum.getMinutes())}:${zwei(datum.getSeconds())}`
+  }
 
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' })
+  const exportLogs = () => {
+    // CSV wird vom Backend gestreamt (gleiche Filter wie in der Ansicht)
+    const params = new URLSearchParams()
+    if (actionFilter !== 'all') params.set('action', actionFilter)
+    if (searchTerm) params.set('q', searchTerm)
+    if (dateFilter !== 'all') {
+      const from = new Date()
+      if (dateFilter === 'today') from.setHours(0, 0, 0, 0)
+      if (dateFilter === 'week') from.setDate(from.getDate() - 7)
+      if (dateFilter === 'month') from.setMonth(from.getMonth() - 1)
+      params.set('from', lokaleIsoZeit(from))
+    }
     const link = document.createElement('a')
-    link.href = URL.createObjectURL(blob)
-    link.download = `ebay-bot-protokoll-${new Date().toISOString().split('T')[0]}.csv`
+    link.href = `/api/logs/export?${params.toString()}`
     link.click()
   }
 
@@ -282,7 +308,7 @@ function LogsPanel() {
               {filteredLogs.length} von {logs.length} Einträgen
             </div>
             <div className="flex space-x-2">
-              <Button onClick={loadLogs} disabled={isLoading} variant="outline" size="sm">
+              <Button onClick={cursor === null ? loadLogs : loadNewLogs} disabled={isLoading} variant="outline" size="sm">
                 <RefreshCw className={`h-4 w-4 mr-2 ${isLoading ? 'animate-spin' : ''}`} />
                 Aktualisieren
               </Button>
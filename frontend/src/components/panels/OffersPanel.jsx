@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { Button } from '@/components/ui/button.jsx'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card.jsx'
 import { Input } from '@/components/ui/input.jsx'
@@ -36,12 +36,31 @@ import {
   RefreshCw
 } from 'lucide-react'
 
+// Seitengröße beim Laden (Server-Standard von /api/offers)
+const SEITENGROESSE = 100
+
+// Client-seitiger Filter für Gegenvorschläge (zusätzlich zum Server-Filter)
+const hatGegenvorschlag = (offer) =>
+  offer.counter_amount || offer.counter_message || offer.offer_type === 'counter'
+
+// Eindeutiger Schlüssel eines Angebots (die id der Quelle kann sich über Accounts wiederholen)
+const angebotsKey = (offer) => offer.canonical_id ?? offer.id
+
+const passtZumFilter = (offer, filter) => {
+  if (filter === 'all') return true
+  if (filter === 'with_counters') return hatGegenvorschlag(offer)
+  return offer.status === filter
+}
+
 function OffersPanel({ onStatsUpdate }) {
   const [offers, setOffers] = useState([])
   const [selectedOffer, setSelectedOffer] = useState(null)
   const [isLoading, setIsLoading] = useState(false)
   const [message, setMessage] = useState(null)
   const [filter, setFilter] = useState('all')
+  // Keyset-Pagination: Cursor der nächsten Seite (null: alles geladen) und Gesamtzahl
+  const [nextCursor, setNextCursor] = useState(null)
+  const [totalOffers, setTotalOffers] = useState(0)
   const [responseData, setResponseData] = useState({
     action: '',
     counter_price: '',
@@ -51,29 +70,103 @@ function OffersPanel({ onStatsUpdate }) {
   const [batchSyncStatus, setBatchSyncStatus] = useState(null)
   const [isBatchSyncing, setIsBatchSyncing] = useState(false)
   const [showBatchProgress, setShowBatchProgress] = useState(false)
+  // Job-IDs des laufenden Batch-Syncs (null: keiner) und zuletzt empfangener Sync-Status
+  const batchJobsRef = useRef(null)
+  const letzterSyncRef = useRef(null)
+  const filterRef = useRef(filter)
+  const loadOffersRef = useRef(null)
+  const syncStatusRef = useRef(null)
+  // Anzahl der über Seiten geladenen Zeilen; neue Angebote aus dem Stream kommen höchstens
+  // eine Seite darüber hinaus dazu, damit die Liste nicht unbegrenzt wächst
+  const geladenRef = useRef(0)
+  // Zusammenfassen mehrerer reload-Events eines laufenden Syncs zu einem Neuladen
+  const reloadTimerRef = useRef(null)
 
   useEffect(() => {
+    filterRef.current = filter
     loadOffers()
   }, [filter])
 
+  // Eine Verbindung zum Event-Stream für Angebote und Sync-Fortschritt:
+  // geänderte Angebote inkrementell übernehmen statt die komplette Liste neu zu laden
+  useEffect(() => {
+    const source = new EventSource('/api/stream')
+
+    source.addEventListener('offers', (event) => {
+      const { offers: changed, reload } = JSON.parse(event.data)
+      if (reload) {
+        // Großer Batch: der Server schickt keine Angebote mit, die aktuelle Seite wird neu geladen
+        clearTimeout(reloadTimerRef.current)
+        reloadTimerRef.current = setTimeout(() => loadOffersRef.current(), 500)
+        return
+      }
+      const aktuellerFilter = filterRef.current
+      setOffers(current => {
+        // Angezeigte Angebote an Ort und Stelle aktualisieren, neue passende oben einfügen
+        // (neueste zuerst, wie die Server-Sortierung); der Cursor für "Mehr laden" bleibt gültig
+        const position = new Map(current.map((offer, i) => [angebotsKey(offer), i]))
+        const liste = [...current]
+        const neu = []
+        changed.forEach(offer => {
+          if (position.has(angebotsKey(offer))) {
+            liste[position.get(angebotsKey(offer))] = offer
+          } else if (passtZumFilter(offer, aktuellerFilter)) {
+            neu.push(offer)
+          }
+        })
+        const platz = Math.max(geladenRef.current + SEITENGROESSE - liste.length, 0)
+        return neu.length ? [...neu.slice(0, platz), ...liste] : liste
+      })
+    })
+
+    // reset: Cursor zu alt oder von einem anderen Worker-Prozess – Liste und Sync-Status neu übernehmen
+    source.addEventListener('reset', (event) => {
+      loadOffersRef.current()
+      const { sync } = JSON.parse(event.data)
+      if (sync) syncStatusRef.current(sync)
+    })
+
+    // hello kommt bei jedem (Neu-)Verbindungsaufbau mit dem aktuellen Sync-Status,
+    // damit ein Abschluss während eines Verbindungsabbruchs nicht verloren geht
+    source.addEventListener('hello', (event) => {
+      const { sync } = JSON.parse(event.data)
+      if (sync) syncStatusRef.current(sync)
+    })
+
+    source.addEventListener('sync', (event) => syncStatusRef.current(JSON.parse(event.data)))
+
+    source.onerror = () => {
+      // EventSource verbindet sich selbst neu und setzt über Last-Event-ID fort
+      console.error('Verbindung zum Event-Stream unterbrochen')
+    }
+
+    return () => {
+      clearTimeout(reloadTimerRef.current)
+      source.close()
+    }
+  }, [])
+
+  const fetchOffersPage = async (cursor) => {
+    const params = new URLSearchParams({ limit: SEITENGROESSE })
+    if (filter !== 'all') params.set('status', filter)
+    if (cursor) params.set('cursor', cursor)
+    const response = await fetch(`/api/offers?${params}`)
+    return response.json()
+  }
+
   const loadOffers = async () => {
     try {
       setIsLoading(true)
-      const url = filter === 'all' ? '/api/offers' : `/api/offers?status=${filter}`
-      const response = await fetch(url)
-      const data = await response.json()
+      const data = await fetchOffersPage(null)
+      // Filter inzwischen gewechselt: die neuere Anfrage setzt die Liste
+      if (filterRef.current !== filter) return
       
       if (data.offers) {
-        let filteredOffers = data.offers
-        
-        // Zusätzlicher Client-seitiger Filter für Gegenvorschläge
-        if (filter === 'with_counters') {
-          filteredOffers = data.offers.filter(offer => 
-            offer.counter_amount || offer.counter_message || offer.offer_type === 'counter'
-          )
-        }
-        
+        const filteredOffers = filter === 'with_counters' ? data.offers.filter(hatGegenvorschlag) : data.offers
+        geladenRef.current = filteredOffers.length
         setOffers(filteredOffers)
+        setNextCursor(data.next_cursor || null)
+        setTotalOffers(data.total ?? filteredOffers.length)
       } else if (data.error) {
         setMessage({ type: 'error', text: data.error })
       } else {
@@ -85,6 +178,33 @@ function OffersPanel({ onStatsUpdate }) {
       setIsLoading(false)
     }
   }
+  loadOffersRef.current = loadOffers
+
+  const loadMoreOffers = async () => {
+    if (!nextCursor) return
+    try {
+      setIsLoading(true)
+      const data = await fetchOffersPage(nextCursor)
+      if (filterRef.current !== filter) return
+
+      if (data.offers) {
+        const filteredOffers = filter === 'with_counters' ? data.offers.filter(hatGegenvorschlag) : data.offers
+        geladenRef.current += filteredOffers.length
+        setOffers(current => {
+          const vorhanden = new Set(current.map(angebotsKey))
+          return [...current, ...filteredOffers.filter(offer => !vorhanden.has(angebotsKey(offer)))]
+        })
+        setNextCursor(data.next_cursor || null)
+        setTotalOffers(data.total ?? totalOffers)
+      } else if (data.error) {
+        setMessage({ type: 'error', text: data.error })
+      }
+    } catch (err) {
+      setMessage({ type: 'error', text: 'Fehler beim Laden weiterer Angebote' })
+    } finally {
+      setIsLoading(false)
+    }
+  }
 
   const analyzeOffer = async (offerId) => {
     try {
@@ -207,9 +327,11 @@ function OffersPanel({ onStatsUpdate }) {
       const data = await response.json()
       
       if (data.success) {
-        setBatchSyncStatus(data.status)
-        // Starte Polling für Status-Updates
-        pollBatchStatus()
+        // Fortschritt kommt über den Event-Stream; Events vor dieser Antwort nachholen
+        const vorAntwort = letzterSyncRef.current
+        batchJobsRef.current = new Set(data.job_ids)
+        uebernimmSyncStatus(data.status)
+        if (vorAntwort) uebernimmSyncStatus(vorAntwort)
       } else {
         setMessage({ type: 'error', text: `Batch-Sync konnte nicht gestartet werden: ${data.message}` })
         setIsBatchSyncing(false)
@@ -222,44 +344,40 @@ function OffersPanel({ onStatsUpdate }) {
     }
   }
 
-  const pollBatchStatus = async () => {
-    const pollInterval = setInterval(async () => {
-      try {
-        const response = await fetch('/api/offers/sync-batch/status')
-        const data = await response.json()
-        
-        setBatchSyncStatus(data.status)
-        
-        // Prüfe ob Sync abgeschlossen ist
-        if (!data.status.active) {
-          clearInterval(pollInterval)
-          setIsBatchSyncing(false)
-          
-          // Zeige Abschluss-Nachricht
-          if (data.status.found_offers > 0) {
-            setMessage({ 
-              type: 'success', 
-              text: `Batch-Sync abgeschlossen! ${data.status.found_offers} Best Offers gefunden, ${data.status.errors} Fehler`
-            })
-          } else {
-            setMessage({ 
-              type: 'info', 
-              text: `Batch-Sync abgeschlossen. ${data.status.status_message}`
-            })
-          }
-          
-          // Aktualisiere Angebote
-          loadOffers()
-          if (onStatsUpdate) onStatsUpdate()
-          
-          // Verstecke Progress nach 5 Sekunden
-          setTimeout(() => setShowBatchProgress(false), 5000)
-        }
-      } catch (err) {
-        console.error('Fehler beim Abfragen des Batch-Status:', err)
-      }
-    }, 2000) // Alle 2 Sekunden aktualisieren
+  // Fortschritt per Server-Sent Events ('hello' und 'sync') statt Polling
+  const uebernimmSyncStatus = (status) => {
+    letzterSyncRef.current = status
+    const jobIds = batchJobsRef.current
+    if (!jobIds) return
+    // Status von vor dem Start (ohne die gestarteten Jobs) ignorieren
+    const jobs = (status.jobs || []).filter(job => jobIds.has(job.job_id))
+    if (jobs.length < jobIds.size) return
+    setBatchSyncStatus(status)
+
+    // Abgeschlossen, sobald keiner der gestarteten Jobs mehr aktiv ist
+    if (jobs.some(job => job.active)) return
+    batchJobsRef.current = null
+    setIsBatchSyncing(false)
+
+    // Zeige Abschluss-Nachricht
+    if (status.found_offers > 0) {
+      setMessage({ 
+        type: 'success', 
+        text: `Batch-Sync abgeschlossen! ${status.found_offers} Best Offers gefunden, ${status.errors} Fehler`
+      })
+    } else {
+      setMessage({ 
+        type: 'info', 
+        text: `Batch-Sync abgeschlossen. ${status.status_message}`
+      })
+    }
+
+    if (onStatsUpdate) onStatsUpdate()
+
+    // Verstecke Progress nach 5 Sekunden
+    setTimeout(() => setShowBatchProgress(false), 5000)
   }
+  syncStatusRef.current = uebernimmSyncStatus
 
   const stopBatchSync = async () => {
     try {
@@ -498,7 +616,7 @@ function OffersPanel({ onStatsUpdate }) {
               {offers.map((offer) => {
                 const offerDetails = getOfferDetails(offer)
                 return (
-                  <TableRow key={offer.id}>
+                  <TableRow key={angebotsKey(offer)}>
                     <TableCell>
                       <div className="max-w-xs truncate" title={offer.item_title}>
                         {offer.item_title}
@@ -725,6 +843,17 @@ function OffersPanel({ onStatsUpdate }) {
               Keine Angebote gefunden
             </div>
           )}
+
+          {offers.length > 0 && (
+            <div className="flex items-center justify-between pt-4 text-sm text-gray-500">
+              <span>{offers.length} von {Math.max(totalOffers, offers.length)} Angeboten</span>
+              {nextCursor && (
+                <Button onClick={loadMoreOffers} disabled={isLoading} variant="outline" size="sm">
+                  Mehr laden
+                </Button>
+              )}
+            </div>
+          )}
         </CardContent>
       </Card>
     </div>